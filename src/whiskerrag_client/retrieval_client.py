@@ -22,6 +22,18 @@ class RetrievalClient:
         )
         return [RetrievalChunk(**chunk) for chunk in response["data"]]
 
+    async def retrieve_many(
+        self, requests: List[RetrievalRequest]
+    ) -> List[List[RetrievalChunk]]:
+        response = await self.http_client._request(
+            method="POST",
+            endpoint=f"{self.base_path}/retrieve_many",
+            json=[request.model_dump() for request in requests],
+        )
+        return [
+            [RetrievalChunk(**chunk) for chunk in chunks] for chunks in response["data"]
+        ]
+
     async def retrieve_knowledge_content(
         self, request: RetrievalByKnowledgeRequest
     ) -> List[RetrievalChunk]:
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from abc import ABC, abstractmethod
 from typing import Any, AsyncIterator, List, Optional, TypeVar, Union
@@ -187,6 +188,22 @@ class DBPluginInterface(ABC):
     ) -> List[RetrievalChunk]:
         pass
 
+    async def retrieve_many(
+        self,
+        tenant_id: str,
+        params_list: List[RetrievalRequest],
+    ) -> List[List[RetrievalChunk]]:
+        """
+        Retrieve for several requests, one result list per request in input
+        order. Defaults to concurrent ``retrieve`` calls; plugins that can embed
+        and search in one batch should override it.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.retrieve(tenant_id, params) for params in params_list)
+            )
+        )
+
     # =================== task ===================
     @abstractmethod
     async def save_task_list(self, task_list: List[Task]) -> List[Task]:
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Generic, List, TypeVar, Union
+from concurrent.futures import Executor
+from typing import AsyncIterator, Generic, List, Optional, TypeVar, Union
 
 from whiskerrag_types.model.knowledge import Knowledge
 from whiskerrag_types.model.multi_modal import Blob, Image, Text
@@ -19,6 +20,15 @@ class BaseLoader(ABC, Generic[T]):
         """
         pass
 
+    async def iter_load(self, executor: Optional[Executor] = None) -> AsyncIterator[T]:
+        """
+        Load the knowledge item by item, as the pipeline consumes it. Loaders
+        that can produce items incrementally (document pages) override this
+        and may run CPU-heavy extraction on ``executor``. Defaults to ``load``.
+        """
+        for item in await self.load():
+            yield item
+
     @abstractmethod
     async def decompose(self) -> List[Knowledge]:
         """
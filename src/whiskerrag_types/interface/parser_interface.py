@@ -1,15 +1,38 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Generic, List, TypeVar, Union
+from concurrent.futures import Executor
+from typing import Any, Generic, List, Optional, TypeVar, Union
 
 from whiskerrag_types.interface.embed_interface import Image
 from whiskerrag_types.model.knowledge import Knowledge
-from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.multi_modal import Text, TextSlice
 
 ParseResult = List[Union[Image, Text]]
+SliceParseResult = List[Union[Image, TextSlice]]
 ContentType = TypeVar("ContentType")
 
 
+def slices_to_texts(items: SliceParseResult) -> ParseResult:
+    """Materialise the ``TextSlice``s of a parse result into ``Text`` models."""
+    return [item.to_text() if isinstance(item, TextSlice) else item for item in items]
+
+
+def _parse_in_worker(
+    parser: "BaseParser[Any]", knowledge: Knowledge, content: Any, slices: bool
+) -> Union[ParseResult, SliceParseResult]:
+    """Run ``parser.parse`` (or ``parse_slices``) on an executor worker's own loop."""
+    if slices:
+        return asyncio.run(parser.parse_slices(knowledge, content))
+    return asyncio.run(parser.parse(knowledge, content))
+
+
 class BaseParser(Generic[ContentType], ABC):
+    # items of one batch_parse call parsed at the same time
+    batch_concurrency: int = 8
+    # part of parse cache keys: bump when a change alters the chunks produced
+    # from unchanged content and split config
+    cache_version: str = "1"
+
     @abstractmethod
     async def parse(
         self,
@@ -18,8 +41,68 @@ class BaseParser(Generic[ContentType], ABC):
     ) -> ParseResult:
         pass
 
-    @abstractmethod
+    async def parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: ContentType,
+    ) -> SliceParseResult:
+        """
+        ``parse`` with text chunks returned as ``TextSlice``s. The default
+        wraps ``parse``; splitter-based parsers implement this instead and
+        build ``parse`` on it, so their chunks share the content's buffer.
+        """
+        return [
+            TextSlice.from_text(item) if isinstance(item, Text) else item
+            for item in await self.parse(knowledge, content)
+        ]
+
     async def batch_parse(
-        self, knowledge: Knowledge, content: List[ContentType]
+        self,
+        knowledge: Knowledge,
+        content: List[ContentType],
+        max_concurrency: Optional[int] = None,
+        executor: Optional[Executor] = None,
     ) -> List[ParseResult]:
-        pass
+        """
+        Parse every item of ``content``, at most ``max_concurrency`` (default
+        ``batch_concurrency``) at a time, and return the results in input order.
+
+        With an ``executor`` each item is parsed on a worker thread or process
+        so CPU-bound parsing does not block the event loop; for a process pool
+        the parser, knowledge and content must be picklable.
+        """
+        return await self._gather(knowledge, content, max_concurrency, executor, False)
+
+    async def batch_parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: List[ContentType],
+        max_concurrency: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> List[SliceParseResult]:
+        """``batch_parse`` with ``parse_slices``, as used by the ingestion pipeline."""
+        return await self._gather(knowledge, content, max_concurrency, executor, True)
+
+    async def _gather(
+        self,
+        knowledge: Knowledge,
+        content: List[ContentType],
+        max_concurrency: Optional[int],
+        executor: Optional[Executor],
+        slices: bool,
+    ) -> List[Any]:
+        if not content:
+            return []
+        semaphore = asyncio.Semaphore(max_concurrency or self.batch_concurrency)
+        loop = asyncio.get_running_loop()
+        parse = self.parse_slices if slices else self.parse
+
+        async def parse_one(item: ContentType) -> Any:
+            async with semaphore:
+                if executor is None:
+                    return await parse(knowledge, item)
+                return await loop.run_in_executor(
+                    executor, _parse_in_worker, self, knowledge, item, slices
+                )
+
+        return list(await asyncio.gather(*(parse_one(item) for item in content)))
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Generic, List, TypeVar
 
@@ -24,3 +25,17 @@ class BaseRetriever(Generic[T, R], ABC):
             List[R]: A list of retrieval results.
         """
         pass
+
+    async def retrieve_many(
+        self, params_list: List[T], tenant_id: str
+    ) -> List[List[R]]:
+        """
+        Retrieve for several requests at once, one result list per request in
+        input order. The default runs ``retrieve`` concurrently; retrievers
+        that can batch embedding and search should override it.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.retrieve(params, tenant_id) for params in params_list)
+            )
+        )
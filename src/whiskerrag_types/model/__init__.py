@@ -28,6 +28,7 @@ from .knowledge_source import (
     YuqueSourceConfig,
 )
 from .language import LanguageEnum
+from .layered_metadata import LayeredMetadata
 from .page import (
     PageParams,
     PageQueryParams,
@@ -40,7 +41,9 @@ from .retrieval import (
     RetrievalByKnowledgeRequest,
     RetrievalBySpaceRequest,
     RetrievalChunk,
+    RetrievalPostProcessConfig,
     RetrievalRequest,
+    VectorSearchConfig,
 )
 from .rule import GlobalRule, Rule, SpaceRule
 from .space import Space, SpaceCreate, SpaceResponse
@@ -54,6 +57,7 @@ from .splitter import (
     KnowledgeSplitConfig,
     MarkdownSplitConfig,
     PDFSplitConfig,
+    SemanticCodeSplitConfig,
     TextSplitConfig,
     YuqueSplitConfig,
 )
@@ -105,11 +109,14 @@ __all__ = [
     "RetrievalByKnowledgeRequest",
     "RetrievalChunk",
     "RetrievalRequest",
+    "RetrievalPostProcessConfig",
+    "VectorSearchConfig",
     "Task",
     "TaskStatus",
     "TaskRestartRequest",
     "Tenant",
     "GenericConverter",
+    "LayeredMetadata",
     "BaseCharSplitConfig",
     "JSONSplitConfig",
     "MarkdownSplitConfig",
@@ -119,6 +126,7 @@ __all__ = [
     "YuqueSplitConfig",
     "ImageSplitConfig",
     "BaseCodeSplitConfig",
+    "SemanticCodeSplitConfig",
     "GithubRepoParseConfig",
     "Wiki",
     "KNOWLEDGE_CREATE_2_KNOWLEDGE_STRATEGY_MAP",
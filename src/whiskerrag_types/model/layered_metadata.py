@@ -0,0 +1,143 @@
+"""
+Copy-on-write metadata for parse results and chunks.
+
+Every chunk of a knowledge used to carry its own copy of the knowledge
+metadata merged with the loader's metadata, copied again by each pipeline
+stage. ``LayeredMetadata`` is a mutable mapping made of a small private
+overlay (what this chunk sets or deletes) over read-only layers shared with
+every other chunk of the same knowledge, so the shared part is stored once.
+It stays inside the parse pipeline: it is turned into a plain ``dict`` where
+``Text`` and ``Chunk`` models are built, so models only ever hold dicts.
+
+Shared layers are never written to; values inside them are shared too, so
+nested values (lists, dicts) must be replaced, not mutated in place.
+"""
+
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+
+class LayeredMetadata(MutableMapping[str, Any]):
+    """
+    A private ``overlay`` over shared ``layers``, highest priority first.
+    Reads fall through the overlay to the layers; writes and deletes only
+    touch the overlay (deleting a key of a shared layer hides it).
+    Iteration order matches ``{**layers[-1], ..., **layers[0], **overlay}``.
+    """
+
+    __slots__ = ("_overlay", "_layers", "_hidden")
+
+    def __init__(
+        self, overlay: Optional[Dict[str, Any]] = None, *layers: Mapping[str, Any]
+    ) -> None:
+        self._overlay: Dict[str, Any] = {} if overlay is None else overlay
+        self._layers: Tuple[Mapping[str, Any], ...] = layers
+        self._hidden: Optional[Set[str]] = None
+
+    @classmethod
+    def stack(cls, *mappings: Optional[Mapping[str, Any]]) -> "LayeredMetadata":
+        """
+        Metadata reading through ``mappings``, highest priority first, without
+        copying them. Build it once per knowledge (or content item) and
+        ``derive`` each chunk's metadata from it.
+        """
+        layers: List[Mapping[str, Any]] = []
+        for mapping in mappings:
+            if not mapping:
+                continue
+            if isinstance(mapping, LayeredMetadata):
+                if mapping._hidden:
+                    layers.append(mapping.to_dict())
+                    continue
+                # the overlay stays private to its owner, so take a snapshot
+                if mapping._overlay:
+                    layers.append(dict(mapping._overlay))
+                layers.extend(mapping._layers)
+            else:
+                layers.append(mapping)
+        return cls(None, *layers)
+
+    def derive(self, overlay: Optional[Mapping[str, Any]] = None) -> "LayeredMetadata":
+        """New metadata sharing this one's layers, with ``overlay`` on top."""
+        child = LayeredMetadata({**self._overlay, **(overlay or {})}, *self._layers)
+        if self._hidden:
+            child._hidden = self._hidden - child._overlay.keys()
+        return child
+
+    def copy(self) -> "LayeredMetadata":
+        return self.derive()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialise into a plain ``dict``."""
+        result: Dict[str, Any] = {}
+        for layer in reversed(self._layers):
+            result.update(layer)
+        if self._hidden:
+            for key in self._hidden:
+                result.pop(key, None)
+        result.update(self._overlay)
+        return result
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._overlay:
+            return self._overlay[key]
+        if not self._hidden or key not in self._hidden:
+            for layer in self._layers:
+                if key in layer:
+                    return layer[key]
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._overlay:
+            return True
+        if self._hidden and key in self._hidden:
+            return False
+        return any(key in layer for layer in self._layers)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._overlay[key] = value
+        if self._hidden:
+            self._hidden.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._overlay.pop(key, None)
+        if any(key in layer for layer in self._layers):
+            if self._hidden is None:
+                self._hidden = set()
+            self._hidden.add(key)
+
+    def __iter__(self) -> Iterator[str]:
+        seen: Set[str] = set()
+        hidden = self._hidden or set()
+        for layer in reversed(self._layers):
+            for key in layer:
+                if key not in seen and key not in hidden:
+                    seen.add(key)
+                    yield key
+        for key in self._overlay:
+            if key not in seen:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"LayeredMetadata({self.to_dict()!r})"
+
+
+# metadata of a chunk inside the parse pipeline; models only hold plain dicts
+ChunkMetadata = Union[Dict[str, Any], LayeredMetadata]
+
+__all__ = ["LayeredMetadata", "ChunkMetadata"]
@@ -3,6 +3,8 @@ from typing import Optional
 from langchain_core.documents.base import Blob
 from pydantic import BaseModel, HttpUrl
 
+from .layered_metadata import ChunkMetadata, LayeredMetadata
+
 
 class Image(BaseModel):
     url: Optional[HttpUrl] = None
@@ -15,4 +17,52 @@ class Text(BaseModel):
     metadata: dict
 
 
-__all__ = ["Image", "Text", "Blob"]
+class TextSlice:
+    """
+    A text chunk that refers to ``source[start:end]`` instead of holding a
+    copy, for use inside the parse pipeline. Chunks cut from one document,
+    overlapping ones included, share its buffer; the chunk text is sliced
+    out only when ``content`` is read, and ``to_text`` builds the ``Text``
+    model at the output boundary.
+    """
+
+    __slots__ = ("source", "start", "end", "metadata")
+
+    def __init__(
+        self,
+        source: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        metadata: Optional[ChunkMetadata] = None,
+    ) -> None:
+        self.source = source
+        self.start = start
+        self.end = len(source) if end is None else end
+        self.metadata: ChunkMetadata = {} if metadata is None else metadata
+
+    @classmethod
+    def from_text(cls, text: Text) -> "TextSlice":
+        return cls(text.content, 0, len(text.content), text.metadata)
+
+    @property
+    def content(self) -> str:
+        # slicing the whole string returns the string itself, not a copy
+        return self.source[self.start : self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def to_text(self) -> Text:
+        metadata = self.metadata
+        if isinstance(metadata, LayeredMetadata):
+            metadata = metadata.to_dict()
+        return Text(content=self.content, metadata=metadata)
+
+    def __repr__(self) -> str:
+        return (
+            f"TextSlice(start={self.start}, end={self.end}, "
+            f"content={self.content[:40]!r}, metadata={self.metadata!r})"
+        )
+
+
+__all__ = ["Image", "Text", "TextSlice", "Blob"]
@@ -5,6 +5,7 @@ from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_valid
 
 from whiskerrag_types.model.chunk import Chunk
 from whiskerrag_types.model.knowledge import EmbeddingModelEnum
+from whiskerrag_types.model.page import FilterGroup
 
 
 @deprecated("RetrievalConfig is deprecated, please use RetrievalRequest instead.")
@@ -50,14 +51,73 @@ class RetrievalByKnowledgeRequest(RetrievalBaseConfig):
     knowledge_id_list: List[str] = Field(..., description="knowledge id list")
 
 
+class RetrievalPostProcessConfig(BaseModel):
+    """Optional post-processing applied to retrieved chunks."""
+
+    mmr: bool = Field(
+        default=False,
+        description="Re-rank with Maximal Marginal Relevance to drop near-duplicates.",
+    )
+    mmr_lambda: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="MMR trade-off: 1.0 is pure relevance, 0.0 is pure diversity.",
+    )
+    mmr_fetch_k: int = Field(
+        default=50,
+        ge=1,
+        description="Number of candidates fetched for MMR before keeping top_k.",
+    )
+    merge_adjacent: bool = Field(
+        default=False,
+        description="Merge chunks of the same knowledge and page with consecutive _idx.",
+    )
+    merge_token_budget: int = Field(
+        default=1024,
+        ge=1,
+        description="Maximum estimated tokens of a merged chunk.",
+    )
+
+
 class RetrievalConfig(BaseModel):
     type: str = Field(
         ...,
         description="The retrieval type. Each retrieval type corresponds to a specific retriever.",
     )
+    post_process: Optional[RetrievalPostProcessConfig] = Field(
+        default=None,
+        description="MMR diversification and adjacent-chunk merging of the results.",
+    )
     model_config = ConfigDict(extra="allow")
 
 
+class VectorSearchConfig(RetrievalConfig):
+    """
+    Common options understood by the in-process vector index retrievers.
+    A plain RetrievalConfig carrying the same extra fields can be converted with
+    ``VectorSearchConfig.model_validate(config.model_dump())``.
+    """
+
+    type: str = Field(default="vector_index", description="The retrieval type.")
+    top_k: int = Field(default=10, ge=1, description="The maximum number of results.")
+    similarity_threshold: float = Field(
+        default=0.0,
+        ge=-1.0,
+        le=1.0,
+        description="Minimum cosine similarity of a returned chunk.",
+    )
+    space_id_list: Optional[List[str]] = Field(
+        default=None, description="Only search chunks of these spaces."
+    )
+    knowledge_id_list: Optional[List[str]] = Field(
+        default=None, description="Only search chunks of these knowledge items."
+    )
+    metadata_filter: Optional[FilterGroup] = Field(
+        default=None, description="Filter on chunk fields, e.g. tags or f1-f5."
+    )
+
+
 class RetrievalRequest(BaseModel):
     content: str = Field(
         ...,
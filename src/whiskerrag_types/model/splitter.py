@@ -14,6 +14,11 @@ class BaseSplitConfig(BaseModel):
         ge=0,
         description="chunk overlap size, must be less than chunk_size",
     )
+    length_function: Literal["characters", "tokens"] = Field(
+        default="characters",
+        description="""Unit of chunk_size and chunk_overlap: characters, or tokens of the
+                knowledge's embedding model (estimated when its tokenizer is unavailable)""",
+    )
 
     @model_validator(mode="after")
     def validate_config(self) -> "BaseSplitConfig":
@@ -108,6 +113,18 @@ class JSONSplitConfig(BaseModel):
         description="""The minimum size for a chunk. If None,
                 defaults to the maximum chunk size minus 200, with a lower bound of 50.""",
     )
+    mode: Literal["document", "stream", "jsonl"] = Field(
+        default="document",
+        description="""How to read the content. "document" loads the whole JSON and
+                splits it recursively; "stream" walks arrays and objects incrementally,
+                keeping memory bounded by the chunk size; "jsonl" reads one JSON record
+                per line.""",
+    )
+    group_records: bool = Field(
+        default=False,
+        description="""In "jsonl" mode, pack consecutive records into one chunk up to
+                max_chunk_size instead of emitting one chunk per record.""",
+    )
 
 
 class YuqueSplitConfig(BaseSplitConfig):
@@ -155,7 +172,7 @@ class GithubRepoParseConfig(BaseSplitConfig):
     )
 
 
-class BaseCodeSplitConfig(BaseModel):
+class BaseCodeSplitConfig(BaseSplitConfig):
     """
     Code document split configuration
     """
@@ -173,6 +190,25 @@ class BaseCodeSplitConfig(BaseModel):
     )
 
 
+class SemanticCodeSplitConfig(BaseSplitConfig):
+    """
+    Code split configuration that cuts at class and function boundaries
+    """
+
+    type: Literal["semantic_code"] = "semantic_code"
+    language: Language = Field(
+        ...,
+        description="""The programming language of the code.""",
+    )
+    chunk_size: int = Field(default=1500, ge=1, description="chunk max size for code")
+    chunk_overlap: int = Field(
+        default=0,
+        ge=0,
+        description="""chunk overlap size, only used when a single function or
+                statement is larger than chunk_size and has to be split""",
+    )
+
+
 class ImageSplitConfig(BaseModel):
     type: Literal["image"] = "image"
 
@@ -187,5 +223,6 @@ KnowledgeSplitConfig = Union[
     GeaGraphSplitConfig,
     GithubRepoParseConfig,
     BaseCodeSplitConfig,
+    SemanticCodeSplitConfig,
     ImageSplitConfig,
 ]
@@ -1,12 +1,18 @@
 import asyncio
 import logging
 import uuid
-from typing import Any, Dict, List, Optional, Tuple, TypedDict, Union
+from concurrent.futures import Executor
+from typing import Any, List, Optional, Tuple, TypedDict, Union
 
+from whiskerrag_types.interface.loader_interface import BaseLoader
+from whiskerrag_types.interface.parser_interface import BaseParser, SliceParseResult
 from whiskerrag_types.model.chunk import Chunk
 from whiskerrag_types.model.knowledge import Knowledge, KnowledgeTypeEnum
-from whiskerrag_types.model.multi_modal import Image, Text
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Image, Text, TextSlice
 
+from .parser.dedup import ChunkDeduplicator, reused_embeddings
+from .parser.parse_cache import ParseCache
 from .registry import (
     RegisterTypeEnum,
     get_all_registered_with_metadata,
@@ -27,17 +33,18 @@ class DiffResult(TypedDict):
 
 
 def _process_metadata_and_tags(
-    knowledge: Knowledge, parse_item: Union[Text, Image]
-) -> Tuple[Dict[str, Any], List[str]]:
+    knowledge: Knowledge, parse_item: Union[Text, TextSlice, Image]
+) -> Tuple[LayeredMetadata, List[str]]:
     """
     Process metadata and tags for a parse item.
     Args:
         knowledge: The knowledge object.
-        parse_item: The parse item (Text or Image).
+        parse_item: The parse item (Text, TextSlice or Image).
     Returns:
-        A tuple of (combined_metadata, tags).
+        A tuple of (combined_metadata, tags). The metadata shares the item's
+        and the knowledge's metadata rather than copying them per chunk.
     """
-    combined_metadata = {**knowledge.metadata, **parse_item.metadata}
+    combined_metadata = LayeredMetadata.stack(parse_item.metadata, knowledge.metadata)
     combined_metadata["_knowledge_type"] = knowledge.knowledge_type
     combined_metadata["_reference_url"] = combined_metadata.get("_reference_url", "")
 
@@ -53,18 +60,18 @@ def _process_metadata_and_tags(
 
 def _create_chunk(
     knowledge: Knowledge,
-    parse_item: Union[Text, Image],
+    parse_item: Union[Text, TextSlice, Image],
     embedding: List[float],
-    combined_metadata: Dict[str, Any],
+    combined_metadata: LayeredMetadata,
     tags: List[str],
 ) -> Chunk:
     """
     Create a Chunk object from the given parameters.
     Args:
         knowledge: The knowledge object.
-        parse_item: The parse item (Text or Image).
+        parse_item: The parse item (Text, TextSlice or Image).
         embedding: The embedding vector.
-        combined_metadata: The combined metadata.
+        combined_metadata: The combined metadata, copied into a plain dict.
         tags: The tags.
     Returns:
         A Chunk object.
@@ -74,11 +81,13 @@ def _create_chunk(
         space_id=knowledge.space_id,
         tenant_id=knowledge.tenant_id,
         knowledge_id=knowledge.knowledge_id,
-        context=parse_item.content if isinstance(parse_item, Text) else "",
+        context=(
+            parse_item.content if isinstance(parse_item, (Text, TextSlice)) else ""
+        ),
         embedding=embedding,
         enabled=knowledge.enabled,
         embedding_model_name=knowledge.embedding_model_name,
-        metadata=combined_metadata,
+        metadata=combined_metadata.to_dict(),
         tags=tags,
         f1=combined_metadata.get("_f1"),
         f2=combined_metadata.get("_f2"),
@@ -121,9 +130,65 @@ async def decompose_knowledge(
     return flat if flat else knowledge_list
 
 
-async def get_chunks_by_knowledge(knowledge: Knowledge) -> List[Chunk]:
+async def _parse_loaded(
+    knowledge: Knowledge,
+    loader: BaseLoader[Any],
+    parser: BaseParser[Any],
+    parse_executor: Optional[Executor],
+    extract_executor: Optional[Executor],
+    parse_cache: Optional[ParseCache],
+) -> List[SliceParseResult]:
+    """
+    Parse every item of ``loader.iter_load`` as soon as it is loaded, at most
+    ``parser.batch_concurrency`` at a time; the loader is not asked for the
+    next item while that many are waiting. Results keep the load order.
+    """
+    semaphore = asyncio.Semaphore(parser.batch_concurrency)
+
+    async def parse_one(content: Any) -> SliceParseResult:
+        try:
+            if parse_cache is not None:
+                results = await parse_cache.batch_parse_slices(
+                    parser, knowledge, [content], executor=parse_executor
+                )
+            else:
+                results = await parser.batch_parse_slices(
+                    knowledge, [content], executor=parse_executor
+                )
+            return results[0]
+        finally:
+            semaphore.release()
+
+    tasks: List["asyncio.Future[SliceParseResult]"] = []
+    try:
+        async for content in loader.iter_load(extract_executor):
+            await semaphore.acquire()
+            tasks.append(asyncio.ensure_future(parse_one(content)))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return list(await asyncio.gather(*tasks))
+
+
+async def get_chunks_by_knowledge(
+    knowledge: Knowledge,
+    parse_executor: Optional[Executor] = None,
+    deduplicator: Optional[ChunkDeduplicator] = None,
+    parse_cache: Optional[ParseCache] = None,
+    extract_executor: Optional[Executor] = None,
+) -> List[Chunk]:
     """
     Convert knowledge into vectorized chunks with controlled concurrency
+
+    Each loaded content is parsed as soon as the loader yields it (a PDF is
+    split page by page while later pages are still being extracted); pass
+    ``parse_executor`` to run CPU-heavy parsing off the event loop and
+    ``extract_executor`` (a process pool) to extract document pages in
+    parallel. With a
+    ``deduplicator``, near-duplicate text chunks are dropped or linked before
+    embedding, and linked ones reuse their original's embedding when it is
+    part of the same knowledge.
     """
     source_type = knowledge.source_type
     knowledge_type = knowledge.knowledge_type
@@ -147,7 +212,6 @@ async def get_chunks_by_knowledge(knowledge: Knowledge) -> List[Chunk]:
             f"[warn]: No embedding model found for name: {knowledge.embedding_model_name}"
         )
         return []
-    loaded_contents = []
     if LoaderCls is None:
         # If no loader, directly parse the knowledge object itself
         logger.warning(
@@ -155,29 +219,41 @@ async def get_chunks_by_knowledge(knowledge: Knowledge) -> List[Chunk]:
         )
         parse_results = await ParserCls().parse(knowledge, None)
     else:
-        # Use loader to load contents
-        loaded_contents = await LoaderCls(knowledge).load()
-        if not loaded_contents:
+        # Parse contents as they are loaded, keeping their order. Text chunks
+        # stay slices of the loaded content until they become Chunk objects.
+        batch_results = await _parse_loaded(
+            knowledge,
+            LoaderCls(knowledge),
+            ParserCls(),
+            parse_executor,
+            extract_executor,
+            parse_cache,
+        )
+        if not batch_results:
             logger.warning(
                 f"Loader returned no content for source type: {knowledge.source_type}."
             )
             return []
-        # Parse loaded contents
-        parse_results = []
-        for content in loaded_contents:
-            split_result = await ParserCls().parse(knowledge, content)
-            parse_results.extend(split_result)
+        parse_results = [item for result in batch_results for item in result]
 
     # Classify parse_results by type
-    text_items = []
+    text_items: List[Union[Text, TextSlice]] = []
     image_items = []
     for parse_item in parse_results:
-        if isinstance(parse_item, Text):
+        if isinstance(parse_item, (Text, TextSlice)):
             text_items.append(parse_item)
         elif isinstance(parse_item, Image):
             image_items.append(parse_item)
         else:
             logger.warning(f"[warn]: illegal parse item: {parse_item}")
+    if deduplicator is not None and text_items:
+        deduplicated = deduplicator.deduplicate(knowledge, text_items)
+        logger.info(
+            f"Deduplication kept {len(deduplicated)} of {len(text_items)} text items"
+        )
+        text_items = [
+            item for item in deduplicated if isinstance(item, (Text, TextSlice))
+        ]
 
     chunks = []
 
@@ -185,8 +261,18 @@ async def get_chunks_by_knowledge(knowledge: Knowledge) -> List[Chunk]:
     if text_items:
         try:
             logger.info(f"Processing {len(text_items)} text items in batch")
-            documents = [text_item.content for text_item in text_items]
-            embeddings = await EmbeddingCls().embed_documents(documents, timeout=30)
+            sources = reused_embeddings(knowledge, text_items)
+            documents = [
+                text_item.content
+                for text_item, source in zip(text_items, sources)
+                if source is None
+            ]
+            embedded = iter(await EmbeddingCls().embed_documents(documents, timeout=30))
+            embeddings: List[List[float]] = []
+            for source in sources:
+                embeddings.append(
+                    next(embedded) if source is None else embeddings[source]
+                )
             for text_item, embedding in zip(text_items, embeddings):
                 combined_metadata, tags = _process_metadata_and_tags(
                     knowledge, text_item
@@ -0,0 +1,443 @@
+"""
+Retrieval benchmark.
+
+Builds a synthetic (or loads a recorded) corpus and query set, runs every
+registered retriever that has a benchmark builder and reports, per retriever:
+
+* recall@k against exact brute-force search over the same vectors,
+* p50 / p95 / p99 single-query latency and sequential QPS,
+* batched QPS through ``retrieve_many``,
+* build time and index memory.
+
+Everything runs offline: query vectors come from a deterministic fake
+embedding. Run it as a module::
+
+    python -m whiskerrag_utils.bench.retrieval --chunks 20000 --dimension 384 \\
+        --queries 200 --top-k 10 --output retrieval-bench.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from whiskerrag_types.interface.embed_interface import BaseEmbedding, Image
+from whiskerrag_types.interface.retriever_interface import BaseRetriever
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.retrieval import RetrievalRequest, VectorSearchConfig
+from whiskerrag_utils.registry import (
+    RegisterTypeEnum,
+    get_all_registered_with_metadata,
+    init_register,
+)
+from whiskerrag_utils.retriever.index_manager import (
+    SpaceIndexManager,
+    SpaceIndexRetriever,
+)
+from whiskerrag_utils.retriever.mmap_index import (
+    MmapIndexRetriever,
+    write_vector_index,
+)
+from whiskerrag_utils.retriever.segmented_index import (
+    SegmentedIndexRetriever,
+    SegmentedVectorIndex,
+)
+from whiskerrag_utils.retriever.sharded_index import (
+    ShardedIndexRetriever,
+    ShardedVectorIndex,
+    write_sharded_index,
+)
+from whiskerrag_utils.retriever.vector_search import normalize_rows
+
+logger = logging.getLogger("whisker")
+
+BENCH_MODEL = "bench-model"
+BENCH_TENANT = "bench-tenant"
+BENCH_SPACE = "bench-space"
+
+
+class SeededEmbedding(BaseEmbedding):
+    """
+    Deterministic fake embedding: each text seeds a random generator with its
+    SHA-256, so the same text always maps to the same unit vector. Texts found
+    in ``vectors`` return the stored vector instead, which lets recorded query
+    sets keep their real embeddings.
+    """
+
+    def __init__(
+        self, dimension: int, vectors: Optional[Dict[str, List[float]]] = None
+    ) -> None:
+        self.dimension = dimension
+        self.vectors = vectors or {}
+
+    @classmethod
+    async def health_check(cls) -> bool:
+        return True
+
+    def vector(self, text: str) -> List[float]:
+        if text in self.vectors:
+            return self.vectors[text]
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        normalized: List[float] = normalize_rows(vector)[0].tolist()
+        return normalized
+
+    async def embed_documents(
+        self, documents: List[str], timeout: Optional[int]
+    ) -> List[List[float]]:
+        return [self.vector(document) for document in documents]
+
+    async def embed_text(self, text: str, timeout: Optional[int]) -> List[float]:
+        return self.vector(text)
+
+    async def embed_text_query(self, text: str, timeout: Optional[int]) -> List[float]:
+        return self.vector(text)
+
+    async def embed_image(self, image: Image, timeout: Optional[int]) -> List[float]:
+        raise NotImplementedError("SeededEmbedding does not support image embedding")
+
+
+class BenchCorpus(BaseModel):
+    """Chunks with embeddings plus the query texts to run against them."""
+
+    chunks: List[Chunk]
+    queries: List[str]
+    query_vectors: Dict[str, List[float]] = Field(default_factory=dict)
+
+    @property
+    def dimension(self) -> int:
+        return len(self.chunks[0].embedding or []) if self.chunks else 0
+
+    @property
+    def tenant_id(self) -> str:
+        """
+        Tenant the queries run as: the corpus' tenant, or "" (no tenant
+        scope) for a recorded corpus spanning several, since the exact
+        ground truth is taken over all chunks.
+        """
+        tenants = {chunk.tenant_id for chunk in self.chunks}
+        return tenants.pop() if len(tenants) == 1 else ""
+
+    def embedding(self) -> SeededEmbedding:
+        return SeededEmbedding(self.dimension, self.query_vectors)
+
+
+class RetrieverBenchResult(BaseModel):
+    retriever: str
+    status: str = "ok"
+    error: Optional[str] = None
+    build_seconds: float = 0.0
+    recall_at_k: float = 0.0
+    latency_ms_p50: float = 0.0
+    latency_ms_p95: float = 0.0
+    latency_ms_p99: float = 0.0
+    qps: float = 0.0
+    batch_qps: float = 0.0
+    index_memory_bytes: int = 0
+
+
+class RetrievalBenchReport(BaseModel):
+    chunks: int
+    queries: int
+    dimension: int
+    top_k: int
+    seed: int
+    results: List[RetrieverBenchResult]
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.model_dump_json(indent=2))
+
+
+def synthetic_corpus(
+    num_chunks: int = 10000,
+    dimension: int = 384,
+    num_queries: int = 100,
+    num_clusters: int = 64,
+    num_knowledge: int = 100,
+    seed: int = 0,
+) -> BenchCorpus:
+    """
+    Clustered unit vectors (closer to real embeddings than uniform noise) and
+    queries drawn as perturbed corpus vectors.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dimension))
+    labels = rng.integers(0, num_clusters, num_chunks)
+    vectors = normalize_rows(
+        centers[labels] + 0.6 * rng.standard_normal((num_chunks, dimension))
+    )
+    chunks = [
+        Chunk.model_validate(
+            {
+                "chunk_id": f"bench-chunk-{i}",
+                "space_id": BENCH_SPACE,
+                "tenant_id": BENCH_TENANT,
+                "knowledge_id": f"bench-knowledge-{i % num_knowledge}",
+                "context": f"synthetic chunk {i} of cluster {labels[i]}",
+                "embedding": vectors[i].tolist(),
+                "embedding_model_name": BENCH_MODEL,
+                "metadata": {"_idx": i // num_knowledge},
+            }
+        )
+        for i in range(num_chunks)
+    ]
+    sources = rng.integers(0, num_chunks, num_queries)
+    query_vectors = normalize_rows(
+        vectors[sources] + 0.3 * rng.standard_normal((num_queries, dimension))
+    )
+    queries = [f"synthetic query {i}" for i in range(num_queries)]
+    return BenchCorpus(
+        chunks=chunks,
+        queries=queries,
+        query_vectors={q: v.tolist() for q, v in zip(queries, query_vectors)},
+    )
+
+
+def load_corpus(chunks_path: str, queries_path: str) -> BenchCorpus:
+    """
+    Load a recorded corpus: JSONL of ``Chunk`` / ``RetrievalChunk`` dumps with
+    embeddings, and JSONL of ``{"content": ..., "embedding": [...]}`` queries
+    (the embedding is optional).
+    """
+    with open(chunks_path, "r", encoding="utf-8") as f:
+        chunks = [Chunk.model_validate_json(line) for line in f if line.strip()]
+    queries: List[str] = []
+    query_vectors: Dict[str, List[float]] = {}
+    with open(queries_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            queries.append(record["content"])
+            if record.get("embedding"):
+                query_vectors[record["content"]] = record["embedding"]
+    return BenchCorpus(chunks=chunks, queries=queries, query_vectors=query_vectors)
+
+
+def exact_top_k(corpus: BenchCorpus, top_k: int) -> List[List[str]]:
+    """Ground truth: brute-force inner product over the normalised corpus."""
+    embedding = corpus.embedding()
+    matrix = normalize_rows([chunk.embedding or [] for chunk in corpus.chunks])
+    queries = normalize_rows([embedding.vector(query) for query in corpus.queries])
+    scores = matrix @ queries.T
+    truth = []
+    for i in range(len(corpus.queries)):
+        order = np.argsort(-scores[:, i], kind="stable")[:top_k]
+        truth.append([corpus.chunks[row].chunk_id for row in order])
+    return truth
+
+
+# =================== retriever builders ===================
+
+BuiltRetriever = Tuple[BaseRetriever, Callable[[], int], Callable[[], None]]
+"""(retriever, index memory in bytes, cleanup)"""
+
+BenchBuilder = Callable[[BenchCorpus, Path, BaseEmbedding], BuiltRetriever]
+
+BENCH_BUILDERS: Dict[str, BenchBuilder] = {}
+
+
+def bench_builder(name: str) -> Callable[[BenchBuilder], BenchBuilder]:
+    """Register how to build the retriever registered as ``name`` for a corpus."""
+
+    def decorator(builder: BenchBuilder) -> BenchBuilder:
+        BENCH_BUILDERS[name] = builder
+        return builder
+
+    return decorator
+
+
+def _noop() -> None:
+    return None
+
+
+@bench_builder("mmap_index")
+def _build_mmap(
+    corpus: BenchCorpus, workdir: Path, embedding: BaseEmbedding
+) -> BuiltRetriever:
+    write_vector_index(workdir / "mmap", corpus.chunks, BENCH_MODEL)
+    retriever = MmapIndexRetriever(workdir / "mmap", embedding=embedding)
+    return retriever, lambda: retriever.index.nbytes, _noop
+
+
+@bench_builder("segmented_index")
+def _build_segmented(
+    corpus: BenchCorpus, workdir: Path, embedding: BaseEmbedding
+) -> BuiltRetriever:
+    index = SegmentedVectorIndex.from_chunks(corpus.chunks, BENCH_MODEL)
+    return (
+        SegmentedIndexRetriever(index, embedding=embedding),
+        lambda: index.nbytes,
+        _noop,
+    )
+
+
+@bench_builder("sharded_index")
+def _build_sharded(
+    corpus: BenchCorpus, workdir: Path, embedding: BaseEmbedding
+) -> BuiltRetriever:
+    write_sharded_index(workdir / "sharded", corpus.chunks, 2, BENCH_MODEL)
+    index = ShardedVectorIndex(workdir / "sharded", shard_timeout=30)
+    index.start()
+    retriever = ShardedIndexRetriever(index, embedding=embedding)
+    return retriever, lambda: index.nbytes, index.close
+
+
+@bench_builder("space_index")
+def _build_space_index(
+    corpus: BenchCorpus, workdir: Path, embedding: BaseEmbedding
+) -> BuiltRetriever:
+    manager = SpaceIndexManager(
+        lambda space_id: SegmentedVectorIndex.from_chunks(
+            [chunk for chunk in corpus.chunks if chunk.space_id == space_id],
+            BENCH_MODEL,
+        )
+    )
+    retriever = SpaceIndexRetriever(manager, embedding=embedding)
+    return retriever, lambda: manager.memory_usage, manager.clear
+
+
+# =================== runner ===================
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+async def _timed(call: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = await call()
+    return result, time.perf_counter() - started
+
+
+async def bench_retriever(
+    name: str,
+    corpus: BenchCorpus,
+    truth: List[List[str]],
+    top_k: int,
+    workdir: Path,
+    batch_size: int = 32,
+) -> RetrieverBenchResult:
+    builder = BENCH_BUILDERS.get(name)
+    if builder is None:
+        return RetrieverBenchResult(retriever=name, status="skipped")
+    spaces = sorted({chunk.space_id for chunk in corpus.chunks})
+    requests = [
+        RetrievalRequest(
+            content=query,
+            config=VectorSearchConfig(type=name, top_k=top_k, space_id_list=spaces),
+        )
+        for query in corpus.queries
+    ]
+    cleanup = _noop
+    try:
+        started = time.perf_counter()
+        retriever, memory, cleanup = builder(corpus, workdir, corpus.embedding())
+        # a first query loads whatever the builder left lazy
+        await retriever.retrieve(requests[0], corpus.tenant_id)
+        build_seconds = time.perf_counter() - started
+
+        latencies: List[float] = []
+        hits = 0
+        for request, expected in zip(requests, truth):
+            results, seconds = await _timed(
+                lambda: retriever.retrieve(request, corpus.tenant_id)
+            )
+            latencies.append(seconds)
+            hits += len({r.chunk_id for r in results} & set(expected))
+
+        batch_seconds = 0.0
+        for start in range(0, len(requests), batch_size):
+            batch = requests[start : start + batch_size]
+            _, seconds = await _timed(
+                lambda: retriever.retrieve_many(batch, corpus.tenant_id)
+            )
+            batch_seconds += seconds
+
+        return RetrieverBenchResult(
+            retriever=name,
+            build_seconds=build_seconds,
+            recall_at_k=hits / max(sum(len(e) for e in truth), 1),
+            latency_ms_p50=_percentile(latencies, 50) * 1000,
+            latency_ms_p95=_percentile(latencies, 95) * 1000,
+            latency_ms_p99=_percentile(latencies, 99) * 1000,
+            qps=len(latencies) / sum(latencies) if sum(latencies) else 0.0,
+            batch_qps=len(requests) / batch_seconds if batch_seconds else 0.0,
+            index_memory_bytes=memory(),
+        )
+    except Exception as e:
+        logger.error(f"Benchmark of retriever {name} failed: {e}")
+        return RetrieverBenchResult(retriever=name, status="error", error=str(e))
+    finally:
+        cleanup()
+
+
+async def run_benchmark(
+    corpus: BenchCorpus,
+    top_k: int = 10,
+    retrievers: Optional[List[str]] = None,
+    seed: int = 0,
+) -> RetrievalBenchReport:
+    """Benchmark ``retrievers`` (default: every registered retriever)."""
+    if retrievers is None:
+        init_register()
+        registered = get_all_registered_with_metadata(RegisterTypeEnum.RETRIEVER)
+        retrievers = sorted(str(key) for key in registered)
+    truth = exact_top_k(corpus, top_k)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="whisker-bench-") as workdir:
+        for name in retrievers:
+            target = Path(workdir) / name
+            target.mkdir()
+            results.append(await bench_retriever(name, corpus, truth, top_k, target))
+    return RetrievalBenchReport(
+        chunks=len(corpus.chunks),
+        queries=len(corpus.queries),
+        dimension=corpus.dimension,
+        top_k=top_k,
+        seed=seed,
+        results=results,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> RetrievalBenchReport:
+    parser = argparse.ArgumentParser(description="Benchmark registered retrievers")
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--retriever", action="append", dest="retrievers")
+    parser.add_argument("--corpus", help="recorded chunks (JSONL)")
+    parser.add_argument("--query-file", help="recorded queries (JSONL)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+    if bool(args.corpus) != bool(args.query_file):
+        parser.error("--corpus and --query-file must be given together")
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus, args.query_file)
+    else:
+        corpus = synthetic_corpus(
+            args.chunks, args.dimension, args.queries, seed=args.seed
+        )
+    report = asyncio.run(
+        run_benchmark(corpus, args.top_k, args.retrievers, seed=args.seed)
+    )
+    if args.output:
+        report.write(args.output)
+    print(report.model_dump_json(indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
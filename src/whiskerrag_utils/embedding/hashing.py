@@ -0,0 +1,134 @@
+import asyncio
+import os
+import random
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from whiskerrag_types.interface.embed_interface import BaseEmbedding, Image
+from whiskerrag_utils import RegisterTypeEnum, register
+
+HASHING_EMBEDDING_MODEL = "hashing"
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+@lru_cache(maxsize=1 << 18)
+def _feature_slot(feature: str, dimension: int) -> Tuple[int, float]:
+    """Bucket and sign of a feature; the sign halves collision bias."""
+    digest = zlib.crc32(feature.encode("utf-8"))
+    return digest % dimension, 1.0 if digest & 0x80000000 else -1.0
+
+
+def text_features(text: str, char_ngram: int = 3) -> List[str]:
+    """
+    Features of a text: lower-cased words, word bigrams and character n-grams
+    of every word. CJK characters count as words of their own, so Chinese and
+    Japanese text still produces overlapping features.
+    """
+    words: List[str] = []
+    for word in _WORD.findall(text.lower()):
+        if _CJK.search(word):
+            words.extend(_CJK.findall(word))
+            rest = _CJK.sub(" ", word).split()
+            words.extend(rest)
+        else:
+            words.append(word)
+    features = [f"w:{word}" for word in words]
+    features.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f"<{word}>"
+        if len(padded) > char_ngram:
+            features.extend(
+                f"c:{padded[i : i + char_ngram]}"
+                for i in range(len(padded) - char_ngram + 1)
+            )
+    return features
+
+
+@register(RegisterTypeEnum.EMBEDDING, HASHING_EMBEDDING_MODEL)
+class HashingEmbedding(BaseEmbedding):
+    """
+    Local, deterministic embedding by feature hashing of words, word bigrams and
+    character n-grams. Texts that share words get similar vectors, so it can
+    stand in for a real model in tests and benchmarks without a network.
+
+    ``latency`` (seconds per call) and ``error_rate`` (probability that a call
+    raises) simulate a remote provider. Defaults are read from the
+    ``WHISKER_HASHING_EMBEDDING_*`` environment variables because the registry
+    creates embeddings without arguments.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        latency: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        seed: int = 0,
+    ) -> None:
+        self.dimension = dimension or int(
+            os.getenv("WHISKER_HASHING_EMBEDDING_DIMENSION", "384")
+        )
+        self.latency = (
+            latency
+            if latency is not None
+            else float(os.getenv("WHISKER_HASHING_EMBEDDING_LATENCY", "0"))
+        )
+        self.error_rate = (
+            error_rate
+            if error_rate is not None
+            else float(os.getenv("WHISKER_HASHING_EMBEDDING_ERROR_RATE", "0"))
+        )
+        self._random = random.Random(seed)
+
+    @classmethod
+    async def health_check(cls) -> bool:
+        return True
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        """L2-normalised (len(texts), dimension) float32 matrix."""
+        rows: List[int] = []
+        columns: List[int] = []
+        signs: List[float] = []
+        for row, text in enumerate(texts):
+            for feature in text_features(text):
+                column, sign = _feature_slot(feature, self.dimension)
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(
+            matrix,
+            (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)),
+            np.asarray(signs, dtype=np.float32),
+        )
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        normalized: np.ndarray = matrix / norms
+        return normalized
+
+    async def _simulate_provider(self) -> None:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        if self.error_rate > 0 and self._random.random() < self.error_rate:
+            raise RuntimeError("HashingEmbedding simulated provider error")
+
+    async def embed_documents(
+        self, documents: List[str], timeout: Optional[int]
+    ) -> List[List[float]]:
+        await self._simulate_provider()
+        embeddings: List[List[float]] = self.embed_matrix(documents).tolist()
+        return embeddings
+
+    async def embed_text(self, text: str, timeout: Optional[int]) -> List[float]:
+        return (await self.embed_documents([text], timeout))[0]
+
+    async def embed_text_query(self, text: str, timeout: Optional[int]) -> List[float]:
+        return await self.embed_text(text, timeout)
+
+    async def embed_image(self, image: Image, timeout: Optional[int]) -> List[float]:
+        raise NotImplementedError("HashingEmbedding does not support image embedding")
@@ -0,0 +1,270 @@
+"""
+In-process CPU embedding for the sentence-transformers models of
+``EmbeddingModelEnum``.
+
+Models are loaded from a local directory (``WHISKER_LOCAL_EMBEDDING_DIR``),
+never downloaded. A model lives either at ``<dir>/<model name>`` (e.g.
+``<dir>/sentence-transformers/all-MiniLM-L6-v2``) or at
+``<dir>/<last part of the name>``. The backends are only registered when
+``sentence-transformers`` is installed and the model directory exists.
+
+Texts are sorted by token length and cut into batches whose padded size
+(``longest sequence * batch size``) stays under ``max_batch_tokens``, so short
+texts are not padded to the length of a long one. Batches run concurrently on a
+shared thread pool, which keeps the event loop free;
+``WHISKER_LOCAL_EMBEDDING_THREADS`` sizes the pool and torch is limited to one
+intra-op thread per worker, so a process never runs more inference threads.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, ClassVar, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from whiskerrag_types.interface.embed_interface import BaseEmbedding, Image
+from whiskerrag_types.model.knowledge import EmbeddingModelEnum
+from whiskerrag_utils import RegisterTypeEnum, register
+
+logger = logging.getLogger("whisker")
+
+MODEL_DIR_ENV = "WHISKER_LOCAL_EMBEDDING_DIR"
+THREADS_ENV = "WHISKER_LOCAL_EMBEDDING_THREADS"
+
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _lazy_import_sentence_transformers() -> Any:
+    try:
+        from sentence_transformers import SentenceTransformer  # type: ignore
+
+        return SentenceTransformer
+    except ImportError as e:
+        raise ImportError(
+            "sentence-transformers is required for local embedding, install with "
+            "`pip install sentence-transformers`"
+        ) from e
+
+
+def thread_limit() -> int:
+    """Threads per process for local inference, at least one."""
+    default = min(4, os.cpu_count() or 1)
+    return max(1, int(os.getenv(THREADS_ENV, str(default))))
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """The process-wide inference pool, sized by ``thread_limit``."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=thread_limit(), thread_name_prefix="whisker-embed"
+            )
+        return _executor
+
+
+def _limit_torch_threads() -> None:
+    try:
+        import torch  # type: ignore
+    except ImportError:
+        return
+    # parallelism comes from the pool, one intra-op thread per worker keeps the
+    # process at ``thread_limit`` busy threads
+    torch.set_num_threads(1)
+
+
+def resolve_model_dir(model_name: str, root: Optional[str] = None) -> Optional[Path]:
+    """Local directory of ``model_name`` under ``root``, None if absent."""
+    root = root or os.getenv(MODEL_DIR_ENV)
+    if not root:
+        return None
+    for candidate in (Path(root) / model_name, Path(root) / model_name.split("/")[-1]):
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+def length_buckets(
+    lengths: Sequence[int], max_batch_size: int, max_batch_tokens: int
+) -> List[List[int]]:
+    """
+    Group indices into batches of similar length. Indices are sorted by
+    length (longest first) and a batch is closed once adding the next text
+    would make ``max length * batch size`` exceed ``max_batch_tokens``.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    longest = 0
+    for i in order:
+        padded = max(longest, lengths[i]) * (len(batch) + 1)
+        if batch and (len(batch) >= max_batch_size or padded > max_batch_tokens):
+            batches.append(batch)
+            batch, longest = [], 0
+        batch.append(i)
+        longest = max(longest, lengths[i])
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def load_model(model_dir: Path) -> Any:
+    """Load (once per process) the model stored in ``model_dir``."""
+    key = str(model_dir)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            SentenceTransformer = _lazy_import_sentence_transformers()
+            _limit_torch_threads()
+            logger.info(f"Loading local embedding model from {model_dir}")
+            model = SentenceTransformer(key, device="cpu", local_files_only=True)
+            _models[key] = model
+        return model
+
+
+def _scatter(
+    count: int, buckets: List[List[int]], vectors: List[np.ndarray]
+) -> np.ndarray:
+    """Put per-bucket vectors back into input order."""
+    dimension = vectors[0].shape[1] if vectors else 0
+    result = np.zeros((count, dimension), dtype=np.float32)
+    for bucket, batch in zip(buckets, vectors):
+        result[bucket] = batch
+    return result
+
+
+class LocalSentenceTransformerEmbedding(BaseEmbedding):
+    """
+    Base of the local sentence-transformers backends; subclasses set
+    ``model_name``. ``model`` may be passed directly, anything with the
+    ``encode`` method of ``SentenceTransformer`` works.
+    """
+
+    model_name: ClassVar[str] = ""
+
+    def __init__(
+        self,
+        model_dir: Optional[str] = None,
+        max_batch_size: int = 32,
+        max_batch_tokens: int = 8192,
+        model: Any = None,
+    ) -> None:
+        self.model_dir = model_dir
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._model = model
+
+    @classmethod
+    async def health_check(cls) -> bool:
+        if importlib.util.find_spec("sentence_transformers") is None:
+            return False
+        return resolve_model_dir(cls.model_name) is not None
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            model_dir = resolve_model_dir(self.model_name, self.model_dir)
+            if model_dir is None:
+                raise FileNotFoundError(
+                    f"Local embedding model {self.model_name} not found, "
+                    f"set {MODEL_DIR_ENV} to the directory holding it"
+                )
+            self._model = load_model(model_dir)
+        return self._model
+
+    def sequence_lengths(self, texts: List[str]) -> List[int]:
+        """Token counts from the model tokenizer, characters without one."""
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if not callable(tokenizer):
+            return [len(text) for text in texts]
+        max_length = getattr(self.model, "max_seq_length", None) or 512
+        encoded = tokenizer(texts, truncation=True, max_length=max_length)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def buckets(self, texts: List[str]) -> List[List[int]]:
+        return length_buckets(
+            self.sequence_lengths(texts), self.max_batch_size, self.max_batch_tokens
+        )
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(
+                texts,
+                batch_size=len(texts),
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ),
+            dtype=np.float32,
+        )
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Blocking, length-bucketed encoding of ``texts`` in input order."""
+        buckets = self.buckets(texts)
+        return _scatter(
+            len(texts),
+            buckets,
+            [self.encode_batch([texts[i] for i in bucket]) for bucket in buckets],
+        )
+
+    async def _encode_async(self, texts: List[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        executor = get_executor()
+        buckets = await loop.run_in_executor(executor, self.buckets, texts)
+        vectors = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor, self.encode_batch, [texts[i] for i in bucket]
+                )
+                for bucket in buckets
+            )
+        )
+        return _scatter(len(texts), buckets, list(vectors))
+
+    async def embed_documents(
+        self, documents: List[str], timeout: Optional[int]
+    ) -> List[List[float]]:
+        if not documents:
+            return []
+        matrix = await asyncio.wait_for(self._encode_async(documents), timeout)
+        embeddings: List[List[float]] = matrix.tolist()
+        return embeddings
+
+    async def embed_text(self, text: str, timeout: Optional[int]) -> List[float]:
+        return (await self.embed_documents([text], timeout))[0]
+
+    async def embed_text_query(self, text: str, timeout: Optional[int]) -> List[float]:
+        return await self.embed_text(text, timeout)
+
+    async def embed_image(self, image: Image, timeout: Optional[int]) -> List[float]:
+        raise NotImplementedError(f"{self.model_name} does not support image embedding")
+
+
+@register(RegisterTypeEnum.EMBEDDING, EmbeddingModelEnum.ALL_MINILM_L6_V2)
+class AllMiniLML6V2Embedding(LocalSentenceTransformerEmbedding):
+    model_name = EmbeddingModelEnum.ALL_MINILM_L6_V2.value
+
+
+@register(RegisterTypeEnum.EMBEDDING, EmbeddingModelEnum.all_mpnet_base_v2)
+class AllMpnetBaseV2Embedding(LocalSentenceTransformerEmbedding):
+    model_name = EmbeddingModelEnum.all_mpnet_base_v2.value
+
+
+@register(
+    RegisterTypeEnum.EMBEDDING, EmbeddingModelEnum.PARAPHRASE_MULTILINGUAL_MINILM_L12_V2
+)
+class ParaphraseMultilingualMiniLML12V2Embedding(LocalSentenceTransformerEmbedding):
+    model_name = EmbeddingModelEnum.PARAPHRASE_MULTILINGUAL_MINILM_L12_V2.value
+
+
+@register(RegisterTypeEnum.EMBEDDING, EmbeddingModelEnum.TEXT2VEC_BASE_CHINESE)
+class Text2VecBaseChineseEmbedding(LocalSentenceTransformerEmbedding):
+    model_name = EmbeddingModelEnum.TEXT2VEC_BASE_CHINESE.value
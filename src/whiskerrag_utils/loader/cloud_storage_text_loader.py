@@ -1,5 +1,7 @@
+import asyncio
 import os
-from typing import List, Tuple
+from concurrent.futures import Executor
+from typing import AsyncIterator, List, Optional, Tuple
 
 from whiskerrag_types.interface.loader_interface import BaseLoader
 from whiskerrag_types.model.knowledge import (
@@ -9,12 +11,15 @@ from whiskerrag_types.model.knowledge import (
 )
 from whiskerrag_types.model.knowledge_source import OpenUrlSourceConfig, S3SourceConfig
 from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_utils.loader.document_pages import iter_document_pages
 from whiskerrag_utils.loader.utils import (
     download_from_s3_to_local,
     download_from_url_to_local,
 )
 from whiskerrag_utils.registry import RegisterTypeEnum, register
 
+PAGED_KNOWLEDGE_TYPES = (KnowledgeTypeEnum.PDF, KnowledgeTypeEnum.DOCX)
+
 
 @register(RegisterTypeEnum.KNOWLEDGE_LOADER, KnowledgeSourceEnum.CLOUD_STORAGE_TEXT)
 class CloudStorageTextLoader(BaseLoader[Text]):
@@ -22,13 +27,11 @@ class CloudStorageTextLoader(BaseLoader[Text]):
         """读取文件内容，兼容处理UTF-8编码，避免乱码"""
         try:
             knowledge_type = self.knowledge.knowledge_type
-            if knowledge_type is KnowledgeTypeEnum.DOCX:
-                raise NotImplementedError("Word document processing not implemented")
-            # PDF文档
-            if knowledge_type is KnowledgeTypeEnum.PDF:
-                raise NotImplementedError("PDF processing not implemented")
-            if knowledge_type is KnowledgeTypeEnum.DOCX:
-                raise NotImplementedError("Word document processing not implemented")
+            # PDF / Word文档：逐页提取，页之间以换页符分隔
+            if knowledge_type in PAGED_KNOWLEDGE_TYPES:
+                return "\f".join(
+                    page.text for page in iter_document_pages(file_path, knowledge_type)
+                )
             # 首先尝试以UTF-8编码读取文件
             with open(file_path, "r", encoding="utf-8") as f:
                 return f.read()
@@ -86,9 +89,62 @@ class CloudStorageTextLoader(BaseLoader[Text]):
         except Exception as e:
             raise Exception(f"Failed to process file: {str(e)}")
 
+    async def iter_pages(
+        self, executor: Optional[Executor] = None
+    ) -> AsyncIterator[Text]:
+        """
+        下载 PDF / Word 文档并逐页产出: one Text per non-empty page, with its
+        1-based ``page_number``. The download and every page extraction run
+        in the default thread pool, so the event loop is never blocked, and
+        a page is only read when the consumer asks for the next one. With an
+        ``executor`` (a process pool) PDF page ranges are extracted in it.
+        """
+        loop = asyncio.get_running_loop()
+        config = self.knowledge.source_config
+        if isinstance(config, S3SourceConfig):
+            temp_file, source_metadata = await loop.run_in_executor(
+                None, download_from_s3_to_local, config
+            )
+        elif isinstance(config, OpenUrlSourceConfig):
+            temp_file, source_metadata = await loop.run_in_executor(
+                None, download_from_url_to_local, config.url
+            )
+        else:
+            raise AttributeError(
+                "Invalid source config type for CloudStorageTextLoader"
+            )
+        metadata = {**self.knowledge.metadata, **source_metadata}
+        pages = iter_document_pages(temp_file, self.knowledge.knowledge_type, executor)
+        try:
+            while True:
+                page = await loop.run_in_executor(None, next, pages, None)
+                if page is None:
+                    return
+                if page.text.strip():
+                    yield Text(
+                        content=page.text,
+                        metadata={**metadata, "page_number": page.page_number},
+                    )
+        finally:
+            pages.close()
+            if os.path.exists(temp_file):
+                os.unlink(temp_file)
+
+    async def iter_load(
+        self, executor: Optional[Executor] = None
+    ) -> AsyncIterator[Text]:
+        if self.knowledge.knowledge_type in PAGED_KNOWLEDGE_TYPES:
+            async for page in self.iter_pages(executor):
+                yield page
+        else:
+            for text in await self.load():
+                yield text
+
     async def load(self) -> List[Text]:
         """加载文件内容"""
         try:
+            if self.knowledge.knowledge_type in PAGED_KNOWLEDGE_TYPES:
+                return [page async for page in self.iter_pages()]
             if isinstance(self.knowledge.source_config, S3SourceConfig):
                 content, source_metadata = await self.download_from_s3(
                     self.knowledge.source_config
@@ -0,0 +1,179 @@
+"""
+Page-by-page text extraction for PDF and DOCX files.
+
+Pages are produced one at a time from the file on disk, so a consumer can
+handle each page before the next one is read; ``CloudStorageTextLoader``
+feeds them to the ingestion pipeline that way, which splits each page as it
+arrives. PDF pages can be extracted in a process pool; the file is reopened
+by every task and at most ``max_pending`` page ranges are in flight, so
+extraction never runs more than that far ahead of the consumer. pypdf and
+python-docx are optional and only imported when a document of their format
+is read.
+"""
+
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Deque, Generator, List, NamedTuple, Optional
+
+from whiskerrag_types.model.knowledge import KnowledgeTypeEnum
+
+PDF_PAGES_PER_TASK = 8
+MAX_PENDING_TASKS = 4
+
+
+class DocumentPage(NamedTuple):
+    page_number: int  # 1-based
+    text: str
+
+
+Pages = Generator[DocumentPage, None, None]
+
+
+def _lazy_import_pypdf() -> Any:
+    try:
+        import pypdf  # type: ignore
+
+        return pypdf
+    except ImportError:
+        raise ImportError(
+            "pypdf is required for PDF text extraction. "
+            "Install it with: pip install pypdf"
+        )
+
+
+def _lazy_import_docx() -> Any:
+    try:
+        import docx  # type: ignore
+
+        return docx
+    except ImportError:
+        raise ImportError(
+            "python-docx is required for DOCX text extraction. "
+            "Install it with: pip install python-docx"
+        )
+
+
+def count_pdf_pages(path: str) -> int:
+    return len(_lazy_import_pypdf().PdfReader(path).pages)
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[str]:
+    """Text of pages ``start`` to ``stop`` (0-based, exclusive) of a PDF."""
+    reader = _lazy_import_pypdf().PdfReader(path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+def iter_pdf_pages(
+    path: str,
+    executor: Optional[Executor] = None,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+    max_pending: int = MAX_PENDING_TASKS,
+) -> Pages:
+    """
+    Pages of a PDF, in order. With an ``executor`` (a process pool for real
+    parallelism), ranges of ``pages_per_task`` pages are extracted
+    concurrently, keeping at most ``max_pending`` ranges in flight.
+    """
+    if executor is None:
+        reader = _lazy_import_pypdf().PdfReader(path)
+        for index, page in enumerate(reader.pages):
+            yield DocumentPage(index + 1, page.extract_text() or "")
+        return
+
+    page_count = count_pdf_pages(path)
+    starts = iter(range(0, page_count, pages_per_task))
+    pending: Deque["Future[List[str]]"] = deque()
+    page_number = 1
+
+    def submit() -> None:
+        start = next(starts, None)
+        if start is not None:
+            stop = min(start + pages_per_task, page_count)
+            pending.append(executor.submit(extract_pdf_pages, path, start, stop))
+
+    for _ in range(max(max_pending, 1)):
+        submit()
+    while pending:
+        texts = pending.popleft().result()
+        submit()
+        for text in texts:
+            yield DocumentPage(page_number, text)
+            page_number += 1
+
+
+def _table_text(table: Any) -> str:
+    rows = []
+    for row in table.rows:
+        cells = (" ".join(p.text for p in cell.paragraphs) for cell in row.cells)
+        rows.append(" | ".join(cell.strip() for cell in cells))
+    return "\n".join(rows)
+
+
+def iter_docx_pages(path: str) -> Pages:
+    """
+    Pages of a DOCX file, in order. DOCX has no fixed layout: pages end at
+    explicit page breaks and at the breaks Word recorded when it last laid
+    the document out. Paragraphs are separated by newlines and table rows
+    rendered as ``cell | cell``. A file without breaks is a single page.
+    """
+    docx = _lazy_import_docx()
+    from docx.oxml.ns import qn  # type: ignore
+    from docx.table import Table  # type: ignore
+
+    paragraph_tag, table_tag = qn("w:p"), qn("w:tbl")
+    text_tag, tab_tag, break_tag = qn("w:t"), qn("w:tab"), qn("w:br")
+    rendered_break_tag, break_type = qn("w:lastRenderedPageBreak"), qn("w:type")
+
+    document = docx.Document(path)
+    page_number = 1
+    lines: List[str] = []
+    line: List[str] = []
+    # Word writes a rendered break right after an explicit one: count it once
+    just_broke = False
+
+    def flush() -> DocumentPage:
+        nonlocal page_number, lines
+        page = DocumentPage(page_number, "\n".join(lines).strip())
+        page_number += 1
+        lines = []
+        return page
+
+    for element in document.element.body.iterchildren():
+        if element.tag == table_tag:
+            lines.append(_table_text(Table(element, document)))
+            just_broke = False
+            continue
+        if element.tag != paragraph_tag:
+            continue
+        for node in element.iter(text_tag, tab_tag, break_tag, rendered_break_tag):
+            is_page_break = node.tag == rendered_break_tag or (
+                node.tag == break_tag and node.get(break_type) == "page"
+            )
+            if is_page_break:
+                if not just_broke:
+                    lines.append("".join(line))
+                    line = []
+                    yield flush()
+                    just_broke = True
+                continue
+            if node.tag == text_tag:
+                line.append(node.text or "")
+            else:
+                line.append("\t" if node.tag == tab_tag else "\n")
+            just_broke = False
+        lines.append("".join(line))
+        line = []
+    yield flush()
+
+
+def iter_document_pages(
+    path: str,
+    knowledge_type: KnowledgeTypeEnum,
+    executor: Optional[Executor] = None,
+) -> Pages:
+    """Pages of a PDF or DOCX file; ``executor`` is used for PDF pages only."""
+    if knowledge_type is KnowledgeTypeEnum.PDF:
+        return iter_pdf_pages(path, executor)
+    if knowledge_type is KnowledgeTypeEnum.DOCX:
+        return iter_docx_pages(path)
+    raise ValueError(f"No page extraction for knowledge type: {knowledge_type}")
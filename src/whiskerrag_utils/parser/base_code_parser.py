@@ -1,63 +1,63 @@
-from typing import List, Union
-
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
-from whiskerrag_types.interface.parser_interface import BaseParser, ParseResult
+from bisect import bisect_right
+from typing import Tuple
+
+from whiskerrag_types.interface.parser_interface import (
+    BaseParser,
+    ParseResult,
+    SliceParseResult,
+    slices_to_texts,
+)
 from whiskerrag_types.model.knowledge import Knowledge
-from whiskerrag_types.model.multi_modal import Image, Text
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Text
 from whiskerrag_types.model.splitter import BaseCodeSplitConfig
+from whiskerrag_utils.parser.splitter_cache import get_language_splitter
+from whiskerrag_utils.parser.token_length import resolve_chunk_sizing
 from whiskerrag_utils.registry import RegisterTypeEnum, register
 
 
+class LineIndex:
+    """
+    Start offsets of every line of a text, built once so that an offset is
+    mapped to its (line, column) with a binary search instead of a rescan.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.line_starts = [0]
+        position = text.find("\n")
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = text.find("\n", position + 1)
+
+    def line_column(self, offset: int) -> Tuple[int, int]:
+        """1-based line and column of a character offset."""
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+
 @register(RegisterTypeEnum.PARSER, "base_code")
 class CodeParser(BaseParser[Text]):
 
-    def _calculate_line_position(
-        self, content: str, chunk: str, char_start: int
+    def _span_line_position(
+        self, line_index: "LineIndex", source: str, start: int, end: int
     ) -> dict:
         """
-        Calculate line-based position information for a code chunk
-
-        Args:
-            content: Original full content
-            chunk: The code chunk
-            char_start: Character start position in the original content
-
-        Returns:
-            dict: Position information including line numbers
+        Line-based position of the chunk ``source[start:end]``: 1-based start
+        and end lines and columns and its line count, computed from the
+        offsets without slicing the chunk out of the source.
         """
-        # Split content into lines for position calculation
-        lines = content.split("\n")
-
-        # Calculate start line
-        current_char = 0
-        start_line = 1
-        start_column = 1
-
-        for line_num, line in enumerate(lines, 1):
-            line_length = len(line) + 1  # +1 for newline character
-            if current_char + line_length > char_start:
-                start_line = line_num
-                start_column = char_start - current_char + 1
-                break
-            current_char += line_length
-
-        # Calculate end line
-        chunk_lines = chunk.split("\n")
-        end_line = start_line + len(chunk_lines) - 1
-
-        # Calculate end column
-        if len(chunk_lines) == 1:
-            end_column = start_column + len(chunk_lines[0]) - 1
+        start_line, start_column = line_index.line_column(start)
+        newlines = source.count("\n", start, end)
+        if newlines == 0:
+            end_column = start_column + end - start - 1
         else:
-            end_column = len(chunk_lines[-1])
-
+            end_column = end - source.rfind("\n", start, end) - 1
         return {
             "start_line": start_line,
-            "end_line": end_line,
+            "end_line": start_line + newlines,
             "start_column": start_column,
             "end_column": end_column,
-            "total_lines": len(chunk_lines),
+            "total_lines": newlines + 1,
         }
 
     async def parse(
@@ -65,41 +65,38 @@ class CodeParser(BaseParser[Text]):
         knowledge: Knowledge,
         content: Text,
     ) -> ParseResult:
+        return slices_to_texts(await self.parse_slices(knowledge, content))
+
+    async def parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: Text,
+    ) -> SliceParseResult:
         split_config = knowledge.split_config
         if not isinstance(split_config, BaseCodeSplitConfig):
             raise TypeError("knowledge.split_config must be of type CodeSplitConfig")
-        splitter = RecursiveCharacterTextSplitter.from_language(
-            split_config.language,
-            chunk_size=split_config.chunk_size,
-            chunk_overlap=split_config.chunk_overlap,
+        sizing = resolve_chunk_sizing(
+            knowledge, split_config.chunk_size, split_config.chunk_overlap
         )
-        split_docs = splitter.split_text(
-            content.content,
+        splitter = get_language_splitter(
+            split_config.language,
+            sizing.chunk_size,
+            sizing.chunk_overlap,
+            sizing.length_function,
         )
+        # language splitters keep separators, so every slice points into content
+        slices = splitter.split_slices(content.content)
 
-        # Create Text objects with proper metadata inheritance and position info
-        results: List[Union[Text, Image]] = []
-        current_position = 0
-
-        for chunk_index, doc in enumerate(split_docs):
-            # Start with knowledge.metadata as base
-            combined_metadata = {**knowledge.metadata}
-
-            # Add Text.metadata from content (loader/previous parser stage)
-            if content.metadata:
-                combined_metadata.update(content.metadata)
-
-            # Find the actual start position of this chunk in the original content
-            doc_start = content.content.find(doc, current_position)
-            if doc_start == -1:
-                # Fallback if exact match not found
-                doc_start = current_position
-
-            doc_end = doc_start + len(doc)
+        # Attach metadata with proper inheritance and position info
+        line_index = LineIndex(content.content)
+        # Text.metadata from content (loader/previous parser stage) over
+        # knowledge.metadata, shared by every chunk instead of copied
+        base_metadata = LayeredMetadata.stack(content.metadata, knowledge.metadata)
 
+        for chunk_index, chunk in enumerate(slices):
             # Calculate line-based position information
-            line_position = self._calculate_line_position(
-                content.content, doc, doc_start
+            line_position = self._span_line_position(
+                line_index, chunk.source, chunk.start, chunk.end
             )
             # Add processing information from current parser stage
             parser_metadata = {
@@ -108,16 +105,6 @@ class CodeParser(BaseParser[Text]):
                 "position": line_position,
             }
 
-            combined_metadata.update(parser_metadata)
-
-            results.append(Text(content=doc, metadata=combined_metadata))
-            current_position = doc_end
+            chunk.metadata = base_metadata.derive(parser_metadata)
 
-        return results
-
-    async def batch_parse(
-        self,
-        knowledge: Knowledge,
-        content_list: List[Text],
-    ) -> List[ParseResult]:
-        return [await self.parse(knowledge, content) for content in content_list]
+        return list(slices)
@@ -0,0 +1,381 @@
+"""
+Near-duplicate elimination between parsing and embedding.
+
+Repositories and document books repeat a lot of text (license headers,
+templates, vendored copies). ``ChunkDeduplicator`` fingerprints every parsed
+text chunk and looks it up in a per-space ``SignatureIndex`` before the chunk
+is embedded. A near-duplicate is either dropped or kept and linked to its
+original through ``_duplicate_of`` metadata; a linked chunk whose original is
+in the same batch reuses the original's embedding.
+
+Signatures are computed with NumPy from hashed character shingles of the
+normalised text:
+
+    minhash    ``num_perm`` minimum hash values; the fraction of equal values
+               estimates the Jaccard similarity of the shingle sets. Candidates
+               come from LSH over ``bands`` bands of the signature.
+    simhash    one 64-bit fingerprint; similarity is ``1 - hamming / 64`` and
+               candidates share one of eight 8-bit blocks.
+
+A space index can be saved to a directory and reloaded, so duplicates are also
+found across knowledge items ingested in different runs::
+
+    dedup.json     parameters and the reference of every signature
+    dedup.npz      signature matrix
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple, Union
+from urllib.parse import quote
+
+import numpy as np
+
+from whiskerrag_types.model.knowledge import Knowledge
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Image, Text, TextSlice
+
+DEDUP_FILE = "dedup.json"
+DEDUP_ARRAYS = "dedup.npz"
+
+SignatureMethod = Literal["minhash", "simhash"]
+DuplicateAction = Literal["drop", "link"]
+PathLike = Union[str, Path]
+
+DEFAULT_THRESHOLDS: Dict[str, float] = {"minhash": 0.8, "simhash": 0.9}
+# simhash candidates share one of these many blocks of the fingerprint, which
+# any pair differing in fewer bits than blocks does
+SIMHASH_BLOCKS = 8
+
+_SHINGLE_BASE = np.uint64(1000003)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser, spreads polynomial hashes over all 64 bits."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    mixed: np.ndarray = values ^ (values >> np.uint64(31))
+    return mixed
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """
+    Distinct 64-bit hashes of the ``shingle_size``-character shingles of
+    ``text`` after lower-casing and collapsing whitespace.
+    """
+    normalized = " ".join(text.lower().split())
+    if not normalized:
+        return np.empty(0, dtype=np.uint64)
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(
+        np.uint64
+    )
+    size = min(shingle_size, len(codes))
+    count = len(codes) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(size):
+            hashes = hashes * _SHINGLE_BASE + codes[offset : offset + count]
+        return np.unique(_mix64(hashes))
+
+
+class SignatureIndex:
+    """
+    Signatures of the chunks of one space, each with a JSON-serialisable
+    reference to where the chunk came from.
+    """
+
+    def __init__(
+        self,
+        method: SignatureMethod = "minhash",
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5,
+        threshold: Optional[float] = None,
+        seed: int = 0,
+    ) -> None:
+        if method == "minhash" and num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands")
+        self.method = method
+        self.num_perm = num_perm
+        self.bands = bands if method == "minhash" else SIMHASH_BLOCKS
+        self.shingle_size = shingle_size
+        self.threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # odd multipliers and offsets of the multiply-shift permutations
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self._bit_values = np.uint64(1) << np.arange(64, dtype=np.uint64)
+
+        self.signatures: List[np.ndarray] = []
+        self.refs: List[Dict[str, Any]] = []
+        self.alive: List[bool] = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._by_knowledge: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return sum(self.alive)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Signature of ``text``, None for text without any content."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not len(hashes):
+            return None
+        if self.method == "simhash":
+            ones = ((hashes[:, None] & self._bit_values) != 0).sum(axis=0)
+            fingerprint = np.bitwise_or.reduce(
+                self._bit_values[ones * 2 > len(hashes)], initial=np.uint64(0)
+            )
+            return np.array([fingerprint], dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            permuted = np.multiply.outer(self._a, hashes)
+            permuted += self._b[:, None]
+        # the high half of a multiply-shift hash is the well-mixed one
+        signature: np.ndarray = (permuted.min(axis=1) >> np.uint64(32)).astype(
+            np.uint32
+        )
+        return signature
+
+    def _keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        if self.method == "simhash":
+            width = 64 // SIMHASH_BLOCKS
+            value = int(signature[0])
+            return [
+                (
+                    band,
+                    ((value >> (width * band)) & ((1 << width) - 1)).to_bytes(
+                        width // 8, "little"
+                    ),
+                )
+                for band in range(SIMHASH_BLOCKS)
+            ]
+        rows = self.num_perm // self.bands
+        return [
+            (band, signature[band * rows : (band + 1) * rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def similarity(self, signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+        """Similarity of ``signature`` to each row of ``others``."""
+        if self.method == "simhash":
+            distance = np.array(
+                [bin(int(value)).count("1") for value in others[:, 0] ^ signature[0]]
+            )
+            return 1.0 - distance / 64.0
+        matches: np.ndarray = (others == signature).mean(axis=1)
+        return matches
+
+    def query(self, signature: np.ndarray) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Reference and similarity of the closest indexed near-duplicate."""
+        candidates = {
+            position
+            for key in self._keys(signature)
+            for position in self._buckets.get(key, ())
+            if self.alive[position]
+        }
+        if not candidates:
+            return None
+        positions = sorted(candidates)
+        scores = self.similarity(
+            signature, np.stack([self.signatures[p] for p in positions])
+        )
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return self.refs[positions[best]], float(scores[best])
+
+    def add(self, signature: np.ndarray, ref: Dict[str, Any]) -> None:
+        position = len(self.signatures)
+        self.signatures.append(signature)
+        self.refs.append(ref)
+        self.alive.append(True)
+        for key in self._keys(signature):
+            self._buckets.setdefault(key, []).append(position)
+        knowledge_id = ref.get("knowledge_id")
+        if knowledge_id is not None:
+            self._by_knowledge.setdefault(knowledge_id, []).append(position)
+
+    def discard_knowledge(self, knowledge_id: str) -> None:
+        """Forget the signatures of ``knowledge_id``, e.g. before re-ingesting it."""
+        for position in self._by_knowledge.pop(knowledge_id, []):
+            self.alive[position] = False
+
+    def to_header(self) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "shingle_size": self.shingle_size,
+            "threshold": self.threshold,
+            "seed": self.seed,
+        }
+
+    def save(self, directory: PathLike) -> None:
+        """Write the live signatures to ``directory``, dropping discarded ones."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        live = [p for p, alive in enumerate(self.alive) if alive]
+        header = self.to_header()
+        header["refs"] = [self.refs[p] for p in live]
+        with open(directory / DEDUP_FILE, "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False)
+        dtype = np.uint64 if self.method == "simhash" else np.uint32
+        width = 1 if self.method == "simhash" else self.num_perm
+        signatures = (
+            np.stack([self.signatures[p] for p in live])
+            if live
+            else np.empty((0, width), dtype=dtype)
+        )
+        np.savez(directory / DEDUP_ARRAYS, signatures=signatures)
+
+    @classmethod
+    def load(cls, directory: PathLike) -> Optional["SignatureIndex"]:
+        """The index saved in ``directory``, None if there is none."""
+        directory = Path(directory)
+        if not (directory / DEDUP_FILE).exists():
+            return None
+        with open(directory / DEDUP_FILE, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        index = cls(
+            header["method"],
+            int(header["num_perm"]),
+            int(header["bands"]),
+            int(header["shingle_size"]),
+            float(header["threshold"]),
+            int(header["seed"]),
+        )
+        with np.load(directory / DEDUP_ARRAYS) as arrays:
+            signatures = arrays["signatures"]
+        for signature, ref in zip(signatures, header["refs"]):
+            index.add(signature, ref)
+        return index
+
+
+class ChunkDeduplicator:
+    """
+    Drops or links near-duplicate text chunks of a knowledge item, against the
+    item itself and, with ``scope="space"``, against everything indexed for its
+    space. Space indexes live in memory and, with ``directory``, are loaded from
+    and written back to ``directory/<space id>`` by ``save()``.
+    """
+
+    def __init__(
+        self,
+        scope: Literal["knowledge", "space"] = "space",
+        action: DuplicateAction = "drop",
+        directory: Optional[PathLike] = None,
+        method: SignatureMethod = "minhash",
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5,
+        threshold: Optional[float] = None,
+    ) -> None:
+        self.scope = scope
+        self.action = action
+        self.directory = Path(directory) if directory is not None else None
+        self._params: Dict[str, Any] = {
+            "method": method,
+            "num_perm": num_perm,
+            "bands": bands,
+            "shingle_size": shingle_size,
+            "threshold": threshold,
+        }
+        self._indexes: Dict[str, SignatureIndex] = {}
+
+    def _space_directory(self, space_id: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        return self.directory / quote(space_id, safe="")
+
+    def index_for(self, space_id: str) -> SignatureIndex:
+        """The (lazily loaded) signature index of ``space_id``."""
+        index = self._indexes.get(space_id)
+        if index is None:
+            directory = self._space_directory(space_id)
+            index = SignatureIndex.load(directory) if directory else None
+            if index is None:
+                index = SignatureIndex(**self._params)
+            self._indexes[space_id] = index
+        return index
+
+    def deduplicate(
+        self, knowledge: Knowledge, items: Sequence[Union[Text, TextSlice, Image]]
+    ) -> List[Union[Text, TextSlice, Image]]:
+        """
+        ``items`` without (``action="drop"``) or with linked (``"link"``)
+        near-duplicates; images pass through untouched. Text chunks are indexed
+        under ``knowledge_id`` and their position among the text items.
+        """
+        if self.scope == "space":
+            index = self.index_for(knowledge.space_id)
+            index.discard_knowledge(knowledge.knowledge_id)
+        else:
+            index = SignatureIndex(**self._params)
+        kept: List[Union[Text, TextSlice, Image]] = []
+        text_idx = -1
+        for item in items:
+            if not isinstance(item, (Text, TextSlice)):
+                kept.append(item)
+                continue
+            text_idx += 1
+            signature = index.signature(item.content)
+            if signature is None:
+                kept.append(item)
+                continue
+            match = index.query(signature)
+            if match is None:
+                index.add(
+                    signature,
+                    {
+                        "knowledge_id": knowledge.knowledge_id,
+                        "knowledge_name": knowledge.knowledge_name,
+                        "chunk_idx": text_idx,
+                    },
+                )
+                kept.append(item)
+                continue
+            if self.action == "link":
+                ref, similarity = match
+                metadata = LayeredMetadata.stack(item.metadata).derive(
+                    {"_duplicate_of": {**ref, "similarity": round(similarity, 4)}}
+                )
+                if isinstance(item, TextSlice):
+                    kept.append(TextSlice(item.source, item.start, item.end, metadata))
+                else:
+                    kept.append(Text(content=item.content, metadata=metadata.to_dict()))
+        return kept
+
+    def save(self) -> None:
+        """Persist every space index loaded or built so far."""
+        if self.directory is None:
+            raise ValueError("ChunkDeduplicator has no directory to save to")
+        for space_id, index in self._indexes.items():
+            directory = self._space_directory(space_id)
+            assert directory is not None
+            index.save(directory)
+
+
+def reused_embeddings(
+    knowledge: Knowledge, items: Sequence[Union[Text, TextSlice]]
+) -> List[Optional[int]]:
+    """
+    For each of the deduplicated text ``items`` of ``knowledge``, the position
+    of the earlier item whose embedding it can reuse (it was linked to it as a
+    near-duplicate), else None.
+    """
+    sources: List[Optional[int]] = []
+    for position, item in enumerate(items):
+        ref = item.metadata.get("_duplicate_of")
+        source = None
+        if isinstance(ref, dict) and ref.get("knowledge_id") == knowledge.knowledge_id:
+            chunk_idx = ref.get("chunk_idx")
+            if (
+                isinstance(chunk_idx, int)
+                and 0 <= chunk_idx < position
+                and sources[chunk_idx] is None
+            ):
+                source = chunk_idx
+        sources.append(source)
+    return sources
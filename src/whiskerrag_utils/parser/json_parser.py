@@ -1,12 +1,23 @@
 import json
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable
 
 from langchain_text_splitters import RecursiveJsonSplitter
 
-from whiskerrag_types.interface.parser_interface import BaseParser, ParseResult
+from whiskerrag_types.interface.parser_interface import (
+    BaseParser,
+    ParseResult,
+    SliceParseResult,
+    slices_to_texts,
+)
 from whiskerrag_types.model import JSONSplitConfig, Knowledge
 from whiskerrag_types.model.knowledge import KnowledgeTypeEnum
-from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Text, TextSlice
+from whiskerrag_utils.parser.json_stream import (
+    JSONChunk,
+    iter_json_chunks,
+    iter_jsonl_chunks,
+)
 from whiskerrag_utils.registry import RegisterTypeEnum, register
 
 
@@ -49,10 +60,28 @@ class JSONParser(BaseParser[Text]):
         content: Text,
     ) -> ParseResult:
         """Splits JSON content into smaller chunks based on the provided configuration."""
+        return slices_to_texts(await self.parse_slices(knowledge, content))
+
+    async def parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: Text,
+    ) -> SliceParseResult:
         split_config = knowledge.split_config
         if not isinstance(split_config, JSONSplitConfig):
             raise TypeError("knowledge.split_config must be of type JSONSplitConfig")
 
+        if split_config.mode == "stream":
+            chunks = iter_json_chunks(content.content, split_config.max_chunk_size)
+            return self._to_slices(content, chunks)
+        if split_config.mode == "jsonl":
+            chunks = iter_jsonl_chunks(
+                content.content,
+                split_config.max_chunk_size,
+                group_records=split_config.group_records,
+            )
+            return self._to_slices(content, chunks)
+
         # Use the new helper function for better JSON compatibility
         json_content = parse_json_content(content.content)
 
@@ -63,16 +92,19 @@ class JSONParser(BaseParser[Text]):
         split_texts = splitter.split_text(
             json_content, convert_lists=True, ensure_ascii=False
         )
-        result: ParseResult = []
-        for idx, text in enumerate(split_texts):
-            metadata = content.metadata.copy()
-            metadata["_idx"] = idx
-            result.append(Text(content=text, metadata=metadata))
-        return result
-
-    async def batch_parse(
-        self,
-        knowledge: Knowledge,
-        content_list: List[Text],
-    ) -> List[ParseResult]:
-        return [await self.parse(knowledge, content) for content in content_list]
+        shared_metadata = LayeredMetadata.stack(content.metadata)
+        return [
+            TextSlice(text, metadata=shared_metadata.derive({"_idx": idx}))
+            for idx, text in enumerate(split_texts)
+        ]
+
+    def _to_slices(
+        self, content: Text, chunks: Iterable[JSONChunk]
+    ) -> SliceParseResult:
+        shared_metadata = LayeredMetadata.stack(content.metadata)
+        return [
+            TextSlice(
+                text, metadata=shared_metadata.derive({"_idx": idx, "_json_path": path})
+            )
+            for idx, (text, path) in enumerate(chunks)
+        ]
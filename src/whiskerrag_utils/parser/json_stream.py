@@ -0,0 +1,280 @@
+"""
+Incremental JSON / JSON Lines chunking.
+
+``iter_json_chunks`` walks a JSON document from its text instead of loading it:
+a value whose source is small enough is decoded on its own, larger arrays and
+objects are entered and their members grouped into chunks of at most
+``max_chunk_size`` characters (compact JSON). Only the members of the group
+being built are ever decoded at once, so memory follows the chunk size rather
+than the document size. Every chunk comes with the JSON path of what it holds,
+e.g. ``$.data.items[3:7]`` for a run of array elements.
+
+``iter_jsonl_chunks`` does the same for newline-delimited JSON, one record per
+chunk or records packed together; a record too large for one chunk is walked
+like a document.
+"""
+
+import json
+import re
+from typing import Any, Generator, Iterator, List, Optional, Tuple
+
+# (chunk content, JSON path)
+JSONChunk = Tuple[str, str]
+
+# containers whose source closes within this many times max_chunk_size are
+# decoded and then measured compactly, so indentation alone does not force a split
+DECODE_SLACK = 4
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# everything up to the next bracket: other characters and whole strings
+_SKIP = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+_decoder = json.JSONDecoder()
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _dumps(value: object) -> str:
+    return _encoder.encode(value)
+
+
+def _skip(text: str, pos: int) -> int:
+    match = _WHITESPACE.match(text, pos)
+    return match.end() if match else pos
+
+
+def _error(message: str) -> ValueError:
+    return ValueError(f"Invalid JSON content provided for splitting: {message}")
+
+
+def _decode(text: str, pos: int) -> Tuple[Any, int]:
+    try:
+        return _decoder.raw_decode(text, pos)
+    except json.JSONDecodeError as e:
+        raise _error(str(e))
+
+
+def _container_end(text: str, pos: int, limit: int) -> Optional[int]:
+    """
+    Offset right after the array or object at ``pos``, or None if it does not
+    close within ``limit`` characters. Only brackets and strings are visited.
+    """
+    stop = min(pos + limit, len(text))
+    depth = 0
+    while pos < stop:
+        char = text[pos]
+        if char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        elif char == '"':
+            return None  # a string cut off by the scan
+        skipped = _SKIP.match(text, pos + 1, stop)
+        assert skipped is not None  # the pattern also matches the empty string
+        pos = skipped.end()
+    return None
+
+
+def _decode_container(text: str, pos: int, limit: int) -> Optional[Tuple[Any, int]]:
+    """
+    Decode the array or object at ``pos`` if its source fits in ``limit``
+    characters. The decoder is only run once its end is known, so the work per
+    member follows its own size rather than ``limit``.
+    """
+    end = _container_end(text, pos, limit)
+    if end is None:
+        if pos + limit >= len(text):
+            _decoder.raw_decode(text, pos)  # unterminated: raise its error
+        # too large for one chunk (or broken further in): walk it instead
+        return None
+    return _decoder.raw_decode(text, pos)
+
+
+def _member_path(path: str, key: str) -> str:
+    if _IDENTIFIER.match(key):
+        return f"{path}.{key}"
+    return f"{path}[{_dumps(key)}]"
+
+
+class _Group:
+    """Consecutive members of one container packed into chunks."""
+
+    def __init__(self, is_array: bool, path: str, max_chunk_size: int) -> None:
+        self.is_array = is_array
+        self.path = path
+        self.max_chunk_size = max_chunk_size
+        self.pieces: List[str] = []
+        self.size = 2  # brackets
+        self.first = 0
+        self.last = 0
+        self.keys: List[str] = []
+
+    def fits(self, piece: str) -> bool:
+        extra = len(piece) + (1 if self.pieces else 0)
+        return not self.pieces or self.size + extra <= self.max_chunk_size
+
+    def add(self, piece: str, index: int, key: Optional[str]) -> None:
+        if not self.pieces:
+            self.first = index
+        self.size += len(piece) + (1 if self.pieces else 0)
+        self.pieces.append(piece)
+        self.last = index
+        if key is not None:
+            self.keys.append(key)
+
+    def flush(self) -> Iterator[JSONChunk]:
+        if not self.pieces:
+            return
+        if self.is_array:
+            content = "[" + ",".join(self.pieces) + "]"
+            if self.first == self.last:
+                path = f"{self.path}[{self.first}]"
+            else:
+                path = f"{self.path}[{self.first}:{self.last + 1}]"
+        else:
+            content = "{" + ",".join(self.pieces) + "}"
+            path = (
+                _member_path(self.path, self.keys[0])
+                if len(self.keys) == 1
+                else self.path
+            )
+        self.pieces, self.keys, self.size = [], [], 2
+        yield content, path
+
+
+def _piece(value: Any, key: Optional[str]) -> str:
+    return _dumps(value) if key is None else f"{_dumps(key)}:{_dumps(value)}"
+
+
+def _walk(
+    text: str, pos: int, path: str, max_chunk_size: int
+) -> Generator[JSONChunk, None, int]:
+    """
+    Chunks of the array or object starting at ``text[pos]``; returns the offset
+    right after it.
+    """
+    is_array = text[pos] == "["
+    close = "]" if is_array else "}"
+    group = _Group(is_array, path, max_chunk_size)
+    limit = max_chunk_size * DECODE_SLACK
+    pos = _skip(text, pos + 1)
+    index = 0
+    if text[pos : pos + 1] == close:
+        return pos + 1
+    while True:
+        key: Optional[str] = None
+        if is_array:
+            member_path = f"{path}[{index}]"
+        else:
+            if text[pos : pos + 1] != '"':
+                raise _error(f"expected a key at char {pos}")
+            key, pos = _decode(text, pos)
+            pos = _skip(text, pos)
+            if text[pos : pos + 1] != ":":
+                raise _error(f"expected ':' at char {pos}")
+            pos = _skip(text, pos + 1)
+            member_path = _member_path(path, key)
+
+        piece: Optional[str] = None
+        if text[pos : pos + 1] in ("[", "{"):
+            try:
+                decoded = _decode_container(text, pos, limit)
+            except json.JSONDecodeError as e:
+                raise _error(str(e))
+            if decoded is not None:
+                value, end = decoded
+                piece = _piece(value, key)
+                if len(piece) > max_chunk_size:
+                    piece = None
+        else:
+            # scalars cannot be split; an oversized one becomes its own chunk
+            value, end = _decode(text, pos)
+            piece = _piece(value, key)
+        if piece is None:
+            # too large for one chunk: emit what is pending and descend
+            yield from group.flush()
+            end = yield from _walk(text, pos, member_path, max_chunk_size)
+        else:
+            if not group.fits(piece):
+                yield from group.flush()
+            group.add(piece, index, key)
+
+        index += 1
+        pos = _skip(text, end)
+        char = text[pos : pos + 1]
+        if char == ",":
+            pos = _skip(text, pos + 1)
+        elif char == close:
+            break
+        else:
+            raise _error(f"expected ',' or '{close}' at char {pos}")
+    yield from group.flush()
+    return pos + 1
+
+
+def iter_json_chunks(text: str, max_chunk_size: int) -> Iterator[JSONChunk]:
+    """
+    Chunks of the JSON document ``text``, whose top level must be an array or
+    an object. A single scalar larger than ``max_chunk_size`` becomes a chunk of
+    its own.
+    """
+    pos = _skip(text, 1 if text.startswith("\ufeff") else 0)
+    if text[pos : pos + 1] not in ("[", "{"):
+        raise ValueError("JSON content must be a dictionary or array.")
+    end = yield from _walk(text, pos, "$", max_chunk_size)
+    if _skip(text, end) != len(text):
+        raise _error("extra data after the JSON document")
+
+
+def iter_jsonl_chunks(
+    text: str, max_chunk_size: int, group_records: bool = False
+) -> Iterator[JSONChunk]:
+    """
+    Chunks of newline-delimited JSON: one per record, or consecutive records
+    joined by newlines up to ``max_chunk_size`` when ``group_records`` is set.
+    Blank lines are skipped; records keep their index among non-blank lines.
+    """
+    pending: List[str] = []
+    pending_size = 0
+    first = 0
+
+    def flush() -> Iterator[JSONChunk]:
+        nonlocal pending, pending_size
+        if pending:
+            last = first + len(pending) - 1
+            path = f"$[{first}]" if first == last else f"$[{first}:{last + 1}]"
+            yield "\n".join(pending), path
+            pending, pending_size = [], 0
+
+    index = 0
+    start = 0
+    line_number = 0
+    length = len(text)
+    while start <= length:
+        end = text.find("\n", start)
+        if end < 0:
+            end = length
+        line_number += 1
+        line = text[start:end].strip()
+        start = end + 1
+        if not line:
+            continue
+        try:
+            record = _dumps(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON record on line {line_number}: {e}")
+        if len(record) > max_chunk_size and record[:1] in ("[", "{"):
+            yield from flush()
+            yield from _walk(record, 0, f"$[{index}]", max_chunk_size)
+        elif not group_records:
+            yield record, f"$[{index}]"
+        else:
+            if pending and pending_size + 1 + len(record) > max_chunk_size:
+                yield from flush()
+            if not pending:
+                first = index
+            pending_size += len(record) + (1 if pending else 0)
+            pending.append(record)
+        index += 1
+    yield from flush()
@@ -1,14 +1,42 @@
-import re
-from typing import Dict, List
-
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
-from whiskerrag_types.interface.parser_interface import BaseParser, ParseResult
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence, Tuple, TypeVar, Union
+
+from whiskerrag_types.interface.parser_interface import (
+    BaseParser,
+    ParseResult,
+    SliceParseResult,
+    slices_to_texts,
+)
 from whiskerrag_types.model import Knowledge, MarkdownSplitConfig
 from whiskerrag_types.model.knowledge import KnowledgeTypeEnum
-from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Text, TextSlice
+from whiskerrag_utils.parser.markdown_tokenizer import (
+    CodeBlock,
+    Heading,
+    iter_sections,
+)
+from whiskerrag_utils.parser.span_splitter import SpanSplitter, TextSpan
+from whiskerrag_utils.parser.splitter_cache import get_text_splitter
+from whiskerrag_utils.parser.token_length import resolve_chunk_sizing
 from whiskerrag_utils.registry import RegisterTypeEnum, register
 
+Block = TypeVar("Block", bound=Union[CodeBlock, TextSpan])
+
+
+def _contained(
+    blocks: Sequence[Block], starts: List[int], start: int, end: int
+) -> List[Block]:
+    """Blocks (sorted by start) lying entirely inside ``[start, end)``."""
+    found = []
+    for i in range(bisect_left(starts, start), len(blocks)):
+        block = blocks[i]
+        if block.start >= end:
+            break
+        if block.end <= end:
+            found.append(block)
+    return found
+
 
 @register(RegisterTypeEnum.PARSER, KnowledgeTypeEnum.MARKDOWN)
 class MarkdownParser(BaseParser[Text]):
@@ -17,119 +45,76 @@ class MarkdownParser(BaseParser[Text]):
         knowledge: Knowledge,
         content: Text,
     ) -> ParseResult:
+        return slices_to_texts(await self.parse_slices(knowledge, content))
+
+    async def parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: Text,
+    ) -> SliceParseResult:
         split_config = knowledge.split_config
         if not isinstance(split_config, MarkdownSplitConfig):
             raise TypeError(
                 "knowledge.split_config must be of type MarkdownSplitConfig"
             )
-        texts_to_process = (
-            self._split_by_headers(content)
-            if split_config.extract_header_first
-            else [content]
-        )
-        final_chunks: ParseResult = []
-        splitter = self._create_recursive_splitter(split_config)
-
-        for text_item in texts_to_process:
-            split_texts = splitter.split_text(text_item.content)
-            chunks = []
-            for split_text in split_texts:
-                code_list = self._extract_code_list(split_text)
-                chunk_metadata = text_item.metadata.copy()
-                chunk_metadata["_code_list"] = code_list
-                chunks.append(Text(content=split_text, metadata=chunk_metadata))
-
-            final_chunks.extend(chunks)
-        return final_chunks
-
-    def _extract_code_list(self, text: str) -> List[str]:
-        code_list = []
-        # 从 markdown 中提取 code
-        code_match = re.findall(r"```(.*?)```", text, re.DOTALL)
-        for code in code_match:
-            code_list.append(code.strip())
-        return code_list
-
-    def _split_by_headers(self, content: Text) -> List[Text]:
-        chunks = []
-        current_chunk: List[str] = []
-        current_headers: List[dict] = []
-
-        lines = content.content.split("\n")
-
-        for line in lines:
-            header_match = re.match(r"^(#{1,6})\s+(.+)$", line)
-            if header_match:
-                if current_chunk:
-                    chunks.append(
-                        self._create_text_chunk(
-                            content="\n".join(current_chunk),
-                            headers=current_headers.copy(),
-                            original_metadata=content.metadata,
-                        )
-                    )
-                    current_chunk = []
-
-                level = header_match.group(1)
-                title = header_match.group(2)
-
-                while current_headers and len(level) <= len(
-                    current_headers[-1]["level"]
-                ):
-                    current_headers.pop()
-
-                current_headers.append(
-                    {"level": level, "title": title, "full_title": line.strip()}
+        extract_header_first = bool(split_config.extract_header_first)
+        splitter = self._create_recursive_splitter(knowledge, split_config)
+        text = content.content
+        final_chunks: SliceParseResult = []
+
+        shared_metadata = LayeredMetadata.stack(content.metadata)
+        for section in iter_sections(text, split_on_headings=extract_header_first):
+            section_metadata = shared_metadata
+            if extract_header_first:
+                # one header layer shared by the chunks of the section
+                section_metadata = LayeredMetadata.stack(
+                    self._header_metadata(section.headings), shared_metadata
                 )
+            code_starts = [block.start for block in section.code_blocks]
+            table_starts = [table.start for table in section.tables]
+            for span in splitter.split_spans(text[section.start : section.end]):
+                chunk_start = section.start + span.start
+                chunk_end = section.start + span.end
+                chunk_metadata = section_metadata.derive()
+                chunk_metadata["_code_list"] = [
+                    block.code.strip()
+                    for block in _contained(
+                        section.code_blocks, code_starts, chunk_start, chunk_end
+                    )
+                ]
+                chunk_metadata["_table_list"] = [
+                    table.text
+                    for table in _contained(
+                        section.tables, table_starts, chunk_start, chunk_end
+                    )
+                ]
+                final_chunks.append(TextSlice(span.text, metadata=chunk_metadata))
+        return final_chunks
 
-                current_chunk.append(line)
-            else:
-                current_chunk.append(line)
-
-        if current_chunk:
-            chunks.append(
-                self._create_text_chunk(
-                    content="\n".join(current_chunk),
-                    headers=current_headers.copy(),
-                    original_metadata=content.metadata,
-                )
-            )
-
-        return chunks
-
-    def _create_text_chunk(
-        self, content: str, headers: List[Dict], original_metadata: Dict
-    ) -> Text:
-        metadata = original_metadata.copy()
-        metadata.update(
-            {
-                "headers": headers,
-                "level": len(headers[-1]["level"]) if headers else 0,
-                "header_path": (
-                    " > ".join(h["title"] for h in headers) if headers else ""
-                ),
-                "is_header_chunk": bool(headers),
-            }
-        )
-
-        return Text(content=content, metadata=metadata)
+    def _header_metadata(self, headings: Tuple[Heading, ...]) -> Dict[str, Any]:
+        headers = [
+            {"level": "#" * h.level, "title": h.title, "full_title": h.line}
+            for h in headings
+        ]
+        return {
+            "headers": headers,
+            "level": headings[-1].level if headings else 0,
+            "header_path": " > ".join(h.title for h in headings),
+            "is_header_chunk": bool(headings),
+        }
 
     def _create_recursive_splitter(
-        self, config: MarkdownSplitConfig
-    ) -> RecursiveCharacterTextSplitter:
-        if "" not in config.separators:
-            config.separators.append("")
-        return RecursiveCharacterTextSplitter(
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap,
-            separators=config.separators,
+        self, knowledge: Knowledge, config: MarkdownSplitConfig
+    ) -> SpanSplitter:
+        sizing = resolve_chunk_sizing(
+            knowledge, config.chunk_size, config.chunk_overlap
+        )
+        return get_text_splitter(
+            sizing.chunk_size,
+            sizing.chunk_overlap,
+            # an explicit empty list means "characters only", not the defaults
+            config.separators or [""],
             is_separator_regex=config.is_separator_regex,
-            keep_separator=config.keep_separator or False,
+            keep_separator=config.keep_separator,
+            length_function=sizing.length_function,
         )
-
-    async def batch_parse(
-        self,
-        knowledge: Knowledge,
-        content_list: List[Text],
-    ) -> List[ParseResult]:
-        return [await self.parse(knowledge, content) for content in content_list]
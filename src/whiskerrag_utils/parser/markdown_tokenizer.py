@@ -0,0 +1,174 @@
+"""
+Single-pass, line-streaming Markdown structure tokenizer.
+
+``iter_sections`` walks the text once, line by line, tracking the heading stack,
+fenced code blocks and pipe tables, and yields ``MarkdownSection`` objects that
+refer to the source by offset. Header-like lines inside fenced code are code,
+not headings, and no line is matched more than once, so large documents
+(multi-megabyte API references) are tokenized in linear time.
+
+Only the structure ``MarkdownParser`` needs is recognised: ATX headings
+(``#`` to ``######``), backtick/tilde fences and tables with a delimiter row.
+"""
+
+import re
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from whiskerrag_utils.parser.span_splitter import TextSpan
+
+_HEADING = re.compile(r" {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(r"( {0,3})(`{3,}|~{3,})(.*)$")
+_TABLE_DELIMITER = re.compile(
+    r"[ \t]*\|?[ \t]*:?-+:?[ \t]*(\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$"
+)
+
+
+class Heading(NamedTuple):
+    level: int
+    title: str
+    # the heading line, stripped
+    line: str
+
+
+class CodeBlock(NamedTuple):
+    """A fenced code block; ``[start, end)`` runs from fence to closing fence."""
+
+    start: int
+    end: int
+    language: str
+    code: str
+
+
+class MarkdownSection(NamedTuple):
+    """
+    ``[start, end)`` of one section in the source, the heading path leading to
+    it (its own heading last) and the code blocks and tables it contains.
+    """
+
+    start: int
+    end: int
+    headings: Tuple[Heading, ...]
+    code_blocks: List[CodeBlock]
+    tables: List[TextSpan]
+
+
+def _lines(text: str) -> Iterator[Tuple[int, int]]:
+    """``(start, end)`` of every line, without its newline."""
+    start = 0
+    length = len(text)
+    while True:
+        end = text.find("\n", start)
+        if end < 0:
+            yield start, length
+            return
+        yield start, end
+        start = end + 1
+
+
+def iter_sections(
+    text: str, split_on_headings: bool = True
+) -> Iterator[MarkdownSection]:
+    """
+    Yield the sections of ``text`` in order. A section starts at a heading line
+    and ends right before the newline preceding the next heading; the first
+    section holds whatever precedes the first heading (possibly nothing). With
+    ``split_on_headings=False`` the whole text is one section without headings.
+    """
+    stack: List[Heading] = []
+    section_start = 0
+    code_blocks: List[CodeBlock] = []
+    tables: List[TextSpan] = []
+
+    # open fence: (marker char, marker length, fence start, language, body start)
+    fence: Optional[Tuple[str, int, int, str, int]] = None
+    table_start = -1
+    table_end = -1
+    # (first non-blank offset, end) of the previous line, a possible table header
+    previous: Optional[Tuple[int, int]] = None
+
+    def close_table() -> None:
+        nonlocal table_start
+        if table_start >= 0:
+            tables.append(TextSpan(text[table_start:table_end], table_start, table_end))
+            table_start = -1
+
+    for start, end in _lines(text):
+        line = text[start:end]
+
+        if fence is not None:
+            marker, marker_length, fence_start, language, body_start = fence
+            stripped = line.strip()
+            if (
+                stripped.startswith(marker * marker_length)
+                and stripped == marker * len(stripped)
+                and len(line) - len(line.lstrip(" ")) <= 3
+            ):
+                code_blocks.append(
+                    CodeBlock(
+                        fence_start,
+                        end,
+                        language,
+                        text[body_start : max(body_start, start - 1)],
+                    )
+                )
+                fence = None
+            continue
+
+        first = line.lstrip(" ")[:1]
+        if first in ("`", "~"):
+            match = _FENCE.match(line)
+            if match and not (match.group(2)[0] == "`" and "`" in match.group(3)):
+                close_table()
+                previous = None
+                marker = match.group(2)
+                info = match.group(3).split()
+                fence = (
+                    marker[0],
+                    len(marker),
+                    start + len(match.group(1)),
+                    info[0] if info else "",
+                    min(end + 1, len(text)),
+                )
+                continue
+
+        if first == "#":
+            match = _HEADING.match(line)
+            if match:
+                close_table()
+                previous = None
+                if split_on_headings:
+                    if start > 0:
+                        yield MarkdownSection(
+                            section_start,
+                            start - 1,
+                            tuple(stack),
+                            code_blocks,
+                            tables,
+                        )
+                        code_blocks, tables = [], []
+                    section_start = start
+                    level = len(match.group(1))
+                    while stack and stack[-1].level >= level:
+                        stack.pop()
+                    stack.append(Heading(level, match.group(2), line.strip()))
+                continue
+
+        if "|" in line:
+            if table_start >= 0:
+                table_end = end
+            elif previous is not None and _TABLE_DELIMITER.match(line):
+                table_start = previous[0]
+                table_end = end
+            previous = (start + len(line) - len(line.lstrip()), end)
+        else:
+            close_table()
+            previous = None
+
+    if fence is not None:
+        # an unclosed fence runs to the end of the document
+        _, _, fence_start, language, body_start = fence
+        code_blocks.append(
+            CodeBlock(fence_start, len(text), language, text[body_start:])
+        )
+    close_table()
+    yield MarkdownSection(section_start, len(text), tuple(stack), code_blocks, tables)
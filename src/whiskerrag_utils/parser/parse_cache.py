@@ -0,0 +1,276 @@
+"""
+Cache of parse results between loading and embedding.
+
+Retried tasks, re-decomposed repositories and spaces sharing a repository
+parse the same content with the same split config again and again.
+``ParseCache`` keeps the parse result of a loaded ``Text`` under a key made of
+
+    - the sha256 of the content,
+    - the canonical hash of the split config (``split_config_hash``),
+    - the parser class and its ``cache_version``,
+    - the knowledge name and embedding model, which some parsers read
+      (heading context, token-based chunk sizes),
+
+in an in-memory LRU and, with ``directory``, in one compressed ``.npz`` file
+per entry on disk, so a rerun in a new process skips straight to embedding.
+
+Entries are stored compactly: chunks cut from the content are kept as
+``(start, end)`` offsets into it, and only what the parser added to each
+chunk's metadata is kept; the metadata inherited from the content and the
+knowledge is stacked back on a hit. Results holding anything other than text
+chunks (images) are not cached. Metadata that is not JSON serialisable keeps
+an entry in memory only.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from whiskerrag_types.interface.parser_interface import BaseParser, SliceParseResult
+from whiskerrag_types.model.knowledge import Knowledge
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Text, TextSlice
+from whiskerrag_utils.parser.splitter_cache import split_config_hash
+
+logger = logging.getLogger("whisker")
+
+# bumped when the entry layout changes, so old disk entries are never read
+PARSE_CACHE_FORMAT = "1"
+
+PathLike = Union[str, Path]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def parser_version(parser: BaseParser) -> str:
+    parser_cls = type(parser)
+    return f"{parser_cls.__module__}.{parser_cls.__qualname__}:{parser.cache_version}"
+
+
+class _Entry:
+    """
+    Row ``i`` of ``spans`` is ``(start, end)`` into the content, or
+    ``(-1, j)`` for a chunk whose text is ``texts[j]``. ``metadata[i]`` holds
+    what the parser set on chunk ``i`` and ``hidden`` the inherited keys it
+    removed, by chunk.
+    """
+
+    __slots__ = ("spans", "texts", "metadata", "hidden")
+
+    def __init__(
+        self,
+        spans: np.ndarray,
+        texts: List[str],
+        metadata: List[Dict[str, Any]],
+        hidden: Dict[int, List[str]],
+    ) -> None:
+        self.spans = spans
+        self.texts = texts
+        self.metadata = metadata
+        self.hidden = hidden
+
+
+class ParseCache:
+    def __init__(
+        self, max_entries: int = 1024, directory: Optional[PathLike] = None
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory is not None else None
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(knowledge: Knowledge, content: Text, parser: BaseParser) -> str:
+        parts = [
+            PARSE_CACHE_FORMAT,
+            content_hash(content.content),
+            split_config_hash(knowledge.split_config),
+            parser_version(parser),
+            str(knowledge.knowledge_name),
+            str(knowledge.embedding_model_name),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(
+        self, knowledge: Knowledge, content: Any, parser: BaseParser
+    ) -> Optional[SliceParseResult]:
+        """The cached parse result of ``content``, None on a miss."""
+        if not isinstance(content, Text):
+            return None
+        key = self.make_key(knowledge, content, parser)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            entry = self._read(key)
+            if entry is not None:
+                self._remember(key, entry)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._restore(knowledge, content, entry)
+
+    def put(
+        self,
+        knowledge: Knowledge,
+        content: Any,
+        parser: BaseParser,
+        result: SliceParseResult,
+    ) -> bool:
+        """Store ``result``; False when it cannot be cached."""
+        if not isinstance(content, Text):
+            return False
+        slices = [item for item in result if isinstance(item, TextSlice)]
+        if len(slices) != len(result):
+            return False
+        key = self.make_key(knowledge, content, parser)
+        entry = self._compact(knowledge, content, slices)
+        self._remember(key, entry)
+        self._write(key, entry)
+        return True
+
+    async def batch_parse_slices(
+        self,
+        parser: BaseParser,
+        knowledge: Knowledge,
+        contents: List[Any],
+        executor: Optional[Executor] = None,
+    ) -> List[SliceParseResult]:
+        """``parser.batch_parse_slices`` that only parses the cache misses."""
+        results = [self.get(knowledge, content, parser) for content in contents]
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if missing:
+            parsed = await parser.batch_parse_slices(
+                knowledge, [contents[i] for i in missing], executor=executor
+            )
+            for i, result in zip(missing, parsed):
+                self.put(knowledge, contents[i], parser, result)
+                results[i] = result
+        return [result or [] for result in results]
+
+    def clear(self) -> None:
+        """Empty the in-memory tier; disk entries are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _base_metadata(knowledge: Knowledge, content: Text) -> LayeredMetadata:
+        return LayeredMetadata.stack(content.metadata, knowledge.metadata)
+
+    def _compact(
+        self, knowledge: Knowledge, content: Text, result: List[TextSlice]
+    ) -> _Entry:
+        inherited = self._base_metadata(knowledge, content).to_dict()
+        spans = np.empty((len(result), 2), dtype=np.int64)
+        texts: List[str] = []
+        metadata: List[Dict[str, Any]] = []
+        hidden: Dict[int, List[str]] = {}
+        for i, item in enumerate(result):
+            if item.source is content.content:
+                spans[i] = (item.start, item.end)
+            else:
+                spans[i] = (-1, len(texts))
+                texts.append(item.content)
+            chunk_metadata = item.metadata or {}
+            metadata.append(
+                {
+                    key: value
+                    for key, value in chunk_metadata.items()
+                    if key not in inherited
+                    or (inherited[key] is not value and inherited[key] != value)
+                }
+            )
+            removed = [key for key in inherited if key not in chunk_metadata]
+            if removed:
+                hidden[i] = removed
+        return _Entry(spans, texts, metadata, hidden)
+
+    def _restore(
+        self, knowledge: Knowledge, content: Text, entry: _Entry
+    ) -> SliceParseResult:
+        base = self._base_metadata(knowledge, content)
+        result: SliceParseResult = []
+        for i, (start, end) in enumerate(entry.spans.tolist()):
+            metadata = base.derive(entry.metadata[i])
+            for key in entry.hidden.get(i, ()):
+                metadata.pop(key, None)
+            if start < 0:
+                text = entry.texts[end]
+                result.append(TextSlice(text, 0, len(text), metadata))
+            else:
+                result.append(TextSlice(content.content, start, end, metadata))
+        return result
+
+    def _path(self, key: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        return self.directory / key[:2] / f"{key}.npz"
+
+    def _write(self, key: str, entry: _Entry) -> None:
+        path = self._path(key)
+        if path is None or path.exists():
+            return
+        try:
+            extra = json.dumps(
+                {
+                    "texts": entry.texts,
+                    "metadata": entry.metadata,
+                    "hidden": {str(i): keys for i, keys in entry.hidden.items()},
+                },
+                ensure_ascii=False,
+            ).encode("utf-8")
+        except (TypeError, ValueError):
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            with open(temp, "wb") as f:
+                np.savez_compressed(
+                    f, spans=entry.spans, extra=np.frombuffer(extra, dtype=np.uint8)
+                )
+            os.replace(temp, path)
+        except OSError as e:
+            logger.warning(f"Could not write parse cache entry {path}: {e}")
+            if temp.exists():
+                temp.unlink()
+
+    def _read(self, key: str) -> Optional[_Entry]:
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            with np.load(path) as arrays:
+                spans = arrays["spans"]
+                extra = json.loads(arrays["extra"].tobytes().decode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {path}: {e}")
+            return None
+        hidden = {int(i): keys for i, keys in extra["hidden"].items()}
+        return _Entry(spans, extra["texts"], extra["metadata"], hidden)
@@ -0,0 +1,61 @@
+from whiskerrag_types.interface.parser_interface import (
+    BaseParser,
+    ParseResult,
+    SliceParseResult,
+    slices_to_texts,
+)
+from whiskerrag_types.model.knowledge import Knowledge
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.splitter import PDFSplitConfig
+from whiskerrag_utils.parser.splitter_cache import get_text_splitter
+from whiskerrag_utils.parser.token_length import resolve_chunk_sizing
+from whiskerrag_utils.registry import RegisterTypeEnum, register
+
+# extracted page text has no markup: paragraphs, lines, then words
+PDF_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+@register(RegisterTypeEnum.PARSER, "pdf")
+class PDFParser(BaseParser[Text]):
+    """
+    Splits the text of one PDF page (the cloud storage loader loads a PDF as
+    one ``Text`` per page), so chunks never span pages and keep the page's
+    ``page_number`` in their metadata.
+    """
+
+    async def parse(
+        self,
+        knowledge: Knowledge,
+        content: Text,
+    ) -> ParseResult:
+        return slices_to_texts(await self.parse_slices(knowledge, content))
+
+    async def parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: Text,
+    ) -> SliceParseResult:
+        split_config = knowledge.split_config
+        if not isinstance(split_config, PDFSplitConfig):
+            raise TypeError("knowledge.split_config must be of type PDFSplitConfig")
+        sizing = resolve_chunk_sizing(
+            knowledge, split_config.chunk_size, split_config.chunk_overlap
+        )
+        splitter = get_text_splitter(
+            sizing.chunk_size,
+            sizing.chunk_overlap,
+            PDF_SEPARATORS,
+            length_function=sizing.length_function,
+        )
+        slices = splitter.split_slices(content.content)
+
+        # page metadata from the loader over knowledge.metadata, shared by
+        # every chunk of the page
+        base_metadata = LayeredMetadata.stack(content.metadata, knowledge.metadata)
+        for chunk_index, chunk in enumerate(slices):
+            chunk.metadata = base_metadata.derive(
+                {"chunk_index": chunk_index, "parser_type": "pdf"}
+            )
+
+        return list(slices)
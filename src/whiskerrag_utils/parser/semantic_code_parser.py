@@ -0,0 +1,476 @@
+"""
+Semantic code chunking.
+
+``CodeParser`` cuts source with langchain's per-language separators, which
+regularly splits a function in half or glues the tail of one method to the
+head of the next. This parser first outlines the file into units that follow
+its structure (module-level statements, classes, functions, methods) and then
+packs consecutive sibling units into chunks of up to ``chunk_size``:
+
+* Python is outlined with :mod:`ast`; a unit spans a statement's lines,
+  including its decorators and the comments above it.
+* Other languages, and Python that does not parse, use a heuristic: a unit
+  starts at each line at the nesting depth of its block, nesting being
+  bracket depth for brace languages and indentation otherwise.
+
+A unit larger than ``chunk_size`` is opened: its header (signature,
+decorators) and its body statements become units of their own, so a large
+class is chunked method by method. Only a leaf that cannot be opened is cut
+with the language's separators. Each chunk records the qualified names of
+the symbols it covers and its line span.
+"""
+
+import ast
+import re
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from langchain_text_splitters import Language
+
+from whiskerrag_types.interface.parser_interface import SliceParseResult
+from whiskerrag_types.model.knowledge import Knowledge
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Text, TextSlice
+from whiskerrag_types.model.splitter import SemanticCodeSplitConfig
+from whiskerrag_utils.parser.base_code_parser import CodeParser, LineIndex
+from whiskerrag_utils.parser.splitter_cache import get_language_splitter
+from whiskerrag_utils.parser.token_length import resolve_chunk_sizing
+from whiskerrag_utils.registry import RegisterTypeEnum, register
+
+# languages whose blocks are delimited by brackets rather than indentation
+BRACE_LANGUAGES = frozenset(
+    {
+        Language.C,
+        Language.CPP,
+        Language.CSHARP,
+        Language.GO,
+        Language.JAVA,
+        Language.JS,
+        Language.KOTLIN,
+        Language.PERL,
+        Language.PHP,
+        Language.POWERSHELL,
+        Language.PROTO,
+        Language.R,
+        Language.RUST,
+        Language.SCALA,
+        Language.SOL,
+        Language.SWIFT,
+        Language.TS,
+    }
+)
+
+
+class CodeUnit(NamedTuple):
+    """A contiguous range of source lines (1-based, inclusive)."""
+
+    start_line: int
+    end_line: int
+    # qualified names of the symbols defined in, or enclosing, the unit
+    symbols: Tuple[str, ...]
+    # header and body units the range is made of, empty for a leaf
+    children: Tuple["CodeUnit", ...]
+
+
+class CodeChunk(NamedTuple):
+    start: int
+    end: int
+    symbols: Tuple[str, ...]
+
+
+def _unique(names: Iterator[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(names))
+
+
+def _leaf(start_line: int, end_line: int, owner: Optional[str]) -> CodeUnit:
+    return CodeUnit(start_line, end_line, (owner,) if owner else (), ())
+
+
+# -- Python ------------------------------------------------------------------
+
+_PY_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _first_line(node: ast.stmt) -> int:
+    decorators: List[ast.expr] = getattr(node, "decorator_list", None) or []
+    return min([node.lineno] + [d.lineno for d in decorators])
+
+
+def _python_units(
+    lines: List[str],
+    statements: List[ast.stmt],
+    first_line: int,
+    last_line: int,
+    prefix: str,
+    owner: Optional[str],
+) -> List[CodeUnit]:
+    units: List[CodeUnit] = []
+    start = first_line
+    for i, statement in enumerate(statements):
+        # lines between two statements (comments, blanks) go with the next one
+        is_last = i == len(statements) - 1
+        end = last_line if is_last else (statement.end_lineno or statement.lineno)
+        name = statement.name if isinstance(statement, _PY_DEFINITIONS) else None
+        qualified = f"{prefix}{name}" if name else owner
+        children: List[CodeUnit] = []
+        body = getattr(statement, "body", None)
+        if isinstance(body, list) and body and isinstance(body[0], ast.stmt):
+            body_start = _first_line(body[0])
+            # a body sharing its line with the header cannot be opened
+            opens = (
+                body_start > start
+                and not lines[body_start - 1][: body[0].col_offset].strip()
+            )
+            if opens:
+                children.append(_leaf(start, body_start - 1, qualified))
+                children.extend(
+                    _python_units(
+                        lines,
+                        body,
+                        body_start,
+                        end,
+                        f"{qualified}." if name else prefix,
+                        qualified,
+                    )
+                )
+        own = (qualified,) if qualified else ()
+        symbols = _unique(s for unit in children for s in unit.symbols)
+        units.append(
+            CodeUnit(start, end, _unique(iter(own + symbols)), tuple(children))
+        )
+        start = end + 1
+    if not units and first_line <= last_line:
+        units.append(_leaf(first_line, last_line, owner))
+    return units
+
+
+def outline_python(text: str) -> List[CodeUnit]:
+    """Outline Python source with ``ast``. Raises ``SyntaxError``."""
+    tree = ast.parse(text)
+    lines = text.split("\n")
+    return _python_units(lines, tree.body, 1, len(lines), "", None)
+
+
+# -- brace / indentation heuristic -------------------------------------------
+
+_NOISE = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\\n]){0,2}\'|`(?:\\.|[^`\\])*`'
+    r"|//.*|/\*.*?\*/|/\*.*"
+)
+_OPENERS = re.compile(r"[\[({]")
+_CLOSERS = re.compile(r"[\])}]")
+_COMMENT = re.compile(r"\s*(?://|/\*|\*|#|--|@|')")
+_CONTINUATION = re.compile(
+    r"\s*(?:[\])}]|else\b|elif\b|elsif\b|except\b|catch\b|finally\b|rescue\b|end\b)"
+)
+_DEFINITION = re.compile(
+    r"\b(?:class|interface|struct|enum|trait|impl|object|module|namespace|"
+    r"message|service|contract|type|def|defp|fn|fun|func|function|sub|"
+    r"const|let|var|val)\s+(?:\([^)]*\)\s*)?([A-Za-z_$][\w$]*)"
+)
+# a line opening with a call-like name, after modifiers: `public int size(`
+_CALLABLE = re.compile(
+    r"\s*(?:[\w$<>\[\],?]+\s+)*?([A-Za-z_$][\w$]*)\s*(?:<[^<>]*>)?\s*\("
+)
+_NOT_NAMES = frozenset(
+    {
+        "if",
+        "for",
+        "foreach",
+        "while",
+        "switch",
+        "catch",
+        "return",
+        "new",
+        "sizeof",
+        "await",
+        "yield",
+    }
+)
+
+
+def _bracket_depths(lines: List[str]) -> List[int]:
+    """Bracket depth at the start of each line, ignoring strings and comments."""
+    depths: List[int] = []
+    depth = 0
+    in_comment = False
+    for line in lines:
+        depths.append(depth)
+        if in_comment:
+            close = line.find("*/")
+            if close == -1:
+                continue
+            line = line[close + 2 :]
+            in_comment = False
+        last = 0
+        pieces = []
+        for match in _NOISE.finditer(line):
+            pieces.append(line[last : match.start()])
+            last = match.end()
+            token = match.group()
+            if token.startswith("/*") and (len(token) < 4 or token[-2:] != "*/"):
+                in_comment = True
+        pieces.append(line[last:])
+        stripped = "".join(pieces)
+        depth += len(_OPENERS.findall(stripped)) - len(_CLOSERS.findall(stripped))
+        depth = max(depth, 0)
+    return depths
+
+
+def _indent_depths(lines: List[str]) -> List[int]:
+    return [
+        len(line.expandtabs(4)) - len(line.expandtabs(4).lstrip()) for line in lines
+    ]
+
+
+def _symbol_name(
+    lines: List[str], start: int, end: int, is_block: bool
+) -> Optional[str]:
+    """
+    Name defined by the first code line of a unit. Call-like lines only name
+    blocks (methods), and control statements never name anything.
+    """
+    for number in range(start, end + 1):
+        line = lines[number - 1]
+        if not line.strip() or _COMMENT.match(line):
+            continue
+        words = line.split(None, 1)
+        if words[0].rstrip("(") in _NOT_NAMES:
+            return None
+        definition = _DEFINITION.search(line)
+        if definition:
+            return definition.group(1)
+        call = _CALLABLE.match(line) if is_block else None
+        if call and call.group(1) not in _NOT_NAMES:
+            return call.group(1)
+        return None
+    return None
+
+
+def _block_units(
+    lines: List[str],
+    depths: List[int],
+    first_line: int,
+    last_line: int,
+    owner: Optional[str],
+) -> List[CodeUnit]:
+    numbers = [n for n in range(first_line, last_line + 1) if lines[n - 1].strip()]
+    if not numbers:
+        return [_leaf(first_line, last_line, owner)] if first_line <= last_line else []
+    base = depths[numbers[0] - 1]
+    starts = [first_line]
+    for n in numbers[1:]:
+        line = lines[n - 1]
+        if depths[n - 1] <= base and not _CONTINUATION.match(line):
+            starts.append(n)
+    # comment and annotation lines belong to the block below them
+    ranges: List[Tuple[int, int]] = []
+    pending: Optional[int] = None
+    for i, start in enumerate(starts):
+        end = starts[i + 1] - 1 if i + 1 < len(starts) else last_line
+        if pending is not None:
+            start, pending = pending, None
+        only_comments = all(
+            _COMMENT.match(lines[n - 1])
+            for n in range(start, end + 1)
+            if lines[n - 1].strip()
+        )
+        if only_comments and i + 1 < len(starts):
+            pending = start
+            continue
+        ranges.append((start, end))
+
+    units: List[CodeUnit] = []
+    for start, end in ranges:
+        children: List[CodeUnit] = []
+        unit_base = min(
+            (depths[n - 1] for n in range(start, end + 1) if lines[n - 1].strip()),
+            default=base,
+        )
+        body_start = next(
+            (
+                n
+                for n in range(start + 1, end + 1)
+                if lines[n - 1].strip() and depths[n - 1] > unit_base
+            ),
+            None,
+        )
+        # statements inside a block only name themselves when they open one
+        name = None
+        if body_start is not None or owner is None:
+            name = _symbol_name(lines, start, end, body_start is not None)
+        qualified = (f"{owner}.{name}" if owner else name) if name else owner
+        if body_start is not None:
+            children.append(_leaf(start, body_start - 1, qualified))
+            children.extend(_block_units(lines, depths, body_start, end, qualified))
+        own = (qualified,) if qualified else ()
+        symbols = _unique(s for unit in children for s in unit.symbols)
+        units.append(
+            CodeUnit(start, end, _unique(iter(own + symbols)), tuple(children))
+        )
+    return units
+
+
+def outline_blocks(text: str, language: Language) -> List[CodeUnit]:
+    """Outline source by bracket depth (brace languages) or indentation."""
+    lines = text.split("\n")
+    if language in BRACE_LANGUAGES:
+        depths = _bracket_depths(lines)
+    else:
+        depths = _indent_depths(lines)
+    return _block_units(lines, depths, 1, len(lines), None)
+
+
+def outline(text: str, language: Language) -> List[CodeUnit]:
+    if language == Language.PYTHON:
+        try:
+            return outline_python(text)
+        except (SyntaxError, ValueError):
+            pass
+    return outline_blocks(text, language)
+
+
+# -- packing -----------------------------------------------------------------
+
+
+class _Packer:
+    def __init__(
+        self,
+        text: str,
+        line_index: LineIndex,
+        chunk_size: int,
+        length_function: Callable[[str], int],
+        split_leaf: Callable[[str], List[Tuple[int, int]]],
+    ) -> None:
+        self.text = text
+        self.line_starts = line_index.line_starts
+        self.chunk_size = chunk_size
+        self.length_function = length_function
+        self.split_leaf = split_leaf
+        self.chunks: List[CodeChunk] = []
+
+    def offsets(self, unit: CodeUnit) -> Tuple[int, int]:
+        start = self.line_starts[unit.start_line - 1]
+        if unit.end_line < len(self.line_starts):
+            return start, self.line_starts[unit.end_line]
+        return start, len(self.text)
+
+    def pack(self, units: List[CodeUnit]) -> None:
+        group: List[CodeUnit] = []
+        group_length = 0
+        for unit in units:
+            start, end = self.offsets(unit)
+            length = self.length_function(self.text[start:end])
+            if length > self.chunk_size:
+                self.flush(group)
+                group, group_length = [], 0
+                if unit.children:
+                    self.pack(list(unit.children))
+                else:
+                    for piece_start, piece_end in self.split_leaf(self.text[start:end]):
+                        self.chunks.append(
+                            CodeChunk(
+                                start + piece_start, start + piece_end, unit.symbols
+                            )
+                        )
+                continue
+            if group and group_length + length > self.chunk_size:
+                self.flush(group)
+                group, group_length = [], 0
+            group.append(unit)
+            group_length += length
+        self.flush(group)
+
+    def flush(self, group: List[CodeUnit]) -> None:
+        if group:
+            start, _ = self.offsets(group[0])
+            _, end = self.offsets(group[-1])
+            symbols = _unique(s for unit in group for s in unit.symbols)
+            self.chunks.append(CodeChunk(start, end, symbols))
+
+
+_LEADING_BLANK_LINES = re.compile(r"(?:[ \t]*\n)*")
+
+
+def chunk_code(
+    text: str,
+    language: Language,
+    chunk_size: int,
+    chunk_overlap: int = 0,
+    length_function: Callable[[str], int] = len,
+    line_index: Optional[LineIndex] = None,
+) -> List[CodeChunk]:
+    """
+    Split ``text`` at structural boundaries into chunks of at most
+    ``chunk_size`` (measured with ``length_function``). Leading blank lines
+    and trailing whitespace are trimmed off each chunk.
+    """
+    splitter = get_language_splitter(
+        language, chunk_size, chunk_overlap, length_function
+    )
+
+    def split_leaf(source: str) -> List[Tuple[int, int]]:
+        return [(piece.start, piece.end) for piece in splitter.split_slices(source)]
+
+    packer = _Packer(
+        text,
+        line_index or LineIndex(text),
+        chunk_size,
+        length_function,
+        split_leaf,
+    )
+    packer.pack(outline(text, language))
+    chunks: List[CodeChunk] = []
+    for chunk in packer.chunks:
+        match = _LEADING_BLANK_LINES.match(text, chunk.start, chunk.end)
+        start, end = match.end() if match else chunk.start, chunk.end
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            chunks.append(CodeChunk(start, end, chunk.symbols))
+    return chunks
+
+
+@register(RegisterTypeEnum.PARSER, "semantic_code")
+class SemanticCodeParser(CodeParser):
+
+    async def parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: Text,
+    ) -> SliceParseResult:
+        split_config = knowledge.split_config
+        if not isinstance(split_config, SemanticCodeSplitConfig):
+            raise TypeError(
+                "knowledge.split_config must be of type SemanticCodeSplitConfig"
+            )
+        sizing = resolve_chunk_sizing(
+            knowledge, split_config.chunk_size, split_config.chunk_overlap
+        )
+        line_index = LineIndex(content.content)
+        chunks = chunk_code(
+            content.content,
+            split_config.language,
+            sizing.chunk_size,
+            sizing.chunk_overlap,
+            sizing.length_function,
+            line_index,
+        )
+
+        results: SliceParseResult = []
+        base_metadata = LayeredMetadata.stack(content.metadata, knowledge.metadata)
+        for chunk_index, chunk in enumerate(chunks):
+            combined_metadata = base_metadata.derive(
+                {
+                    "chunk_index": chunk_index,
+                    "parser_type": "semantic_code",
+                    "position": self._span_line_position(
+                        line_index, content.content, chunk.start, chunk.end
+                    ),
+                    "symbols": list(chunk.symbols),
+                }
+            )
+            results.append(
+                TextSlice(content.content, chunk.start, chunk.end, combined_metadata)
+            )
+
+        return results
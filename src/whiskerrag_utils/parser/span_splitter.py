@@ -0,0 +1,245 @@
+"""
+Recursive character splitter that reports where every chunk comes from.
+
+``SpanSplitter`` follows the algorithm of langchain's
+``RecursiveCharacterTextSplitter`` (same separator choice, merging, overlap and
+whitespace stripping, so chunk texts are identical) but works on offsets into
+the source text. Every chunk is returned as a ``TextSpan`` whose ``start`` and
+``end`` delimit it in the source, so parsers can look up headings and line
+numbers directly instead of searching for the chunk text, which is slow and
+ambiguous when text repeats.
+"""
+
+import re
+from typing import (
+    Callable,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+from whiskerrag_types.model.multi_modal import TextSlice
+
+KeepSeparator = Union[bool, Literal["start", "end"]]
+
+
+class TextSpan(NamedTuple):
+    """A chunk and its ``[start, end)`` range in the source text."""
+
+    text: str
+    start: int
+    end: int
+
+
+# (text, start, end, length) of a split; plain tuples keep the hot loop cheap
+_Piece = Tuple[str, int, int, int]
+# (text, start, end) of a chunk; text is None when it is source[start:end]
+_Chunk = Tuple[Optional[str], int, int]
+
+
+class SpanSplitter:
+    """
+    Args:
+        chunk_size: Maximum chunk length, measured by ``length_function``.
+        chunk_overlap: Length carried over from the end of one chunk to the
+            start of the next.
+        separators: Tried in order; the first one found in a text splits it
+            and longer pieces are split again with the remaining ones.
+        is_separator_regex: Treat separators as regular expressions.
+        keep_separator: Keep separators in the chunks, at the start of the
+            following piece (True or ``"start"``) or the end of the previous
+            one (``"end"``).
+        length_function: Length of a text, ``len`` by default.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: Optional[Sequence[str]] = None,
+        is_separator_regex: bool = False,
+        keep_separator: KeepSeparator = False,
+        length_function: Callable[[str], int] = len,
+        strip_whitespace: bool = True,
+    ) -> None:
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size "
+                f"({chunk_size}), should be smaller."
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators or ["\n\n", "\n", " ", ""])
+        self.is_separator_regex = is_separator_regex
+        self.keep_separator = keep_separator
+        self.length_function = length_function
+        self.strip_whitespace = strip_whitespace
+        self._patterns = [
+            re.compile(s if is_separator_regex else re.escape(s)) if s else None
+            for s in self.separators
+        ]
+
+    @classmethod
+    def from_language(
+        cls,
+        language: Language,
+        chunk_size: int,
+        chunk_overlap: int,
+        length_function: Callable[[str], int] = len,
+    ) -> "SpanSplitter":
+        separators = RecursiveCharacterTextSplitter.get_separators_for_language(
+            language
+        )
+        # langchain keeps separators (keywords like "def ") for languages
+        return cls(
+            chunk_size,
+            chunk_overlap,
+            separators,
+            is_separator_regex=True,
+            keep_separator=True,
+            length_function=length_function,
+        )
+
+    def split_text(self, text: str) -> List[str]:
+        return [span.text for span in self.split_spans(text)]
+
+    def split_spans(self, text: str) -> List[TextSpan]:
+        return [
+            TextSpan(text[start:end] if chunk is None else chunk, start, end)
+            for chunk, start, end in self._chunks(text)
+        ]
+
+    def split_slices(self, text: str) -> List[TextSlice]:
+        """
+        Chunks as ``TextSlice``s of ``text``, sliced only when read. A chunk
+        whose pieces had to be re-joined with a separator that differs from
+        the text between them (separators dropped, or regex separators) gets
+        its own buffer instead; with ``keep_separator`` set, as for language
+        splitters, every slice points into ``text``.
+        """
+        return [
+            TextSlice(text, start, end) if chunk is None else TextSlice(chunk)
+            for chunk, start, end in self._chunks(text)
+        ]
+
+    def _chunks(self, text: str) -> List[_Chunk]:
+        chunks: List[_Chunk] = []
+        self._split(text, 0, len(text), 0, chunks)
+        return chunks
+
+    def _pieces(self, sub: str, offset: int, index: int) -> List[_Piece]:
+        """Splits of ``sub`` (found at ``offset``) at separator ``index``."""
+        pattern = self._patterns[index]
+        length = self.length_function
+        if pattern is None:
+            return [
+                (c, offset + i, offset + i + 1, length(c)) for i, c in enumerate(sub)
+            ]
+        cuts = [(m.start(), m.end()) for m in pattern.finditer(sub)]
+        if not self.keep_separator:
+            lefts = [0] + [e for _, e in cuts]
+            rights = [s for s, _ in cuts] + [len(sub)]
+        elif self.keep_separator == "end":
+            lefts = [0] + [e for _, e in cuts]
+            rights = [e for _, e in cuts] + [len(sub)]
+        else:
+            lefts = [0] + [s for s, _ in cuts]
+            rights = [s for s, _ in cuts] + [len(sub)]
+        pieces: List[_Piece] = []
+        for left, right in zip(lefts, rights):
+            if right > left:
+                piece = sub[left:right]
+                pieces.append((piece, offset + left, offset + right, length(piece)))
+        return pieces
+
+    def _split(
+        self, text: str, start: int, end: int, first: int, spans: List[_Chunk]
+    ) -> None:
+        sub = text[start:end]
+        index = len(self.separators) - 1
+        for i in range(first, len(self.separators)):
+            pattern = self._patterns[i]
+            if pattern is None or pattern.search(sub):
+                index = i
+                break
+        has_next = self._patterns[index] is not None and index + 1 < len(
+            self.separators
+        )
+        separator = "" if self.keep_separator else self.separators[index]
+
+        good: List[_Piece] = []
+        for piece in self._pieces(sub, start, index):
+            piece_text, piece_start, piece_end, piece_length = piece
+            if piece_length < self.chunk_size:
+                good.append(piece)
+                continue
+            if good:
+                self._merge(text, good, separator, spans)
+                good = []
+            if not has_next:
+                spans.append((None, piece_start, piece_end))
+            else:
+                self._split(text, piece_start, piece_end, index + 1, spans)
+        if good:
+            self._merge(text, good, separator, spans)
+
+    def _merge(
+        self, text: str, pieces: List[_Piece], separator: str, spans: List[_Chunk]
+    ) -> None:
+        """Greedily join pieces up to ``chunk_size``, carrying ``chunk_overlap``."""
+        separator_length = self.length_function(separator)
+        chunk_size, chunk_overlap = self.chunk_size, self.chunk_overlap
+        head = 0  # current chunk is pieces[head:i]
+        total = 0
+        for i, piece in enumerate(pieces):
+            piece_length = piece[3]
+            if (
+                total + piece_length + (separator_length if i > head else 0)
+                > (chunk_size)
+                and i > head
+            ):
+                self._emit(text, pieces, head, i, separator, spans)
+                while total > chunk_overlap or (
+                    total + piece_length + (separator_length if i > head else 0)
+                    > chunk_size
+                    and total > 0
+                ):
+                    total -= pieces[head][3] + (separator_length if i - head > 1 else 0)
+                    head += 1
+            total += piece_length + (separator_length if i > head else 0)
+        self._emit(text, pieces, head, len(pieces), separator, spans)
+
+    def _emit(
+        self,
+        text: str,
+        pieces: List[_Piece],
+        head: int,
+        tail: int,
+        separator: str,
+        spans: List[_Chunk],
+    ) -> None:
+        start, end = pieces[head][1], pieces[tail - 1][2]
+        # the joined chunk is the source text itself unless the separator put
+        # between pieces differs from what separated them in the source
+        contiguous = not separator or all(
+            text[pieces[i][2] : pieces[i + 1][1]] == separator
+            for i in range(head, tail - 1)
+        )
+        chunk: Optional[str] = None
+        if not contiguous:
+            chunk = separator.join(piece[0] for piece in pieces[head:tail])
+            if self.strip_whitespace:
+                chunk = chunk.strip()
+        if self.strip_whitespace:
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+        if chunk if chunk is not None else end > start:
+            spans.append((chunk, start, end))
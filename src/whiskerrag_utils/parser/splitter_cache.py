@@ -0,0 +1,132 @@
+"""
+Shared, bounded cache of text splitters.
+
+Parsers used to build a ``RecursiveCharacterTextSplitter`` (and its separator
+list) on every ``parse`` call, i.e. once per file of a decomposed repository.
+Splitters (``SpanSplitter``, which compiles its separator patterns once) are
+stateless once built, so one instance per distinct split configuration is
+reused across calls. Separator lists are copied into the key, never modified
+in place, so the caller's split config stays untouched.
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Callable, Optional, Sequence, Tuple, Union
+
+from langchain_text_splitters import Language
+from pydantic import BaseModel
+
+from whiskerrag_utils.parser.span_splitter import KeepSeparator, SpanSplitter
+
+SPLITTER_CACHE_SIZE = 256
+
+DEFAULT_SEPARATORS: Tuple[str, ...] = (
+    # First, try to split along Markdown headings (starting with level 2)
+    "\n#{1,6} ",
+    # Note the alternative syntax for headings (below) is not handled here
+    # Heading level 2
+    # ---------------
+    # End of code block
+    "```\n",
+    # Horizontal lines
+    "\n\\*\\*\\*+\n",
+    "\n---+\n",
+    "\n___+\n",
+    # Note that this splitter doesn't handle horizontal lines defined
+    # by *three or more* of ***, ---, or ___, but this is not handled
+    "\n\n",
+    "\n",
+    " ",
+    "",
+)
+
+
+def split_config_hash(config: Union[BaseModel, dict]) -> str:
+    """Stable hash of a split config: sha256 of its canonical JSON form."""
+    data = config.model_dump(mode="json") if isinstance(config, BaseModel) else config
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _with_catch_all(separators: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    resolved = tuple(separators or DEFAULT_SEPARATORS)
+    return resolved if "" in resolved else resolved + ("",)
+
+
+@lru_cache(maxsize=SPLITTER_CACHE_SIZE)
+def _cached_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: Tuple[str, ...],
+    is_separator_regex: bool,
+    keep_separator: KeepSeparator,
+    length_function: Callable[[str], int],
+) -> SpanSplitter:
+    return SpanSplitter(
+        chunk_size,
+        chunk_overlap,
+        separators,
+        is_separator_regex=is_separator_regex,
+        keep_separator=keep_separator,
+        length_function=length_function,
+    )
+
+
+@lru_cache(maxsize=SPLITTER_CACHE_SIZE)
+def _cached_language_splitter(
+    language: Language,
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int],
+) -> SpanSplitter:
+    return SpanSplitter.from_language(
+        language, chunk_size, chunk_overlap, length_function
+    )
+
+
+def get_text_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: Optional[Sequence[str]] = None,
+    is_separator_regex: bool = False,
+    keep_separator: Optional[KeepSeparator] = False,
+    length_function: Callable[[str], int] = len,
+) -> SpanSplitter:
+    """
+    Cached recursive splitter. Empty or missing ``separators`` fall back to
+    ``DEFAULT_SEPARATORS`` and a final ``""`` is always present so every text
+    can be split down to ``chunk_size``. ``length_function`` is part of the
+    key, so it should be a long-lived function such as ``len`` or a counter
+    from ``token_length.get_token_counter``.
+    """
+    return _cached_splitter(
+        chunk_size,
+        chunk_overlap,
+        _with_catch_all(separators),
+        is_separator_regex,
+        keep_separator or False,
+        length_function,
+    )
+
+
+def get_language_splitter(
+    language: Language,
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int] = len,
+) -> SpanSplitter:
+    """Cached splitter with the separators langchain uses for ``language``."""
+    return _cached_language_splitter(
+        language, chunk_size, chunk_overlap, length_function
+    )
+
+
+def clear_splitter_cache() -> None:
+    _cached_splitter.cache_clear()
+    _cached_language_splitter.cache_clear()
+
+
+def splitter_cache_info() -> Any:
+    """``lru_cache`` statistics of the character splitter cache."""
+    return _cached_splitter.cache_info()
@@ -1,11 +1,15 @@
-from typing import List
-
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
-from whiskerrag_types.interface.parser_interface import BaseParser, ParseResult
+from whiskerrag_types.interface.parser_interface import (
+    BaseParser,
+    ParseResult,
+    SliceParseResult,
+    slices_to_texts,
+)
 from whiskerrag_types.model import Knowledge, TextSplitConfig
 from whiskerrag_types.model.knowledge import KnowledgeTypeEnum
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
 from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_utils.parser.splitter_cache import get_text_splitter
+from whiskerrag_utils.parser.token_length import resolve_chunk_sizing
 from whiskerrag_utils.registry import RegisterTypeEnum, register
 
 
@@ -16,43 +20,29 @@ class TextParser(BaseParser[Text]):
         knowledge: Knowledge,
         content: Text,
     ) -> ParseResult:
+        return slices_to_texts(await self.parse_slices(knowledge, content))
+
+    async def parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: Text,
+    ) -> SliceParseResult:
         split_config = knowledge.split_config
         if not isinstance(split_config, TextSplitConfig):
             raise TypeError("knowledge.split_config must be of type TextSplitConfig")
-        separators = split_config.separators or [
-            # First, try to split along Markdown headings (starting with level 2)
-            "\n#{1,6} ",
-            # Note the alternative syntax for headings (below) is not handled here
-            # Heading level 2
-            # ---------------
-            # End of code block
-            "```\n",
-            # Horizontal lines
-            "\n\\*\\*\\*+\n",
-            "\n---+\n",
-            "\n___+\n",
-            # Note that this splitter doesn't handle horizontal lines defined
-            # by *three or more* of ***, ---, or ___, but this is not handled
-            "\n\n",
-            "\n",
-            " ",
-            "",
-        ]
-        if "" not in separators:
-            separators.append("")
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=split_config.chunk_size,
-            chunk_overlap=split_config.chunk_overlap,
-            separators=separators,
+        sizing = resolve_chunk_sizing(
+            knowledge, split_config.chunk_size, split_config.chunk_overlap
+        )
+        splitter = get_text_splitter(
+            sizing.chunk_size,
+            sizing.chunk_overlap,
+            split_config.separators,
             is_separator_regex=split_config.is_separator_regex,
-            keep_separator=split_config.keep_separator or False,
+            keep_separator=split_config.keep_separator,
+            length_function=sizing.length_function,
         )
-        split_texts = splitter.split_text(content.content)
-        return [Text(content=text, metadata=content.metadata) for text in split_texts]
-
-    async def batch_parse(
-        self,
-        knowledge: Knowledge,
-        content_list: List[Text],
-    ) -> List[ParseResult]:
-        return [await self.parse(knowledge, content) for content in content_list]
+        slices = splitter.split_slices(content.content)
+        shared_metadata = LayeredMetadata.stack(content.metadata)
+        for chunk in slices:
+            chunk.metadata = shared_metadata.derive()
+        return list(slices)
@@ -0,0 +1,189 @@
+"""
+Token-based chunk lengths.
+
+Split configs measure ``chunk_size`` in characters unless their
+``length_function`` is ``"tokens"``; then lengths are counted with the tokenizer
+of the knowledge's embedding model, so chunks can be packed up to what the
+model accepts. Tokenizers are loaded once per model and their counts memoised
+by a digest of the text (the splitter measures the same short pieces over and
+over, and the cache must not keep whole documents alive). OpenAI models count
+with tiktoken; the local sentence-transformers models with the tokenizer in
+their model directory (see ``embedding.local_transformers``). When no
+tokenizer is available (tiktoken or transformers missing, encoding files not
+downloadable, no local model directory, or an unknown model) the fast
+``estimate_tokens`` approximation is used, and model input limits are applied
+with a safety margin since estimates run low on WordPiece vocabularies.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from whiskerrag_types.model.knowledge import EmbeddingModelEnum, Knowledge
+
+logger = logging.getLogger("whisker")
+
+TOKEN_COUNT_CACHE_SIZE = 65536
+
+# tiktoken encodings of embedding models
+MODEL_ENCODINGS: Dict[str, str] = {
+    EmbeddingModelEnum.OPENAI.value: "cl100k_base",
+    "text-embedding-ada-002": "cl100k_base",
+    "text-embedding-3-small": "cl100k_base",
+    "text-embedding-3-large": "cl100k_base",
+}
+
+# longest input, in tokens, each embedding model takes
+MODEL_MAX_TOKENS: Dict[str, int] = {
+    EmbeddingModelEnum.OPENAI.value: 8191,
+    "text-embedding-ada-002": 8191,
+    "text-embedding-3-small": 8191,
+    "text-embedding-3-large": 8191,
+    EmbeddingModelEnum.ALL_MINILM_L6_V2.value: 256,
+    EmbeddingModelEnum.all_mpnet_base_v2.value: 384,
+    EmbeddingModelEnum.PARAPHRASE_MULTILINGUAL_MINILM_L12_V2.value: 128,
+}
+
+# share of a model's input limit usable when token counts are estimated:
+# WordPiece tokenizers run to ~2.5 characters a token on code and numbers,
+# where the estimate assumes 4
+ESTIMATED_LIMIT_RATIO = 0.6
+
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: one token per CJK character, ~4 characters otherwise."""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _lazy_import_tiktoken() -> Any:
+    try:
+        import tiktoken  # type: ignore
+
+        return tiktoken
+    except ImportError:
+        raise ImportError(
+            "tiktoken is required for token-based chunk sizing. "
+            "Install it with: pip install tiktoken"
+        )
+
+
+def _lazy_import_transformers() -> Any:
+    try:
+        import transformers  # type: ignore
+
+        return transformers
+    except ImportError:
+        raise ImportError(
+            "transformers is required to count tokens of local embedding models. "
+            "Install it with: pip install sentence-transformers"
+        )
+
+
+def _load_encoding(encoding_name: str) -> Any:
+    return _lazy_import_tiktoken().get_encoding(encoding_name)
+
+
+def _local_model_dir(model_name: str) -> Any:
+    # imported here: the embedding backends import the package root
+    from whiskerrag_utils.embedding.local_transformers import resolve_model_dir
+
+    return resolve_model_dir(model_name)
+
+
+def _load_tokenizer(model_dir: Any) -> Any:
+    return _lazy_import_transformers().AutoTokenizer.from_pretrained(
+        str(model_dir), local_files_only=True
+    )
+
+
+class _MemoisedCounter:
+    """Token counter with an LRU of its counts keyed by digest."""
+
+    def __init__(
+        self, count: Callable[[str], int], max_entries: int = TOKEN_COUNT_CACHE_SIZE
+    ):
+        self.count = count
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __call__(self, text: str) -> int:
+        data = text.encode("utf-8", "surrogatepass")
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                return count
+        count = self.count(text)
+        with self._lock:
+            self._counts[key] = count
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return count
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model_name: Optional[str]) -> Callable[[str], int]:
+    """
+    Token counter for ``model_name``, built once per model. Falls back to
+    ``estimate_tokens`` when the model's tokenizer cannot be loaded.
+    """
+    encoding_name = MODEL_ENCODINGS.get(model_name or "")
+    model_dir = _local_model_dir(model_name) if model_name else None
+    try:
+        if encoding_name is not None:
+            encoding = _load_encoding(encoding_name)
+            return _MemoisedCounter(
+                lambda text: len(encoding.encode(text, disallowed_special=()))
+            )
+        if model_dir is not None:
+            tokenizer = _load_tokenizer(model_dir)
+            # with the special tokens, which count against the input limit
+            return _MemoisedCounter(
+                lambda text: len(tokenizer.encode(text, verbose=False))
+            )
+    except Exception as e:
+        logger.warning(
+            f"Tokenizer of {model_name} unavailable ({e}), "
+            "estimating token counts instead"
+        )
+    return estimate_tokens
+
+
+class ChunkSizing(NamedTuple):
+    chunk_size: int
+    chunk_overlap: int
+    length_function: Callable[[str], int]
+
+
+def resolve_chunk_sizing(
+    knowledge: Knowledge, chunk_size: int, chunk_overlap: int
+) -> ChunkSizing:
+    """
+    Chunk size, overlap and length function for ``knowledge``'s split config.
+    In ``"tokens"`` mode the size is capped at the embedding model's input
+    limit, when known, so no chunk is rejected by the provider or truncated
+    by a local model; with estimated counts the cap keeps a safety margin.
+    """
+    if getattr(knowledge.split_config, "length_function", "characters") != "tokens":
+        return ChunkSizing(chunk_size, chunk_overlap, len)
+    model_name = knowledge.embedding_model_name
+    length_function = get_token_counter(model_name)
+    limit = MODEL_MAX_TOKENS.get(model_name)
+    if limit is not None and length_function is estimate_tokens:
+        limit = int(limit * ESTIMATED_LIMIT_RATIO)
+    if limit is not None and chunk_size > limit:
+        chunk_size = limit
+        chunk_overlap = min(chunk_overlap, chunk_size // 2)
+    return ChunkSizing(chunk_size, chunk_overlap, length_function)
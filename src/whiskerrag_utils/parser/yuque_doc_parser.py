@@ -1,12 +1,19 @@
 import re
+from bisect import bisect_right
 from typing import Dict, List, Tuple, Union
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
-from whiskerrag_types.interface.parser_interface import BaseParser, ParseResult
+from whiskerrag_types.interface.parser_interface import (
+    BaseParser,
+    ParseResult,
+    SliceParseResult,
+    slices_to_texts,
+)
 from whiskerrag_types.model.knowledge import Knowledge, KnowledgeTypeEnum
-from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Text, TextSlice
 from whiskerrag_types.model.splitter import YuqueSplitConfig
+from whiskerrag_utils.parser.splitter_cache import get_text_splitter
+from whiskerrag_utils.parser.token_length import resolve_chunk_sizing
 from whiskerrag_utils.registry import RegisterTypeEnum, register
 
 
@@ -57,51 +64,32 @@ class YuqueParser(BaseParser[Text]):
 
     def _find_chunk_headings(
         self,
-        chunk_text: str,
-        original_content: str,
+        chunk_start: int,
+        heading_positions: List[int],
         hierarchy_map: Dict[int, List[str]],
     ) -> List[str]:
         """
-        Find the relevant headings for a given chunk based on its position in the original content.
-        Uses binary search for efficient lookup of the closest heading position.
+        Find the relevant headings for a chunk starting at ``chunk_start``: the
+        hierarchy of the closest heading at or before it, found by binary
+        search over the sorted heading positions.
         """
-        # Find the position of this chunk in the original content
-        chunk_start = original_content.find(chunk_text)
-        if chunk_start == -1:
-            # If exact match not found, try to find the best match
-            # This can happen due to text processing differences
-            return []
-
-        # Get sorted heading positions for binary search
-        heading_positions = sorted(hierarchy_map.keys())
-
-        if not heading_positions:
-            return []
-
-        # Find the closest heading position that is <= chunk_start
-        # Using binary search for efficiency
-        left, right = 0, len(heading_positions) - 1
-        best_position = -1
-
-        while left <= right:
-            mid = (left + right) // 2
-            if heading_positions[mid] <= chunk_start:
-                best_position = heading_positions[mid]
-                left = mid + 1
-            else:
-                right = mid - 1
-
-        # Return the hierarchy for the best position found
-        if best_position != -1:
-            return hierarchy_map[best_position]
-        else:
+        i = bisect_right(heading_positions, chunk_start)
+        if i == 0:
             return []
+        return hierarchy_map[heading_positions[i - 1]]
 
     async def parse(
         self,
         knowledge: Knowledge,
         content: Text,
     ) -> ParseResult:
+        return slices_to_texts(await self.parse_slices(knowledge, content))
+
+    async def parse_slices(
+        self,
+        knowledge: Knowledge,
+        content: Text,
+    ) -> SliceParseResult:
         split_config = knowledge.split_config
         if not isinstance(split_config, YuqueSplitConfig):
             raise TypeError("knowledge.split_config must be of type YuqueSplitConfig")
@@ -109,45 +97,29 @@ class YuqueParser(BaseParser[Text]):
         # Extract headings and build hierarchy
         headings = self._extract_headings(content.content)
         hierarchy_map = self._build_heading_hierarchy(headings)
+        heading_positions = sorted(hierarchy_map)
 
-        separators = split_config.separators or [
-            # First, try to split along Markdown headings (starting with level 2)
-            "\n#{1,6} ",
-            # Note the alternative syntax for headings (below) is not handled here
-            # Heading level 2
-            # ---------------
-            # End of code block
-            "```\n",
-            # Horizontal lines
-            "\n\\*\\*\\*+\n",
-            "\n---+\n",
-            "\n___+\n",
-            # Note that this splitter doesn't handle horizontal lines defined
-            # by *three or more* of ***, ---, or ___, but this is not handled
-            "\n\n",
-            "\n",
-            " ",
-            "",
-        ]
-        if "" not in separators:
-            separators.append("")
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=split_config.chunk_size,
-            chunk_overlap=split_config.chunk_overlap,
-            separators=separators,
-            keep_separator=False,
+        sizing = resolve_chunk_sizing(
+            knowledge, split_config.chunk_size, split_config.chunk_overlap
         )
-        result: ParseResult = []
+        splitter = get_text_splitter(
+            sizing.chunk_size,
+            sizing.chunk_overlap,
+            split_config.separators,
+            length_function=sizing.length_function,
+        )
+        result: SliceParseResult = []
         # split text
-        split_texts = splitter.split_text(content.content)
+        spans = splitter.split_spans(content.content)
 
-        for idx, text in enumerate(split_texts):
-            metadata = content.metadata.copy()
-            metadata["_idx"] = idx
+        shared_metadata = LayeredMetadata.stack(content.metadata)
+        for idx, span in enumerate(spans):
+            text = span.text
+            metadata = shared_metadata.derive({"_idx": idx})
 
             # Find relevant headings for this chunk
             chunk_headings = self._find_chunk_headings(
-                text, content.content, hierarchy_map
+                span.start, heading_positions, hierarchy_map
             )
 
             # Build context with knowledge name and headings
@@ -167,15 +139,8 @@ class YuqueParser(BaseParser[Text]):
                 # Prepend context to the chunk content for better retrieval
                 # This creates a more context-rich chunk that includes knowledge name and hierarchical path
                 enhanced_content = f"[Context: {full_context}]\n\n{text}"
-                result.append(Text(content=enhanced_content, metadata=metadata))
+                result.append(TextSlice(enhanced_content, metadata=metadata))
             else:
-                result.append(Text(content=text, metadata=metadata))
+                result.append(TextSlice(text, metadata=metadata))
 
         return result
-
-    async def batch_parse(
-        self,
-        knowledge: Knowledge,
-        content_list: List[Text],
-    ) -> List[ParseResult]:
-        return [await self.parse(knowledge, content) for content in content_list]
@@ -0,0 +1,405 @@
+"""
+In-process cache of retrieval results.
+
+Entries are keyed by (tenant, normalised request content, config hash), expire
+after a TTL and are dropped as soon as chunks that could change them change:
+
+- new or updated chunks invalidate every entry scoped to their space or
+  knowledge, plus entries whose scope is unknown (tenant-wide);
+- deleted or disabled knowledge only invalidates entries that returned chunks
+  of that knowledge or were scoped to it, since removing a chunk that is not in
+  a top-k result cannot change that result;
+- re-enabled knowledge invalidates the whole tenant, because the interface does
+  not tell us which space it belongs to.
+
+The cache is per process; deployments with several workers need each worker's
+DB plugin to see the writes (or a short TTL).
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from whiskerrag_types.interface.db_engine_plugin_interface import DBPluginInterface
+from whiskerrag_types.interface.retriever_interface import BaseRetriever
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.retrieval import RetrievalChunk, RetrievalRequest
+
+_WHITESPACE = re.compile(r"\s+")
+
+CacheKey = str
+ScopeKey = Tuple[str, str]
+
+
+def normalize_query(content: str) -> str:
+    """NFKC-normalise and collapse whitespace; case is kept as it may matter."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", content)).strip()
+
+
+def hash_config(config: Dict[str, Any]) -> str:
+    canonical = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _as_id_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value]
+    return [str(value)]
+
+
+class _Entry:
+    __slots__ = ("results", "expires_at", "tenant_id", "spaces", "knowledge")
+
+    def __init__(
+        self,
+        results: List[RetrievalChunk],
+        expires_at: float,
+        tenant_id: str,
+        spaces: Set[str],
+        knowledge: Set[str],
+    ) -> None:
+        self.results = results
+        self.expires_at = expires_at
+        self.tenant_id = tenant_id
+        self.spaces = spaces
+        self.knowledge = knowledge
+
+
+class RetrievalCache:
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        # reverse indexes used by invalidation
+        self._by_space: Dict[ScopeKey, Set[CacheKey]] = {}
+        self._by_knowledge: Dict[ScopeKey, Set[CacheKey]] = {}
+        self._tenant_wide: Dict[str, Set[CacheKey]] = {}
+        self._by_tenant: Dict[str, Set[CacheKey]] = {}
+        # bumped on every invalidation so in-flight retrievals don't store stale data
+        self._generation: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(tenant_id: str, request: RetrievalRequest) -> CacheKey:
+        parts = [
+            tenant_id,
+            normalize_query(request.content),
+            request.image_url or "",
+            hash_config(request.config.model_dump(mode="json")),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def generation(self, tenant_id: str) -> int:
+        return self._generation.get(tenant_id, 0)
+
+    def get(
+        self, tenant_id: str, request: RetrievalRequest
+    ) -> Optional[List[RetrievalChunk]]:
+        key = self.make_key(tenant_id, request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= self._clock():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [chunk.model_copy() for chunk in entry.results]
+
+    def put(
+        self,
+        tenant_id: str,
+        request: RetrievalRequest,
+        results: List[RetrievalChunk],
+        generation: Optional[int] = None,
+    ) -> None:
+        """
+        Store ``results``. When ``generation`` (taken before the retrieval
+        started) is stale, the results may predate an invalidation and are
+        not cached.
+        """
+        key = self.make_key(tenant_id, request)
+        config = request.config.model_dump()
+        spaces = set(_as_id_list(config.get("space_id_list")))
+        spaces.update(_as_id_list(config.get("space_id")))
+        scoped_knowledge = set(_as_id_list(config.get("knowledge_id_list")))
+        scoped_knowledge.update(_as_id_list(config.get("knowledge_id")))
+        knowledge = scoped_knowledge | {chunk.knowledge_id for chunk in results}
+        tenant_wide = not spaces and not scoped_knowledge
+
+        with self._lock:
+            if generation is not None and generation != self.generation(tenant_id):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                [chunk.model_copy() for chunk in results],
+                self._clock() + self.ttl,
+                tenant_id,
+                spaces,
+                knowledge,
+            )
+            for space_id in spaces:
+                self._by_space.setdefault((tenant_id, space_id), set()).add(key)
+            for knowledge_id in knowledge:
+                self._by_knowledge.setdefault((tenant_id, knowledge_id), set()).add(key)
+            if tenant_wide:
+                self._tenant_wide.setdefault(tenant_id, set()).add(key)
+            self._by_tenant.setdefault(tenant_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    async def get_or_retrieve(
+        self,
+        tenant_id: str,
+        request: RetrievalRequest,
+        retrieve: Callable[[], Awaitable[List[RetrievalChunk]]],
+    ) -> List[RetrievalChunk]:
+        cached = self.get(tenant_id, request)
+        if cached is not None:
+            return cached
+        generation = self.generation(tenant_id)
+        results = await retrieve()
+        self.put(tenant_id, request, results, generation)
+        return results
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        tenant_id = entry.tenant_id
+        for index, scope_ids in (
+            (self._by_space, entry.spaces),
+            (self._by_knowledge, entry.knowledge),
+        ):
+            for scope_id in scope_ids:
+                keys = index.get((tenant_id, scope_id))
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[(tenant_id, scope_id)]
+        for tenant_index in (self._tenant_wide, self._by_tenant):
+            keys = tenant_index.get(tenant_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del tenant_index[tenant_id]
+
+    def _invalidate(self, tenant_id: str, keys: Iterable[CacheKey]) -> int:
+        with self._lock:
+            self._generation[tenant_id] = self.generation(tenant_id) + 1
+            removed = 0
+            for key in list(keys):
+                if key in self._entries:
+                    self._remove(key)
+                    removed += 1
+            return removed
+
+    def invalidate_chunks_added(
+        self, tenant_id: str, space_ids: Iterable[str], knowledge_ids: Iterable[str]
+    ) -> int:
+        """New or changed chunks: any entry that could now rank them is dropped."""
+        with self._lock:
+            keys: Set[CacheKey] = set(self._tenant_wide.get(tenant_id, ()))
+            for space_id in space_ids:
+                keys.update(self._by_space.get((tenant_id, space_id), ()))
+            for knowledge_id in knowledge_ids:
+                keys.update(self._by_knowledge.get((tenant_id, knowledge_id), ()))
+            return self._invalidate(tenant_id, keys)
+
+    def invalidate_knowledge_removed(
+        self, tenant_id: str, knowledge_ids: Iterable[str]
+    ) -> int:
+        """Deleted or disabled knowledge: only entries that reference it change."""
+        with self._lock:
+            keys: Set[CacheKey] = set()
+            for knowledge_id in knowledge_ids:
+                keys.update(self._by_knowledge.get((tenant_id, knowledge_id), ()))
+            return self._invalidate(tenant_id, keys)
+
+    def invalidate_tenant(self, tenant_id: str) -> int:
+        with self._lock:
+            return self._invalidate(tenant_id, self._by_tenant.get(tenant_id, ()))
+
+    def clear(self) -> None:
+        with self._lock:
+            for tenant_id in list(self._by_tenant):
+                self._generation[tenant_id] = self.generation(tenant_id) + 1
+            self._entries.clear()
+            self._by_space.clear()
+            self._by_knowledge.clear()
+            self._tenant_wide.clear()
+            self._by_tenant.clear()
+
+
+def _invalidate_for_chunks(cache: RetrievalCache, chunks: Iterable[Chunk]) -> None:
+    scopes: Dict[str, Tuple[Set[str], Set[str]]] = {}
+    for chunk in chunks:
+        spaces, knowledge = scopes.setdefault(chunk.tenant_id, (set(), set()))
+        spaces.add(chunk.space_id)
+        knowledge.add(chunk.knowledge_id)
+    for tenant_id, (spaces, knowledge) in scopes.items():
+        cache.invalidate_chunks_added(tenant_id, spaces, knowledge)
+
+
+class CachedRetriever(BaseRetriever[RetrievalRequest, RetrievalChunk]):
+    """
+    Put a RetrievalCache in front of any retriever. Writers must call the
+    cache's ``invalidate_*`` methods (or use ``RetrievalCacheMixin`` on the DB
+    plugin that performs the writes and share its cache).
+    """
+
+    def __init__(
+        self,
+        retriever: BaseRetriever,
+        cache: Optional[RetrievalCache] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.retriever = retriever
+        self.cache = cache or RetrievalCache()
+
+    async def retrieve(
+        self, params: RetrievalRequest, tenant_id: str
+    ) -> List[RetrievalChunk]:
+        return await self.cache.get_or_retrieve(
+            tenant_id,
+            params,
+            lambda: self.retriever.retrieve(params, tenant_id),
+        )
+
+    async def retrieve_many(
+        self, params_list: List[RetrievalRequest], tenant_id: str
+    ) -> List[List[RetrievalChunk]]:
+        """Serve cached requests and send the misses as one batch."""
+        results = [self.cache.get(tenant_id, params) for params in params_list]
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if missing:
+            generation = self.cache.generation(tenant_id)
+            fetched = await self.retriever.retrieve_many(
+                [params_list[i] for i in missing], tenant_id
+            )
+            for i, chunks in zip(missing, fetched):
+                self.cache.put(tenant_id, params_list[i], chunks, generation)
+                results[i] = chunks
+        return [chunks or [] for chunks in results]
+
+
+class RetrievalCacheMixin(DBPluginInterface):
+    """
+    Adds a result cache to ``DBPluginInterface.retrieve`` and invalidates it
+    from the chunk write paths. Put it in front of a concrete plugin::
+
+        class CachedPlugin(RetrievalCacheMixin, MyDBPlugin):
+            retrieval_cache_ttl = 60
+    """
+
+    retrieval_cache_ttl: float = 300.0
+    retrieval_cache_max_entries: int = 10_000
+    _retrieval_cache: Optional[RetrievalCache] = None
+
+    @property
+    def retrieval_cache(self) -> RetrievalCache:
+        if self._retrieval_cache is None:
+            self._retrieval_cache = RetrievalCache(
+                ttl=self.retrieval_cache_ttl,
+                max_entries=self.retrieval_cache_max_entries,
+            )
+        return self._retrieval_cache
+
+    def _plugin(self) -> Any:
+        """The wrapped plugin implementation (next class in the MRO)."""
+        return super(RetrievalCacheMixin, self)
+
+    async def retrieve(
+        self, tenant_id: str, params: RetrievalRequest
+    ) -> List[RetrievalChunk]:
+        return await self.retrieval_cache.get_or_retrieve(
+            tenant_id, params, lambda: self._plugin().retrieve(tenant_id, params)
+        )
+
+    async def save_chunk_list(self, chunks: List[Chunk]) -> List[Chunk]:
+        saved: List[Chunk] = await self._plugin().save_chunk_list(chunks)
+        _invalidate_for_chunks(self.retrieval_cache, [*chunks, *saved])
+        return saved
+
+    async def update_chunk_list(self, chunks: List[Chunk]) -> List[Chunk]:
+        updated: List[Chunk] = await self._plugin().update_chunk_list(chunks)
+        _invalidate_for_chunks(self.retrieval_cache, [*chunks, *updated])
+        return updated
+
+    async def delete_chunk_by_id(
+        self, tenant_id: str, chunk_id: str, embedding_model_name: str
+    ) -> Union[Chunk, None]:
+        deleted: Optional[Chunk] = await self._plugin().delete_chunk_by_id(
+            tenant_id, chunk_id, embedding_model_name
+        )
+        if deleted is not None:
+            self.retrieval_cache.invalidate_knowledge_removed(
+                tenant_id, [deleted.knowledge_id]
+            )
+        return deleted
+
+    async def delete_knowledge_chunk(
+        self, tenant_id: str, knowledge_ids: List[str]
+    ) -> Union[List[Chunk], None]:
+        plugin = self._plugin()
+        deleted: Optional[List[Chunk]] = await plugin.delete_knowledge_chunk(
+            tenant_id, knowledge_ids
+        )
+        self.retrieval_cache.invalidate_knowledge_removed(tenant_id, knowledge_ids)
+        return deleted
+
+    async def update_knowledge_enabled_status(
+        self, tenant_id: str, knowledge_id: str, enabled: bool
+    ) -> None:
+        await self._plugin().update_knowledge_enabled_status(
+            tenant_id, knowledge_id, enabled
+        )
+        if enabled:
+            self.retrieval_cache.invalidate_tenant(tenant_id)
+        else:
+            self.retrieval_cache.invalidate_knowledge_removed(tenant_id, [knowledge_id])
+
+
+__all__ = [
+    "CachedRetriever",
+    "RetrievalCache",
+    "RetrievalCacheMixin",
+    "hash_config",
+    "normalize_query",
+]
@@ -0,0 +1,343 @@
+"""
+Per-space index manager.
+
+Indexes are loaded lazily on the first query of a space and kept in LRU order.
+The memory of every loaded index is tracked (``nbytes`` of the index: its
+arrays or mapped files plus an estimate of the chunks, bitmaps and decoded
+columns it holds, read again on every access so indexes that take writes are
+accounted as they grow) and, when the total exceeds the budget, the least
+recently used spaces are evicted. An evicted index that a query still holds
+through ``acquire`` is closed once that query ``release``s it.
+``warm_up`` pre-loads the spaces with the highest ``Knowledge.retrieval_count``
+so hot spaces do not pay the load on their first query after a restart.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from whiskerrag_types.interface.embed_interface import BaseEmbedding
+from whiskerrag_types.interface.retriever_interface import BaseRetriever
+from whiskerrag_types.model.knowledge import EmbeddingModelEnum, Knowledge
+from whiskerrag_types.model.retrieval import (
+    RetrievalChunk,
+    RetrievalRequest,
+    VectorSearchConfig,
+)
+from whiskerrag_utils.registry import RegisterTypeEnum, get_register, register
+from whiskerrag_utils.retriever.postprocess import postprocess_results
+from whiskerrag_utils.retriever.vector_search import (
+    VectorIndex,
+    build_search_filter,
+    embed_queries,
+    fetch_size,
+    to_vector_search_config,
+)
+
+logger = logging.getLogger("whisker")
+
+IndexLoader = Callable[[str], VectorIndex]
+ModelName = Union[EmbeddingModelEnum, str]
+
+
+def index_memory(index: VectorIndex) -> int:
+    """Bytes accounted to an index: its ``nbytes`` when it reports one."""
+    nbytes = getattr(index, "nbytes", 0)
+    return int(nbytes) if nbytes else 0
+
+
+class SpaceIndexManager:
+    """
+    Lazily loaded, memory-bounded cache of per-space vector indexes.
+
+    Args:
+        loader: Builds or opens the index of a space id.
+        memory_budget: Upper bound in bytes for all loaded indexes. The most
+            recently used index is always kept, even if it alone exceeds it.
+        on_evict: Called with ``(space_id, index)`` after an eviction, once no
+            query holds the index any more. Indexes that have a ``close``
+            method are closed as well.
+    """
+
+    def __init__(
+        self,
+        loader: IndexLoader,
+        memory_budget: int = 4 << 30,
+        on_evict: Optional[Callable[[str, VectorIndex], None]] = None,
+    ) -> None:
+        self.loader = loader
+        self.memory_budget = memory_budget
+        self.on_evict = on_evict
+        self._indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
+        self._memory: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        # acquired and not yet released, by id of the index
+        self._users: Dict[int, int] = {}
+        # evicted while acquired: closed by the last release
+        self._evicted: Dict[int, Tuple[str, VectorIndex]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, space_id: str) -> bool:
+        return space_id in self._indexes
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    @property
+    def memory_usage(self) -> int:
+        return sum(self._memory.values())
+
+    @property
+    def loaded_spaces(self) -> List[str]:
+        """Loaded space ids, least recently used first."""
+        with self._lock:
+            return list(self._indexes)
+
+    def memory_of(self, space_id: str) -> int:
+        return self._memory.get(space_id, 0)
+
+    def get(self, space_id: str) -> VectorIndex:
+        """
+        Return the index of ``space_id``, loading it on first use. The index
+        may be evicted and closed at any time; use ``acquire`` to search it.
+        """
+        return self._get(space_id, acquire=False)
+
+    def acquire(self, space_id: str) -> VectorIndex:
+        """
+        ``get`` that keeps the index open until it is passed to ``release``,
+        even if it is evicted in between.
+        """
+        return self._get(space_id, acquire=True)
+
+    def release(self, index: VectorIndex) -> None:
+        """Give back an index from ``acquire``; closes it if it was evicted."""
+        with self._lock:
+            key = id(index)
+            users = self._users[key] - 1
+            if users:
+                self._users[key] = users
+                return
+            del self._users[key]
+            evicted = self._evicted.pop(key, None)
+        if evicted is not None:
+            self._close(*evicted)
+
+    def _get(self, space_id: str, acquire: bool) -> VectorIndex:
+        index = self._hit(space_id, acquire)
+        if index is not None:
+            return index
+        with self._lock:
+            loading = self._loading.setdefault(space_id, threading.Lock())
+
+        # one loader per space; other spaces keep being served meanwhile
+        with loading:
+            index = self._hit(space_id, acquire)
+            if index is not None:
+                return index
+            with self._lock:
+                self.misses += 1
+            try:
+                index = self.loader(space_id)
+                with self._lock:
+                    self._indexes[space_id] = index
+                    if acquire:
+                        self._users[id(index)] = self._users.get(id(index), 0) + 1
+                self._account(space_id, index)
+            finally:
+                with self._lock:
+                    self._loading.pop(space_id, None)
+            return index
+
+    def _hit(self, space_id: str, acquire: bool) -> Optional[VectorIndex]:
+        with self._lock:
+            index = self._indexes.get(space_id)
+            if index is None:
+                return None
+            self._indexes.move_to_end(space_id)
+            self.hits += 1
+            if acquire:
+                self._users[id(index)] = self._users.get(id(index), 0) + 1
+        # indexes that take writes (SegmentedVectorIndex) grow after loading
+        self._account(space_id, index)
+        return index
+
+    def _account(self, space_id: str, index: VectorIndex) -> None:
+        """Record the current memory of a loaded index and enforce the budget."""
+        memory = index_memory(index)
+        evicted = []
+        with self._lock:
+            if self._indexes.get(space_id) is not index:
+                return  # evicted meanwhile
+            self._memory[space_id] = memory
+            while self.memory_usage > self.memory_budget and len(self._indexes) > 1:
+                evicted.append(self._pop_oldest())
+        for victim_id, victim in evicted:
+            self._release(victim_id, victim)
+
+    def _pop_oldest(self) -> Tuple[str, VectorIndex]:
+        space_id, index = self._indexes.popitem(last=False)
+        self._memory.pop(space_id, None)
+        self.evictions += 1
+        return space_id, index
+
+    def _release(self, space_id: str, index: VectorIndex) -> None:
+        logger.debug(f"Evicting vector index of space {space_id}")
+        with self._lock:
+            if id(index) in self._users:
+                self._evicted[id(index)] = (space_id, index)
+                return
+        self._close(space_id, index)
+
+    def _close(self, space_id: str, index: VectorIndex) -> None:
+        close = getattr(index, "close", None)
+        if callable(close):
+            close()
+        if self.on_evict is not None:
+            self.on_evict(space_id, index)
+
+    def evict(self, space_id: str) -> bool:
+        """Drop a space, e.g. after its index was rebuilt on disk."""
+        with self._lock:
+            index = self._indexes.pop(space_id, None)
+            self._memory.pop(space_id, None)
+        if index is None:
+            return False
+        self._release(space_id, index)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            items = list(self._indexes.items())
+            self._indexes.clear()
+            self._memory.clear()
+        for space_id, index in items:
+            self._release(space_id, index)
+
+    def warm_up(self, knowledge_list: Iterable[Knowledge], top_n: int) -> List[str]:
+        """
+        Load the ``top_n`` spaces with the highest summed ``retrieval_count``
+        of their knowledge, keeping the hottest one most recently used so it
+        is the last to be evicted. Stops once the memory budget is reached.
+        Returns the loaded space ids, hottest first.
+        """
+        counts: Dict[str, int] = {}
+        for knowledge in knowledge_list:
+            counts[knowledge.space_id] = (
+                counts.get(knowledge.space_id, 0) + knowledge.retrieval_count
+            )
+        hottest = sorted(counts, key=lambda space_id: -counts[space_id])[:top_n]
+        loaded: List[str] = []
+        for space_id in hottest:
+            if self.memory_usage >= self.memory_budget:
+                break
+            try:
+                self.get(space_id)
+            except Exception as e:
+                logger.warning(f"Failed to warm up index of space {space_id}: {e}")
+                continue
+            loaded.append(space_id)
+            with self._lock:
+                for warm_id in reversed(loaded):
+                    if warm_id in self._indexes:
+                        self._indexes.move_to_end(warm_id)
+        return [space_id for space_id in loaded if space_id in self._indexes]
+
+
+@register(RegisterTypeEnum.RETRIEVER, "space_index")
+class SpaceIndexRetriever(BaseRetriever[RetrievalRequest, RetrievalChunk]):
+    """
+    Retriever over the indexes of a SpaceIndexManager. Every space of the
+    request's ``space_id_list`` is searched and the hits merged by similarity.
+    The query is embedded once per embedding model and dimension among the
+    spaces, with the model's registered embedding unless one is passed in.
+    """
+
+    def __init__(
+        self,
+        manager: SpaceIndexManager,
+        embedding: Optional[BaseEmbedding] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.manager = manager
+        self._embedding = embedding
+        self._embeddings: Dict[ModelName, BaseEmbedding] = {}
+
+    def _embedding_for(self, model_name: ModelName) -> BaseEmbedding:
+        if self._embedding is not None:
+            return self._embedding
+        embedding = self._embeddings.get(model_name)
+        if embedding is None:
+            EmbeddingCls = get_register(RegisterTypeEnum.EMBEDDING, model_name)
+            embedding = self._embeddings[model_name] = EmbeddingCls()
+        return embedding
+
+    async def retrieve(
+        self, params: RetrievalRequest, tenant_id: str
+    ) -> List[RetrievalChunk]:
+        config = to_vector_search_config(params.config)
+        if not config.space_id_list:
+            raise ValueError("space_index retrieval requires space_id_list")
+        # loading an index blocks on disk or on building it
+        loop = asyncio.get_running_loop()
+        loads = [
+            loop.run_in_executor(None, self.manager.acquire, space_id)
+            for space_id in config.space_id_list
+        ]
+        results = await asyncio.gather(*loads, return_exceptions=True)
+        indexes = [r for r in results if not isinstance(r, BaseException)]
+        try:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            return await self._search(params, config, tenant_id, indexes)
+        finally:
+            for index in indexes:
+                self.manager.release(index)
+
+    async def _search(
+        self,
+        params: RetrievalRequest,
+        config: VectorSearchConfig,
+        tenant_id: str,
+        indexes: List[VectorIndex],
+    ) -> List[RetrievalChunk]:
+
+        # spaces embedded with different models need their own query vector
+        groups: Dict[Tuple[ModelName, int], List[VectorIndex]] = {}
+        for index in indexes:
+            key = (index.model_name, index.query_dimension)
+            groups.setdefault(key, []).append(index)
+        if self._embedding is not None and len(groups) > 1:
+            raise ValueError(
+                "The spaces of the request were embedded with different models "
+                "or dimensions, which a single embedding cannot serve"
+            )
+
+        fetch_k = fetch_size(config)
+        filter_group = build_search_filter(config, tenant_id)
+        chunks: List[RetrievalChunk] = []
+        for (model_name, dimension), members in groups.items():
+            queries = await embed_queries(
+                self._embedding_for(model_name), [params.content], dimension
+            )
+            for index in members:
+                # spaces may be reduced with their own projection
+                hits = await index.search_async(
+                    index.project_queries(queries),
+                    fetch_k,
+                    filter_group,
+                    config.similarity_threshold,
+                )
+                chunks.extend(index.get_chunks(*hits[0]))
+        chunks.sort(key=lambda chunk: chunk.similarity, reverse=True)
+        return postprocess_results(chunks[:fetch_k], config.post_process, config.top_k)
+
+
+__all__ = ["SpaceIndexManager", "SpaceIndexRetriever", "index_memory"]
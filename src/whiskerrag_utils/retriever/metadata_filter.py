@@ -0,0 +1,742 @@
+"""
+Evaluate FilterGroup / Condition trees outside the database.
+
+A filter group can be compiled into:
+- a row predicate (``compile_predicate``), for filtering single records;
+- a vectorised mask function (``compile_mask``), for columnar chunk metadata;
+- bitmap lookups (``BitmapFilterIndex``), for pre-filtering vector search
+  candidates on the frequently filtered chunk fields. ``MetadataBitmapIndex``
+  builds the postings in memory; an on-disk index can serve its own.
+"""
+
+import re
+import sys
+from abc import ABC, abstractmethod
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from whiskerrag_types.model.page import Condition, FilterGroup, Operator
+from whiskerrag_utils.retriever.sizing import estimate_size
+
+FilterNode = Union[Condition, FilterGroup]
+Predicate = Callable[[Any], bool]
+
+SUPPORTED_OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike"}
+
+# fields indexed by MetadataBitmapIndex unless told otherwise
+DEFAULT_BITMAP_FIELDS = (
+    "tags",
+    "f1",
+    "f2",
+    "f3",
+    "f4",
+    "f5",
+    "knowledge_id",
+    "enabled",
+)
+
+
+def get_field_value(record: Any, field: str) -> Any:
+    """
+    Read a (possibly dotted) field from a model or mapping.
+
+    ``metadata._f1`` reads ``record.metadata["_f1"]``. Missing fields return None.
+    """
+    value = record
+    for part in field.split("."):
+        if value is None:
+            return None
+        if isinstance(value, Mapping):
+            value = value.get(part, None)
+        else:
+            value = getattr(value, part, None)
+    return value
+
+
+def like_to_regex(pattern: str, case_insensitive: bool = False) -> "re.Pattern[str]":
+    """Translate a SQL LIKE pattern (``%`` and ``_`` wildcards, ``\\`` escape)."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    flags = re.DOTALL | (re.IGNORECASE if case_insensitive else 0)
+    return re.compile("".join(parts), flags)
+
+
+def _validate_operator(condition: Condition) -> str:
+    operator = condition.operator.lower()
+    if operator not in SUPPORTED_OPERATORS:
+        raise ValueError(
+            f"Unsupported filter operator: {condition.operator}; "
+            f"supported operators are {sorted(SUPPORTED_OPERATORS)}"
+        )
+    return operator
+
+
+def _scalar_test(operator: str, expected: Any) -> Callable[[Any], bool]:
+    """Build a test for a single non-list value, following SQL NULL semantics."""
+    if operator == "eq":
+        return lambda v: v is not None and v == expected
+    if operator == "neq":
+        return lambda v: v is not None and v != expected
+    if operator in ("like", "ilike"):
+        regex = like_to_regex(str(expected), operator == "ilike")
+        return lambda v: v is not None and regex.fullmatch(str(v)) is not None
+
+    compare: Callable[[Any, Any], bool] = {
+        "gt": lambda a, b: a > b,
+        "gte": lambda a, b: a >= b,
+        "lt": lambda a, b: a < b,
+        "lte": lambda a, b: a <= b,
+    }[operator]
+
+    def ordered(v: Any) -> bool:
+        if v is None:
+            return False
+        try:
+            return bool(compare(v, expected))
+        except TypeError:
+            return False
+
+    return ordered
+
+
+def _value_test(operator: str, expected: Any) -> Callable[[Any], bool]:
+    """
+    Like ``_scalar_test`` but list values (e.g. ``tags``) are treated as sets:
+    ``eq`` means "contains", ``neq`` means "does not contain", and the other
+    operators match if any element matches.
+    """
+    scalar = _scalar_test(operator, expected)
+    if operator == "neq":
+        positive = _scalar_test("eq", expected)
+
+        def list_neq(v: Any) -> bool:
+            if isinstance(v, (list, tuple, set)):
+                return not any(positive(item) for item in v)
+            return scalar(v)
+
+        return list_neq
+
+    def list_any(v: Any) -> bool:
+        if isinstance(v, (list, tuple, set)):
+            return any(scalar(item) for item in v)
+        return scalar(v)
+
+    return list_any
+
+
+def compile_predicate(node: FilterNode) -> Predicate:
+    """
+    Compile a filter tree into a ``record -> bool`` function.
+
+    Records may be pydantic models (e.g. Chunk) or plain dicts. Operators and
+    LIKE patterns are resolved once at compile time.
+    """
+    if isinstance(node, Condition):
+        field = node.field
+        test = _value_test(_validate_operator(node), node.value)
+        return lambda record: test(get_field_value(record, field))
+
+    children = [compile_predicate(child) for child in node.conditions]
+    if node.operator == Operator.AND:
+        return lambda record: all(child(record) for child in children)
+    return lambda record: any(child(record) for child in children)
+
+
+class ColumnarMetadata:
+    """
+    Column-oriented view over a list of records, one numpy array per field.
+
+    Columns holding only numbers or booleans are stored with a native dtype so
+    range comparisons run fully vectorised; everything else is an object array.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], size: int) -> None:
+        for name, column in columns.items():
+            if len(column) != size:
+                raise ValueError(
+                    f"Column {name} has {len(column)} rows, expected {size}"
+                )
+        self.columns = columns
+        self.size = size
+
+    @classmethod
+    def from_records(
+        cls, records: Sequence[Any], fields: Iterable[str] = DEFAULT_BITMAP_FIELDS
+    ) -> "ColumnarMetadata":
+        columns = {
+            field: _to_column([get_field_value(record, field) for record in records])
+            for field in fields
+        }
+        return cls(columns, len(records))
+
+    def column(self, field: str) -> np.ndarray:
+        try:
+            return self.columns[field]
+        except KeyError:
+            raise KeyError(
+                f"Field {field} is not available as a column; "
+                f"available columns: {sorted(self.columns)}"
+            )
+
+    def take(self, rows: np.ndarray) -> "ColumnarMetadata":
+        """Return a new view restricted to the given row indices."""
+        return ColumnarMetadata(
+            {name: column[rows] for name, column in self.columns.items()},
+            len(rows),
+        )
+
+
+def _to_column(values: List[Any]) -> np.ndarray:
+    if values and all(isinstance(v, bool) for v in values):
+        return np.array(values, dtype=np.bool_)
+    if values and all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) for v in values
+    ):
+        return np.array(values, dtype=np.float64)
+    column = np.empty(len(values), dtype=object)
+    # assign one by one so equal-length lists are not broadcast into a 2-D array
+    for row, value in enumerate(values):
+        column[row] = value
+    return column
+
+
+_NUMPY_COMPARE = {
+    "eq": np.equal,
+    "neq": np.not_equal,
+    "gt": np.greater,
+    "gte": np.greater_equal,
+    "lt": np.less,
+    "lte": np.less_equal,
+}
+
+
+def _condition_mask(condition: Condition) -> Callable[[ColumnarMetadata], np.ndarray]:
+    operator = _validate_operator(condition)
+    field = condition.field
+    expected = condition.value
+    fallback = _value_test(operator, expected)
+
+    def evaluate(columns: ColumnarMetadata) -> np.ndarray:
+        column = columns.column(field)
+        ufunc = _NUMPY_COMPARE.get(operator)
+        if ufunc is not None and column.dtype != object:
+            # Native dtype: no NULLs and no lists, numpy comparisons apply directly.
+            try:
+                mask = np.asarray(ufunc(column, expected), dtype=np.bool_)
+                if mask.shape == column.shape:
+                    return mask
+            except TypeError:
+                pass
+        return np.fromiter(
+            (fallback(value) for value in column), dtype=np.bool_, count=columns.size
+        )
+
+    return evaluate
+
+
+def compile_mask(node: FilterNode) -> Callable[[ColumnarMetadata], np.ndarray]:
+    """
+    Compile a filter tree into a ``ColumnarMetadata -> bool mask`` function.
+
+    Groups combine child masks in place and short-circuit once the mask is all
+    False (AND) or all True (OR).
+    """
+    if isinstance(node, Condition):
+        return _condition_mask(node)
+
+    children = [compile_mask(child) for child in node.conditions]
+    is_and = node.operator == Operator.AND
+
+    def evaluate(columns: ColumnarMetadata) -> np.ndarray:
+        mask = np.full(columns.size, is_and, dtype=np.bool_)
+        for child in children:
+            if is_and:
+                mask &= child(columns)
+                if not mask.any():
+                    break
+            else:
+                mask |= child(columns)
+                if mask.all():
+                    break
+        return mask
+
+    return evaluate
+
+
+# =================== bitmap ===================
+
+_CONTAINER_BITS = 16
+_CONTAINER_SIZE = 1 << _CONTAINER_BITS
+_LOW_MASK = _CONTAINER_SIZE - 1
+# same switch-over point as Roaring: above 4096 entries a bitset is smaller
+_ARRAY_MAX = 4096
+
+Container = Tuple[bool, np.ndarray]
+"""(is_dense, data): sorted uint16 values, or a packed 65536-bit bitset."""
+
+
+def _dense_from_values(values: np.ndarray) -> np.ndarray:
+    bits = np.zeros(_CONTAINER_SIZE, dtype=np.bool_)
+    bits[values] = True
+    return np.packbits(bits, bitorder="little")
+
+
+def _values_from_dense(bits: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(np.unpackbits(bits, bitorder="little")).astype(np.uint16)
+
+
+def _dense_cardinality(bits: np.ndarray) -> int:
+    return int(np.unpackbits(bits).sum())
+
+
+def _dense_contains(bits: np.ndarray, values: np.ndarray) -> np.ndarray:
+    positions = values.astype(np.intp)
+    selected: np.ndarray = (bits[positions >> 3] >> (positions & 7)) & 1
+    return selected.astype(np.bool_)
+
+
+def _make_container(values: np.ndarray) -> Optional[Container]:
+    if len(values) == 0:
+        return None
+    if len(values) > _ARRAY_MAX:
+        return True, _dense_from_values(values)
+    return False, values.astype(np.uint16)
+
+
+def _normalize_dense(bits: np.ndarray) -> Optional[Container]:
+    cardinality = _dense_cardinality(bits)
+    if cardinality == 0:
+        return None
+    if cardinality <= _ARRAY_MAX:
+        return False, _values_from_dense(bits)
+    return True, bits
+
+
+def _container_values(container: Container) -> np.ndarray:
+    is_dense, data = container
+    return _values_from_dense(data) if is_dense else data
+
+
+def _container_and(a: Container, b: Container) -> Optional[Container]:
+    if a[0] and b[0]:
+        return _normalize_dense(a[1] & b[1])
+    if a[0] or b[0]:
+        dense, sparse = (a, b) if a[0] else (b, a)
+        kept = sparse[1][_dense_contains(dense[1], sparse[1])]
+        return (False, kept) if len(kept) else None
+    kept = np.intersect1d(a[1], b[1], assume_unique=True)
+    return (False, kept) if len(kept) else None
+
+
+def _container_or(a: Container, b: Container) -> Optional[Container]:
+    if not a[0] and not b[0]:
+        return _make_container(np.union1d(a[1], b[1]))
+    a_bits = a[1] if a[0] else _dense_from_values(a[1])
+    b_bits = b[1] if b[0] else _dense_from_values(b[1])
+    return _normalize_dense(a_bits | b_bits)
+
+
+def _container_sub(a: Container, b: Container) -> Optional[Container]:
+    if a[0]:
+        b_bits = b[1] if b[0] else _dense_from_values(b[1])
+        return _normalize_dense(a[1] & ~b_bits)
+    if b[0]:
+        kept = a[1][~_dense_contains(b[1], a[1])]
+    else:
+        kept = np.setdiff1d(a[1], b[1], assume_unique=True)
+    return (False, kept) if len(kept) else None
+
+
+class Bitmap:
+    """
+    Roaring-style compressed set of non-negative row ids.
+
+    Row ids are bucketed by their high 16 bits; each bucket keeps its low bits
+    either as a sorted uint16 array (sparse) or as a packed 65536-bit bitset
+    (dense), whichever is smaller. Set operations work container by container.
+    """
+
+    __slots__ = ("_containers",)
+
+    def __init__(self, containers: Optional[Dict[int, Container]] = None) -> None:
+        self._containers: Dict[int, Container] = containers or {}
+
+    @classmethod
+    def from_indices(cls, indices: Union[Sequence[int], np.ndarray]) -> "Bitmap":
+        values = np.unique(np.asarray(indices, dtype=np.int64))
+        if len(values) and values[0] < 0:
+            raise ValueError("Bitmap row ids must be non-negative")
+        containers: Dict[int, Container] = {}
+        if len(values) == 0:
+            return cls(containers)
+        highs = values >> _CONTAINER_BITS
+        boundaries = np.flatnonzero(np.diff(highs)) + 1
+        for group in np.split(values, boundaries):
+            container = _make_container((group & _LOW_MASK).astype(np.uint16))
+            if container is not None:
+                containers[int(group[0] >> _CONTAINER_BITS)] = container
+        return cls(containers)
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "Bitmap":
+        return cls.from_indices(np.flatnonzero(mask))
+
+    @classmethod
+    def full(cls, size: int) -> "Bitmap":
+        return cls.from_indices(np.arange(size, dtype=np.int64))
+
+    def add(self, row: int) -> "Bitmap":
+        """A copy with ``row`` added; this bitmap is left unchanged."""
+        if row < 0:
+            raise ValueError("Bitmap row ids must be non-negative")
+        high, low = row >> _CONTAINER_BITS, row & _LOW_MASK
+        containers = dict(self._containers)
+        container = containers.get(high)
+        if container is None:
+            containers[high] = (False, np.array([low], dtype=np.uint16))
+        elif container[0]:
+            bits = container[1].copy()
+            bits[low >> 3] |= 1 << (low & 7)
+            containers[high] = (True, bits)
+        else:
+            values = container[1]
+            if low > values[-1]:
+                # rows are mostly added in increasing order
+                values = np.concatenate((values, np.array([low], dtype=np.uint16)))
+            else:
+                position = int(np.searchsorted(values, low))
+                if values[position] == low:
+                    return self
+                values = np.insert(values, position, low)
+            if len(values) > _ARRAY_MAX:
+                containers[high] = (True, _dense_from_values(values))
+            else:
+                containers[high] = (False, values)
+        return Bitmap(containers)
+
+    def __len__(self) -> int:
+        return sum(
+            _dense_cardinality(data) if is_dense else len(data)
+            for is_dense, data in self._containers.values()
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def __contains__(self, row: int) -> bool:
+        container = self._containers.get(row >> _CONTAINER_BITS)
+        if container is None:
+            return False
+        low = np.array([row & _LOW_MASK], dtype=np.uint16)
+        if container[0]:
+            return bool(_dense_contains(container[1], low)[0])
+        position = int(np.searchsorted(container[1], low[0]))
+        return position < len(container[1]) and container[1][position] == low[0]
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        containers = {}
+        for high in self._containers.keys() & other._containers.keys():
+            merged = _container_and(self._containers[high], other._containers[high])
+            if merged is not None:
+                containers[high] = merged
+        return Bitmap(containers)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        containers = dict(self._containers)
+        for high, container in other._containers.items():
+            if high in containers:
+                merged = _container_or(containers[high], container)
+                if merged is not None:
+                    containers[high] = merged
+            else:
+                containers[high] = container
+        return Bitmap(containers)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        containers = {}
+        for high, container in self._containers.items():
+            if high in other._containers:
+                remaining = _container_sub(container, other._containers[high])
+                if remaining is not None:
+                    containers[high] = remaining
+            else:
+                containers[high] = container
+        return Bitmap(containers)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+        return np.array_equal(self.to_indices(), other.to_indices())
+
+    def __repr__(self) -> str:
+        return f"Bitmap(cardinality={len(self)}, containers={len(self._containers)})"
+
+    def to_indices(self) -> np.ndarray:
+        """Sorted int64 row ids."""
+        if not self._containers:
+            return np.empty(0, dtype=np.int64)
+        parts = [
+            (high << _CONTAINER_BITS)
+            + _container_values(self._containers[high]).astype(np.int64)
+            for high in sorted(self._containers)
+        ]
+        return np.concatenate(parts)
+
+    def to_mask(self, size: int) -> np.ndarray:
+        mask = np.zeros(size, dtype=np.bool_)
+        indices = self.to_indices()
+        mask[indices[indices < size]] = True
+        return mask
+
+
+class BitmapFilterIndex(ABC):
+    """
+    Evaluates filter trees over ``size`` rows from per-value postings.
+
+    ``eq`` / ``neq`` conditions on ``indexed_fields`` are answered from
+    ``lookup`` and ``non_null`` bitmaps; any other condition falls back to a
+    mask over ``columns``. Subclasses decide where postings and columns live.
+    """
+
+    size: int
+
+    @property
+    @abstractmethod
+    def indexed_fields(self) -> List[str]:
+        pass
+
+    @property
+    @abstractmethod
+    def columns(self) -> ColumnarMetadata:
+        pass
+
+    @abstractmethod
+    def lookup(self, field: str, value: Any) -> Bitmap:
+        """Rows whose ``field`` equals (or, for lists, contains) ``value``."""
+        pass
+
+    @abstractmethod
+    def non_null(self, field: str) -> Bitmap:
+        """Rows where ``field`` is set."""
+        pass
+
+    def all_rows(self) -> Bitmap:
+        return Bitmap.full(self.size)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated memory of the postings and columns held in memory."""
+        return 0
+
+    def evaluate(self, node: FilterNode) -> Bitmap:
+        """Evaluate a filter tree to the bitmap of matching rows."""
+        if isinstance(node, Condition):
+            operator = _validate_operator(node)
+            if operator in ("eq", "neq") and node.field in self.indexed_fields:
+                matched = self.lookup(node.field, node.value)
+                if operator == "eq":
+                    return matched
+                return self.non_null(node.field) - matched
+            return Bitmap.from_mask(_condition_mask(node)(self.columns))
+
+        if not node.conditions:
+            return self.all_rows() if node.operator == Operator.AND else Bitmap()
+        results = iter(node.conditions)
+        result = self.evaluate(next(results))
+        for child in results:
+            if node.operator == Operator.AND:
+                if not result:
+                    break
+                result = result & self.evaluate(child)
+            else:
+                result = result | self.evaluate(child)
+        return result
+
+    def mask(
+        self, node: Optional[FilterNode], size: Optional[int] = None
+    ) -> np.ndarray:
+        """Mask over the first ``size`` rows (all rows by default)."""
+        size = self.size if size is None else size
+        if node is None:
+            return np.ones(size, dtype=np.bool_)
+        return self.evaluate(node).to_mask(size)
+
+    def candidates(self, node: Optional[FilterNode]) -> np.ndarray:
+        """Sorted row ids that satisfy ``node`` (all rows if ``node`` is None)."""
+        if node is None:
+            return np.arange(self.size, dtype=np.int64)
+        return self.evaluate(node).to_indices()
+
+
+class MetadataBitmapIndex(BitmapFilterIndex):
+    """
+    Inverted bitmap index over chunk fields (``tags``, ``f1``-``f5``,
+    ``knowledge_id`` and ``enabled`` by default).
+
+    Row ids are the positions of the records passed to ``build``, which lets a
+    vector index pre-filter its candidate rows before scoring.
+
+    ``append`` indexes one more record in place of a rebuild. Bitmaps are
+    replaced rather than modified, so a lookup running alongside it sees either
+    the old or the new posting; pass the row count it should see to ``mask``.
+    """
+
+    def __init__(
+        self,
+        columns: ColumnarMetadata,
+        fields: Iterable[str] = DEFAULT_BITMAP_FIELDS,
+    ) -> None:
+        self._base_columns = self._columns = columns
+        # field values of appended rows, for the columns of the mask fallback
+        self._appended: List[Dict[str, Any]] = []
+        self.size = columns.size
+        self._all = Bitmap.full(self.size)
+        self._postings: Dict[str, Dict[Hashable, Bitmap]] = {}
+        self._non_null: Dict[str, Bitmap] = {}
+        # (row count, bytes) of the last memory estimate
+        self._nbytes: Tuple[int, int] = (-1, 0)
+        for field in fields:
+            self._index_field(field, columns.column(field))
+
+    @classmethod
+    def build(
+        cls, records: Sequence[Any], fields: Iterable[str] = DEFAULT_BITMAP_FIELDS
+    ) -> "MetadataBitmapIndex":
+        fields = tuple(fields)
+        return cls(ColumnarMetadata.from_records(records, fields), fields)
+
+    def _index_field(self, field: str, column: np.ndarray) -> None:
+        rows_by_value: Dict[Hashable, List[int]] = {}
+        non_null: List[int] = []
+        for row, value in enumerate(column.tolist()):
+            if value is None:
+                continue
+            non_null.append(row)
+            values = value if isinstance(value, (list, tuple, set)) else (value,)
+            for item in values:
+                try:
+                    rows_by_value.setdefault(item, []).append(row)
+                except TypeError:
+                    # unhashable values are only reachable through the mask path
+                    continue
+        self._postings[field] = {
+            value: Bitmap.from_indices(rows) for value, rows in rows_by_value.items()
+        }
+        self._non_null[field] = Bitmap.from_indices(non_null)
+
+    def append(self, record: Any) -> int:
+        """Index ``record`` as the next row and return its row id."""
+        row = self.size
+        values = {
+            field: get_field_value(record, field)
+            for field in self._base_columns.columns
+        }
+        for field in self._postings:
+            value = values[field]
+            if value is None:
+                continue
+            self._non_null[field] = self._non_null[field].add(row)
+            postings = self._postings[field]
+            items = value if isinstance(value, (list, tuple, set)) else (value,)
+            for item in items:
+                try:
+                    bitmap = postings.get(item, Bitmap())
+                except TypeError:
+                    continue
+                postings[item] = bitmap.add(row)
+        self._appended.append(values)
+        self._all = self._all.add(row)
+        self.size = row + 1
+        return row
+
+    @property
+    def columns(self) -> ColumnarMetadata:
+        """Columns over every row; rebuilt on first use after an ``append``."""
+        size, columns = self.size, self._columns
+        if columns.size != size:
+            base = self._base_columns
+            appended = self._appended[: size - base.size]
+            columns = ColumnarMetadata(
+                {
+                    field: _to_column(
+                        column.tolist() + [values[field] for values in appended]
+                    )
+                    for field, column in base.columns.items()
+                },
+                size,
+            )
+            self._columns = columns
+        return columns
+
+    @property
+    def indexed_fields(self) -> List[str]:
+        return list(self._postings)
+
+    @property
+    def nbytes(self) -> int:
+        size, (counted_size, nbytes) = self.size, self._nbytes
+        if counted_size != size:
+            # column values are shared with the indexed records: count slots
+            columns = {id(c): c for c in (self._base_columns, self._columns)}
+            nbytes = sum(
+                column.nbytes
+                for metadata in columns.values()
+                for column in metadata.columns.values()
+            )
+            nbytes += sum(sys.getsizeof(values) for values in self._appended)
+            nbytes += estimate_size((self._postings, self._non_null, self._all))
+            self._nbytes = (size, nbytes)
+        return nbytes
+
+    def lookup(self, field: str, value: Any) -> Bitmap:
+        try:
+            bitmap = self._postings[field].get(value)
+        except TypeError:
+            return Bitmap()
+        return bitmap if bitmap is not None else Bitmap()
+
+    def non_null(self, field: str) -> Bitmap:
+        return self._non_null[field]
+
+    def all_rows(self) -> Bitmap:
+        return self._all
+
+
+__all__ = [
+    "SUPPORTED_OPERATORS",
+    "DEFAULT_BITMAP_FIELDS",
+    "Bitmap",
+    "BitmapFilterIndex",
+    "ColumnarMetadata",
+    "MetadataBitmapIndex",
+    "compile_mask",
+    "compile_predicate",
+    "get_field_value",
+    "like_to_regex",
+]
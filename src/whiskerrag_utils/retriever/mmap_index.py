@@ -0,0 +1,530 @@
+"""
+Versioned on-disk vector index opened with ``np.memmap``.
+
+An index is a directory::
+
+    header.json        format, version, model name, dimension, count, checksum
+    embeddings.f32     row-major float32 matrix (count x dimension), L2-normalised
+    chunk_ids.idx/.dat chunk id table (uint64 offsets + utf-8 blob)
+    <column>.idx/.dat  one JSON value per row for every other Chunk field
+    <field>.keys/.offsets/.rows
+                       posting lists of the filter fields (tenant, space,
+                       knowledge, enabled, tags, f1-f5): the distinct values
+                       as JSON, then the sorted uint32 rows of each value;
+                       the last list holds the rows where the field is set
+    reduction.json/npz optional dimension reducer (see ``reduction``)
+
+Opening only reads the header and maps the files, so it costs the same for any
+index size, and read-only workers mapping the same files share pages through
+the OS page cache. Filters on the indexed fields read the postings they need
+straight from the mapped files; the JSON columns are only decoded a row at a
+time when a result is materialised, or whole for a condition the postings
+cannot answer.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from whiskerrag_types.interface.embed_interface import BaseEmbedding
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.knowledge import EmbeddingModelEnum
+from whiskerrag_types.model.page import FilterGroup
+from whiskerrag_types.model.retrieval import RetrievalChunk
+from whiskerrag_utils.registry import RegisterTypeEnum, register
+from whiskerrag_utils.retriever.metadata_filter import (
+    Bitmap,
+    BitmapFilterIndex,
+    ColumnarMetadata,
+    MetadataBitmapIndex,
+)
+from whiskerrag_utils.retriever.reduction import DimensionReducer
+from whiskerrag_utils.retriever.sizing import estimate_size
+from whiskerrag_utils.retriever.vector_search import (
+    INDEX_FILTER_FIELDS,
+    SearchHits,
+    VectorIndex,
+    VectorIndexRetriever,
+    normalize_rows,
+    search_matrix,
+)
+
+INDEX_FORMAT = "whisker-vector-index"
+INDEX_VERSION = 1
+HEADER_FILE = "header.json"
+EMBEDDINGS_FILE = "embeddings.f32"
+CHUNK_ID_TABLE = "chunk_ids"
+
+_WRITE_BATCH_SIZE = 4096
+_HASH_BLOCK_SIZE = 1 << 20
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def _table_files(directory: Path, name: str) -> List[Path]:
+    return [directory / f"{name}.idx", directory / f"{name}.dat"]
+
+
+def _write_table(directory: Path, name: str, values: Iterable[bytes]) -> None:
+    offsets = [0]
+    idx_path, dat_path = _table_files(directory, name)
+    with open(dat_path, "wb") as dat:
+        for value in values:
+            dat.write(value)
+            offsets.append(offsets[-1] + len(value))
+    np.asarray(offsets, dtype=np.uint64).tofile(idx_path)
+
+
+def _map_file(path: Path, dtype: Any, shape: Optional[tuple] = None) -> np.ndarray:
+    # np.memmap refuses empty files
+    if path.stat().st_size == 0:
+        return np.empty(shape if shape is not None else 0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+class _BlobTable:
+    """Read side of a table written by ``_write_table``."""
+
+    def __init__(self, directory: Path, name: str) -> None:
+        idx_path, dat_path = _table_files(directory, name)
+        self._offsets = _map_file(idx_path, np.uint64)
+        self._data = _map_file(dat_path, np.uint8)
+
+    def __len__(self) -> int:
+        return max(len(self._offsets) - 1, 0)
+
+    def __getitem__(self, row: int) -> bytes:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return bytes(self._data[start:end])
+
+
+def _posting_files(directory: Path, field: str) -> List[Path]:
+    return [directory / f"{field}.{part}" for part in ("keys", "offsets", "rows")]
+
+
+def _write_postings(directory: Path, field: str, values: Sequence[Any]) -> None:
+    rows_by_value: Dict[Hashable, List[int]] = {}
+    non_null: List[int] = []
+    for row, value in enumerate(values):
+        if value is None:
+            continue
+        non_null.append(row)
+        for item in value if isinstance(value, list) else (value,):
+            try:
+                rows_by_value.setdefault(item, []).append(row)
+            except TypeError:
+                # unhashable values are only reachable through the mask path
+                continue
+    keys_path, offsets_path, rows_path = _posting_files(directory, field)
+    with open(keys_path, "w", encoding="utf-8") as f:
+        json.dump(list(rows_by_value), f, ensure_ascii=False)
+    postings = [*rows_by_value.values(), non_null]
+    offsets = np.cumsum([0] + [len(rows) for rows in postings], dtype=np.uint64)
+    offsets.tofile(offsets_path)
+    with open(rows_path, "wb") as f:
+        for rows in postings:
+            np.asarray(rows, dtype=np.uint32).tofile(f)
+
+
+def _data_files(
+    directory: Path, columns: Sequence[str], filter_fields: Sequence[str] = ()
+) -> List[Path]:
+    files = [directory / EMBEDDINGS_FILE]
+    for name in (CHUNK_ID_TABLE, *columns):
+        files.extend(_table_files(directory, name))
+    for field in filter_fields:
+        files.extend(_posting_files(directory, field))
+    return files
+
+
+def _checksum(files: Iterable[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(path.name.encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _model_name_str(model_name: Union[EmbeddingModelEnum, str]) -> str:
+    if isinstance(model_name, EmbeddingModelEnum):
+        return model_name.value
+    return str(model_name)
+
+
+def write_vector_index(
+    path: PathLike,
+    chunks: Sequence[Chunk],
+    model_name: Optional[Union[EmbeddingModelEnum, str]] = None,
+    reducer: Optional[DimensionReducer] = None,
+) -> Path:
+    """
+    Write ``chunks`` (which must all carry embeddings of one model and one
+    dimension) as an index directory at ``path``, replacing any existing one.
+    With a ``reducer`` the embeddings are stored projected to its dimension
+    and the reducer is saved with the index to project queries.
+
+    The index is assembled in a sibling temporary directory and moved into
+    place, so readers never observe a partially written index.
+    """
+    target = Path(path)
+    if model_name is None:
+        if not chunks:
+            raise ValueError("model_name is required to write an empty index")
+        model_name = chunks[0].embedding_model_name
+    model = _model_name_str(model_name)
+
+    dimension = 0
+    for chunk in chunks:
+        if not chunk.embedding:
+            raise ValueError(f"Chunk {chunk.chunk_id} has no embedding")
+        if _model_name_str(chunk.embedding_model_name) != model:
+            raise ValueError(
+                f"Chunk {chunk.chunk_id} was embedded with "
+                f"{_model_name_str(chunk.embedding_model_name)}, expected {model}"
+            )
+        if dimension == 0:
+            dimension = len(chunk.embedding)
+        elif len(chunk.embedding) != dimension:
+            raise ValueError(
+                f"Chunk {chunk.chunk_id} has dimension {len(chunk.embedding)}, "
+                f"expected {dimension}"
+            )
+
+    if len(chunks) > np.iinfo(np.uint32).max:
+        raise ValueError("An index holds at most 2**32 - 1 chunks")
+    if reducer is not None and chunks and dimension != reducer.source_dimension:
+        raise ValueError(
+            f"Reducer expects dimension {reducer.source_dimension}, "
+            f"chunks have {dimension}"
+        )
+
+    columns = [
+        name for name in Chunk.model_fields if name not in ("chunk_id", "embedding")
+    ]
+    staging = target.parent / f".{target.name}.tmp-{uuid.uuid4().hex}"
+    staging.mkdir(parents=True)
+    try:
+        with open(staging / EMBEDDINGS_FILE, "wb") as f:
+            for start in range(0, len(chunks), _WRITE_BATCH_SIZE):
+                batch = chunks[start : start + _WRITE_BATCH_SIZE]
+                vectors = [chunk.embedding or [] for chunk in batch]
+                if reducer is not None:
+                    reducer.transform(vectors).tofile(f)
+                else:
+                    normalize_rows(vectors).tofile(f)
+        _write_table(
+            staging,
+            CHUNK_ID_TABLE,
+            (chunk.chunk_id.encode("utf-8") for chunk in chunks),
+        )
+        payloads = [
+            chunk.model_dump(mode="json", exclude={"chunk_id", "embedding"})
+            for chunk in chunks
+        ]
+        for column in columns:
+            _write_table(
+                staging,
+                column,
+                (
+                    json.dumps(payload[column], ensure_ascii=False).encode("utf-8")
+                    for payload in payloads
+                ),
+            )
+        for field in INDEX_FILTER_FIELDS:
+            _write_postings(staging, field, [payload[field] for payload in payloads])
+        header = {
+            "format": INDEX_FORMAT,
+            "version": INDEX_VERSION,
+            "model_name": model,
+            "dimension": reducer.dimension if reducer is not None else dimension,
+            "count": len(chunks),
+            "dtype": "float32",
+            "normalized": True,
+            "columns": columns,
+            "filter_fields": list(INDEX_FILTER_FIELDS),
+            "checksum": _checksum(_data_files(staging, columns, INDEX_FILTER_FIELDS)),
+        }
+        if reducer is not None:
+            header["reduction"] = reducer.to_header()
+            reducer.save(staging)
+        with open(staging / HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=2)
+
+        if target.exists():
+            backup = target.parent / f".{target.name}.old-{uuid.uuid4().hex}"
+            os.replace(target, backup)
+            os.replace(staging, target)
+            shutil.rmtree(backup, ignore_errors=True)
+        else:
+            os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return target
+
+
+class MmapVectorIndex(VectorIndex):
+    """Read-only view over an index directory written by ``write_vector_index``."""
+
+    def __init__(self, path: PathLike, header: Dict[str, Any]) -> None:
+        self.path = Path(path)
+        self.header = header
+        self.model_name = header["model_name"]
+        self.dimension = int(header["dimension"])
+        self.columns: List[str] = list(header["columns"])
+        # absent from indexes written before postings were persisted
+        self.filter_fields: List[str] = list(header.get("filter_fields", []))
+        self._count = int(header["count"])
+        self.embeddings = _map_file(
+            self.path / EMBEDDINGS_FILE, np.float32, (self._count, self.dimension)
+        )
+        self._chunk_ids = _BlobTable(self.path, CHUNK_ID_TABLE)
+        self._tables = {name: _BlobTable(self.path, name) for name in self.columns}
+        self._decoded: Dict[str, List[Any]] = {}
+        # estimated memory of what was decoded from the mapped files
+        self._decoded_bytes: Dict[str, int] = {}
+        self._row_by_chunk_id: Optional[Dict[str, int]] = None
+        self._bitmap_index: Optional[BitmapFilterIndex] = None
+        self.reducer = (
+            DimensionReducer.load(self.path) if "reduction" in header else None
+        )
+
+    @classmethod
+    def read_header(cls, path: PathLike) -> Dict[str, Any]:
+        header_path = Path(path) / HEADER_FILE
+        if not header_path.exists():
+            raise FileNotFoundError(f"No vector index header at {header_path}")
+        with open(header_path, "r", encoding="utf-8") as f:
+            header: Dict[str, Any] = json.load(f)
+        if header.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{path} is not a {INDEX_FORMAT} directory")
+        if header.get("version") != INDEX_VERSION:
+            raise ValueError(
+                f"Unsupported index version {header.get('version')}, "
+                f"expected {INDEX_VERSION}"
+            )
+        return header
+
+    @classmethod
+    def open(cls, path: PathLike, verify: bool = False) -> "MmapVectorIndex":
+        """
+        Map an index. ``verify`` re-hashes every data file against the header
+        checksum, which reads the whole index and is therefore opt-in.
+        """
+        index = cls(path, cls.read_header(path))
+        if verify:
+            index.verify()
+        return index
+
+    def verify(self) -> None:
+        actual = _checksum(_data_files(self.path, self.columns, self.filter_fields))
+        if actual != self.header["checksum"]:
+            raise ValueError(f"Checksum mismatch for vector index at {self.path}")
+
+    @property
+    def size(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Size of the mapped data files (pages are only resident once touched)
+        plus an estimate of the columns, postings and lookups decoded so far.
+        """
+        files = _data_files(self.path, self.columns, self.filter_fields)
+        nbytes = sum(p.stat().st_size for p in files)
+        nbytes += sum(self._decoded_bytes.values())
+        if self._bitmap_index is not None:
+            nbytes += self._bitmap_index.nbytes
+        return nbytes
+
+    def chunk_id(self, row: int) -> str:
+        return self._chunk_ids[row].decode("utf-8")
+
+    def row_of(self, chunk_id: str) -> Optional[int]:
+        if self._row_by_chunk_id is None:
+            row_by_chunk_id = {self.chunk_id(row): row for row in range(self._count)}
+            self._decoded_bytes[CHUNK_ID_TABLE] = estimate_size(row_by_chunk_id)
+            self._row_by_chunk_id = row_by_chunk_id
+        return self._row_by_chunk_id.get(chunk_id)
+
+    def value(self, column: str, row: int) -> Any:
+        if column in self._decoded:
+            return self._decoded[column][row]
+        return json.loads(self._tables[column][row])
+
+    def column(self, column: str) -> List[Any]:
+        if column not in self._decoded:
+            table = self._tables[column]
+            values = [json.loads(table[row]) for row in range(len(table))]
+            self._decoded_bytes[column] = estimate_size(values)
+            self._decoded[column] = values
+        return self._decoded[column]
+
+    def metadata_columns(
+        self, fields: Iterable[str] = INDEX_FILTER_FIELDS
+    ) -> ColumnarMetadata:
+        records: List[Dict[str, Any]] = [{} for _ in range(self._count)]
+        fields = tuple(fields)
+        for field in fields:
+            root = field.split(".")[0]
+            for record, value in zip(records, self.column(root)):
+                record[root] = value
+        return ColumnarMetadata.from_records(records, fields)
+
+    @property
+    def bitmap_index(self) -> BitmapFilterIndex:
+        if self._bitmap_index is None:
+            if self.filter_fields:
+                self._bitmap_index = _MappedBitmapIndex(self)
+            else:
+                self._bitmap_index = MetadataBitmapIndex(
+                    self.metadata_columns(), INDEX_FILTER_FIELDS
+                )
+        return self._bitmap_index
+
+    def candidate_rows(
+        self, filter_group: Optional[FilterGroup]
+    ) -> Optional[np.ndarray]:
+        """Rows passing ``filter_group``, or None when every row does."""
+        if filter_group is None:
+            return None
+        rows = self.bitmap_index.candidates(filter_group)
+        return None if len(rows) == self._count else rows
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> List[SearchHits]:
+        return search_matrix(
+            self.embeddings,
+            queries,
+            top_k,
+            self.candidate_rows(filter_group),
+            similarity_threshold,
+        )
+
+    def get_chunk(self, row: int, similarity: float) -> RetrievalChunk:
+        payload = {column: self.value(column, row) for column in self.columns}
+        return RetrievalChunk(
+            chunk_id=self.chunk_id(row),
+            embedding=self.embeddings[row].tolist(),
+            similarity=float(similarity),
+            **payload,
+        )
+
+    def get_chunks(
+        self, rows: np.ndarray, similarities: np.ndarray
+    ) -> List[RetrievalChunk]:
+        return [
+            self.get_chunk(int(row), float(similarity))
+            for row, similarity in zip(rows, similarities)
+        ]
+
+
+class _MappedPostings:
+    """Posting lists of one field, read from the files of ``_write_postings``."""
+
+    def __init__(self, directory: Path, field: str) -> None:
+        keys_path, offsets_path, rows_path = _posting_files(directory, field)
+        with open(keys_path, "r", encoding="utf-8") as f:
+            keys = json.load(f)
+        self._positions: Dict[Hashable, int] = {}
+        for position, key in enumerate(keys):
+            self._positions.setdefault(key, position)
+        self._offsets = _map_file(offsets_path, np.uint64)
+        self._rows = _map_file(rows_path, np.uint32)
+        self.nbytes = estimate_size(self._positions)
+
+    def _bitmap(self, position: int) -> Bitmap:
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return Bitmap.from_indices(self._rows[start:end])
+
+    def lookup(self, value: Any) -> Bitmap:
+        try:
+            position = self._positions.get(value)
+        except TypeError:
+            return Bitmap()
+        return Bitmap() if position is None else self._bitmap(position)
+
+    def non_null(self) -> Bitmap:
+        return self._bitmap(len(self._offsets) - 2)
+
+
+class _MappedBitmapIndex(BitmapFilterIndex):
+    """
+    Filter index over the posting files of an ``MmapVectorIndex``. A lookup
+    reads only the rows of the value it asks for; the JSON columns are decoded
+    only for conditions the postings cannot answer.
+    """
+
+    def __init__(self, index: "MmapVectorIndex") -> None:
+        self._index = index
+        self.size = index.size
+        self._fields: Dict[str, Optional[_MappedPostings]] = {
+            field: None for field in index.filter_fields
+        }
+        self._columns: Optional[ColumnarMetadata] = None
+
+    @property
+    def indexed_fields(self) -> List[str]:
+        return list(self._fields)
+
+    @property
+    def columns(self) -> ColumnarMetadata:
+        if self._columns is None:
+            self._columns = self._index.metadata_columns()
+        return self._columns
+
+    @property
+    def nbytes(self) -> int:
+        # the column values themselves are the index's decoded columns
+        nbytes = sum(
+            postings.nbytes
+            for postings in self._fields.values()
+            if postings is not None
+        )
+        if self._columns is not None:
+            nbytes += sum(c.nbytes for c in self._columns.columns.values())
+        return nbytes
+
+    def _postings(self, field: str) -> _MappedPostings:
+        postings = self._fields[field]
+        if postings is None:
+            postings = _MappedPostings(self._index.path, field)
+            self._fields[field] = postings
+        return postings
+
+    def lookup(self, field: str, value: Any) -> Bitmap:
+        return self._postings(field).lookup(value)
+
+    def non_null(self, field: str) -> Bitmap:
+        return self._postings(field).non_null()
+
+
+@register(RegisterTypeEnum.RETRIEVER, "mmap_index")
+class MmapIndexRetriever(VectorIndexRetriever):
+    """Retriever over an on-disk index; accepts a path or an opened index."""
+
+    index: MmapVectorIndex
+
+    def __init__(
+        self,
+        index: Union[PathLike, MmapVectorIndex],
+        embedding: Optional[BaseEmbedding] = None,
+        **kwargs: Any,
+    ) -> None:
+        if not isinstance(index, MmapVectorIndex):
+            index = MmapVectorIndex.open(index)
+        super().__init__(index, embedding, **kwargs)
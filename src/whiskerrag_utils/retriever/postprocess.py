@@ -0,0 +1,215 @@
+"""
+Post-processing of retrieval results: Maximal Marginal Relevance (MMR)
+re-ranking and merging of adjacent chunks from the same knowledge.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from whiskerrag_types.model.retrieval import RetrievalChunk, RetrievalPostProcessConfig
+from whiskerrag_utils.parser.token_length import estimate_tokens
+
+# metadata set by loaders that split one knowledge into several contents;
+# parsers number chunks per content, so runs never cross these
+CONTENT_KEYS = ("page_number",)
+
+
+def mmr_select(
+    relevance: np.ndarray,
+    embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    Greedy MMR over ``n`` candidates.
+
+    ``relevance`` (n,) is each candidate's similarity to the query and
+    ``embeddings`` (n, d) the candidate vectors. The pairwise similarity matrix
+    is computed once; each step is a vectorised argmax over
+    ``lambda * relevance - (1 - lambda) * max_similarity_to_selected``.
+    Returns candidate positions in selection order.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = vectors / norms
+    pairwise = vectors @ vectors.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected = [int(np.argmax(relevance))]
+    available = np.ones(n, dtype=np.bool_)
+    available[selected[0]] = False
+    redundancy = pairwise[selected[0]].copy()
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(redundancy, pairwise[chosen], out=redundancy)
+    return selected
+
+
+def apply_mmr(
+    chunks: Sequence[RetrievalChunk], k: int, lambda_mult: float = 0.5
+) -> List[RetrievalChunk]:
+    """
+    MMR over retrieved chunks, using their similarity as relevance. Chunks
+    without embeddings cannot be compared, so the original order is kept then.
+    """
+    if len(chunks) <= 1 or any(not chunk.embedding for chunk in chunks):
+        return list(chunks[:k])
+    dimension = len(chunks[0].embedding or [])
+    if any(len(chunk.embedding or []) != dimension for chunk in chunks):
+        return list(chunks[:k])
+    relevance = np.fromiter(
+        (chunk.similarity for chunk in chunks), dtype=np.float32, count=len(chunks)
+    )
+    embeddings = np.asarray([chunk.embedding for chunk in chunks], dtype=np.float32)
+    return [chunks[i] for i in mmr_select(relevance, embeddings, k, lambda_mult)]
+
+
+def _chunk_order(chunk: RetrievalChunk) -> Optional[int]:
+    metadata = chunk.metadata or {}
+    for key in ("_idx", "chunk_index"):
+        value = metadata.get(key)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def _run_key(chunk: RetrievalChunk) -> Tuple[str, ...]:
+    metadata = chunk.metadata or {}
+    return (chunk.knowledge_id,) + tuple(
+        repr(metadata.get(key)) for key in CONTENT_KEYS
+    )
+
+
+def _overlap_length(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``."""
+    limit = min(len(left), len(right))
+    if limit == 0:
+        return 0
+    start = len(left) - limit
+    while True:
+        start = left.find(right[0], start)
+        if start == -1:
+            return 0
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start += 1
+
+
+def _merge_run(run: List[RetrievalChunk]) -> RetrievalChunk:
+    if len(run) == 1:
+        return run[0]
+    context = run[0].context
+    for chunk in run[1:]:
+        overlap = _overlap_length(context, chunk.context)
+        separator = "" if overlap else "\n"
+        context = context + separator + chunk.context[overlap:]
+
+    first, last = run[0], run[-1]
+    metadata: Dict[str, Any] = dict(first.metadata or {})
+    metadata["_merged_chunk_ids"] = [chunk.chunk_id for chunk in run]
+    metadata["_idx_range"] = [_chunk_order(first), _chunk_order(last)]
+    first_position = metadata.get("position")
+    last_position = (last.metadata or {}).get("position")
+    if isinstance(first_position, dict) and isinstance(last_position, dict):
+        position = dict(first_position)
+        for key in ("end_line", "end_column"):
+            if key in last_position:
+                position[key] = last_position[key]
+        if "start_line" in position and "end_line" in position:
+            position["total_lines"] = position["end_line"] - position["start_line"] + 1
+        metadata["position"] = position
+
+    best = max(run, key=lambda chunk: chunk.similarity)
+    return best.model_copy(
+        update={
+            "context": context,
+            "metadata": metadata,
+            "similarity": best.similarity,
+        }
+    )
+
+
+def merge_adjacent_chunks(
+    chunks: Sequence[RetrievalChunk], token_budget: int
+) -> List[RetrievalChunk]:
+    """
+    Merge retrieved chunks of the same knowledge (and the same loaded content,
+    e.g. PDF page) whose ``_idx`` (or the code parser's ``chunk_index``) are
+    consecutive, as long as the merged text stays
+    within ``token_budget``. Overlap between neighbours is removed. Merged
+    results keep the best similarity of their parts and the result list stays
+    ordered by similarity.
+    """
+    groups: Dict[Tuple[str, ...], List[Tuple[int, RetrievalChunk]]] = {}
+    result: List[RetrievalChunk] = []
+    for chunk in chunks:
+        order = _chunk_order(chunk)
+        if order is None:
+            result.append(chunk)
+        else:
+            groups.setdefault(_run_key(chunk), []).append((order, chunk))
+
+    for members in groups.values():
+        members.sort(key=lambda item: item[0])
+        run: List[RetrievalChunk] = []
+        run_tokens = 0
+        previous: Optional[int] = None
+        for order, chunk in members:
+            tokens = estimate_tokens(chunk.context)
+            if (
+                run
+                and previous is not None
+                and order == previous + 1
+                and run_tokens + tokens <= token_budget
+            ):
+                run.append(chunk)
+                run_tokens += tokens
+            else:
+                if run:
+                    result.append(_merge_run(run))
+                run, run_tokens = [chunk], tokens
+            previous = order
+        if run:
+            result.append(_merge_run(run))
+
+    result.sort(key=lambda chunk: chunk.similarity, reverse=True)
+    return result
+
+
+def postprocess_results(
+    chunks: Sequence[RetrievalChunk],
+    config: Optional[RetrievalPostProcessConfig],
+    top_k: Optional[int] = None,
+) -> List[RetrievalChunk]:
+    """Apply the configured stages: MMR down to ``top_k``, then merging."""
+    results = list(chunks)
+    if config is None:
+        return results[:top_k] if top_k is not None else results
+    if config.mmr:
+        results = apply_mmr(
+            results, top_k if top_k is not None else len(results), config.mmr_lambda
+        )
+    elif top_k is not None:
+        results = results[:top_k]
+    if config.merge_adjacent:
+        results = merge_adjacent_chunks(results, config.merge_token_budget)
+    return results
+
+
+__all__ = [
+    "apply_mmr",
+    "estimate_tokens",
+    "merge_adjacent_chunks",
+    "mmr_select",
+    "postprocess_results",
+]
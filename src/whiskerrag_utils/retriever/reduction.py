@@ -0,0 +1,284 @@
+"""
+Dimensionality reduction of stored embeddings.
+
+A ``DimensionReducer`` is fitted per (space, embedding model) and maps vectors
+of the model dimension to a smaller one, either with PCA or by keeping a
+prefix of every vector (Matryoshka-trained models put most of the signal in
+the leading dimensions). The same reducer is applied to chunk embeddings at
+ingest and to query embeddings at search time; ``write_vector_index`` stores
+it next to the index so a reopened index projects queries the same way::
+
+    reduction.json     method, source dimension, dimension, explained variance
+    reduction.npz      PCA mean and components (PCA only)
+
+Index memory and scan time shrink with the dimension. ``recall_report``
+measures what that costs in recall@k for a set of candidate dimensions.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_utils.retriever.vector_search import normalize_rows, select_top_k
+
+REDUCTION_FILE = "reduction.json"
+REDUCTION_ARRAYS = "reduction.npz"
+
+ReductionMethod = Literal["pca", "prefix"]
+PathLike = Union[str, Path]
+
+
+class DimensionReducer:
+    """
+    Linear projection from ``source_dimension`` to ``dimension``. Inputs and
+    outputs are L2-normalised float32 rows, so cosine similarity stays a dot
+    product after the projection.
+    """
+
+    def __init__(
+        self,
+        method: ReductionMethod,
+        source_dimension: int,
+        dimension: int,
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+        explained_variance_ratio: Optional[float] = None,
+    ) -> None:
+        if not 0 < dimension <= source_dimension:
+            raise ValueError(
+                f"Reduced dimension {dimension} must be in (0, {source_dimension}]"
+            )
+        if method == "pca" and (mean is None or components is None):
+            raise ValueError("PCA reduction requires mean and components")
+        self.method = method
+        self.source_dimension = source_dimension
+        self.dimension = dimension
+        self.mean = mean
+        self.components = components
+        self.explained_variance_ratio = explained_variance_ratio
+        self._variance_ratios: Optional[np.ndarray] = None
+
+    @classmethod
+    def prefix(cls, source_dimension: int, dimension: int) -> "DimensionReducer":
+        """Matryoshka truncation: keep the first ``dimension`` values."""
+        return cls("prefix", source_dimension, dimension)
+
+    @classmethod
+    def fit_pca(
+        cls,
+        embeddings: Union[np.ndarray, Sequence[Sequence[float]]],
+        dimension: int,
+        max_samples: int = 50000,
+        seed: int = 0,
+    ) -> "DimensionReducer":
+        """
+        Fit PCA on (a sample of at most ``max_samples``) normalised rows of
+        ``embeddings``.
+        """
+        matrix = normalize_rows(embeddings)
+        if len(matrix) > max_samples:
+            rows = np.random.default_rng(seed).choice(
+                len(matrix), max_samples, replace=False
+            )
+            matrix = matrix[rows]
+        mean = matrix.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        dimension = min(dimension, vt.shape[0])
+        variance = singular_values**2
+        total = float(variance.sum())
+        ratios = variance / total if total else np.ones_like(variance)
+        reducer = cls(
+            "pca",
+            matrix.shape[1],
+            dimension,
+            mean.astype(np.float32),
+            vt[:dimension].astype(np.float32),
+            float(ratios[:dimension].sum()),
+        )
+        reducer._variance_ratios = ratios[:dimension]
+        return reducer
+
+    def truncated(self, dimension: int) -> "DimensionReducer":
+        """The same reducer with fewer output dimensions, without refitting."""
+        if dimension > self.dimension:
+            raise ValueError(f"Cannot widen a {self.dimension}-dim reducer")
+        if self.method == "prefix":
+            return DimensionReducer.prefix(self.source_dimension, dimension)
+        assert self.components is not None
+        ratios = self._variance_ratios
+        reducer = DimensionReducer(
+            "pca",
+            self.source_dimension,
+            dimension,
+            self.mean,
+            self.components[:dimension],
+            float(ratios[:dimension].sum()) if ratios is not None else None,
+        )
+        reducer._variance_ratios = None if ratios is None else ratios[:dimension]
+        return reducer
+
+    def transform(
+        self, matrix: Union[np.ndarray, Sequence[Sequence[float]]]
+    ) -> np.ndarray:
+        """Project rows of ``source_dimension`` to normalised rows of ``dimension``."""
+        array = normalize_rows(matrix)
+        if array.shape[1] != self.source_dimension:
+            raise ValueError(
+                f"Expected vectors of dimension {self.source_dimension}, "
+                f"got {array.shape[1]}"
+            )
+        if self.method == "prefix":
+            return normalize_rows(array[:, : self.dimension])
+        assert self.mean is not None and self.components is not None
+        return normalize_rows((array - self.mean) @ self.components.T)
+
+    def to_header(self) -> Dict[str, object]:
+        return {
+            "method": self.method,
+            "source_dimension": self.source_dimension,
+            "dimension": self.dimension,
+            "explained_variance_ratio": self.explained_variance_ratio,
+        }
+
+    def save(self, directory: PathLike) -> None:
+        directory = Path(directory)
+        with open(directory / REDUCTION_FILE, "w", encoding="utf-8") as f:
+            json.dump(self.to_header(), f, indent=2)
+        if self.method == "pca":
+            assert self.mean is not None and self.components is not None
+            np.savez(
+                directory / REDUCTION_ARRAYS,
+                mean=self.mean,
+                components=self.components,
+            )
+
+    @classmethod
+    def load(cls, directory: PathLike) -> Optional["DimensionReducer"]:
+        """The reducer saved in ``directory``, None if there is none."""
+        directory = Path(directory)
+        if not (directory / REDUCTION_FILE).exists():
+            return None
+        with open(directory / REDUCTION_FILE, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        mean = components = None
+        if header["method"] == "pca":
+            with np.load(directory / REDUCTION_ARRAYS) as arrays:
+                mean, components = arrays["mean"], arrays["components"]
+        return cls(
+            header["method"],
+            int(header["source_dimension"]),
+            int(header["dimension"]),
+            mean,
+            components,
+            header.get("explained_variance_ratio"),
+        )
+
+
+def reduce_chunks(chunks: Sequence[Chunk], reducer: DimensionReducer) -> List[Chunk]:
+    """Copies of ``chunks`` whose embeddings are projected by ``reducer``."""
+    if not chunks:
+        return []
+    reduced = reducer.transform([chunk.embedding or [] for chunk in chunks])
+    return [
+        chunk.model_copy(update={"embedding": vector.tolist()})
+        for chunk, vector in zip(chunks, reduced)
+    ]
+
+
+def fit_space_reducers(
+    chunks: Sequence[Chunk],
+    dimension: int,
+    method: ReductionMethod = "pca",
+    max_samples: int = 50000,
+) -> Dict[Tuple[str, str], DimensionReducer]:
+    """Fit one reducer per (space_id, embedding model name) of ``chunks``."""
+    groups: Dict[Tuple[str, str], List[List[float]]] = {}
+    for chunk in chunks:
+        if not chunk.embedding:
+            continue
+        model_name = getattr(
+            chunk.embedding_model_name, "value", chunk.embedding_model_name
+        )
+        groups.setdefault((chunk.space_id, str(model_name)), []).append(chunk.embedding)
+    reducers: Dict[Tuple[str, str], DimensionReducer] = {}
+    for key, embeddings in groups.items():
+        if method == "prefix":
+            reducers[key] = DimensionReducer.prefix(len(embeddings[0]), dimension)
+        else:
+            reducers[key] = DimensionReducer.fit_pca(embeddings, dimension, max_samples)
+    return reducers
+
+
+class ReductionRecall(BaseModel):
+    method: str
+    dimension: int
+    recall_at_k: float
+    memory_ratio: float
+    explained_variance_ratio: Optional[float] = None
+
+
+def _neighbours(
+    embeddings: np.ndarray, queries: np.ndarray, top_k: int, exclude: np.ndarray
+) -> List[set]:
+    scores = embeddings @ queries.T
+    if len(exclude):
+        scores[exclude, np.arange(len(exclude))] = -np.inf
+    return [set(select_top_k(scores[:, i], top_k)[0]) for i in range(len(queries))]
+
+
+def recall_report(
+    embeddings: Union[np.ndarray, Sequence[Sequence[float]]],
+    dimensions: Sequence[int],
+    method: ReductionMethod = "pca",
+    queries: Optional[Union[np.ndarray, Sequence[Sequence[float]]]] = None,
+    top_k: int = 10,
+    num_queries: int = 200,
+    seed: int = 0,
+) -> List[ReductionRecall]:
+    """
+    Recall@k of searching reduced vectors against exact search on the full
+    ones, per candidate dimension. Without ``queries``, up to ``num_queries``
+    rows (at most half) of ``embeddings`` are sampled as queries: their own
+    row is excluded from the results and PCA is fitted on the other rows, so
+    the queries are as unseen as they would be in production.
+    """
+    matrix = normalize_rows(embeddings)
+    exclude = np.empty(0, dtype=np.int64)
+    fit_matrix = matrix
+    if queries is None:
+        exclude = np.random.default_rng(seed).choice(
+            len(matrix), min(num_queries, len(matrix) // 2), replace=False
+        )
+        query_matrix = matrix[exclude]
+        fit_matrix = np.delete(matrix, exclude, axis=0)
+    else:
+        query_matrix = normalize_rows(queries)
+    truth = _neighbours(matrix, query_matrix, top_k, exclude)
+
+    widest = max(dimensions)
+    if method == "prefix":
+        base = DimensionReducer.prefix(matrix.shape[1], widest)
+    else:
+        base = DimensionReducer.fit_pca(fit_matrix, widest, seed=seed)
+    report: List[ReductionRecall] = []
+    for dimension in sorted(dimensions, reverse=True):
+        reducer = base.truncated(min(dimension, base.dimension))
+        found = _neighbours(
+            reducer.transform(matrix), reducer.transform(query_matrix), top_k, exclude
+        )
+        hits = sum(len(t & f) for t, f in zip(truth, found))
+        total = sum(len(t) for t in truth)
+        report.append(
+            ReductionRecall(
+                method=method,
+                dimension=reducer.dimension,
+                recall_at_k=hits / total if total else 1.0,
+                memory_ratio=reducer.dimension / matrix.shape[1],
+                explained_variance_ratio=reducer.explained_variance_ratio,
+            )
+        )
+    return report
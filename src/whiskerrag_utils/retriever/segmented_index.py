@@ -0,0 +1,482 @@
+"""
+In-memory vector index that takes incremental updates.
+
+Rows are appended to a growable active segment; once it holds
+``segment_size`` rows it is sealed and a new one is started. Deletes and
+re-inserts only flip a per-row tombstone, and enabling or disabling a chunk or
+a whole knowledge flips a per-row enable flag, so the cost of a write is
+proportional to the rows it touches rather than to the space.
+
+``compact`` rewrites sealed segments that carry many tombstones (or are too
+small) into fresh ones. The copy runs outside the index lock and only the
+final swap is locked, so queries keep running against the old segments while
+a compaction is in progress; ``start_background_compaction`` runs it
+periodically on a daemon thread.
+
+With a ``DimensionReducer`` rows are projected as they are upserted and
+stored at the reduced dimension; the retriever projects queries the same way.
+
+Row ids returned by ``search`` encode ``(segment id, local row)``. Segments
+retired by a compaction stay addressable until the next one, so the results
+of a search that raced a compaction can still be materialised.
+"""
+
+import itertools
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from whiskerrag_types.interface.embed_interface import BaseEmbedding
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.knowledge import EmbeddingModelEnum
+from whiskerrag_types.model.page import FilterGroup
+from whiskerrag_types.model.retrieval import RetrievalChunk
+from whiskerrag_utils.registry import RegisterTypeEnum, register
+from whiskerrag_utils.retriever.metadata_filter import MetadataBitmapIndex
+from whiskerrag_utils.retriever.reduction import DimensionReducer
+from whiskerrag_utils.retriever.sizing import estimate_size
+from whiskerrag_utils.retriever.vector_search import (
+    INDEX_FILTER_FIELDS,
+    SearchHits,
+    VectorIndex,
+    VectorIndexRetriever,
+    normalize_rows,
+    select_top_k,
+)
+
+logger = logging.getLogger("whisker")
+
+_ROW_BITS = 32
+_ROW_MASK = (1 << _ROW_BITS) - 1
+_INITIAL_CAPACITY = 256
+
+
+class _Segment:
+    """Append-only block of rows with tombstones and enable flags."""
+
+    def __init__(self, segment_id: int, dimension: int, capacity: int) -> None:
+        self.segment_id = segment_id
+        self.dimension = dimension
+        self.count = 0
+        self.sealed = False
+        self.embeddings = np.zeros((capacity, dimension), dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=np.bool_)
+        self.enabled = np.zeros(capacity, dtype=np.bool_)
+        self.chunks: List[Chunk] = []
+        # estimated Python memory of the stored chunks, kept up on append
+        self.chunk_bytes = 0
+        self.rows_by_knowledge: Dict[str, List[int]] = {}
+        self.bitmap_index = MetadataBitmapIndex.build([], INDEX_FILTER_FIELDS)
+        self._sealed_nbytes: Optional[int] = None
+
+    @property
+    def live_count(self) -> int:
+        return int(np.count_nonzero(self.alive[: self.count]))
+
+    @property
+    def nbytes(self) -> int:
+        """Arrays, chunks and bitmap index; fixed once the segment is sealed."""
+        if self._sealed_nbytes is not None:
+            return self._sealed_nbytes
+        nbytes = (
+            self.embeddings.nbytes
+            + self.alive.nbytes
+            + self.enabled.nbytes
+            + self.chunk_bytes
+            + self.bitmap_index.nbytes
+        )
+        if self.sealed:
+            self._sealed_nbytes = nbytes
+        return nbytes
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.alive)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        # replace, never resize in place: searches may hold the old arrays
+        for name in ("embeddings", "alive", "enabled"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: self.count] = old[: self.count]
+            setattr(self, name, new)
+
+    def append(self, chunk: Chunk, vector: np.ndarray, enabled: bool) -> int:
+        row = self.count
+        self._grow(row + 1)
+        self.embeddings[row] = vector
+        self.enabled[row] = enabled
+        self.alive[row] = True
+        self.chunks.append(chunk)
+        self.chunk_bytes += estimate_size(chunk)
+        self.rows_by_knowledge.setdefault(chunk.knowledge_id, []).append(row)
+        self.bitmap_index.append(chunk)
+        self.count = row + 1
+        return row
+
+
+def _decode(row_id: int) -> Tuple[int, int]:
+    return row_id >> _ROW_BITS, row_id & _ROW_MASK
+
+
+class SegmentedVectorIndex(VectorIndex):
+    """
+    Incrementally updatable in-memory vector index.
+
+    Args:
+        model_name: Embedding model of the stored vectors.
+        dimension: Dimension of the chunk embeddings.
+        segment_size: Rows per segment before it is sealed.
+        compact_dead_ratio: Tombstone ratio that makes a sealed segment
+            eligible for compaction.
+        reducer: Projects embeddings (of dimension ``reducer.source_dimension``)
+            on upsert; rows are stored at ``reducer.dimension``.
+    """
+
+    def __init__(
+        self,
+        model_name: Union[EmbeddingModelEnum, str],
+        dimension: int,
+        segment_size: int = 65536,
+        compact_dead_ratio: float = 0.2,
+        reducer: Optional[DimensionReducer] = None,
+    ) -> None:
+        if segment_size <= 0 or segment_size > _ROW_MASK:
+            raise ValueError(f"segment_size must be in 1..{_ROW_MASK}")
+        if reducer is not None and reducer.source_dimension != dimension:
+            raise ValueError(
+                f"Reducer expects dimension {reducer.source_dimension}, "
+                f"index has {dimension}"
+            )
+        self.model_name = model_name
+        self.reducer = reducer
+        self.dimension = reducer.dimension if reducer else dimension
+        self.segment_size = segment_size
+        self.compact_dead_ratio = compact_dead_ratio
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._segment_ids = itertools.count()
+        self._segments: List[_Segment] = []
+        self._retired: Dict[int, _Segment] = {}
+        self._location: Dict[str, Tuple[_Segment, int]] = {}
+        self._disabled_knowledge: Set[str] = set()
+        self._disabled_chunks: Set[str] = set()
+        self._stop_compaction: Optional[threading.Event] = None
+        self._compaction_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: List[Chunk],
+        model_name: Optional[Union[EmbeddingModelEnum, str]] = None,
+        **kwargs: Any,
+    ) -> "SegmentedVectorIndex":
+        if not chunks and model_name is None:
+            raise ValueError("model_name is required to build an empty index")
+        first = chunks[0] if chunks else None
+        dimension = len(first.embedding or []) if first is not None else 0
+        index = cls(
+            model_name or (first.embedding_model_name if first else ""),
+            dimension,
+            **kwargs,
+        )
+        index.upsert(chunks)
+        return index
+
+    # =================== writes ===================
+
+    def _new_segment(self, capacity: int = _INITIAL_CAPACITY) -> _Segment:
+        return _Segment(
+            next(self._segment_ids),
+            self.dimension,
+            min(capacity, self.segment_size),
+        )
+
+    def _active_segment(self) -> _Segment:
+        if not self._segments or self._segments[-1].sealed:
+            self._segments.append(self._new_segment())
+        return self._segments[-1]
+
+    def _is_enabled(self, chunk: Chunk) -> bool:
+        return (
+            chunk.enabled
+            and chunk.knowledge_id not in self._disabled_knowledge
+            and chunk.chunk_id not in self._disabled_chunks
+        )
+
+    def _tombstone(self, chunk_id: str) -> bool:
+        location = self._location.pop(chunk_id, None)
+        if location is None:
+            return False
+        segment, row = location
+        segment.alive[row] = False
+        return True
+
+    def upsert(self, chunks: Iterable[Chunk]) -> int:
+        """
+        Insert chunks, replacing rows with the same ``chunk_id``. Embeddings
+        are L2-normalised (and projected by the reducer) on the way in.
+        Returns the number of rows written.
+        """
+        chunks = list(chunks)
+        for chunk in chunks:
+            if chunk.embedding is None or len(chunk.embedding) != self.query_dimension:
+                raise ValueError(
+                    f"Chunk {chunk.chunk_id} has no embedding of dimension "
+                    f"{self.query_dimension}"
+                )
+        if not chunks:
+            return 0
+        embeddings = [chunk.embedding or [] for chunk in chunks]
+        if self.reducer is not None:
+            vectors = self.reducer.transform(embeddings)
+        else:
+            vectors = normalize_rows(embeddings)
+        with self._lock:
+            for chunk, vector in zip(chunks, vectors):
+                self._tombstone(chunk.chunk_id)
+                segment = self._active_segment()
+                stored = chunk.model_copy(update={"embedding": None})
+                row = segment.append(stored, vector, self._is_enabled(chunk))
+                self._location[chunk.chunk_id] = (segment, row)
+                if segment.count >= self.segment_size:
+                    segment.sealed = True
+        return len(chunks)
+
+    def delete(self, chunk_ids: Iterable[str]) -> int:
+        """Tombstone rows by chunk id. Returns the number of rows deleted."""
+        with self._lock:
+            return sum(self._tombstone(chunk_id) for chunk_id in chunk_ids)
+
+    def delete_knowledge(self, knowledge_ids: Iterable[str]) -> int:
+        knowledge_ids = set(knowledge_ids)
+        with self._lock:
+            chunk_ids = [
+                segment.chunks[row].chunk_id
+                for segment in self._segments
+                for knowledge_id in knowledge_ids
+                for row in segment.rows_by_knowledge.get(knowledge_id, ())
+                if segment.alive[row]
+            ]
+            return self.delete(chunk_ids)
+
+    def set_chunk_enabled(self, chunk_ids: Iterable[str], enabled: bool) -> None:
+        with self._lock:
+            for chunk_id in chunk_ids:
+                if enabled:
+                    self._disabled_chunks.discard(chunk_id)
+                else:
+                    self._disabled_chunks.add(chunk_id)
+                location = self._location.get(chunk_id)
+                if location is not None:
+                    segment, row = location
+                    segment.enabled[row] = self._is_enabled(segment.chunks[row])
+
+    def set_knowledge_enabled(
+        self, knowledge_ids: Iterable[str], enabled: bool
+    ) -> None:
+        with self._lock:
+            for knowledge_id in knowledge_ids:
+                if enabled:
+                    self._disabled_knowledge.discard(knowledge_id)
+                else:
+                    self._disabled_knowledge.add(knowledge_id)
+                for segment in self._segments:
+                    for row in segment.rows_by_knowledge.get(knowledge_id, ()):
+                        segment.enabled[row] = self._is_enabled(segment.chunks[row])
+
+    # =================== compaction ===================
+
+    def _needs_compaction(self, segment: _Segment) -> bool:
+        if not segment.sealed or segment.count == 0:
+            return False
+        dead = segment.count - segment.live_count
+        return (
+            dead / segment.count >= self.compact_dead_ratio
+            or segment.count < self.segment_size // 2
+        )
+
+    def compact(self) -> int:
+        """
+        Merge sealed segments that are sparse or small. Returns the number of
+        segments rewritten. Only the final swap holds the index lock.
+        """
+        with self._compaction_lock:
+            with self._lock:
+                targets = [s for s in self._segments if self._needs_compaction(s)]
+                if len(targets) < 2 and not any(
+                    s.live_count < s.count for s in targets
+                ):
+                    return 0
+                snapshots = [(s, np.flatnonzero(s.alive[: s.count])) for s in targets]
+
+            # copy live rows without holding the lock, into segments sized
+            # for them: rebuilt segments are sealed and never grow
+            rebuilt: List[_Segment] = []
+            origins: List[List[Tuple[_Segment, int]]] = []
+            remaining = sum(len(rows) for _, rows in snapshots)
+            for segment, rows in snapshots:
+                for row in rows.tolist():
+                    if not rebuilt or rebuilt[-1].count >= self.segment_size:
+                        rebuilt.append(self._new_segment(remaining))
+                        origins.append([])
+                    remaining -= 1
+                    rebuilt[-1].append(
+                        segment.chunks[row], segment.embeddings[row], False
+                    )
+                    origins[-1].append((segment, row))
+
+            with self._lock:
+                # carry over deletes and enable flips made during the copy
+                for new_segment, sources in zip(rebuilt, origins):
+                    new_segment.sealed = True
+                    for new_row, (old_segment, old_row) in enumerate(sources):
+                        alive = bool(old_segment.alive[old_row])
+                        new_segment.alive[new_row] = alive
+                        new_segment.enabled[new_row] = old_segment.enabled[old_row]
+                        if alive:
+                            chunk_id = old_segment.chunks[old_row].chunk_id
+                            self._location[chunk_id] = (new_segment, new_row)
+                target_ids = {id(s) for s, _ in snapshots}
+                position = next(
+                    i for i, s in enumerate(self._segments) if id(s) in target_ids
+                )
+                kept = [s for s in self._segments if id(s) not in target_ids]
+                self._segments = kept[:position] + rebuilt + kept[position:]
+                self._retired = {s.segment_id: s for s, _ in snapshots}
+            logger.debug("Compacted %d segments into %d", len(snapshots), len(rebuilt))
+            return len(snapshots)
+
+    def start_background_compaction(self, interval: float = 60.0) -> None:
+        """Run ``compact`` every ``interval`` seconds on a daemon thread."""
+        if self._compaction_thread is not None:
+            return
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Vector index compaction failed: {e}")
+
+        self._stop_compaction = stop
+        self._compaction_thread = threading.Thread(
+            target=run, name="vector-index-compaction", daemon=True
+        )
+        self._compaction_thread.start()
+
+    def stop_background_compaction(self) -> None:
+        if self._stop_compaction is not None and self._compaction_thread is not None:
+            self._stop_compaction.set()
+            self._compaction_thread.join()
+        self._stop_compaction = None
+        self._compaction_thread = None
+
+    # =================== reads ===================
+
+    @property
+    def size(self) -> int:
+        """Number of live rows (deleted rows excluded, disabled ones included)."""
+        with self._lock:
+            return len(self._location)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments)
+
+    @property
+    def nbytes(self) -> int:
+        """Vectors plus an estimate of the chunks and bitmaps held per segment."""
+        with self._lock:
+            return sum(segment.nbytes for segment in self._segments)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> List[SearchHits]:
+        with self._lock:
+            snapshot = [
+                (s, s.count, s.embeddings, s.alive, s.enabled) for s in self._segments
+            ]
+
+        row_parts: List[List[np.ndarray]] = [[] for _ in range(len(queries))]
+        score_parts: List[List[np.ndarray]] = [[] for _ in range(len(queries))]
+        for segment, count, embeddings, alive, enabled in snapshot:
+            mask = alive[:count] & enabled[:count]
+            if filter_group is not None:
+                mask &= segment.bitmap_index.mask(filter_group, count)
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                continue
+            scores = embeddings[rows] @ queries.T
+            base = segment.segment_id << _ROW_BITS
+            for i in range(len(queries)):
+                hit_rows, hit_scores = select_top_k(
+                    scores[:, i], top_k, similarity_threshold, rows
+                )
+                row_parts[i].append(hit_rows + base)
+                score_parts[i].append(hit_scores)
+
+        hits: List[SearchHits] = []
+        for rows_list, scores_list in zip(row_parts, score_parts):
+            if not rows_list:
+                hits.append(
+                    (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+                )
+                continue
+            merged_rows = np.concatenate(rows_list)
+            best, scores = select_top_k(np.concatenate(scores_list), top_k)
+            hits.append((merged_rows[best], scores))
+        return hits
+
+    def _segment(self, segment_id: int) -> _Segment:
+        with self._lock:
+            for segment in self._segments:
+                if segment.segment_id == segment_id:
+                    return segment
+            return self._retired[segment_id]
+
+    def get_chunk(self, row_id: int, similarity: float) -> RetrievalChunk:
+        segment_id, row = _decode(int(row_id))
+        segment = self._segment(segment_id)
+        chunk = segment.chunks[row]
+        payload = chunk.model_dump(exclude={"embedding", "enabled"})
+        return RetrievalChunk(
+            **payload,
+            embedding=segment.embeddings[row].tolist(),
+            enabled=bool(segment.enabled[row]),
+            similarity=float(similarity),
+        )
+
+    def get_chunks(
+        self, rows: np.ndarray, similarities: np.ndarray
+    ) -> List[RetrievalChunk]:
+        return [
+            self.get_chunk(int(row), float(similarity))
+            for row, similarity in zip(rows, similarities)
+        ]
+
+
+@register(RegisterTypeEnum.RETRIEVER, "segmented_index")
+class SegmentedIndexRetriever(VectorIndexRetriever):
+    """Retriever over a SegmentedVectorIndex kept up to date by the caller."""
+
+    index: SegmentedVectorIndex
+
+    def __init__(
+        self,
+        index: SegmentedVectorIndex,
+        embedding: Optional[BaseEmbedding] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(index, embedding, **kwargs)
+
+
+__all__ = ["SegmentedVectorIndex", "SegmentedIndexRetriever"]
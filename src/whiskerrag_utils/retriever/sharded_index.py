@@ -0,0 +1,539 @@
+"""
+Sharded vector search across worker processes.
+
+A sharded index is a directory of ``MmapVectorIndex`` shards plus a manifest::
+
+    shards.json        format, version, model name, dimension, shard names
+    shard-0000/        one on-disk index per shard (see ``mmap_index``)
+    ...
+
+Each shard is served by its own worker process that maps the shard files and
+answers search requests over a ``multiprocessing`` pipe. Concurrent queries
+share the pipes: every request carries its own id and a reader thread per
+worker hands each reply to the query that sent it. The parent fans a query
+batch out to every shard, waits up to ``shard_timeout`` seconds and merges the
+per-shard top-k lists with a heap. A shard that times out or whose worker died
+is left out of that answer (and its worker restarted for the next one), so a
+slow or broken shard degrades recall instead of failing the query;
+``search_shards`` reports which shards are missing from an answer.
+
+Results are materialised in the parent from its own read-only mapping of the
+shard files; the OS page cache is shared with the workers.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from whiskerrag_types.interface.embed_interface import BaseEmbedding
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.knowledge import EmbeddingModelEnum
+from whiskerrag_types.model.page import FilterGroup
+from whiskerrag_types.model.retrieval import RetrievalChunk
+from whiskerrag_utils.registry import RegisterTypeEnum, register
+from whiskerrag_utils.retriever.mmap_index import (
+    MmapVectorIndex,
+    PathLike,
+    write_vector_index,
+)
+from whiskerrag_utils.retriever.reduction import DimensionReducer
+from whiskerrag_utils.retriever.vector_search import (
+    SearchHits,
+    VectorIndex,
+    VectorIndexRetriever,
+)
+
+logger = logging.getLogger("whisker")
+
+SHARDED_INDEX_FORMAT = "whisker-sharded-index"
+SHARDED_INDEX_VERSION = 1
+MANIFEST_FILE = "shards.json"
+
+_ROW_BITS = 40
+_ROW_MASK = (1 << _ROW_BITS) - 1
+
+
+class ShardedHits(NamedTuple):
+    """Hits of one sharded search and the shards missing from them."""
+
+    hits: List[SearchHits]
+    missing_shards: List[int]
+
+
+def shard_of(chunk_id: str, num_shards: int) -> int:
+    """Stable shard assignment of a chunk id."""
+    return zlib.crc32(chunk_id.encode("utf-8")) % num_shards
+
+
+def write_sharded_index(
+    path: PathLike,
+    chunks: Sequence[Chunk],
+    num_shards: int,
+    model_name: Optional[Union[EmbeddingModelEnum, str]] = None,
+    reducer: Optional[DimensionReducer] = None,
+) -> Path:
+    """
+    Partition ``chunks`` by ``shard_of(chunk_id)`` into ``num_shards`` on-disk
+    indexes under ``path``, all reduced by ``reducer`` when one is given. The
+    manifest is written last, so readers only see a complete set of shards.
+    """
+    if num_shards <= 0:
+        raise ValueError("num_shards must be positive")
+    target = Path(path)
+    if model_name is None:
+        if not chunks:
+            raise ValueError("model_name is required to write an empty index")
+        model_name = chunks[0].embedding_model_name
+    partitions: List[List[Chunk]] = [[] for _ in range(num_shards)]
+    for chunk in chunks:
+        partitions[shard_of(chunk.chunk_id, num_shards)].append(chunk)
+
+    target.mkdir(parents=True, exist_ok=True)
+    names = [f"shard-{i:04d}" for i in range(num_shards)]
+    for name, partition in zip(names, partitions):
+        write_vector_index(target / name, partition, model_name, reducer)
+    shard_header = MmapVectorIndex.read_header(target / names[0])
+    manifest = {
+        "format": SHARDED_INDEX_FORMAT,
+        "version": SHARDED_INDEX_VERSION,
+        "model_name": shard_header["model_name"],
+        "dimension": shard_header["dimension"],
+        "count": len(chunks),
+        "shards": names,
+    }
+    staging = target / f".{MANIFEST_FILE}.tmp"
+    with open(staging, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(staging, target / MANIFEST_FILE)
+    return target
+
+
+def read_manifest(path: PathLike) -> Dict[str, Any]:
+    manifest_path = Path(path) / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"No sharded index manifest at {manifest_path}")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest: Dict[str, Any] = json.load(f)
+    if manifest.get("format") != SHARDED_INDEX_FORMAT:
+        raise ValueError(f"{path} is not a {SHARDED_INDEX_FORMAT} directory")
+    if manifest.get("version") != SHARDED_INDEX_VERSION:
+        raise ValueError(
+            f"Unsupported sharded index version {manifest.get('version')}, "
+            f"expected {SHARDED_INDEX_VERSION}"
+        )
+    return manifest
+
+
+def _shard_worker(path: str, conn: Connection) -> None:
+    """Serve ``(request_id, queries, top_k, filter_group, threshold)`` requests."""
+    index = MmapVectorIndex.open(path)
+    conn.send((0, True, None))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        request_id, queries, top_k, filter_group, threshold = message
+        try:
+            reply: Any = index.search(queries, top_k, filter_group, threshold)
+            conn.send((request_id, True, reply))
+        except Exception as e:
+            conn.send((request_id, False, f"{type(e).__name__}: {e}"))
+
+
+class _ShardWorker:
+    """
+    Parent-side handle of one shard worker process. Requests of any number of
+    threads are multiplexed on its pipe; a reader thread resolves the future
+    registered under each reply's request id.
+    """
+
+    def __init__(self, path: Path, context: Any) -> None:
+        self.path = path
+        self._context = context
+        self._process: Optional[Any] = None
+        self._conn: Optional[Connection] = None
+        # futures of the current process; request 0 is its startup
+        self._pending: Dict[int, "Future[Any]"] = {}
+        # guards the fields above, never held while blocking on the pipe
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._spawn_lock = threading.Lock()
+
+    def spawn(self) -> None:
+        with self._spawn_lock:
+            with self._lock:
+                if self._process is not None and self._process.is_alive():
+                    return
+            self.stop(force=True)
+            parent, child = self._context.Pipe()
+            process = self._context.Process(
+                target=_shard_worker,
+                args=(str(self.path), child),
+                name=f"vector-shard-{self.path.name}",
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            pending: Dict[int, "Future[Any]"] = {0: Future()}
+            with self._lock:
+                self._process, self._conn, self._pending = process, parent, pending
+            threading.Thread(
+                target=self._read,
+                args=(parent, pending),
+                name=f"vector-shard-reader-{self.path.name}",
+                daemon=True,
+            ).start()
+
+    def _read(self, conn: Connection, pending: Dict[int, "Future[Any]"]) -> None:
+        """Hand replies to their futures until the worker goes away."""
+        while True:
+            try:
+                request_id, ok, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = pending.pop(request_id, None)
+            if future is None:
+                continue  # late answer to a query that already timed out
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+        # the reader owns the connection: closing it elsewhere could let the
+        # descriptor be reused under a blocked recv
+        conn.close()
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+            futures = list(pending.values())
+            pending.clear()
+        for future in futures:
+            future.set_exception(EOFError("shard worker exited"))
+
+    def ensure_started(self, startup_timeout: float) -> None:
+        """Start the worker if needed and wait until it has mapped its shard."""
+        self.spawn()
+        with self._lock:
+            ready = self._pending.get(0)
+        if ready is None:
+            return
+        try:
+            ready.result(startup_timeout)
+        except FutureTimeoutError:
+            self.restart()
+            raise TimeoutError(f"worker did not start in {startup_timeout}s")
+
+    def submit(
+        self, request_id: int, request: Tuple[Any, ...], startup_timeout: float
+    ) -> "Future[Any]":
+        """Send a search request; the future resolves with the worker's reply."""
+        self.ensure_started(startup_timeout)
+        future: "Future[Any]" = Future()
+        with self._lock:
+            conn = self._conn
+            if conn is None:
+                raise EOFError("shard worker stopped")
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                conn.send((request_id, *request))
+        except BaseException:
+            self.forget(request_id)
+            raise
+        return future
+
+    def forget(self, request_id: int) -> None:
+        """Drop a request whose reply is no longer awaited."""
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def restart(self) -> None:
+        self.stop(force=True)
+
+    def stop(self, force: bool = False) -> None:
+        with self._lock:
+            process, conn = self._process, self._conn
+            self._process, self._conn = None, None
+        if conn is not None and not force:
+            try:
+                with self._send_lock:
+                    conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        if process is not None:
+            if force:
+                process.terminate()
+            process.join(timeout=1)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+class ShardedVectorIndex(VectorIndex):
+    """
+    Vector index partitioned over shard worker processes.
+
+    Args:
+        path: Directory written by ``write_sharded_index``.
+        shard_timeout: Seconds to wait for the shards of one query batch.
+        processes: Serve shards from worker processes. With ``False`` the
+            shards are searched in the calling process, which is useful for
+            small indexes and tests.
+        start_method: ``multiprocessing`` start method of the workers.
+        startup_timeout: Seconds a (re)started worker may take to map its
+            shard before it is treated as unavailable.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        shard_timeout: float = 2.0,
+        processes: bool = True,
+        start_method: Optional[str] = None,
+        startup_timeout: float = 30.0,
+    ) -> None:
+        self.path = Path(path)
+        self.manifest = read_manifest(self.path)
+        self.model_name = self.manifest["model_name"]
+        self.dimension = int(self.manifest["dimension"])
+        self.shard_timeout = shard_timeout
+        self.startup_timeout = startup_timeout
+        self.shards = [
+            MmapVectorIndex.open(self.path / name) for name in self.manifest["shards"]
+        ]
+        self.reducer = self.shards[0].reducer
+        self._request_ids = itertools.count(1)
+        self._workers: Optional[List[_ShardWorker]] = None
+        if processes:
+            context = multiprocessing.get_context(start_method)
+            self._workers = [_ShardWorker(shard.path, context) for shard in self.shards]
+
+    def __enter__(self) -> "ShardedVectorIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start every shard worker up front instead of on the first query."""
+        for worker in self._workers or []:
+            worker.spawn()
+        for worker in self._workers or []:
+            worker.ensure_started(self.startup_timeout)
+
+    def close(self) -> None:
+        for worker in self._workers or []:
+            worker.stop()
+
+    @property
+    def size(self) -> int:
+        return sum(shard.size for shard in self.shards)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shard.nbytes for shard in self.shards)
+
+    def _search_local(
+        self, queries: np.ndarray, args: Tuple[Any, ...]
+    ) -> List[Optional[List[SearchHits]]]:
+        return [shard.search(queries, *args) for shard in self.shards]
+
+    def _search_workers(
+        self, workers: List[_ShardWorker], queries: np.ndarray, args: Tuple[Any, ...]
+    ) -> List[Optional[List[SearchHits]]]:
+        request_id = next(self._request_ids)
+        replies: List[Optional[List[SearchHits]]] = [None] * len(workers)
+        for worker in workers:
+            worker.spawn()
+        futures: Dict[int, "Future[Any]"] = {}
+        for i, worker in enumerate(workers):
+            try:
+                futures[i] = worker.submit(
+                    request_id, (queries, *args), self.startup_timeout
+                )
+            except Exception as e:
+                logger.warning(f"Vector shard {worker.path.name} unavailable: {e}")
+                worker.restart()
+
+        wait(futures.values(), timeout=self.shard_timeout)
+        for i, future in futures.items():
+            if not future.done():
+                logger.warning(
+                    f"Vector shard {workers[i].path.name} timed out after "
+                    f"{self.shard_timeout}s"
+                )
+                # the worker may still be busy; restart it rather than queue behind it
+                workers[i].forget(request_id)
+                workers[i].restart()
+                continue
+            try:
+                replies[i] = future.result()
+            except EOFError as e:
+                logger.warning(f"Vector shard {workers[i].path.name} failed: {e}")
+            except Exception as e:
+                logger.warning(f"Vector shard {workers[i].path.name} error: {e}")
+        return replies
+
+    def search_shards(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> ShardedHits:
+        """``search`` that also returns the shards left out of the answer."""
+        args = (top_k, filter_group, similarity_threshold)
+        if self._workers is None:
+            replies = self._search_local(queries, args)
+        else:
+            replies = self._search_workers(self._workers, queries, args)
+        hits = [
+            self._merge(
+                [(shard, reply[q]) for shard, reply in enumerate(replies) if reply],
+                top_k,
+            )
+            for q in range(len(queries))
+        ]
+        missing = [i for i, reply in enumerate(replies) if reply is None]
+        return ShardedHits(hits, missing)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> List[SearchHits]:
+        return self.search_shards(
+            queries, top_k, filter_group, similarity_threshold
+        ).hits
+
+    async def search_shards_async(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> ShardedHits:
+        """
+        ``search_shards`` on the default executor when shards are served by
+        workers: waiting on them takes up to ``shard_timeout``, or
+        ``startup_timeout`` while a worker starts.
+        """
+        if self._workers is None:
+            return self.search_shards(
+                queries, top_k, filter_group, similarity_threshold
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            self.search_shards,
+            queries,
+            top_k,
+            filter_group,
+            similarity_threshold,
+        )
+
+    async def search_async(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> List[SearchHits]:
+        result = await self.search_shards_async(
+            queries, top_k, filter_group, similarity_threshold
+        )
+        return result.hits
+
+    @staticmethod
+    def _merge(per_shard: List[Tuple[int, SearchHits]], top_k: int) -> SearchHits:
+        """Heap merge of per-shard lists that are each sorted best first."""
+        streams = [
+            zip((-scores).tolist(), (rows + (shard << _ROW_BITS)).tolist())
+            for shard, (rows, scores) in per_shard
+        ]
+        merged = list(itertools.islice(heapq.merge(*streams), top_k))
+        return (
+            np.asarray([row for _, row in merged], dtype=np.int64),
+            np.asarray([-score for score, _ in merged], dtype=np.float32),
+        )
+
+    def get_chunks(
+        self, rows: np.ndarray, similarities: np.ndarray
+    ) -> List[RetrievalChunk]:
+        return [
+            self.shards[int(row) >> _ROW_BITS].get_chunk(
+                int(row) & _ROW_MASK, float(similarity)
+            )
+            for row, similarity in zip(rows, similarities)
+        ]
+
+
+@register(RegisterTypeEnum.RETRIEVER, "sharded_index")
+class ShardedIndexRetriever(VectorIndexRetriever):
+    """
+    Retriever over a sharded index; accepts a path or an opened index, so a
+    ``DBPluginInterface.retrieve`` implementation can delegate to it.
+
+    Answers missing some shards are logged, or raise a ``RuntimeError`` with
+    ``require_all_shards``.
+    """
+
+    index: ShardedVectorIndex
+
+    def __init__(
+        self,
+        index: Union[PathLike, ShardedVectorIndex],
+        embedding: Optional[BaseEmbedding] = None,
+        require_all_shards: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        if not isinstance(index, ShardedVectorIndex):
+            index = ShardedVectorIndex(index)
+        super().__init__(index, embedding, **kwargs)
+        self.require_all_shards = require_all_shards
+
+    async def search_index(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup],
+        similarity_threshold: Optional[float],
+    ) -> List[SearchHits]:
+        result = await self.index.search_shards_async(
+            queries, top_k, filter_group, similarity_threshold
+        )
+        if result.missing_shards:
+            names = [self.index.shards[i].path.name for i in result.missing_shards]
+            if self.require_all_shards:
+                raise RuntimeError(f"Vector shards {names} did not answer")
+            logger.warning(f"Answering without vector shards {names}")
+        return result.hits
+
+
+__all__ = [
+    "ShardedHits",
+    "ShardedIndexRetriever",
+    "ShardedVectorIndex",
+    "read_manifest",
+    "shard_of",
+    "write_sharded_index",
+]
@@ -0,0 +1,43 @@
+"""
+Memory estimates for the Python objects an index keeps next to its arrays
+(chunks, bitmaps, decoded columns), so memory budgets cover more than the
+vectors.
+"""
+
+import sys
+from typing import Any, Iterable, Optional, Set
+
+import numpy as np
+from pydantic import BaseModel
+
+
+def estimate_size(value: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Rough deep size in bytes of a Python value: builtin containers, strings,
+    numbers, numpy arrays, pydantic models and ``__slots__`` objects. Objects
+    reachable twice are counted once per ``seen`` set.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    children: Iterable[Any]
+    if isinstance(value, np.ndarray):
+        # getsizeof only includes the buffer of arrays that own it
+        return size if value.base is None else size + value.nbytes
+    if isinstance(value, dict):
+        children = [item for pair in value.items() for item in pair]
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        children = value
+    elif isinstance(value, BaseModel):
+        children = [value.__dict__]
+    elif hasattr(type(value), "__slots__"):
+        children = [getattr(value, name, None) for name in type(value).__slots__]
+    else:
+        return size
+    return size + sum(estimate_size(child, seen) for child in children)
+
+
+__all__ = ["estimate_size"]
@@ -0,0 +1,301 @@
+"""
+Shared pieces of the in-process vector retrievers: the ``VectorIndex``
+interface, exact top-k selection and a BaseRetriever that embeds the query and
+searches an index.
+"""
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from whiskerrag_types.interface.embed_interface import BaseEmbedding
+from whiskerrag_types.interface.retriever_interface import BaseRetriever
+from whiskerrag_types.model.knowledge import EmbeddingModelEnum
+from whiskerrag_types.model.page import Condition, FilterGroup, Operator
+from whiskerrag_types.model.retrieval import (
+    RetrievalChunk,
+    RetrievalConfig,
+    RetrievalRequest,
+    VectorSearchConfig,
+)
+from whiskerrag_utils.registry import RegisterTypeEnum, get_register
+from whiskerrag_utils.retriever.metadata_filter import DEFAULT_BITMAP_FIELDS
+from whiskerrag_utils.retriever.postprocess import postprocess_results
+
+if TYPE_CHECKING:
+    from whiskerrag_utils.retriever.reduction import DimensionReducer
+
+# bitmap-indexed fields of a vector index; scope filters hit tenant/space too
+INDEX_FILTER_FIELDS = DEFAULT_BITMAP_FIELDS + ("space_id", "tenant_id")
+
+SearchHits = Tuple[np.ndarray, np.ndarray]
+"""(row ids, similarities) of one query, best first."""
+
+
+def normalize_rows(matrix: Union[np.ndarray, Sequence[Sequence[float]]]) -> np.ndarray:
+    """L2-normalise each row as float32 so a dot product is a cosine similarity."""
+    array = np.asarray(matrix, dtype=np.float32)
+    if array.ndim == 1:
+        array = array[None, :]
+    norms = np.linalg.norm(array, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    normalized: np.ndarray = array / norms
+    return normalized
+
+
+def select_top_k(
+    scores: np.ndarray,
+    top_k: int,
+    similarity_threshold: Optional[float] = None,
+    rows: Optional[np.ndarray] = None,
+) -> SearchHits:
+    """
+    Pick the ``top_k`` best scores of a 1-D score vector with ``argpartition``.
+
+    ``rows`` maps score positions back to index rows when only a candidate
+    subset was scored.
+    """
+    if similarity_threshold is not None:
+        keep = np.flatnonzero(scores >= similarity_threshold)
+        scores = scores[keep]
+        rows = keep if rows is None else rows[keep]
+    if len(scores) > top_k:
+        part = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        part = np.arange(len(scores))
+    order = part[np.argsort(-scores[part], kind="stable")]
+    selected = order if rows is None else rows[order]
+    return selected.astype(np.int64), scores[order].astype(np.float32)
+
+
+def search_matrix(
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    candidates: Optional[np.ndarray] = None,
+    similarity_threshold: Optional[float] = None,
+) -> List[SearchHits]:
+    """
+    Exact inner-product search of normalised ``queries`` (q, d) against
+    ``embeddings`` (n, d). Only ``candidates`` rows are scored when given.
+    """
+    if candidates is not None:
+        if len(candidates) == 0:
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            return [empty for _ in range(len(queries))]
+        scores = np.asarray(embeddings[candidates]) @ queries.T
+    else:
+        scores = np.asarray(embeddings) @ queries.T
+    return [
+        select_top_k(scores[:, i], top_k, similarity_threshold, candidates)
+        for i in range(queries.shape[0])
+    ]
+
+
+def build_search_filter(
+    config: VectorSearchConfig, tenant_id: Optional[str]
+) -> Optional[FilterGroup]:
+    """Combine tenant, space, knowledge and metadata scopes into one filter."""
+    conditions: List[Union[Condition, FilterGroup]] = []
+    if tenant_id:
+        conditions.append(Condition(field="tenant_id", operator="eq", value=tenant_id))
+    for field, values in (
+        ("space_id", config.space_id_list),
+        ("knowledge_id", config.knowledge_id_list),
+    ):
+        if values is not None:
+            conditions.append(
+                FilterGroup(
+                    operator=Operator.OR,
+                    conditions=[
+                        Condition(field=field, operator="eq", value=value)
+                        for value in values
+                    ],
+                )
+            )
+    if config.metadata_filter is not None:
+        conditions.append(config.metadata_filter)
+    if not conditions:
+        return None
+    return FilterGroup(operator=Operator.AND, conditions=conditions)
+
+
+def to_vector_search_config(config: RetrievalConfig) -> VectorSearchConfig:
+    if isinstance(config, VectorSearchConfig):
+        return config
+    return VectorSearchConfig.model_validate(config.model_dump())
+
+
+async def embed_queries(
+    embedding: BaseEmbedding, queries: List[str], dimension: int
+) -> np.ndarray:
+    """
+    Embed queries as normalised rows: a single query with ``embed_text_query``,
+    several with one ``embed_documents`` call.
+    """
+    if len(queries) == 1:
+        vectors = [await embedding.embed_text_query(queries[0], timeout=30)]
+    else:
+        vectors = await embedding.embed_documents(queries, timeout=30)
+    matrix = normalize_rows(vectors)
+    if matrix.shape[1] != dimension:
+        raise ValueError(
+            f"Query embedding dimension {matrix.shape[1]} does not match "
+            f"index dimension {dimension}"
+        )
+    return matrix
+
+
+class VectorIndex(ABC):
+    """Read side of an in-process vector index over one embedding model."""
+
+    model_name: Union[EmbeddingModelEnum, str]
+    dimension: int
+    # projection of model embeddings to ``dimension``, when the index is reduced
+    reducer: Optional["DimensionReducer"] = None
+
+    @property
+    def query_dimension(self) -> int:
+        """Dimension of the query embeddings the index expects before projection."""
+        return self.reducer.source_dimension if self.reducer else self.dimension
+
+    def project_queries(self, queries: np.ndarray) -> np.ndarray:
+        """Map normalised model embeddings to the index dimension."""
+        return self.reducer.transform(queries) if self.reducer else queries
+
+    @property
+    @abstractmethod
+    def size(self) -> int:
+        pass
+
+    @abstractmethod
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> List[SearchHits]:
+        """
+        Search normalised query vectors of shape (q, dimension).
+        Returns one (row ids, similarities) pair per query, best first.
+        """
+        pass
+
+    async def search_async(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> List[SearchHits]:
+        """
+        ``search`` for async callers. Indexes whose search blocks (on other
+        processes, say) override it to keep the event loop free.
+        """
+        return self.search(queries, top_k, filter_group, similarity_threshold)
+
+    @abstractmethod
+    def get_chunks(
+        self, rows: np.ndarray, similarities: np.ndarray
+    ) -> List[RetrievalChunk]:
+        pass
+
+
+class VectorIndexRetriever(BaseRetriever[RetrievalRequest, RetrievalChunk]):
+    """
+    Retriever over a VectorIndex. The query is embedded with the index model's
+    registered embedding unless an embedding instance is passed in.
+    """
+
+    index: VectorIndex
+
+    def __init__(
+        self,
+        index: VectorIndex,
+        embedding: Optional[BaseEmbedding] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.index = index
+        self._embedding = embedding
+
+    @property
+    def embedding(self) -> BaseEmbedding:
+        if self._embedding is None:
+            EmbeddingCls = get_register(
+                RegisterTypeEnum.EMBEDDING, self.index.model_name
+            )
+            self._embedding = EmbeddingCls()
+        return self._embedding
+
+    async def embed_queries(self, queries: List[str]) -> np.ndarray:
+        matrix = await embed_queries(
+            self.embedding, queries, self.index.query_dimension
+        )
+        return self.index.project_queries(matrix)
+
+    async def search_index(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        filter_group: Optional[FilterGroup],
+        similarity_threshold: Optional[float],
+    ) -> List[SearchHits]:
+        """Search the index; subclasses can inspect or check the answer."""
+        return await self.index.search_async(
+            queries, top_k, filter_group, similarity_threshold
+        )
+
+    async def retrieve(
+        self, params: RetrievalRequest, tenant_id: str
+    ) -> List[RetrievalChunk]:
+        return (await self.retrieve_many([params], tenant_id))[0]
+
+    async def retrieve_many(
+        self, params_list: List[RetrievalRequest], tenant_id: str
+    ) -> List[List[RetrievalChunk]]:
+        """
+        Embed all queries in one call and search every group of requests that
+        share a scope filter with a single matrix-matrix product.
+        """
+        if not params_list:
+            return []
+        configs = [to_vector_search_config(params.config) for params in params_list]
+        queries = await self.embed_queries([params.content for params in params_list])
+
+        filters: List[Optional[FilterGroup]] = []
+        groups: Dict[str, List[int]] = {}
+        for i, config in enumerate(configs):
+            filter_group = build_search_filter(config, tenant_id)
+            filters.append(filter_group)
+            key = filter_group.model_dump_json() if filter_group is not None else ""
+            groups.setdefault(key, []).append(i)
+
+        results: List[List[RetrievalChunk]] = [[] for _ in params_list]
+        for members in groups.values():
+            fetch_ks = [fetch_size(configs[i]) for i in members]
+            hits = await self.search_index(
+                queries[members],
+                max(fetch_ks),
+                filters[members[0]],
+                min(configs[i].similarity_threshold for i in members),
+            )
+            for i, fetch_k, (rows, similarities) in zip(members, fetch_ks, hits):
+                keep = similarities >= configs[i].similarity_threshold
+                chunks = self.index.get_chunks(
+                    rows[keep][:fetch_k], similarities[keep][:fetch_k]
+                )
+                results[i] = postprocess_results(
+                    chunks, configs[i].post_process, configs[i].top_k
+                )
+        return results
+
+
+def fetch_size(config: VectorSearchConfig) -> int:
+    """Candidates to fetch: top_k, or more when MMR re-ranks them."""
+    post_process = config.post_process
+    if post_process is not None and post_process.mmr:
+        return max(config.top_k, post_process.mmr_fetch_k)
+    return config.top_k
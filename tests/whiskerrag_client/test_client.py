@@ -5,6 +5,8 @@ import pytest
 from pydantic import BaseModel
 
 from whiskerrag_client import HttpClient
+from whiskerrag_client.retrieval_client import RetrievalClient
+from whiskerrag_types.model.retrieval import RetrievalRequest
 
 
 class TestModel(BaseModel):
@@ -145,3 +147,34 @@ async def test_additional_request_kwargs(http_client) -> None:
         call_kwargs = mock_request.call_args[1]
         assert call_kwargs["follow_redirects"] is True
         assert call_kwargs["verify"] is False
+
+
+@pytest.mark.asyncio
+async def test_retrieve_many(http_client) -> None:
+    chunk = {
+        "space_id": "space",
+        "tenant_id": "tenant",
+        "context": "hello",
+        "knowledge_id": "k1",
+        "embedding_model_name": "test-model",
+        "similarity": 0.9,
+    }
+    test_response = {"data": [[chunk], []]}
+    with patch.object(httpx.AsyncClient, "request") as mock_request:
+        mock_response = Mock()
+        mock_response.json.return_value = test_response
+        mock_response.raise_for_status = Mock()
+        mock_request.return_value = mock_response
+
+        requests = [
+            RetrievalRequest(content="a", config={"type": "vector_index"}),
+            RetrievalRequest(content="b", config={"type": "vector_index"}),
+        ]
+        results = await RetrievalClient(http_client).retrieve_many(requests)
+
+        mock_request.assert_called_once()
+        call_kwargs = mock_request.call_args[1]
+        assert call_kwargs["url"].endswith("/api/retrieval/retrieve_many")
+        assert [r["content"] for r in call_kwargs["json"]] == ["a", "b"]
+        assert [len(chunks) for chunks in results] == [1, 0]
+        assert results[0][0].similarity == 0.9
@@ -79,6 +79,7 @@ class TestKnowledge:
         assert knowledge.split_config.model_dump() == {
             "chunk_size": 500,
             "chunk_overlap": 100,
+            "length_function": "characters",
             "separators": None,
             "split_regex": None,
         }
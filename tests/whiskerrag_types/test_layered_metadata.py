@@ -0,0 +1,73 @@
+import json
+import pickle
+
+import pytest
+
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import TextSlice
+
+
+def _chunk(metadata):
+    return Chunk(
+        space_id="space",
+        tenant_id="tenant",
+        context="text",
+        knowledge_id="knowledge",
+        metadata=metadata,
+    )
+
+
+class TestLayeredMetadata:
+    def test_reads_fall_through_in_merge_order(self):
+        knowledge = {"a": 1, "b": 1, "c": 1}
+        loader = {"b": 2, "d": 2}
+        metadata = LayeredMetadata.stack(loader, knowledge).derive({"c": 3, "e": 3})
+        expected = {**knowledge, **loader, "c": 3, "e": 3}
+        assert metadata == expected
+        assert list(metadata) == list(expected)
+        assert len(metadata) == 5
+        assert metadata.to_dict() == expected
+
+    def test_writes_stay_private(self):
+        knowledge = {"a": 1, "b": 1}
+        base = LayeredMetadata.stack(knowledge)
+        first, second = base.derive({"idx": 0}), base.derive({"idx": 1})
+        first["a"] = "changed"
+        del first["b"]
+        assert "b" not in first and dict(first) == {"a": "changed", "idx": 0}
+        assert dict(second) == {"a": 1, "b": 1, "idx": 1}
+        assert knowledge == {"a": 1, "b": 1}
+        copied = first.copy()
+        copied["b"] = 2
+        assert "b" not in first and copied["b"] == 2
+        with pytest.raises(KeyError):
+            del first["missing"]
+
+    def test_stack_snapshots_overlays(self):
+        item = LayeredMetadata.stack({"a": 1}).derive({"idx": 0})
+        combined = LayeredMetadata.stack(item, {"a": 0, "k": 0})
+        item["idx"] = 99
+        assert dict(combined) == {"a": 1, "k": 0, "idx": 0}
+
+    def test_pickle(self):
+        metadata = LayeredMetadata.stack({"a": 1}).derive({"b": 2})
+        del metadata["a"]
+        assert pickle.loads(pickle.dumps(metadata)) == {"b": 2}
+
+
+class TestModels:
+    def test_models_hold_plain_dicts(self):
+        knowledge = {"_reference_url": "https://example.com", "_tags": "a,b"}
+        base = LayeredMetadata.stack(knowledge)
+        text = TextSlice("x", metadata=base.derive({"_idx": 2})).to_text()
+        assert type(text.metadata) is dict
+        assert text.metadata == {**knowledge, "_idx": 2}
+
+        metadata = LayeredMetadata.stack(knowledge).derive({"position": {"line": 3}})
+        chunk = _chunk(metadata.to_dict())
+        knowledge["_tags"] = "changed"
+        assert type(chunk.metadata) is dict
+        assert chunk.metadata["_tags"] == "a,b"
+        assert json.loads(json.dumps(chunk.metadata))["position"] == {"line": 3}
+        assert _chunk(None).model_dump()["metadata"] is None
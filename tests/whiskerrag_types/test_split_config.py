@@ -1,3 +1,6 @@
+import pytest
+from pydantic import ValidationError
+
 from whiskerrag_types.model.knowledge import (
     EmbeddingModelEnum,
     Knowledge,
@@ -5,6 +8,11 @@ from whiskerrag_types.model.knowledge import (
     KnowledgeTypeEnum,
     TextSourceConfig,
 )
+from whiskerrag_types.model.splitter import (
+    BaseCodeSplitConfig,
+    BaseSplitConfig,
+    SemanticCodeSplitConfig,
+)
 
 
 class TestKnowledge:
@@ -31,6 +39,7 @@ class TestKnowledge:
         assert knowledge["split_config"] == {
             "chunk_size": 500,
             "chunk_overlap": 100,
+            "length_function": "characters",
             "separators": None,
             "split_regex": None,
         }
@@ -104,3 +113,18 @@ class TestKnowledge:
         assert knowledge["split_config"]["type"] == "markdown"
         assert knowledge["split_config"]["chunk_size"] == 200
         assert knowledge["split_config"]["chunk_overlap"] == 20
+
+    def test_split_configs_keep_serialization_schema(self) -> None:
+        schema = Knowledge.model_json_schema(mode="serialization")
+        for name in ("TextSplitConfig", "BaseCodeSplitConfig", "PDFSplitConfig"):
+            properties = schema["$defs"][name]["properties"]
+            assert {"chunk_size", "chunk_overlap", "length_function"} <= set(properties)
+
+    def test_code_configs_share_the_base_fields(self) -> None:
+        for config_cls in (BaseCodeSplitConfig, SemanticCodeSplitConfig):
+            assert issubclass(config_cls, BaseSplitConfig)
+            config = config_cls(language="python", length_function="tokens")
+            assert config.length_function == "tokens"
+            with pytest.raises(ValidationError):
+                config_cls(language="python", chunk_size=100, chunk_overlap=100)
+        assert SemanticCodeSplitConfig(language="python").chunk_overlap == 0
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from whiskerrag_utils.bench.retrieval import (
+    BENCH_BUILDERS,
+    SeededEmbedding,
+    exact_top_k,
+    load_corpus,
+    main,
+    run_benchmark,
+    synthetic_corpus,
+)
+
+
+def _record(corpus, tmp_path):
+    chunks_path = tmp_path / "chunks.jsonl"
+    queries_path = tmp_path / "queries.jsonl"
+    chunks_path.write_text(
+        "\n".join(c.model_dump_json() for c in corpus.chunks), encoding="utf-8"
+    )
+    queries_path.write_text(
+        "\n".join(
+            json.dumps({"content": q, "embedding": corpus.query_vectors[q]})
+            for q in corpus.queries
+        ),
+        encoding="utf-8",
+    )
+    return str(chunks_path), str(queries_path)
+
+
+class TestRetrievalBench:
+    def test_synthetic_corpus_is_deterministic(self):
+        first = synthetic_corpus(50, 16, 5, seed=3)
+        second = synthetic_corpus(50, 16, 5, seed=3)
+        assert [c.embedding for c in first.chunks] == [
+            c.embedding for c in second.chunks
+        ]
+        assert first.query_vectors == second.query_vectors
+        assert exact_top_k(first, 5) == exact_top_k(second, 5)
+
+    @pytest.mark.asyncio
+    async def test_seeded_embedding(self):
+        embedding = SeededEmbedding(8, {"known": [1.0] * 8})
+        a, b = await embedding.embed_documents(["text", "text"], timeout=None)
+        assert a == b and len(a) == 8
+        assert await embedding.embed_text_query("known", timeout=None) == [1.0] * 8
+
+    @pytest.mark.asyncio
+    async def test_exact_retrievers_have_full_recall(self):
+        corpus = synthetic_corpus(300, 16, 10, seed=1)
+        report = await run_benchmark(
+            corpus, top_k=5, retrievers=["mmap_index", "segmented_index", "missing"]
+        )
+        results = {r.retriever: r for r in report.results}
+        assert results["missing"].status == "skipped"
+        for name in ("mmap_index", "segmented_index"):
+            result = results[name]
+            assert result.status == "ok"
+            assert result.recall_at_k == pytest.approx(1.0)
+            assert 0 < result.latency_ms_p50 <= result.latency_ms_p99
+            assert result.qps > 0 and result.batch_qps > 0
+            assert result.index_memory_bytes > 0
+
+    @pytest.mark.asyncio
+    async def test_default_runs_every_registered_retriever(self):
+        report = await run_benchmark(synthetic_corpus(100, 8, 4), top_k=3)
+        names = {r.retriever for r in report.results}
+        assert set(BENCH_BUILDERS) <= names
+        assert all(r.status != "error" for r in report.results)
+
+    def test_recorded_corpus_and_json_output(self, tmp_path):
+        corpus = synthetic_corpus(40, 8, 3)
+        chunks_path, queries_path = _record(corpus, tmp_path)
+        assert load_corpus(chunks_path, queries_path) == corpus
+
+        output = tmp_path / "report.json"
+        main(
+            [
+                "--corpus",
+                chunks_path,
+                "--query-file",
+                queries_path,
+                "--retriever",
+                "segmented_index",
+                "--top-k",
+                "4",
+                "--output",
+                str(output),
+            ]
+        )
+        report = json.loads(output.read_text(encoding="utf-8"))
+        assert report["chunks"] == 40 and report["top_k"] == 4
+        assert report["results"][0]["retriever"] == "segmented_index"
+        assert report["results"][0]["recall_at_k"] == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("tenants", [["real-tenant"], ["tenant-a", "tenant-b"]])
+    async def test_recorded_tenants_keep_full_recall(self, tenants, tmp_path):
+        corpus = synthetic_corpus(60, 8, 5, seed=2)
+        for i, chunk in enumerate(corpus.chunks):
+            chunk.tenant_id = tenants[i % len(tenants)]
+        recorded = load_corpus(*_record(corpus, tmp_path))
+        report = await run_benchmark(
+            recorded, top_k=4, retrievers=["mmap_index", "segmented_index"]
+        )
+        for result in report.results:
+            assert result.status == "ok"
+            assert result.recall_at_k == pytest.approx(1.0)
+
+    @pytest.mark.parametrize("flag", ["--corpus", "--query-file"])
+    def test_recorded_corpus_needs_both_files(self, flag, capsys):
+        with pytest.raises(SystemExit):
+            main([flag, "recorded.jsonl"])
+        assert "--corpus and --query-file" in capsys.readouterr().err
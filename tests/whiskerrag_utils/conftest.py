@@ -0,0 +1,25 @@
+import pytest
+
+from whiskerrag_types.model import Knowledge
+
+
+@pytest.fixture
+def make_knowledge():
+    """Build a text knowledge for parser and loader tests; keyword arguments
+    override any of its fields."""
+
+    def make(**fields):
+        values = {
+            "source_type": "user_input_text",
+            "knowledge_type": "text",
+            "space_id": "space",
+            "knowledge_name": "knowledge",
+            "split_config": {"chunk_size": 100, "chunk_overlap": 0},
+            "source_config": {"text": "hello world"},
+            "embedding_model_name": "openai",
+            "tenant_id": "tenant",
+        }
+        values.update(fields)
+        return Knowledge(**values)
+
+    return make
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from whiskerrag_types.model.knowledge import Knowledge
+from whiskerrag_utils import RegisterTypeEnum, get_chunks_by_knowledge, get_register
+from whiskerrag_utils.embedding.hashing import HashingEmbedding, text_features
+from whiskerrag_utils.registry import init_register
+
+
+class TestHashingEmbedding:
+    def test_registered(self):
+        init_register()
+        assert get_register(RegisterTypeEnum.EMBEDDING, "hashing") is HashingEmbedding
+
+    @pytest.mark.asyncio
+    async def test_deterministic_and_normalised(self):
+        first = await HashingEmbedding(dimension=64).embed_documents(
+            ["The quick brown fox", "向量检索"], timeout=None
+        )
+        second = await HashingEmbedding(dimension=64).embed_documents(
+            ["The quick brown fox", "向量检索"], timeout=None
+        )
+        assert first == second
+        assert len(first[0]) == 64
+        assert np.linalg.norm(first, axis=1) == pytest.approx([1.0, 1.0], abs=1e-5)
+        assert (
+            await HashingEmbedding(dimension=64).embed_text_query(
+                "The quick brown fox", timeout=None
+            )
+            == first[0]
+        )
+
+    def test_shared_words_are_similar(self):
+        matrix = HashingEmbedding(dimension=512).embed_matrix(
+            [
+                "how to configure the retrieval cache",
+                "configure retrieval cache ttl",
+                "banana bread recipe with walnuts",
+            ]
+        )
+        similarities = matrix @ matrix[0]
+        assert similarities[1] > 0.3
+        assert similarities[1] > similarities[2]
+
+    def test_features(self):
+        features = text_features("Hello world 中文")
+        assert "w:hello" in features and "w:中" in features
+        assert "b:hello world" in features
+        assert "c:<he" in features
+
+    def test_empty_text(self):
+        matrix = HashingEmbedding(dimension=8).embed_matrix(["", "   "])
+        assert not matrix.any()
+
+    @pytest.mark.asyncio
+    async def test_simulated_provider(self):
+        failing = HashingEmbedding(dimension=8, error_rate=1.0)
+        with pytest.raises(RuntimeError):
+            await failing.embed_documents(["text"], timeout=None)
+
+        flaky = HashingEmbedding(dimension=8, error_rate=0.5, seed=1)
+        outcomes = []
+        for _ in range(20):
+            try:
+                await flaky.embed_documents(["text"], timeout=None)
+                outcomes.append(True)
+            except RuntimeError:
+                outcomes.append(False)
+        assert 0 < sum(outcomes) < 20
+
+    @pytest.mark.asyncio
+    async def test_chunks_by_knowledge_offline(self):
+        init_register()
+        knowledge = Knowledge(
+            source_type="user_input_text",
+            knowledge_type="text",
+            space_id="local_test",
+            knowledge_name="hashing",
+            split_config={"chunk_size": 40, "chunk_overlap": 0},
+            source_config={"text": "hello world " * 20},
+            embedding_model_name="hashing",
+            tenant_id="tenant",
+        )
+        chunks = await get_chunks_by_knowledge(knowledge)
+        assert len(chunks) > 1
+        assert all(len(chunk.embedding) == 384 for chunk in chunks)
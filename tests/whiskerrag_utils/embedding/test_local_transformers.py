@@ -0,0 +1,86 @@
+import threading
+
+import numpy as np
+import pytest
+
+from whiskerrag_types.model.knowledge import EmbeddingModelEnum
+from whiskerrag_utils.embedding.local_transformers import (
+    AllMiniLML6V2Embedding,
+    Text2VecBaseChineseEmbedding,
+    length_buckets,
+    resolve_model_dir,
+)
+
+
+class FakeModel:
+    """Records batches; the vector of a text is [len(text), 1]."""
+
+    def __init__(self):
+        self.batches = []
+        self.threads = set()
+
+    def encode(self, texts, batch_size, **kwargs):
+        self.batches.append(list(texts))
+        self.threads.add(threading.get_ident())
+        vectors = np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _expected(texts):
+    vectors = np.array([[len(t), 1.0] for t in texts])
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestLengthBuckets:
+    def test_similar_lengths_are_grouped(self):
+        lengths = [5, 100, 6, 98, 4, 99]
+        assert length_buckets(lengths, 8, 300) == [[1, 5, 3], [2, 0, 4]]
+
+    def test_batch_size_and_single_long_text(self):
+        assert length_buckets([10] * 5, 2, 1000) == [[0, 1], [2, 3], [4]]
+        assert length_buckets([5000, 1], 8, 100) == [[0], [1]]
+        assert length_buckets([], 8, 100) == []
+
+
+class TestLocalSentenceTransformerEmbedding:
+    def test_resolve_model_dir(self, tmp_path):
+        name = EmbeddingModelEnum.ALL_MINILM_L6_V2.value
+        assert resolve_model_dir(name, str(tmp_path)) is None
+        (tmp_path / "all-MiniLM-L6-v2").mkdir()
+        assert resolve_model_dir(name, str(tmp_path)) == tmp_path / "all-MiniLM-L6-v2"
+        (tmp_path / name).mkdir(parents=True)
+        assert resolve_model_dir(name, str(tmp_path)) == tmp_path / name
+
+    @pytest.mark.asyncio
+    async def test_health_check_without_model_dir(self, monkeypatch):
+        monkeypatch.delenv("WHISKER_LOCAL_EMBEDDING_DIR", raising=False)
+        assert await AllMiniLML6V2Embedding.health_check() is False
+
+    def test_missing_model_raises(self, tmp_path):
+        embedding = Text2VecBaseChineseEmbedding(model_dir=str(tmp_path))
+        with pytest.raises(FileNotFoundError):
+            embedding.encode(["text"])
+
+    @pytest.mark.asyncio
+    async def test_embed_documents_keeps_order(self):
+        model = FakeModel()
+        embedding = AllMiniLML6V2Embedding(
+            model=model, max_batch_size=2, max_batch_tokens=1000
+        )
+        texts = ["a", "a much longer text", "bb", "medium text", "ccc"]
+        vectors = await embedding.embed_documents(texts, None)
+        np.testing.assert_allclose(vectors, _expected(texts), rtol=1e-6)
+        assert [len(batch) for batch in model.batches] == [2, 2, 1]
+        assert sorted(map(len, model.batches[0])) == [11, 18]
+        assert threading.get_ident() not in model.threads
+
+    @pytest.mark.asyncio
+    async def test_embed_text_and_empty(self):
+        embedding = AllMiniLML6V2Embedding(model=FakeModel())
+        np.testing.assert_allclose(
+            await embedding.embed_text_query("four", None), _expected(["four"])[0]
+        )
+        assert await embedding.embed_documents([], None) == []
+        np.testing.assert_allclose(
+            embedding.encode(["x", "yy"]), _expected(["x", "yy"]), rtol=1e-6
+        )
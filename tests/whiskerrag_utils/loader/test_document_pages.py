@@ -0,0 +1,175 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from whiskerrag_types.model.knowledge import KnowledgeSourceEnum, KnowledgeTypeEnum
+from whiskerrag_types.model.knowledge_source import OpenUrlSourceConfig
+from whiskerrag_utils.loader import cloud_storage_text_loader, document_pages
+from whiskerrag_utils.loader.cloud_storage_text_loader import CloudStorageTextLoader
+from whiskerrag_utils.loader.document_pages import (
+    DocumentPage,
+    iter_docx_pages,
+    iter_pdf_pages,
+)
+
+
+def _write_pdf(path, pages):
+    """Minimal PDF with one line of Helvetica text per page."""
+    count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count))
+        + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 712 Td (%s) Tj ET" % text.encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def document_knowledge(make_knowledge):
+    def make(knowledge_type, split_config):
+        return make_knowledge(
+            source_type=KnowledgeSourceEnum.CLOUD_STORAGE_TEXT,
+            knowledge_type=knowledge_type,
+            knowledge_name="document",
+            split_config=split_config,
+            source_config=OpenUrlSourceConfig(url="https://example.com/document"),
+            metadata={"_reference_url": "https://example.com/document"},
+        )
+
+    return make
+
+
+class TestPdfPages:
+    def test_executor_keeps_order_and_bounds_pending(self, monkeypatch):
+        submitted = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                submitted.append(args[1])
+                return super().submit(fn, *args, **kwargs)
+
+        def fake_extract(path, start, stop):
+            return [f"page {index + 1}" for index in range(start, stop)]
+
+        monkeypatch.setattr(document_pages, "count_pdf_pages", lambda path: 10)
+        monkeypatch.setattr(document_pages, "extract_pdf_pages", fake_extract)
+        with RecordingExecutor(2) as executor:
+            pages = iter_pdf_pages("a.pdf", executor, pages_per_task=3, max_pending=2)
+            assert next(pages) == DocumentPage(1, "page 1")
+            # the range being read plus at most two more in flight
+            assert submitted == [0, 3, 6]
+            rest = list(pages)
+        assert submitted == [0, 3, 6, 9]
+        assert [page.page_number for page in rest] == list(range(2, 11))
+        assert rest[-1].text == "page 10"
+
+    def test_missing_pypdf(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "pypdf", None)
+        with pytest.raises(ImportError, match="pip install pypdf"):
+            next(iter_pdf_pages("a.pdf"))
+
+    def test_extract_pages(self, tmp_path):
+        pytest.importorskip("pypdf")
+        path = str(tmp_path / "doc.pdf")
+        _write_pdf(path, [f"Page number {i}" for i in range(1, 6)])
+        serial = list(iter_pdf_pages(path))
+        assert [page.page_number for page in serial] == [1, 2, 3, 4, 5]
+        assert "Page number 3" in serial[2].text
+        with ProcessPoolExecutor(2) as executor:
+            pooled = list(iter_pdf_pages(path, executor, pages_per_task=2))
+        assert pooled == serial
+
+
+class TestDocxPages:
+    def test_page_breaks_and_tables(self, tmp_path):
+        docx = pytest.importorskip("docx")
+        document = docx.Document()
+        document.add_paragraph("First page")
+        document.add_page_break()
+        document.add_paragraph("Second page")
+        table = document.add_table(rows=2, cols=2)
+        for row, values in zip(table.rows, [("a", "b"), ("c", "d")]):
+            for cell, value in zip(row.cells, values):
+                cell.text = value
+        path = str(tmp_path / "doc.docx")
+        document.save(path)
+
+        pages = list(iter_docx_pages(path))
+        assert pages == [
+            DocumentPage(1, "First page"),
+            DocumentPage(2, "Second page\na | b\nc | d"),
+        ]
+
+
+class TestCloudStorageTextLoader:
+    @pytest.mark.asyncio
+    async def test_iter_pages(self, monkeypatch, tmp_path, document_knowledge):
+        pytest.importorskip("pypdf")
+        path = str(tmp_path / "doc.pdf")
+        _write_pdf(path, ["Alpha", " ", "Gamma"])
+        monkeypatch.setattr(
+            cloud_storage_text_loader,
+            "download_from_url_to_local",
+            lambda url: (path, {"content_type": "application/pdf"}),
+        )
+        loader = CloudStorageTextLoader(
+            document_knowledge(
+                KnowledgeTypeEnum.PDF,
+                {"type": "pdf", "chunk_size": 100, "chunk_overlap": 0},
+            )
+        )
+        assert loader.read_file_content(path).count("\f") == 2
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            texts = [text async for text in loader.iter_load(executor)]
+        # blank pages are skipped, numbering follows the document
+        assert [t.metadata["page_number"] for t in texts] == [1, 3]
+        assert texts[1].content.strip() == "Gamma"
+        assert texts[0].metadata["content_type"] == "application/pdf"
+        # the downloaded file is removed once the pages are consumed
+        assert not os.path.exists(path)
+
+    def test_missing_python_docx(self, monkeypatch, tmp_path, document_knowledge):
+        monkeypatch.setitem(sys.modules, "docx", None)
+        path = str(tmp_path / "doc.docx")
+        open(path, "wb").close()
+        loader = CloudStorageTextLoader(
+            document_knowledge(
+                KnowledgeTypeEnum.DOCX,
+                {
+                    "type": "text",
+                    "chunk_size": 100,
+                    "chunk_overlap": 0,
+                    "separators": ["\n\n", "\n"],
+                    "is_separator_regex": False,
+                },
+            )
+        )
+        with pytest.raises(Exception, match="pip install python-docx"):
+            loader.read_file_content(path)
+        assert os.path.exists(path)
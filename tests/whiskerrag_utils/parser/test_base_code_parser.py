@@ -7,6 +7,7 @@ from whiskerrag_types.model.knowledge import Knowledge
 from whiskerrag_types.model.multi_modal import Text
 from whiskerrag_types.model.splitter import BaseCodeSplitConfig
 from whiskerrag_utils import RegisterTypeEnum, get_register
+from whiskerrag_utils.parser.base_code_parser import LineIndex
 from whiskerrag_utils.registry import init_register
 
 
@@ -328,3 +329,34 @@ def function_four():
         # Verify parser type metadata is correct
         assert python_result[0].metadata["parser_type"] == "base_code"
         assert java_result[0].metadata["parser_type"] == "base_code"
+
+    def test_line_index(self):
+        """Offsets map to 1-based (line, column) pairs"""
+        index = LineIndex("ab\ncd\n\nef")
+        assert index.line_starts == [0, 3, 6, 7]
+        assert index.line_column(0) == (1, 1)
+        assert index.line_column(2) == (1, 3)
+        assert index.line_column(4) == (2, 2)
+        assert index.line_column(6) == (3, 1)
+        assert index.line_column(8) == (4, 2)
+
+    @pytest.mark.asyncio
+    async def test_positions_match_chunk_text_on_large_file(self):
+        """Every chunk of a large file starts and ends where its text is"""
+        content = "".join(
+            f"def function_{i}(value):\n    return value * {i}\n\n" for i in range(2000)
+        )
+        knowledge = self._create_knowledge(
+            Language.PYTHON, chunk_size=300, chunk_overlap=60
+        )
+        result = await self.parser.parse(knowledge, Text(content=content, metadata={}))
+        lines = content.split("\n")
+        for chunk in result:
+            position = chunk.metadata["position"]
+            chunk_lines = chunk.content.split("\n")
+            start = position["start_column"] - 1
+            first = lines[position["start_line"] - 1]
+            assert first[start : start + len(chunk_lines[0])] == chunk_lines[0]
+            assert lines[position["end_line"] - 1].startswith(chunk_lines[-1]) or (
+                len(chunk_lines) == 1
+            )
@@ -0,0 +1,143 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from whiskerrag_types.interface.loader_interface import BaseLoader
+from whiskerrag_types.interface.parser_interface import BaseParser
+from whiskerrag_types.model.multi_modal import Text, TextSlice
+from whiskerrag_types.model.splitter import TextSplitConfig
+from whiskerrag_utils import get_chunks_by_knowledge
+from whiskerrag_utils.parser.text_parser import TextParser
+from whiskerrag_utils.registry import RegisterTypeEnum
+
+SPLIT_CONFIG = TextSplitConfig(
+    chunk_size=50, chunk_overlap=0, separators=["\n\n"], is_separator_regex=False
+)
+
+
+class SlowParser(BaseParser[Text]):
+    batch_concurrency = 3
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+
+    async def parse(self, knowledge, content):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        # later items finish first, results must still come back in order
+        await asyncio.sleep(0.01 / (1 + int(content.content)))
+        self.running -= 1
+        return [Text(content=content.content, metadata={})]
+
+
+class TestBatchParse:
+    @pytest.mark.asyncio
+    async def test_order_and_concurrency_limit(self, make_knowledge):
+        knowledge = make_knowledge(split_config=SPLIT_CONFIG)
+        parser = SlowParser()
+        contents = [Text(content=str(i), metadata={}) for i in range(10)]
+        results = await parser.batch_parse(knowledge, contents)
+        assert [r[0].content for r in results] == [str(i) for i in range(10)]
+        assert parser.peak == 3
+
+        parser = SlowParser()
+        await parser.batch_parse(knowledge, contents, max_concurrency=1)
+        assert parser.peak == 1
+
+    @pytest.mark.asyncio
+    async def test_executor_matches_inline(self, make_knowledge):
+        knowledge = make_knowledge(split_config=SPLIT_CONFIG)
+        contents = [
+            Text(content=f"part {i}\n\nsecond {i} " * 8, metadata={}) for i in range(6)
+        ]
+        inline = await TextParser().batch_parse(knowledge, contents)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            threaded = await TextParser().batch_parse(
+                knowledge, contents, executor=executor
+            )
+        assert [[t.content for t in r] for r in threaded] == [
+            [t.content for t in r] for r in inline
+        ]
+
+    @pytest.mark.asyncio
+    async def test_empty_batch(self, make_knowledge):
+        knowledge = make_knowledge(split_config=SPLIT_CONFIG)
+        assert await TextParser().batch_parse(knowledge, []) == []
+
+    @pytest.mark.asyncio
+    async def test_slices_match_texts(self, make_knowledge):
+        knowledge = make_knowledge(split_config=SPLIT_CONFIG)
+        content = Text(content="part one\n\npart two " * 8, metadata={"k": "v"})
+        texts = await TextParser().parse(knowledge, content)
+        slices = await TextParser().parse_slices(knowledge, content)
+        assert all(isinstance(item, TextSlice) for item in slices)
+        assert all(item.source is content.content for item in slices)
+        assert [item.to_text() for item in slices] == texts
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            [threaded] = await TextParser().batch_parse_slices(
+                knowledge, [content], executor=executor
+            )
+        assert [item.content for item in threaded] == [t.content for t in texts]
+
+    @pytest.mark.asyncio
+    async def test_default_parse_slices_wraps_parse(self, make_knowledge):
+        [item] = await SlowParser().parse_slices(
+            make_knowledge(split_config=SPLIT_CONFIG), Text(content="7", metadata={})
+        )
+        assert (item.content, item.start, item.end, len(item)) == ("7", 0, 1, 1)
+
+
+PARSED = {}
+
+
+class RecordingParser(BaseParser[Text]):
+    async def parse(self, knowledge, content):
+        PARSED[content.content].set()
+        return [content]
+
+
+class StreamingLoader(BaseLoader[Text]):
+    executor = None
+
+    async def load(self):
+        return [item async for item in self.iter_load()]
+
+    async def iter_load(self, executor=None):
+        StreamingLoader.executor = executor
+        for i in range(5):
+            PARSED[f"c{i}"] = asyncio.Event()
+            yield Text(content=f"c{i}", metadata={})
+            # only continue once the item was parsed: a pipeline that loads
+            # everything before parsing times out here
+            await asyncio.wait_for(PARSED[f"c{i}"].wait(), timeout=1)
+
+    async def decompose(self):
+        return []
+
+    async def on_load_finished(self):
+        pass
+
+
+class ListEmbedding:
+    async def embed_documents(self, documents, timeout=None):
+        return [[float(i)] for i, _ in enumerate(documents)]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_parses_items_as_they_load(make_knowledge):
+    with patch(
+        "whiskerrag_utils.get_register",
+        side_effect=lambda *args: {
+            RegisterTypeEnum.KNOWLEDGE_LOADER: StreamingLoader,
+            RegisterTypeEnum.PARSER: RecordingParser,
+            RegisterTypeEnum.EMBEDDING: ListEmbedding,
+        }[args[0]],
+    ):
+        chunks = await get_chunks_by_knowledge(
+            make_knowledge(split_config=SPLIT_CONFIG), extract_executor="pool"
+        )
+    assert [chunk.context for chunk in chunks] == [f"c{i}" for i in range(5)]
+    assert StreamingLoader.executor == "pool"
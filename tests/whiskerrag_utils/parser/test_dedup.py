@@ -0,0 +1,139 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from whiskerrag_types.interface.loader_interface import BaseLoader
+from whiskerrag_types.interface.parser_interface import BaseParser
+from whiskerrag_types.model.multi_modal import Image, Text
+from whiskerrag_utils import get_chunks_by_knowledge
+from whiskerrag_utils.parser.dedup import (
+    ChunkDeduplicator,
+    SignatureIndex,
+    reused_embeddings,
+    shingle_hashes,
+)
+from whiskerrag_utils.registry import RegisterTypeEnum
+
+LICENSE = (
+    "Licensed under the Apache License, Version 2.0 (the License); you may not "
+    "use this file except in compliance with the License. You may obtain a copy "
+    "of the License at http://www.apache.org/licenses/LICENSE-2.0"
+)
+
+
+def _text(content):
+    return Text(content=content, metadata={})
+
+
+class TestSignatures:
+    def test_shingles_ignore_case_and_spacing(self):
+        first = shingle_hashes("Hello   World\n")
+        assert np.array_equal(first, shingle_hashes("hello world"))
+        assert len(shingle_hashes("")) == 0
+        assert len(shingle_hashes("ab")) == 1
+
+    @pytest.mark.parametrize("method", ["minhash", "simhash"])
+    def test_near_duplicate_is_found(self, method):
+        index = SignatureIndex(method=method)
+        index.add(index.signature(LICENSE), {"knowledge_id": "k1", "chunk_idx": 0})
+        edited = LICENSE.replace("Version 2.0", "Version 2.0.")
+        match = index.query(index.signature(edited))
+        assert match is not None
+        assert match[0]["knowledge_id"] == "k1"
+        assert match[1] >= index.threshold
+        unrelated = "def parse(self, knowledge, content): return [content] * 3 + []"
+        assert index.query(index.signature(unrelated)) is None
+
+    def test_save_and_load(self, tmp_path):
+        index = SignatureIndex()
+        index.add(index.signature(LICENSE), {"knowledge_id": "k1", "chunk_idx": 0})
+        index.add(index.signature("other text " * 5), {"knowledge_id": "k2"})
+        index.discard_knowledge("k2")
+        index.save(tmp_path)
+        loaded = SignatureIndex.load(tmp_path)
+        assert loaded is not None and len(loaded) == 1
+        assert loaded.query(loaded.signature(LICENSE))[0]["knowledge_id"] == "k1"
+        assert SignatureIndex.load(tmp_path / "missing") is None
+
+
+class TestChunkDeduplicator:
+    def test_drop_within_knowledge(self, make_knowledge):
+        image = Image(url="http://example.com/a.png", metadata={})
+        items = [_text(LICENSE), image, _text("body"), _text(LICENSE.upper())]
+        kept = ChunkDeduplicator(scope="knowledge").deduplicate(make_knowledge(), items)
+        assert kept == items[:3]
+
+    def test_link_across_space_and_runs(self, tmp_path, make_knowledge):
+        dedup = ChunkDeduplicator(action="link", directory=tmp_path)
+        first = make_knowledge(knowledge_name="a.py")
+        dedup.deduplicate(first, [_text("unique a"), _text(LICENSE)])
+        dedup.save()
+
+        reloaded = ChunkDeduplicator(action="link", directory=tmp_path)
+        kept = reloaded.deduplicate(
+            make_knowledge(knowledge_name="b.py"), [_text(LICENSE)]
+        )
+        ref = kept[0].metadata["_duplicate_of"]
+        assert (ref["knowledge_id"], ref["knowledge_name"], ref["chunk_idx"]) == (
+            first.knowledge_id,
+            "a.py",
+            1,
+        )
+        # re-ingesting a knowledge does not match its own earlier signatures
+        again = reloaded.deduplicate(first, [_text("unique a"), _text(LICENSE)])
+        assert all("_duplicate_of" not in item.metadata for item in again)
+
+    def test_reused_embeddings(self, make_knowledge):
+        knowledge = make_knowledge()
+        items = ChunkDeduplicator(scope="knowledge", action="link").deduplicate(
+            knowledge, [_text(LICENSE), _text("body text"), _text(LICENSE)]
+        )
+        assert reused_embeddings(knowledge, items) == [None, None, 0]
+
+
+class Loader(BaseLoader[Text]):
+    async def load(self):
+        return [_text("x")]
+
+    async def decompose(self):
+        return []
+
+    async def on_load_finished(self):
+        pass
+
+
+class Parser(BaseParser[Text]):
+    async def parse(self, knowledge, content):
+        return [_text(LICENSE), _text("body text"), _text(LICENSE)]
+
+
+class Embedding:
+    documents = []
+
+    async def embed_documents(self, documents, timeout=None):
+        Embedding.documents.append(list(documents))
+        return [[float(i)] for i in range(len(documents))]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("action", ["drop", "link"])
+async def test_pipeline_embeds_each_original_once(action, make_knowledge):
+    Embedding.documents = []
+    with patch(
+        "whiskerrag_utils.get_register",
+        side_effect=lambda *args: {
+            RegisterTypeEnum.KNOWLEDGE_LOADER: Loader,
+            RegisterTypeEnum.PARSER: Parser,
+            RegisterTypeEnum.EMBEDDING: Embedding,
+        }[args[0]],
+    ):
+        chunks = await get_chunks_by_knowledge(
+            make_knowledge(), deduplicator=ChunkDeduplicator(action=action)
+        )
+    assert Embedding.documents == [[LICENSE, "body text"]]
+    if action == "drop":
+        assert [c.embedding for c in chunks] == [[0.0], [1.0]]
+    else:
+        assert [c.embedding for c in chunks] == [[0.0], [1.0], [0.0]]
+        assert chunks[2].metadata["_duplicate_of"]["chunk_idx"] == 0
@@ -1,25 +1,42 @@
+import json
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from whiskerrag_types.interface.loader_interface import BaseLoader
+from whiskerrag_types.interface.parser_interface import BaseParser
 from whiskerrag_types.model.knowledge import Knowledge
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
 from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.splitter import (
+    GithubRepoParseConfig,
+    JSONSplitConfig,
+    MarkdownSplitConfig,
+    YuqueSplitConfig,
+)
 from whiskerrag_utils import get_chunks_by_knowledge
+from whiskerrag_utils.parser.git_repo_parser import GithubRepoParser
+from whiskerrag_utils.parser.json_parser import JSONParser
+from whiskerrag_utils.parser.markdown_parser import MarkdownParser
+from whiskerrag_utils.parser.yuque_doc_parser import YuqueParser
 from whiskerrag_utils.registry import RegisterTypeEnum
 
 
-class MockLoader:
-    def __init__(self, knowledge) -> None:
-        self.knowledge = knowledge
-
+class MockLoader(BaseLoader[Text]):
     async def load(self):
         return [
             Text(content="content1", metadata={}),
             Text(content="content2", metadata={}),
         ]
 
+    async def decompose(self):
+        return []
+
+    async def on_load_finished(self):
+        pass
+
 
-class MockSplitter:
+class MockSplitter(BaseParser[Text]):
     call_count = 0
 
     def __init__(self) -> None:
@@ -94,6 +111,7 @@ async def test_get_chunks_by_knowledge_text() -> None:
         chunks = await get_chunks_by_knowledge(knowledge)
         assert len(chunks) == 4
         assert chunks[0].context == "split1"
+        assert type(chunks[0].metadata) is dict
         assert chunks[0].metadata == {
             "key1": "value11",
             "key2": "value22",
@@ -101,3 +119,98 @@ async def test_get_chunks_by_knowledge_text() -> None:
             "_knowledge_name": "OpenSPG/KAG/kag/examples/supplychain/builder/README.md",
             "_reference_url": "",
         }
+
+
+class ContentLoader(BaseLoader[Text]):
+    content = ""
+
+    async def load(self):
+        return [Text(content=self.content, metadata={"source": "loader"})]
+
+    async def decompose(self):
+        return []
+
+    async def on_load_finished(self):
+        pass
+
+
+MARKDOWN = "# Title\n\n" + "\n\n".join(f"paragraph {i} " * 10 for i in range(12))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "parser_cls, split_config, content",
+    [
+        (
+            MarkdownParser,
+            MarkdownSplitConfig(
+                chunk_size=120,
+                chunk_overlap=0,
+                separators=["\n\n"],
+                is_separator_regex=False,
+            ),
+            MARKDOWN,
+        ),
+        (
+            YuqueParser,
+            YuqueSplitConfig(
+                chunk_size=120,
+                chunk_overlap=0,
+                separators=["\n\n"],
+                is_separator_regex=False,
+            ),
+            MARKDOWN,
+        ),
+        (
+            JSONParser,
+            JSONSplitConfig(max_chunk_size=60, mode="stream"),
+            json.dumps([{"id": i, "text": f"record {i}"} for i in range(12)]),
+        ),
+    ],
+)
+async def test_chunk_metadata_is_materialised_once(
+    monkeypatch, make_knowledge, parser_cls, split_config, content
+):
+    knowledge = make_knowledge(
+        knowledge_type=split_config.type,
+        split_config=split_config,
+        source_config={"text": content},
+    )
+    ContentLoader.content = content
+    copies = []
+    to_dict = LayeredMetadata.to_dict
+
+    def counting_to_dict(self):
+        copies.append(self)
+        return to_dict(self)
+
+    monkeypatch.setattr(LayeredMetadata, "to_dict", counting_to_dict)
+    with patch(
+        "whiskerrag_utils.get_register",
+        side_effect=lambda *args: {
+            RegisterTypeEnum.KNOWLEDGE_LOADER: ContentLoader,
+            RegisterTypeEnum.PARSER: parser_cls,
+            RegisterTypeEnum.EMBEDDING: MockEmbedding,
+        }[args[0]],
+    ):
+        chunks = await get_chunks_by_knowledge(knowledge)
+    assert len(chunks) > 1
+    # parsers hand their metadata layers through; only the Chunk copies them
+    assert len(copies) == len(chunks)
+    assert all(chunk.metadata["source"] == "loader" for chunk in chunks)
+
+
+@pytest.mark.asyncio
+async def test_repo_tree_chunks_share_the_content_metadata(make_knowledge):
+    tree = "\n".join(f"src/module_{i}.py" for i in range(20))
+    knowledge = make_knowledge(
+        knowledge_type="github_repo",
+        split_config=GithubRepoParseConfig(
+            chunk_size=60, chunk_overlap=0, separators=["\n"], is_separator_regex=False
+        ),
+        source_config={"text": tree},
+    )
+    content = Text(content=tree, metadata={"repo_name": "repo"})
+    slices = await GithubRepoParser().parse_slices(knowledge, content)
+    assert len(slices) > 1
+    assert all(item.metadata is content.metadata for item in slices)
@@ -0,0 +1,152 @@
+import json
+import re
+
+import pytest
+
+from whiskerrag_types.model.knowledge import KnowledgeTypeEnum
+from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.splitter import JSONSplitConfig
+from whiskerrag_utils.parser.json_parser import JSONParser
+from whiskerrag_utils.parser.json_stream import iter_json_chunks, iter_jsonl_chunks
+
+DOC = {
+    "name": "export",
+    "items": [{"id": i, "title": f"item {i}", "tags": ["a", "b"]} for i in range(30)],
+    "meta": {"weird key": "x", "nested": {"deep": list(range(50))}},
+}
+
+
+def _resolve(data, path):
+    """Tiny resolver for the paths produced by the stream chunker."""
+    node = data
+    for name, quoted, index, stop in re.findall(
+        r'\.(\w+)|\[("(?:[^"\\]|\\.)*")\]|\[(\d+)(?::(\d+))?\]', path
+    ):
+        if name or quoted:
+            node = node[name or json.loads(quoted)]
+        elif stop:
+            node = node[int(index) : int(stop)]
+        else:
+            node = node[int(index)]
+    return node
+
+
+class TestIterJsonChunks:
+    @pytest.mark.parametrize("indent", [None, 4])
+    def test_chunks_are_bounded_and_addressable(self, indent):
+        text = json.dumps(DOC, indent=indent)
+        chunks = list(iter_json_chunks(text, 120))
+        assert len(chunks) > 3
+        for content, path in chunks:
+            assert len(content) <= 120
+            value = json.loads(content)
+            target = _resolve(DOC, path)
+            if isinstance(value, dict) and not isinstance(target, dict):
+                # single object member: path points at the member itself
+                assert list(value.values()) == [target]
+            elif isinstance(value, dict):
+                assert value.items() <= target.items()
+            elif path.endswith("]") and ":" not in path.rsplit("[", 1)[1]:
+                assert value == [target]
+            else:
+                assert value == target
+        paths = [path for _, path in chunks]
+        assert any(p.startswith("$.items[") for p in paths)
+        assert any(p.startswith("$.meta.nested.deep[") for p in paths)
+
+    def test_small_document_is_one_chunk(self):
+        assert list(iter_json_chunks('{"a": 1, "b": [1, 2]}', 100)) == [
+            ('{"a":1,"b":[1,2]}', "$")
+        ]
+        assert list(iter_json_chunks("[]", 100)) == []
+
+    def test_quoted_key_path(self):
+        chunks = list(iter_json_chunks('{"a b": "xxxxxxxxxx", "c": "yyyyyyyyyy"}', 20))
+        assert chunks == [
+            ('{"a b":"xxxxxxxxxx"}', '$["a b"]'),
+            ('{"c":"yyyyyyyyyy"}', "$.c"),
+        ]
+
+    @pytest.mark.parametrize("max_chunk_size", [50, 5000, 20000])
+    def test_members_are_decoded_in_place(self, max_chunk_size):
+        class SliceCountingText(str):
+            copied = 0
+
+            def __getitem__(self, key):
+                item = super().__getitem__(key)
+                SliceCountingText.copied += len(item)
+                return item
+
+        rows = [{"id": i, "s": 'a]{"b', "n": [i, {"x": i}]} for i in range(500)]
+        text = SliceCountingText(json.dumps({"rows": rows}))
+        chunks = list(iter_json_chunks(text, max_chunk_size))
+        assert [row for content, _ in chunks for row in json.loads(content)] == rows
+        # no window of max_chunk_size is copied per member
+        assert SliceCountingText.copied < len(text)
+
+    def test_brackets_inside_strings(self):
+        data = {"a": ["x]}{[" * 5, "y"], "b": {"c": '"]'}}
+        chunks = list(iter_json_chunks(json.dumps(data), 25))
+        assert chunks == [
+            ('["x]}{[x]}{[x]}{[x]}{[x]}{["]', "$.a[0]"),
+            ('["y"]', "$.a[1]"),
+            ('{"b":{"c":"\\"]"}}', "$.b"),
+        ]
+
+    @pytest.mark.parametrize("text", ["4", '{"a": }', '{"a": 1} 2', "[1, 2", '{"a" 1}'])
+    def test_invalid(self, text):
+        with pytest.raises(ValueError):
+            list(iter_json_chunks(text, 50))
+
+
+class TestIterJsonlChunks:
+    LINES = "\n".join(json.dumps({"id": i, "text": "r" * 10}) for i in range(6))
+
+    def test_one_record_per_chunk(self):
+        chunks = list(iter_jsonl_chunks(self.LINES + "\n\n", 1000))
+        assert [path for _, path in chunks] == [f"$[{i}]" for i in range(6)]
+        assert json.loads(chunks[2][0]) == {"id": 2, "text": "r" * 10}
+
+    def test_grouped(self):
+        chunks = list(iter_jsonl_chunks(self.LINES, 60, group_records=True))
+        assert [path for _, path in chunks] == ["$[0:2]", "$[2:4]", "$[4:6]"]
+        assert all(len(content) <= 60 for content, _ in chunks)
+
+    def test_large_record_is_walked(self):
+        text = json.dumps({"values": list(range(100))})
+        chunks = list(iter_jsonl_chunks(text, 50))
+        assert len(chunks) > 1
+        assert all(path.startswith("$[0].values[") for _, path in chunks)
+
+    def test_invalid_line(self):
+        with pytest.raises(ValueError, match="line 2"):
+            list(iter_jsonl_chunks('{"a": 1}\n{oops}\n', 50))
+
+
+class TestJSONParserModes:
+    @pytest.mark.asyncio
+    async def test_stream_mode_metadata(self, make_knowledge):
+        knowledge = make_knowledge(
+            knowledge_type=KnowledgeTypeEnum.JSON,
+            split_config=JSONSplitConfig(max_chunk_size=100, mode="stream"),
+        )
+        result = await JSONParser().parse(
+            knowledge, Text(content=json.dumps(DOC), metadata={"k": "v"})
+        )
+        assert [t.metadata["_idx"] for t in result] == list(range(len(result)))
+        assert all(t.metadata["_json_path"].startswith("$") for t in result)
+        assert result[0].metadata["k"] == "v"
+
+    @pytest.mark.asyncio
+    async def test_jsonl_mode(self, make_knowledge):
+        knowledge = make_knowledge(
+            knowledge_type=KnowledgeTypeEnum.JSON,
+            split_config=JSONSplitConfig(
+                max_chunk_size=100, mode="jsonl", group_records=True
+            ),
+        )
+        text = '{"a": 1}\n{"a": 2}\n{"a": 3}\n'
+        result = await JSONParser().parse(knowledge, Text(content=text, metadata={}))
+        assert [(t.content, t.metadata["_json_path"]) for t in result] == [
+            ('{"a":1}\n{"a":2}\n{"a":3}', "$[0:3]")
+        ]
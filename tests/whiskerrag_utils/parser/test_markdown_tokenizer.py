@@ -0,0 +1,118 @@
+import pytest
+
+from whiskerrag_types.model.knowledge import KnowledgeTypeEnum
+from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.splitter import MarkdownSplitConfig
+from whiskerrag_utils.parser.markdown_parser import MarkdownParser
+from whiskerrag_utils.parser.markdown_tokenizer import Heading, iter_sections
+
+DOC = """intro line
+# Install
+Run this:
+```bash
+# not a heading
+pip install whiskerrag
+```
+## Options
+| name | default |
+|------|---------|
+| size | 100 |
+
+### Deep #
+~~~
+## still code
+~~~
+# Usage
+text
+"""
+
+
+@pytest.fixture
+def markdown_knowledge(make_knowledge):
+    def make(extract_header_first):
+        return make_knowledge(
+            knowledge_type=KnowledgeTypeEnum.MARKDOWN,
+            knowledge_name="doc.md",
+            split_config=MarkdownSplitConfig(
+                chunk_size=200,
+                chunk_overlap=0,
+                separators=["\n\n", "\n", " ", ""],
+                is_separator_regex=False,
+                extract_header_first=extract_header_first,
+            ),
+            source_config={"text": DOC},
+        )
+
+    return make
+
+
+class TestIterSections:
+    def test_sections_skip_headings_in_code(self):
+        sections = list(iter_sections(DOC))
+        assert [[h.title for h in s.headings] for s in sections] == [
+            [],
+            ["Install"],
+            ["Install", "Options"],
+            ["Install", "Options", "Deep"],
+            ["Usage"],
+        ]
+        assert DOC[sections[0].start : sections[0].end] == "intro line"
+        assert DOC[sections[1].start : sections[1].end].startswith("# Install")
+        assert sections[3].headings[-1] == Heading(3, "Deep", "### Deep #")
+
+    def test_code_blocks_and_tables(self):
+        sections = list(iter_sections(DOC))
+        (block,) = sections[1].code_blocks
+        assert block.language == "bash"
+        assert block.code == "# not a heading\npip install whiskerrag"
+        assert DOC[block.start : block.end].endswith("```")
+        assert sections[3].code_blocks[0].code == "## still code"
+        (table,) = sections[2].tables
+        assert table.text == "| name | default |\n|------|---------|\n| size | 100 |"
+        assert DOC[table.start : table.end] == table.text
+
+    def test_unclosed_fence_runs_to_end(self):
+        text = "# A\n```python\n# comment\nx = 1\n"
+        (section,) = list(iter_sections(text))
+        assert section.code_blocks[0].code == "# comment\nx = 1\n"
+        assert section.code_blocks[0].end == len(text)
+
+    def test_without_heading_split(self):
+        (section,) = list(iter_sections(DOC, split_on_headings=False))
+        assert (section.start, section.end, section.headings) == (0, len(DOC), ())
+        assert len(section.code_blocks) == 2
+
+    def test_large_document(self):
+        part = "## Endpoint\n```json\n# {}\n```\n| a | b |\n|---|---|\n| 1 | 2 |\n\n"
+        text = part * 20000
+        sections = list(iter_sections(text))
+        assert len(sections) == 20000
+        assert all(len(s.code_blocks) == 1 and len(s.tables) == 1 for s in sections)
+
+
+class TestMarkdownParserStructure:
+    @pytest.mark.asyncio
+    async def test_header_metadata_and_code_list(self, markdown_knowledge):
+        chunks = await MarkdownParser().parse(
+            markdown_knowledge(True), Text(content=DOC, metadata={"k": "v"})
+        )
+        install = next(c for c in chunks if c.content.startswith("# Install"))
+        assert install.metadata["header_path"] == "Install"
+        assert install.metadata["_code_list"] == [
+            "# not a heading\npip install whiskerrag"
+        ]
+        assert install.metadata["k"] == "v"
+        options = next(c for c in chunks if c.content.startswith("## Options"))
+        assert options.metadata["header_path"] == "Install > Options"
+        assert options.metadata["level"] == 2
+        assert options.metadata["_table_list"][0].startswith("| name")
+        assert not any("not a heading" in c.metadata["header_path"] for c in chunks)
+
+    @pytest.mark.asyncio
+    async def test_without_header_split(self, markdown_knowledge):
+        chunks = await MarkdownParser().parse(
+            markdown_knowledge(False), Text(content=DOC, metadata={})
+        )
+        assert "headers" not in chunks[0].metadata
+        codes = [code for c in chunks for code in c.metadata["_code_list"]]
+        assert "## still code" in codes
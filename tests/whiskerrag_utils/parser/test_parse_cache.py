@@ -0,0 +1,183 @@
+from unittest.mock import patch
+
+import pytest
+
+from whiskerrag_types.interface.loader_interface import BaseLoader
+from whiskerrag_types.interface.parser_interface import BaseParser
+from whiskerrag_types.model.multi_modal import Image, Text
+from whiskerrag_types.model.splitter import TextSplitConfig
+from whiskerrag_utils import get_chunks_by_knowledge
+from whiskerrag_utils.parser.base_text_parser import BaseTextParser
+from whiskerrag_utils.parser.parse_cache import ParseCache
+from whiskerrag_utils.registry import RegisterTypeEnum
+
+CONTENT = "first part of the text\n\nsecond part of the text\n\nthird part"
+
+
+@pytest.fixture
+def text_knowledge(make_knowledge):
+    def make(chunk_size=30, metadata=None):
+        return make_knowledge(
+            knowledge_name="cached.txt",
+            split_config=TextSplitConfig(
+                chunk_size=chunk_size,
+                chunk_overlap=0,
+                separators=["\n\n"],
+                is_separator_regex=False,
+            ),
+            source_config={"text": CONTENT},
+            metadata=metadata or {},
+        )
+
+    return make
+
+
+class RewritingParser(BaseParser[Text]):
+    """Chunks that are new strings, with an inherited key removed."""
+
+    async def parse(self, knowledge, content):
+        metadata = {**knowledge.metadata, **content.metadata, "upper": True}
+        metadata.pop("drop_me", None)
+        return [Text(content=content.content.upper(), metadata=metadata)]
+
+
+class ImageParser(BaseParser[Text]):
+    async def parse(self, knowledge, content):
+        return [Image(url="https://example.com/a.png", metadata={})]
+
+
+async def _parse(cache, parser, knowledge, content):
+    [result] = await cache.batch_parse_slices(parser, knowledge, [content])
+    return [(item.content, dict(item.metadata)) for item in result]
+
+
+class TestParseCache:
+    @pytest.mark.asyncio
+    async def test_hit_matches_parse(self, text_knowledge):
+        cache = ParseCache()
+        knowledge = text_knowledge()
+        content = Text(content=CONTENT, metadata={"path": "a.txt"})
+        first = await _parse(cache, BaseTextParser(), knowledge, content)
+        assert (cache.hits, cache.misses) == (0, 1)
+
+        cached = cache.get(knowledge, content, BaseTextParser())
+        assert cache.hits == 1
+        assert all(item.source is content.content for item in cached)
+        assert [(item.content, dict(item.metadata)) for item in cached] == first
+        entry = next(iter(cache._entries.values()))
+        # only what the parser added is stored per chunk
+        assert entry.texts == [] and all(m.keys() == {"_idx"} for m in entry.metadata)
+
+    @pytest.mark.asyncio
+    async def test_inherited_metadata_is_current(self, text_knowledge):
+        cache = ParseCache()
+        await _parse(
+            cache,
+            BaseTextParser(),
+            text_knowledge(),
+            Text(content=CONTENT, metadata={}),
+        )
+        content = Text(content=CONTENT, metadata={"etag": "new"})
+        [result] = await cache.batch_parse_slices(
+            BaseTextParser(), text_knowledge(metadata={"_tags": "a"}), [content]
+        )
+        assert cache.hits == 1
+        assert all(item.metadata["etag"] == "new" for item in result)
+        assert all(item.metadata["_tags"] == "a" for item in result)
+
+    @pytest.mark.asyncio
+    async def test_key_parts(self, text_knowledge):
+        cache = ParseCache()
+        content = Text(content=CONTENT, metadata={})
+        await _parse(cache, BaseTextParser(), text_knowledge(), content)
+        await _parse(cache, BaseTextParser(), text_knowledge(chunk_size=40), content)
+        await _parse(
+            cache,
+            BaseTextParser(),
+            text_knowledge(),
+            Text(content=CONTENT + "!", metadata={}),
+        )
+        assert (cache.hits, cache.misses) == (0, 3)
+        with patch.object(BaseTextParser, "cache_version", "2"):
+            await _parse(cache, BaseTextParser(), text_knowledge(), content)
+        assert cache.misses == 4
+
+    @pytest.mark.asyncio
+    async def test_disk_tier(self, tmp_path, text_knowledge):
+        knowledge = text_knowledge(metadata={"drop_me": 1, "keep": 2})
+        content = Text(content=CONTENT, metadata={"path": "a.txt"})
+        parsers = [BaseTextParser(), RewritingParser()]
+        writer = ParseCache(directory=tmp_path)
+        expected = [await _parse(writer, p, knowledge, content) for p in parsers]
+        assert len(list(tmp_path.glob("*/*.npz"))) == 2
+
+        reader = ParseCache(directory=tmp_path)
+        assert [await _parse(reader, p, knowledge, content) for p in parsers] == (
+            expected
+        )
+        assert (reader.hits, reader.misses) == (2, 0)
+        [(text, metadata)] = expected[1]
+        assert text == CONTENT.upper() and "drop_me" not in metadata
+
+    @pytest.mark.asyncio
+    async def test_lru_and_uncacheable_results(self, text_knowledge):
+        cache = ParseCache(max_entries=1)
+        knowledge = text_knowledge()
+        await _parse(cache, BaseTextParser(), knowledge, Text(content="a", metadata={}))
+        await _parse(cache, BaseTextParser(), knowledge, Text(content="b", metadata={}))
+        assert len(cache) == 1
+        assert (
+            cache.get(knowledge, Text(content="a", metadata={}), BaseTextParser())
+            is None
+        )
+
+        cache.clear()
+        [result] = await cache.batch_parse_slices(
+            ImageParser(), knowledge, [Text(content="a", metadata={})]
+        )
+        assert isinstance(result[0], Image) and len(cache) == 0
+        with pytest.raises(ValueError):
+            ParseCache(max_entries=0)
+
+
+class CountingTextParser(BaseTextParser):
+    calls = 0
+
+    async def parse_slices(self, knowledge, content):
+        CountingTextParser.calls += 1
+        return await super().parse_slices(knowledge, content)
+
+
+class OneTextLoader(BaseLoader[Text]):
+    async def load(self):
+        return [Text(content=CONTENT, metadata={})]
+
+    async def decompose(self):
+        return []
+
+    async def on_load_finished(self):
+        pass
+
+
+class ListEmbedding:
+    async def embed_documents(self, documents, timeout=None):
+        return [[float(i)] for i, _ in enumerate(documents)]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_skips_parsing_on_retry(text_knowledge):
+    CountingTextParser.calls = 0
+    cache = ParseCache()
+    with patch(
+        "whiskerrag_utils.get_register",
+        side_effect=lambda *args: {
+            RegisterTypeEnum.KNOWLEDGE_LOADER: OneTextLoader,
+            RegisterTypeEnum.PARSER: CountingTextParser,
+            RegisterTypeEnum.EMBEDDING: ListEmbedding,
+        }[args[0]],
+    ):
+        first = await get_chunks_by_knowledge(text_knowledge(), parse_cache=cache)
+        retried = await get_chunks_by_knowledge(text_knowledge(), parse_cache=cache)
+    assert CountingTextParser.calls == 1
+    assert [c.context for c in retried] == [c.context for c in first]
+    assert [c.metadata["_idx"] for c in retried] == list(range(len(first)))
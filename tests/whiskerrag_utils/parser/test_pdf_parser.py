@@ -0,0 +1,60 @@
+import functools
+
+import pytest
+
+from whiskerrag_types.model.layered_metadata import LayeredMetadata
+from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_utils import RegisterTypeEnum, get_register
+from whiskerrag_utils.registry import init_register
+
+
+@pytest.fixture
+def pdf_knowledge(make_knowledge):
+    return functools.partial(
+        make_knowledge,
+        source_type="cloud_storage_text",
+        knowledge_type="pdf",
+        knowledge_name="report.pdf",
+        source_config={"url": "https://example.com/report.pdf"},
+        metadata={"_reference_url": "https://example.com/report.pdf"},
+    )
+
+
+class TestPDFParser:
+    def setup_method(self):
+        init_register()
+        self.parser = get_register(RegisterTypeEnum.PARSER, "pdf")()
+
+    @pytest.mark.asyncio
+    async def test_chunks_keep_page_number(self, pdf_knowledge):
+        knowledge = pdf_knowledge(
+            split_config={"type": "pdf", "chunk_size": 40, "chunk_overlap": 0}
+        )
+        page = "First paragraph of the page.\n\nSecond paragraph, a bit longer."
+        metadata = LayeredMetadata.stack({"content_type": "application/pdf"})
+        result = await self.parser.parse(
+            knowledge, Text(content=page, metadata=metadata.derive({"page_number": 7}))
+        )
+        assert [r.content for r in result] == [
+            "First paragraph of the page.",
+            "Second paragraph, a bit longer.",
+        ]
+        for index, item in enumerate(result):
+            assert item.metadata["page_number"] == 7
+            assert item.metadata["chunk_index"] == index
+            assert item.metadata["parser_type"] == "pdf"
+            assert item.metadata["_reference_url"] == "https://example.com/report.pdf"
+
+    @pytest.mark.asyncio
+    async def test_wrong_config(self, pdf_knowledge):
+        knowledge = pdf_knowledge(
+            split_config={
+                "type": "text",
+                "chunk_size": 100,
+                "chunk_overlap": 0,
+                "separators": ["\n"],
+                "is_separator_regex": False,
+            }
+        )
+        with pytest.raises(TypeError):
+            await self.parser.parse(knowledge, Text(content="text", metadata={}))
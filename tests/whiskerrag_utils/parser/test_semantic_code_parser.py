@@ -0,0 +1,183 @@
+import os
+
+import pytest
+from langchain_text_splitters import Language
+
+from whiskerrag_types.model.knowledge import Knowledge
+from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.splitter import SemanticCodeSplitConfig
+from whiskerrag_utils import RegisterTypeEnum, get_register
+from whiskerrag_utils.parser.semantic_code_parser import chunk_code, outline_python
+from whiskerrag_utils.registry import init_register
+
+CODE_DIR = os.path.join(os.path.dirname(__file__), "code")
+
+SOURCE = '''"""Module docstring."""
+import os
+
+
+def small_a():
+    return 1
+
+
+def small_b():
+    return 2
+
+
+class Service:
+    """A service."""
+
+    timeout = 3
+
+    # comment above the decorator
+    @property
+    def name(self):
+        return "service"
+
+    async def run(self, items):
+        total = 0
+        for item in items:
+            total += item
+        return total
+'''
+
+
+def _load(filename):
+    with open(os.path.join(CODE_DIR, filename), encoding="utf-8") as f:
+        return f.read()
+
+
+def _lines(text, start, end):
+    return text.count("\n", 0, start) + 1, text.count("\n", 0, end) + 1
+
+
+class TestOutline:
+    def test_python_units_follow_definitions(self):
+        units = outline_python(SOURCE)
+        assert [(u.start_line, u.end_line) for u in units] == [
+            (1, 1),
+            (2, 2),
+            (3, 6),
+            (7, 10),
+            (11, 28),
+        ]
+        service = units[-1]
+        assert service.symbols == ("Service", "Service.name", "Service.run")
+        header, docstring, attribute, name, run = service.children
+        assert (header.start_line, header.end_line) == (11, 13)
+        # the decorator and the comment above it belong to the method
+        assert (name.start_line, name.end_line, name.symbols) == (
+            17,
+            21,
+            ("Service.name",),
+        )
+        assert (run.start_line, run.end_line) == (22, 28)
+
+
+class TestChunkCode:
+    def test_small_siblings_are_merged(self):
+        chunks = chunk_code(SOURCE, Language.PYTHON, chunk_size=len(SOURCE))
+        assert len(chunks) == 1
+        assert chunks[0].symbols == (
+            "small_a",
+            "small_b",
+            "Service",
+            "Service.name",
+            "Service.run",
+        )
+        assert SOURCE[chunks[0].start : chunks[0].end] == SOURCE.strip()
+
+    def test_oversized_class_is_opened_by_method(self):
+        chunks = chunk_code(SOURCE, Language.PYTHON, chunk_size=150)
+        texts = [SOURCE[c.start : c.end] for c in chunks]
+        assert all(len(text) <= 150 for text in texts)
+        run = next(c for c in chunks if "Service.run" in c.symbols)
+        assert SOURCE[run.start : run.end].lstrip().startswith("async def run")
+        assert SOURCE[run.start : run.end].endswith("return total")
+        assert _lines(SOURCE, run.start, run.end) == (23, 27)
+
+    def test_functions_are_not_cut_when_they_fit(self):
+        text = _load("rstar.py")
+        for chunk in chunk_code(text, Language.PYTHON, chunk_size=800):
+            lines = text[chunk.start : chunk.end].split("\n")
+            assert len(text[chunk.start : chunk.end]) <= 800
+            # every chunk starts at a statement, never inside an expression
+            assert not lines[0].startswith(" " * 9)
+
+    def test_oversized_leaf_falls_back_to_separators(self):
+        values = ", ".join(str(i) for i in range(200))
+        text = f"def big():\n    values = [{values}]\n    return values\n"
+        chunks = chunk_code(text, Language.PYTHON, chunk_size=200)
+        assert len(chunks) > 1
+        assert all(chunk.end - chunk.start <= 200 for chunk in chunks)
+        assert all(chunk.symbols == ("big",) for chunk in chunks)
+
+    @pytest.mark.parametrize(
+        "filename,language,symbol",
+        [
+            ("rstar.java", Language.JAVA, "rstar.searchNode"),
+            ("rstar.ts", Language.TS, "RStarTree.searchNode"),
+        ],
+    )
+    def test_brace_heuristic(self, filename, language, symbol):
+        text = _load(filename)
+        chunks = chunk_code(text, language, chunk_size=800)
+        assert all(len(text[c.start : c.end]) <= 800 for c in chunks)
+        method = next(c for c in chunks if symbol in c.symbols)
+        assert text[method.start : method.end].lstrip().startswith("private ")
+        assert text[method.start : method.end].rstrip("}\n ").endswith(";")
+
+    def test_syntax_error_uses_indentation(self):
+        text = "def broken(:\n    pass\n\ndef other():\n    return 1\n"
+        chunks = chunk_code(text, Language.PYTHON, chunk_size=30)
+        assert [text[c.start : c.end] for c in chunks] == [
+            "def broken(:\n    pass",
+            "def other():\n    return 1",
+        ]
+
+
+class TestSemanticCodeParser:
+    def setup_method(self):
+        init_register()
+        self.parser = get_register(RegisterTypeEnum.PARSER, "semantic_code")()
+
+    @pytest.mark.asyncio
+    async def test_metadata(self):
+        knowledge = Knowledge(
+            source_type="github_file",
+            knowledge_type="python",
+            space_id="test_space",
+            knowledge_name="service.py",
+            split_config=SemanticCodeSplitConfig(
+                language=Language.PYTHON, chunk_size=150
+            ),
+            source_config={"text": "test"},
+            embedding_model_name="openai",
+            tenant_id="test-tenant",
+            metadata={"_reference_url": "https://example.com/service.py"},
+        )
+        result = await self.parser.parse(
+            knowledge, Text(content=SOURCE, metadata={"path": "service.py"})
+        )
+        run = next(r for r in result if "Service.run" in r.metadata["symbols"])
+        assert run.metadata["parser_type"] == "semantic_code"
+        assert run.metadata["path"] == "service.py"
+        assert run.metadata["_reference_url"] == "https://example.com/service.py"
+        assert run.metadata["position"]["start_line"] == 23
+        assert run.metadata["position"]["end_line"] == 27
+        assert [r.metadata["chunk_index"] for r in result] == list(range(len(result)))
+
+    @pytest.mark.asyncio
+    async def test_wrong_config(self):
+        knowledge = Knowledge(
+            source_type="user_input_text",
+            knowledge_type="text",
+            space_id="test_space",
+            knowledge_name="a.txt",
+            split_config={"chunk_size": 100, "chunk_overlap": 0},
+            source_config={"text": "hello world"},
+            embedding_model_name="openai",
+            tenant_id="test-tenant",
+        )
+        with pytest.raises(TypeError):
+            await self.parser.parse(knowledge, Text(content="x = 1", metadata={}))
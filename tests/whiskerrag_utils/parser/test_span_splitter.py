@@ -0,0 +1,146 @@
+import random
+
+import pytest
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+from whiskerrag_types.model.knowledge import Knowledge, KnowledgeTypeEnum
+from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.splitter import YuqueSplitConfig
+from whiskerrag_utils.parser.span_splitter import SpanSplitter, TextSpan
+from whiskerrag_utils.parser.splitter_cache import DEFAULT_SEPARATORS
+from whiskerrag_utils.parser.yuque_doc_parser import YuqueParser
+
+WORDS = ["alpha", "beta", "# Head", "\n", "\n\n", " ", "```\n", "---", "中文。"]
+
+
+def _random_text(rng):
+    return "".join(
+        rng.choice(WORDS) + rng.choice(["", " ", "\n"])
+        for _ in range(rng.randint(0, 120))
+    )
+
+
+class TestSpanSplitter:
+    def test_spans_point_into_source(self):
+        text = "one two\n\nthree four\n\none two"
+        spans = SpanSplitter(10, 0).split_spans(text)
+        assert spans == [
+            TextSpan("one two", 0, 7),
+            TextSpan("three four", 9, 19),
+            TextSpan("one two", 21, 28),
+        ]
+
+    def test_overlap_spans(self):
+        text = "a b c d e f g h"
+        spans = SpanSplitter(5, 3, [" "]).split_spans(text)
+        assert [s.text for s in spans] == ["a b c", "b c d", "c d e", "d e f"] + [
+            "e f g",
+            "f g h",
+        ]
+        assert all(text[s.start : s.end] == s.text for s in spans)
+        assert [s.start for s in spans] == [0, 2, 4, 6, 8, 10]
+
+    @pytest.mark.parametrize("keep_separator", [False, True, "start", "end"])
+    def test_matches_langchain(self, keep_separator):
+        rng = random.Random(str(keep_separator))
+        for _ in range(300):
+            text = _random_text(rng)
+            chunk_size = rng.randint(5, 120)
+            chunk_overlap = rng.randint(0, chunk_size // 2)
+            separators = rng.choice(
+                [list(DEFAULT_SEPARATORS), ["\n\n", "\n", " ", ""], ["\n\n"]]
+            )
+            expected = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=separators,
+                keep_separator=keep_separator,
+            ).split_text(text)
+            spans = SpanSplitter(
+                chunk_size, chunk_overlap, separators, keep_separator=keep_separator
+            ).split_spans(text)
+            assert [s.text for s in spans] == expected
+            for span in spans:
+                source = text[span.start : span.end]
+                assert (source[:1], source[-1:]) == (span.text[:1], span.text[-1:])
+
+    def test_language_matches_langchain(self):
+        code = "".join(
+            f"class C{i}:\n    def f(self):\n        return {i}\n\n"
+            f"def g{i}(x):\n    if x:\n        return x\n    return {i}\n\n"
+            for i in range(40)
+        )
+        for chunk_size, chunk_overlap in ((120, 20), (400, 0)):
+            expected = RecursiveCharacterTextSplitter.from_language(
+                Language.PYTHON, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+            ).split_text(code)
+            spans = SpanSplitter.from_language(
+                Language.PYTHON, chunk_size, chunk_overlap
+            ).split_spans(code)
+            assert [s.text for s in spans] == expected
+            assert all(code[s.start : s.end] == s.text for s in spans)
+
+    def test_overlap_larger_than_chunk(self):
+        with pytest.raises(ValueError):
+            SpanSplitter(10, 20)
+
+
+class TestSplitSlices:
+    def test_overlapping_slices_share_the_source(self):
+        text = "a b c d e f g h"
+        slices = SpanSplitter(5, 3, [" "], keep_separator=True).split_slices(text)
+        assert all(piece.source is text for piece in slices)
+        assert [piece.content for piece in slices] == [
+            span.text
+            for span in SpanSplitter(5, 3, [" "], keep_separator=True).split_spans(text)
+        ]
+
+    @pytest.mark.parametrize("keep_separator", [False, True])
+    def test_matches_split_spans(self, keep_separator):
+        rng = random.Random(f"slices-{keep_separator}")
+        for _ in range(200):
+            text = _random_text(rng)
+            separators = rng.choice([list(DEFAULT_SEPARATORS), ["\n\n", "\n"]])
+            splitter = SpanSplitter(
+                rng.randint(5, 80),
+                0,
+                separators,
+                is_separator_regex=True,
+                keep_separator=keep_separator,
+            )
+            slices = splitter.split_slices(text)
+            assert [piece.content for piece in slices] == splitter.split_text(text)
+            # only chunks rebuilt from dropped regex separators get a buffer
+            if keep_separator:
+                assert all(piece.source is text for piece in slices)
+
+
+class TestYuqueHeadingsBySpan:
+    @pytest.mark.asyncio
+    async def test_repeated_text_gets_its_own_heading(self):
+        content = "# First\n\nsame paragraph\n\n# Second\n\nsame paragraph"
+        knowledge = Knowledge(
+            source_type="yuque",
+            knowledge_type=KnowledgeTypeEnum.YUQUEDOC,
+            space_id="space",
+            knowledge_name="",
+            split_config=YuqueSplitConfig(
+                chunk_size=20,
+                chunk_overlap=0,
+                separators=["\n\n"],
+                is_separator_regex=False,
+            ),
+            source_config={"text": content},
+            embedding_model_name="openai",
+            tenant_id="tenant",
+        )
+        result = await YuqueParser().parse(
+            knowledge, Text(content=content, metadata={})
+        )
+        headings = [
+            chunk.metadata.get("_headings")
+            for chunk in result
+            if "same paragraph" in chunk.content
+        ]
+        assert headings == [["First"], ["Second"]]
+        assert [chunk.metadata["_idx"] for chunk in result] == list(range(len(result)))
@@ -0,0 +1,76 @@
+import pytest
+from langchain_text_splitters import Language
+
+from whiskerrag_types.model.knowledge import KnowledgeTypeEnum
+from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.splitter import MarkdownSplitConfig, TextSplitConfig
+from whiskerrag_utils.parser.markdown_parser import MarkdownParser
+from whiskerrag_utils.parser.splitter_cache import (
+    DEFAULT_SEPARATORS,
+    clear_splitter_cache,
+    get_language_splitter,
+    get_text_splitter,
+    split_config_hash,
+    splitter_cache_info,
+)
+from whiskerrag_utils.parser.text_parser import TextParser
+
+
+class TestSplitterCache:
+    def setup_method(self):
+        clear_splitter_cache()
+
+    def test_same_config_reuses_splitter(self):
+        first = get_text_splitter(100, 10, ["\n\n", "\n"])
+        assert get_text_splitter(100, 10, ("\n\n", "\n")) is first
+        assert get_text_splitter(100, 20, ["\n\n", "\n"]) is not first
+        assert first.separators == ["\n\n", "\n", ""]
+        assert get_text_splitter(100, 10).separators == list(DEFAULT_SEPARATORS)
+        assert splitter_cache_info().hits == 1
+
+    def test_language_splitter(self):
+        splitter = get_language_splitter(Language.PYTHON, 200, 0)
+        assert get_language_splitter(Language.PYTHON, 200, 0) is splitter
+        assert splitter.is_separator_regex
+
+    def test_split_config_hash(self):
+        config = TextSplitConfig(
+            chunk_size=100,
+            chunk_overlap=0,
+            separators=["\n"],
+            is_separator_regex=False,
+        )
+        same = TextSplitConfig.model_validate(config.model_dump())
+        assert split_config_hash(config) == split_config_hash(same)
+        assert split_config_hash(config) != split_config_hash(
+            config.model_copy(update={"chunk_size": 200})
+        )
+
+    @pytest.mark.asyncio
+    async def test_parsers_do_not_mutate_config(self, make_knowledge):
+        markdown = MarkdownSplitConfig(
+            chunk_size=20,
+            chunk_overlap=0,
+            separators=["\n\n"],
+            is_separator_regex=False,
+        )
+        text = TextSplitConfig(
+            chunk_size=20,
+            chunk_overlap=0,
+            separators=["\n\n"],
+            is_separator_regex=False,
+        )
+        content = Text(content="first part\n\nsecond part " * 5, metadata={})
+        for parser, config, knowledge_type in (
+            (MarkdownParser(), markdown, KnowledgeTypeEnum.MARKDOWN),
+            (TextParser(), text, KnowledgeTypeEnum.TEXT),
+        ):
+            knowledge = make_knowledge(
+                knowledge_type=knowledge_type, split_config=config
+            )
+            first = await parser.parse(knowledge, content)
+            second = await parser.parse(knowledge, content)
+            assert [t.content for t in first] == [t.content for t in second]
+            assert knowledge.split_config.separators == ["\n\n"]
+        # both configs resolve to the same splitter
+        assert splitter_cache_info().currsize == 1
@@ -0,0 +1,154 @@
+import pytest
+
+from whiskerrag_types.model.multi_modal import Text
+from whiskerrag_types.model.splitter import TextSplitConfig
+from whiskerrag_utils.embedding.local_transformers import MODEL_DIR_ENV
+from whiskerrag_utils.parser import token_length
+from whiskerrag_utils.parser.text_parser import TextParser
+from whiskerrag_utils.parser.token_length import (
+    estimate_tokens,
+    get_token_counter,
+    resolve_chunk_sizing,
+)
+
+
+class FakeEncoding:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.calls += 1
+        return text.split()
+
+
+class FakeTokenizer:
+    def encode(self, text, verbose=True):
+        return ["[CLS]"] + text.split() + ["[SEP]"]
+
+
+@pytest.fixture
+def token_knowledge(make_knowledge):
+    def make(length_function, chunk_size=40, model="openai"):
+        return make_knowledge(
+            split_config=TextSplitConfig(
+                chunk_size=chunk_size,
+                chunk_overlap=0,
+                separators=["\n\n", "\n", " ", ""],
+                is_separator_regex=False,
+                length_function=length_function,
+            ),
+            embedding_model_name=model,
+        )
+
+    return make
+
+
+class TestTokenCounter:
+    def setup_method(self):
+        get_token_counter.cache_clear()
+
+    def teardown_method(self):
+        get_token_counter.cache_clear()
+
+    def test_estimate(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("中文字") == 3
+
+    def test_encoding_is_loaded_once_and_memoised(self, monkeypatch):
+        encoding = FakeEncoding()
+        loads = []
+
+        def load(name):
+            loads.append(name)
+            return encoding
+
+        monkeypatch.setattr(token_length, "_load_encoding", load)
+        counter = get_token_counter("openai")
+        assert get_token_counter("openai") is counter
+        assert counter("one two three") == 3
+        assert counter("one two three") == 3
+        assert (loads, encoding.calls) == (["cl100k_base"], 1)
+
+    def test_memo_is_bounded_and_keyed_by_digest(self, monkeypatch):
+        monkeypatch.setattr(token_length, "_load_encoding", lambda name: FakeEncoding())
+        counter = get_token_counter("openai")
+        monkeypatch.setattr(counter, "max_entries", 2)
+        for text in ("a", "a b", "a b c"):
+            assert counter(text) == len(text.split())
+        assert len(counter) == 2
+        assert all(isinstance(key, bytes) for key in counter._counts)
+
+    def test_fallback_when_tokenizer_unavailable(self, monkeypatch):
+        def load(name):
+            raise ConnectionError("offline")
+
+        monkeypatch.setattr(token_length, "_load_encoding", load)
+        assert get_token_counter("openai") is estimate_tokens
+        assert get_token_counter("unknown-model") is estimate_tokens
+
+    def test_local_model_counts_with_its_tokenizer(
+        self, monkeypatch, tmp_path, token_knowledge
+    ):
+        model = "sentence-transformers/all-MiniLM-L6-v2"
+        (tmp_path / "all-MiniLM-L6-v2").mkdir()
+        monkeypatch.setenv(MODEL_DIR_ENV, str(tmp_path))
+        loaded = []
+
+        def load(model_dir):
+            loaded.append(model_dir.name)
+            return FakeTokenizer()
+
+        monkeypatch.setattr(token_length, "_load_tokenizer", load)
+        counter = get_token_counter(model)
+        assert counter("one two three") == 5
+        assert loaded == ["all-MiniLM-L6-v2"]
+        sizing = resolve_chunk_sizing(token_knowledge("tokens", model=model), 1000, 300)
+        assert (sizing.chunk_size, sizing.chunk_overlap) == (256, 128)
+        assert sizing.length_function is counter
+
+    def test_resolve_chunk_sizing(self, monkeypatch, token_knowledge):
+        monkeypatch.delenv(MODEL_DIR_ENV, raising=False)
+        assert resolve_chunk_sizing(token_knowledge("characters"), 40, 5) == (
+            40,
+            5,
+            len,
+        )
+        sizing = resolve_chunk_sizing(
+            token_knowledge("tokens", model="sentence-transformers/all-MiniLM-L6-v2"),
+            1000,
+            300,
+        )
+        # estimated counts keep clear of the 256-token input limit
+        assert (sizing.chunk_size, sizing.chunk_overlap) == (153, 76)
+        assert sizing.length_function is estimate_tokens
+
+
+class TestTokenSizedParsing:
+    def setup_method(self):
+        get_token_counter.cache_clear()
+
+    def teardown_method(self):
+        get_token_counter.cache_clear()
+
+    @pytest.mark.asyncio
+    async def test_chunks_fit_token_budget(self, monkeypatch, token_knowledge):
+        monkeypatch.setattr(token_length, "_load_encoding", lambda name: FakeEncoding())
+        text = " ".join(f"word{i}" for i in range(200))
+        knowledge = token_knowledge("tokens", chunk_size=40)
+        chunks = await TextParser().parse(knowledge, Text(content=text, metadata={}))
+        assert len(chunks) == 5
+        assert all(len(chunk.content.split()) <= 40 for chunk in chunks)
+
+    @pytest.mark.asyncio
+    async def test_cjk_is_measured_in_tokens(self, token_knowledge):
+        text = "这是一个很长的中文句子。" * 40
+        by_chars = await TextParser().parse(
+            token_knowledge("characters", model="custom"),
+            Text(content=text, metadata={}),
+        )
+        by_tokens = await TextParser().parse(
+            token_knowledge("tokens", model="custom"), Text(content=text, metadata={})
+        )
+        assert all(estimate_tokens(c.content) <= 40 for c in by_tokens)
+        assert len(by_tokens) == len(by_chars)
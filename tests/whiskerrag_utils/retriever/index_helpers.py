@@ -0,0 +1,61 @@
+"""Helpers shared by the vector index tests."""
+
+import numpy as np
+
+from whiskerrag_types.model.chunk import Chunk
+
+
+def random_vectors(count, dimension, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dimension))
+
+
+def make_chunk(i, vector, prefix="chunk", knowledge_groups=3, **fields):
+    """Chunk ``{prefix}-{i}`` of knowledge ``k{i % knowledge_groups}``."""
+    values = dict(
+        chunk_id=f"{prefix}-{i}",
+        space_id="space",
+        tenant_id="tenant",
+        context=f"chunk {i}",
+        knowledge_id=f"k{i % knowledge_groups}",
+        embedding=np.asarray(vector, dtype=float).tolist(),
+        embedding_model_name="test-model",
+    )
+    values.update(fields)
+    return Chunk(**values)
+
+
+def make_chunks(vectors, prefix="chunk", knowledge_groups=3, **fields):
+    return [
+        make_chunk(i, vector, prefix, knowledge_groups, **fields)
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def unit_query(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return (vector / np.linalg.norm(vector))[None, :]
+
+
+def exact_ids(vectors, query, top_k, allowed=None, prefix="chunk"):
+    """Brute-force cosine top-k ids, optionally restricted to ``allowed`` rows."""
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normed @ query[0]
+    order = [i for i in np.argsort(-scores) if allowed is None or i in allowed]
+    return [f"{prefix}-{i}" for i in order[:top_k]]
+
+
+def hit_ids(index, hits):
+    return [chunk.chunk_id for chunk in index.get_chunks(*hits)]
+
+
+class FixedEmbedding:
+    """Embeds every query and document as ``vector``."""
+
+    def __init__(self, vector):
+        self.vector = np.asarray(vector, dtype=float).tolist()
+
+    async def embed_text_query(self, text, timeout):
+        return self.vector
+
+    async def embed_documents(self, documents, timeout):
+        return [self.vector for _ in documents]
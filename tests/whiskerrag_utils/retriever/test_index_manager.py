@@ -0,0 +1,277 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from tests.whiskerrag_utils.retriever.index_helpers import (
+    FixedEmbedding,
+    make_chunks,
+    random_vectors,
+)
+from whiskerrag_types.model.knowledge import Knowledge
+from whiskerrag_types.model.retrieval import RetrievalRequest, VectorSearchConfig
+from whiskerrag_utils.retriever import index_manager
+from whiskerrag_utils.retriever.index_manager import (
+    SpaceIndexManager,
+    SpaceIndexRetriever,
+)
+from whiskerrag_utils.retriever.segmented_index import SegmentedVectorIndex
+
+DIMENSION = 4
+
+
+def _space_index(space_id, count=4):
+    seed = int(space_id.split("-")[1])
+    # the query of the retriever test reuses these vectors
+    chunks = make_chunks(
+        random_vectors(count, DIMENSION, seed),
+        prefix=f"{space_id}-chunk",
+        space_id=space_id,
+        knowledge_id=f"{space_id}-k",
+    )
+    return SegmentedVectorIndex.from_chunks(chunks, segment_size=16)
+
+
+class CountingLoader:
+    def __init__(self):
+        self.loads = []
+        self.closed = []
+
+    def __call__(self, space_id):
+        self.loads.append(space_id)
+        index = _space_index(space_id)
+        index.close = lambda: self.closed.append(space_id)
+        return index
+
+
+def _knowledge(space_id, retrieval_count):
+    return Knowledge(
+        source_type="user_input_text",
+        knowledge_type="text",
+        knowledge_name="k",
+        space_id=space_id,
+        tenant_id="tenant",
+        split_config={"chunk_size": 100, "chunk_overlap": 0},
+        source_config={"text": "hello world"},
+        embedding_model_name="openai",
+        retrieval_count=retrieval_count,
+    )
+
+
+INDEX_BYTES = _space_index("space-0").nbytes
+
+
+class TestSpaceIndexManager:
+    def test_lazy_load_and_hits(self):
+        loader = CountingLoader()
+        manager = SpaceIndexManager(loader)
+        assert len(manager) == 0
+        first = manager.get("space-1")
+        assert manager.get("space-1") is first
+        assert loader.loads == ["space-1"]
+        assert (manager.hits, manager.misses) == (1, 1)
+        assert manager.memory_of("space-1") == INDEX_BYTES
+
+    def test_lru_eviction_within_budget(self):
+        evicted = []
+        manager = SpaceIndexManager(
+            CountingLoader(),
+            memory_budget=INDEX_BYTES * 2,
+            on_evict=lambda space_id, index: evicted.append(space_id),
+        )
+        manager.get("space-1")
+        manager.get("space-2")
+        manager.get("space-1")
+        manager.get("space-3")
+        assert manager.loaded_spaces == ["space-1", "space-3"]
+        assert evicted == ["space-2"]
+        assert manager.memory_usage <= INDEX_BYTES * 2
+        assert manager.evictions == 1
+
+    def test_memory_follows_growing_indexes(self):
+        evicted = []
+        manager = SpaceIndexManager(
+            CountingLoader(),
+            memory_budget=INDEX_BYTES * 3,
+            on_evict=lambda space_id, index: evicted.append(space_id),
+        )
+        manager.get("space-1")
+        index = manager.get("space-2")
+        vectors = random_vectors(32, DIMENSION, seed=9)
+        index.upsert(make_chunks(vectors, prefix="new", space_id="space-2"))
+        assert manager.memory_of("space-2") == INDEX_BYTES
+        assert manager.get("space-2") is index
+        assert manager.memory_of("space-2") == index.nbytes > INDEX_BYTES
+        assert evicted == ["space-1"]
+
+    def test_concurrent_first_queries_load_once(self):
+        loads = []
+
+        def slow_loader(space_id):
+            loads.append(space_id)
+            time.sleep(0.05)
+            return _space_index(space_id)
+
+        manager = SpaceIndexManager(slow_loader)
+        threads = [
+            threading.Thread(target=manager.get, args=("space-1",)) for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert loads == ["space-1"]
+
+    def test_warm_up_by_retrieval_count(self):
+        loader = CountingLoader()
+        manager = SpaceIndexManager(loader, memory_budget=INDEX_BYTES * 2)
+        knowledge = [
+            _knowledge("space-1", 5),
+            _knowledge("space-2", 50),
+            _knowledge("space-3", 20),
+            _knowledge("space-1", 10),
+            _knowledge("space-4", 1),
+        ]
+        assert manager.warm_up(knowledge, top_n=3) == ["space-2", "space-3"]
+        # the hottest space is the most recently used one
+        assert manager.loaded_spaces == ["space-3", "space-2"]
+
+    def test_acquired_index_is_closed_on_release(self):
+        loader = CountingLoader()
+        evicted = []
+        manager = SpaceIndexManager(
+            loader,
+            memory_budget=INDEX_BYTES,
+            on_evict=lambda space_id, index: evicted.append(space_id),
+        )
+        held = manager.acquire("space-1")
+        assert manager.acquire("space-1") is held
+        manager.get("space-2")
+        assert "space-1" not in manager and manager.evictions == 1
+        assert loader.closed == [] and evicted == []
+        manager.release(held)
+        assert loader.closed == []
+        manager.release(held)
+        assert loader.closed == evicted == ["space-1"]
+
+        # released before its eviction: closed right away
+        manager.release(manager.acquire("space-2"))
+        manager.get("space-3")
+        assert loader.closed == ["space-1", "space-2"]
+
+    def test_evict_and_clear(self):
+        manager = SpaceIndexManager(CountingLoader())
+        manager.get("space-1")
+        manager.get("space-2")
+        assert manager.evict("space-1")
+        assert not manager.evict("space-1")
+        manager.clear()
+        assert len(manager) == 0 and manager.memory_usage == 0
+
+
+class TestSpaceIndexRetriever:
+    @pytest.mark.asyncio
+    async def test_retrieve_across_spaces(self):
+        manager = SpaceIndexManager(CountingLoader())
+        query = random_vectors(4, DIMENSION, seed=2)[0]
+        retriever = SpaceIndexRetriever(manager, embedding=FixedEmbedding(query))
+        request = RetrievalRequest(
+            content="q",
+            config=VectorSearchConfig(top_k=3, space_id_list=["space-1", "space-2"]),
+        )
+        results = await retriever.retrieve(request, "tenant")
+        assert len(results) == 3
+        assert results[0].space_id == "space-2"
+        assert results[0].similarity == pytest.approx(1.0, abs=1e-5)
+        assert [r.similarity for r in results] == sorted(
+            [r.similarity for r in results], reverse=True
+        )
+
+        with pytest.raises(ValueError):
+            await retriever.retrieve(
+                RetrievalRequest(content="q", config=VectorSearchConfig()), "tenant"
+            )
+
+    @pytest.mark.asyncio
+    async def test_eviction_during_a_query_waits_for_it(self):
+        loader = CountingLoader()
+        manager = SpaceIndexManager(loader, memory_budget=INDEX_BYTES)
+        query = random_vectors(4, DIMENSION, seed=1)[0]
+
+        class EvictingEmbedding(FixedEmbedding):
+            async def embed_text_query(self, text, timeout):
+                # another request loads a space while this one is in flight
+                manager.get("space-2")
+                assert loader.closed == []
+                return self.vector
+
+        retriever = SpaceIndexRetriever(manager, embedding=EvictingEmbedding(query))
+        request = RetrievalRequest(
+            content="q", config=VectorSearchConfig(top_k=1, space_id_list=["space-1"])
+        )
+        results = await retriever.retrieve(request, "tenant")
+        assert results[0].chunk_id == "space-1-chunk-0"
+        assert loader.closed == ["space-1"]
+
+    @pytest.mark.asyncio
+    async def test_loading_does_not_block_the_loop(self):
+        def slow_loader(space_id):
+            time.sleep(0.5)
+            return _space_index(space_id)
+
+        ticks = []
+
+        async def tick():
+            for _ in range(5):
+                await asyncio.sleep(0.02)
+                ticks.append(time.monotonic())
+
+        manager = SpaceIndexManager(slow_loader)
+        query = random_vectors(4, DIMENSION, seed=1)[0]
+        retriever = SpaceIndexRetriever(manager, embedding=FixedEmbedding(query))
+        request = RetrievalRequest(
+            content="q", config=VectorSearchConfig(top_k=1, space_id_list=["space-1"])
+        )
+        results, _ = await asyncio.gather(retriever.retrieve(request, "tenant"), tick())
+        assert results[0].chunk_id == "space-1-chunk-0"
+        assert len(ticks) == 5 and ticks[-1] < time.monotonic() - 0.3
+
+    @pytest.mark.asyncio
+    async def test_query_is_embedded_per_model(self, monkeypatch):
+        def loader(space_id):
+            seed = int(space_id.split("-")[1])
+            dimension = DIMENSION * seed
+            chunks = make_chunks(
+                random_vectors(4, dimension, seed),
+                prefix=space_id,
+                space_id=space_id,
+                embedding_model_name=f"model-{dimension}",
+            )
+            return SegmentedVectorIndex.from_chunks(chunks, segment_size=16)
+
+        def embedding_of(model_name):
+            dimension = int(model_name.split("-")[1])
+            seed = dimension // DIMENSION
+            vector = random_vectors(4, dimension, seed)[seed]
+            return lambda: FixedEmbedding(vector)
+
+        monkeypatch.setattr(
+            index_manager, "get_register", lambda kind, name: embedding_of(name)
+        )
+        request = RetrievalRequest(
+            content="q",
+            config=VectorSearchConfig(
+                top_k=2, space_id_list=["space-1", "space-2"], similarity_threshold=0.99
+            ),
+        )
+        retriever = SpaceIndexRetriever(SpaceIndexManager(loader))
+        results = await retriever.retrieve(request, "tenant")
+        assert sorted(r.chunk_id for r in results) == ["space-1-1", "space-2-2"]
+
+        fixed = SpaceIndexRetriever(
+            SpaceIndexManager(loader), embedding=FixedEmbedding([1.0] * DIMENSION)
+        )
+        with pytest.raises(ValueError):
+            await fixed.retrieve(request, "tenant")
@@ -0,0 +1,172 @@
+import numpy as np
+import pytest
+
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.page import Condition, FilterGroup, Operator
+from whiskerrag_utils.retriever.metadata_filter import (
+    DEFAULT_BITMAP_FIELDS,
+    Bitmap,
+    ColumnarMetadata,
+    MetadataBitmapIndex,
+    compile_mask,
+    compile_predicate,
+)
+
+
+def _chunk(idx: int, **kwargs) -> Chunk:
+    data = {
+        "space_id": "space",
+        "tenant_id": "tenant",
+        "context": f"chunk {idx}",
+        "knowledge_id": f"k{idx % 3}",
+        "enabled": idx % 4 != 0,
+        "tags": ["even"] if idx % 2 == 0 else ["odd", "prime"] if idx in (3, 5) else [],
+        "f1": "alpha" if idx < 5 else None,
+        "metadata": {"_idx": idx, "title": f"Doc {idx}"},
+    }
+    data.update(kwargs)
+    return Chunk(**data)
+
+
+def _group(operator: Operator, *conditions) -> FilterGroup:
+    return FilterGroup(operator=operator, conditions=list(conditions))
+
+
+def _cond(field: str, operator: str, value) -> Condition:
+    return Condition(field=field, operator=operator, value=value)
+
+
+CHUNKS = [_chunk(i) for i in range(10)]
+
+FILTERS = [
+    _group(Operator.AND, _cond("knowledge_id", "eq", "k1")),
+    _group(Operator.AND, _cond("tags", "eq", "even"), _cond("enabled", "eq", True)),
+    _group(Operator.OR, _cond("tags", "eq", "prime"), _cond("f1", "neq", "alpha")),
+    _group(
+        Operator.AND,
+        _cond("metadata._idx", "gte", 2),
+        _group(
+            Operator.OR,
+            _cond("metadata.title", "like", "Doc 1%"),
+            _cond("metadata.title", "ilike", "doc _"),
+        ),
+    ),
+    _group(Operator.AND, _cond("f1", "gt", "a"), _cond("tags", "neq", "even")),
+    # empty groups: AND matches every row, OR matches none
+    _group(Operator.AND),
+    _group(Operator.OR),
+    _group(Operator.AND, _cond("enabled", "eq", True), _group(Operator.OR)),
+]
+
+
+class TestCompilePredicate:
+    def test_eq_on_list_field_means_contains(self):
+        predicate = compile_predicate(
+            _group(Operator.AND, _cond("tags", "eq", "prime"))
+        )
+        assert [c.metadata["_idx"] for c in CHUNKS if predicate(c)] == [3, 5]
+
+    def test_null_never_matches(self):
+        predicate = compile_predicate(_group(Operator.AND, _cond("f1", "neq", "x")))
+        assert [c.metadata["_idx"] for c in CHUNKS if predicate(c)] == [0, 1, 2, 3, 4]
+
+    def test_like_escapes_regex_characters(self):
+        predicate = compile_predicate(
+            _group(Operator.AND, _cond("context", "like", "a.b%"))
+        )
+        assert predicate({"context": "a.b and more"})
+        assert not predicate({"context": "axb"})
+
+    def test_incomparable_values_do_not_raise(self):
+        predicate = compile_predicate(_group(Operator.AND, _cond("f1", "gt", 3)))
+        assert not any(predicate(c) for c in CHUNKS)
+
+    def test_unknown_operator(self):
+        with pytest.raises(ValueError):
+            compile_predicate(_group(Operator.AND, _cond("f1", "between", 1)))
+
+
+class TestCompileMask:
+    @pytest.mark.parametrize("filter_group", FILTERS)
+    def test_mask_matches_predicate(self, filter_group):
+        fields = ["tags", "f1", "knowledge_id", "enabled", "metadata._idx"]
+        fields.append("metadata.title")
+        columns = ColumnarMetadata.from_records(CHUNKS, fields)
+        mask = compile_mask(filter_group)(columns)
+        predicate = compile_predicate(filter_group)
+        assert mask.tolist() == [predicate(c) for c in CHUNKS]
+
+    def test_numeric_columns_use_native_dtype(self):
+        columns = ColumnarMetadata.from_records(CHUNKS, ["metadata._idx", "enabled"])
+        assert columns.column("metadata._idx").dtype == np.float64
+        assert columns.column("enabled").dtype == np.bool_
+
+    def test_missing_column(self):
+        columns = ColumnarMetadata.from_records(CHUNKS, ["f1"])
+        with pytest.raises(KeyError):
+            compile_mask(_group(Operator.AND, _cond("f2", "eq", "x")))(columns)
+
+
+class TestBitmap:
+    def test_set_operations_across_container_kinds(self):
+        rng = np.random.default_rng(0)
+        a_rows = rng.choice(200_000, size=30_000, replace=False)
+        b_rows = rng.choice(200_000, size=500, replace=False)
+        a, b = Bitmap.from_indices(a_rows), Bitmap.from_indices(b_rows)
+        a_set, b_set = set(a_rows.tolist()), set(b_rows.tolist())
+
+        assert len(a) == len(a_set)
+        assert set((a & b).to_indices().tolist()) == a_set & b_set
+        assert set((a | b).to_indices().tolist()) == a_set | b_set
+        assert set((a - b).to_indices().tolist()) == a_set - b_set
+        assert set((b - a).to_indices().tolist()) == b_set - a_set
+
+    def test_contains_and_mask(self):
+        bitmap = Bitmap.from_indices([1, 5, 70_000])
+        assert 5 in bitmap and 70_000 in bitmap and 6 not in bitmap
+        assert np.flatnonzero(bitmap.to_mask(10)).tolist() == [1, 5]
+
+    def test_negative_ids_rejected(self):
+        with pytest.raises(ValueError):
+            Bitmap.from_indices([-1, 2])
+
+    def test_add_copies_and_switches_to_dense(self):
+        rows = list(range(0, 2 * 5000, 2)) + [70_000]
+        bitmap = Bitmap()
+        for row in rows:
+            added = bitmap.add(row)
+            assert row not in bitmap
+            bitmap = added
+        assert bitmap == Bitmap.from_indices(rows)
+        assert bitmap.add(4) == bitmap
+
+
+class TestMetadataBitmapIndex:
+    @pytest.mark.parametrize("filter_group", FILTERS)
+    def test_index_matches_predicate(self, filter_group):
+        fields = [*DEFAULT_BITMAP_FIELDS, "metadata._idx", "metadata.title"]
+        index = MetadataBitmapIndex.build(CHUNKS, fields)
+        predicate = compile_predicate(filter_group)
+        expected = [i for i, c in enumerate(CHUNKS) if predicate(c)]
+        assert index.candidates(filter_group).tolist() == expected
+        assert np.flatnonzero(index.mask(filter_group)).tolist() == expected
+
+    @pytest.mark.parametrize("filter_group", FILTERS)
+    def test_append_matches_build(self, filter_group):
+        fields = [*DEFAULT_BITMAP_FIELDS, "metadata._idx", "metadata.title"]
+        index = MetadataBitmapIndex.build(CHUNKS[:4], fields)
+        for chunk in CHUNKS[4:]:
+            index.append(chunk)
+        built = MetadataBitmapIndex.build(CHUNKS, fields)
+        assert index.size == len(CHUNKS)
+        assert index.mask(filter_group).tolist() == built.mask(filter_group).tolist()
+        assert (
+            index.mask(filter_group, 6).tolist()
+            == built.mask(filter_group)[:6].tolist()
+        )
+
+    def test_lookup(self):
+        index = MetadataBitmapIndex.build(CHUNKS)
+        assert index.lookup("knowledge_id", "k0").to_indices().tolist() == [0, 3, 6, 9]
+        assert not index.lookup("knowledge_id", "missing")
+        assert index.candidates(None).tolist() == list(range(10))
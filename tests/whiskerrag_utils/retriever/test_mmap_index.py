@@ -0,0 +1,250 @@
+import gc
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from tests.whiskerrag_utils.retriever.index_helpers import (
+    FixedEmbedding,
+    make_chunk,
+    random_vectors,
+)
+from whiskerrag_types.model.page import Condition, FilterGroup, Operator
+from whiskerrag_types.model.retrieval import RetrievalRequest, VectorSearchConfig
+from whiskerrag_utils import RegisterTypeEnum, get_register
+from whiskerrag_utils.registry import init_register
+from whiskerrag_utils.retriever.metadata_filter import MetadataBitmapIndex
+from whiskerrag_utils.retriever.mmap_index import (
+    HEADER_FILE,
+    MmapIndexRetriever,
+    MmapVectorIndex,
+    write_vector_index,
+)
+from whiskerrag_utils.retriever.vector_search import INDEX_FILTER_FIELDS
+
+
+def _chunks(count: int = 20, dimension: int = 8):
+    vectors = random_vectors(count, dimension, seed=42)
+    return [
+        make_chunk(
+            i,
+            vectors[i],
+            knowledge_groups=4,
+            created_at="2025-01-01T00:00:00Z",
+            space_id="space-a" if i % 2 == 0 else "space-b",
+            context=f"chunk {i} 中文",
+            metadata={"_idx": i},
+            tags=["tag-a"] if i < 10 else ["tag-b"],
+            f1="x" if i % 3 == 0 else None,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = tmp_path / "space-index"
+    write_vector_index(path, _chunks())
+    return path
+
+
+class TestMmapVectorIndex:
+    def test_round_trip(self, index_path):
+        chunks = _chunks()
+        index = MmapVectorIndex.open(index_path, verify=True)
+        assert index.size == 20
+        assert index.dimension == 8
+        assert index.model_name == "test-model"
+        assert isinstance(index.embeddings, np.memmap)
+        assert index.chunk_id(3) == chunks[3].chunk_id
+        assert index.row_of(chunks[7].chunk_id) == 7
+
+        restored = index.get_chunk(5, 0.5)
+        assert restored.context == "chunk 5 中文"
+        assert restored.metadata == {"_idx": 5}
+        assert restored.tags == ["tag-a"]
+        assert restored.similarity == 0.5
+        assert restored.created_at == chunks[5].created_at
+
+    def test_exact_search(self, index_path):
+        chunks = _chunks()
+        index = MmapVectorIndex.open(index_path)
+        query = np.asarray(chunks[4].embedding, dtype=np.float32)
+        query /= np.linalg.norm(query)
+
+        rows, scores = index.search(query[None, :], top_k=3)[0]
+        assert rows[0] == 4
+        assert scores[0] == pytest.approx(1.0, abs=1e-5)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    def test_filtered_search_scores_only_candidates(self, index_path):
+        index = MmapVectorIndex.open(index_path)
+        query = np.ones((1, 8), dtype=np.float32) / np.sqrt(8)
+        group = FilterGroup(
+            operator=Operator.AND,
+            conditions=[
+                Condition(field="tags", operator="eq", value="tag-b"),
+                Condition(field="knowledge_id", operator="neq", value="k0"),
+            ],
+        )
+        rows, _ = index.search(query, top_k=20, filter_group=group)[0]
+        assert sorted(rows.tolist()) == [10, 11, 13, 14, 15, 17, 18, 19]
+
+    FILTERS = [
+        Condition(field="tenant_id", operator="eq", value="tenant"),
+        Condition(field="space_id", operator="eq", value="space-b"),
+        Condition(field="tags", operator="neq", value="tag-a"),
+        Condition(field="f1", operator="neq", value="x"),
+        Condition(field="enabled", operator="eq", value=True),
+        Condition(field="knowledge_id", operator="eq", value="missing"),
+        FilterGroup(
+            operator=Operator.OR,
+            conditions=[
+                Condition(field="f1", operator="eq", value="x"),
+                Condition(field="knowledge_id", operator="eq", value="k1"),
+            ],
+        ),
+    ]
+
+    @pytest.mark.parametrize("condition", FILTERS)
+    def test_filters_read_persisted_postings(self, index_path, condition):
+        index = MmapVectorIndex.open(index_path, verify=True)
+        expected = MetadataBitmapIndex.build(_chunks(), INDEX_FILTER_FIELDS)
+        assert list(index.bitmap_index.candidates(condition)) == list(
+            expected.candidates(condition)
+        )
+        # no JSON column was decoded to answer the filter
+        assert index._decoded == {}
+
+    def test_filter_fallbacks(self, index_path):
+        index = MmapVectorIndex.open(index_path)
+        like = Condition(field="knowledge_id", operator="like", value="k%")
+        assert len(index.bitmap_index.candidates(like)) == 20
+        # indexes written without postings build the filter from the columns
+        header = json.loads((index_path / HEADER_FILE).read_text())
+        del header["filter_fields"]
+        (index_path / HEADER_FILE).write_text(json.dumps(header))
+        legacy = MmapVectorIndex.open(index_path)
+        group = FilterGroup(operator=Operator.AND, conditions=self.FILTERS[:4])
+        assert list(legacy.bitmap_index.candidates(group)) == list(
+            index.bitmap_index.candidates(group)
+        )
+
+    def test_nbytes_counts_decoded_columns(self, tmp_path):
+        write_vector_index(tmp_path / "index", _chunks(1000))
+        index = MmapVectorIndex.open(tmp_path / "index")
+        file_bytes = index.nbytes
+        like = Condition(field="knowledge_id", operator="like", value="k%")
+        gc.collect()
+        tracemalloc.start()
+        try:
+            # the like condition decodes the filter columns
+            assert len(index.bitmap_index.candidates(like)) == 1000
+            index.row_of("chunk-1")
+            gc.collect()
+            measured, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        decoded = index.nbytes - file_bytes
+        assert 0.8 * measured < decoded < 1.5 * measured
+
+    def test_checksum_detects_corruption(self, index_path):
+        with open(index_path / "context.dat", "r+b") as f:
+            f.write(b"X")
+        MmapVectorIndex.open(index_path)
+        with pytest.raises(ValueError):
+            MmapVectorIndex.open(index_path, verify=True)
+
+    def test_overwrite_and_validation(self, tmp_path):
+        path = tmp_path / "index"
+        write_vector_index(path, _chunks(4))
+        write_vector_index(path, _chunks(6))
+        assert MmapVectorIndex.open(path).size == 6
+        assert [p.name for p in tmp_path.iterdir()] == ["index"]
+
+        bad = _chunks(2)
+        bad[1].embedding = [1.0, 2.0]
+        with pytest.raises(ValueError):
+            write_vector_index(tmp_path / "bad", bad)
+
+    def test_empty_index(self, tmp_path):
+        write_vector_index(tmp_path / "empty", [], model_name="test-model")
+        index = MmapVectorIndex.open(tmp_path / "empty", verify=True)
+        assert index.size == 0
+
+    def test_not_an_index(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            MmapVectorIndex.open(tmp_path)
+
+
+class TestMmapIndexRetriever:
+    def test_registered(self):
+        init_register()
+        retriever_cls = get_register(RegisterTypeEnum.RETRIEVER, "mmap_index")
+        assert retriever_cls is MmapIndexRetriever
+
+    @pytest.mark.asyncio
+    async def test_retrieve_scopes_by_space(self, index_path):
+        chunks = _chunks()
+        retriever = MmapIndexRetriever(
+            index_path, embedding=FixedEmbedding(chunks[3].embedding)
+        )
+        request = RetrievalRequest(
+            content="question",
+            config=VectorSearchConfig(top_k=5, space_id_list=["space-b"]),
+        )
+        results = await retriever.retrieve(request, "tenant")
+        assert results[0].chunk_id == chunks[3].chunk_id
+        assert {r.space_id for r in results} == {"space-b"}
+        assert await retriever.retrieve(request, "other-tenant") == []
+
+    @pytest.mark.asyncio
+    async def test_plain_config_is_accepted(self, index_path):
+        chunks = _chunks()
+        retriever = MmapIndexRetriever(
+            MmapVectorIndex.open(index_path),
+            embedding=FixedEmbedding(chunks[0].embedding),
+        )
+        request = RetrievalRequest(
+            content="question", config={"type": "mmap_index", "top_k": 2}
+        )
+        results = await retriever.retrieve(request, "tenant")
+        assert len(results) == 2
+        assert results[0].chunk_id == chunks[0].chunk_id
+
+    @pytest.mark.asyncio
+    async def test_retrieve_many_batches_queries(self, index_path):
+        chunks = _chunks()
+
+        class CountingEmbedding:
+            calls = 0
+
+            async def embed_documents(self, documents, timeout):
+                self.calls += 1
+                return [chunks[int(d)].embedding for d in documents]
+
+            async def embed_text_query(self, text, timeout):
+                return chunks[int(text)].embedding
+
+        embedding = CountingEmbedding()
+        retriever = MmapIndexRetriever(index_path, embedding=embedding)
+        searches = []
+        search = retriever.index.search
+        retriever.index.search = lambda *args: searches.append(args) or search(*args)
+        requests = [
+            RetrievalRequest(content="1", config=VectorSearchConfig(top_k=3)),
+            RetrievalRequest(content="6", config=VectorSearchConfig(top_k=5)),
+            RetrievalRequest(
+                content="9",
+                config=VectorSearchConfig(top_k=2, space_id_list=["space-b"]),
+            ),
+        ]
+        batched = await retriever.retrieve_many(requests, "tenant")
+        assert embedding.calls == 1
+        assert len(searches) == 2
+        assert [len(results) for results in batched] == [3, 5, 2]
+        for request, results in zip(requests, batched):
+            single = await retriever.retrieve(request, "tenant")
+            assert [r.chunk_id for r in results] == [r.chunk_id for r in single]
+        assert await retriever.retrieve_many([], "tenant") == []
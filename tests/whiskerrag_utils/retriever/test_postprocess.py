@@ -0,0 +1,162 @@
+import time
+
+import numpy as np
+import pytest
+
+from tests.whiskerrag_utils.retriever.index_helpers import FixedEmbedding
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.retrieval import (
+    RetrievalChunk,
+    RetrievalPostProcessConfig,
+    RetrievalRequest,
+    VectorSearchConfig,
+)
+from whiskerrag_utils.retriever.mmap_index import MmapIndexRetriever, write_vector_index
+from whiskerrag_utils.retriever.postprocess import (
+    apply_mmr,
+    merge_adjacent_chunks,
+    mmr_select,
+    postprocess_results,
+)
+
+
+def _chunk(i, context, similarity, embedding=None, knowledge_id="k1", **metadata):
+    return RetrievalChunk(
+        chunk_id=f"chunk-{i}",
+        space_id="space",
+        tenant_id="tenant",
+        knowledge_id=knowledge_id,
+        context=context,
+        embedding=embedding,
+        embedding_model_name="test-model",
+        metadata={"_idx": i, **metadata},
+        similarity=similarity,
+    )
+
+
+class TestMMR:
+    def test_near_duplicates_are_dropped(self):
+        chunks = [
+            _chunk(0, "a", 0.95, [1.0, 0.0, 0.0]),
+            _chunk(1, "a copy", 0.94, [0.99, 0.01, 0.0]),
+            _chunk(2, "b", 0.80, [0.0, 1.0, 0.0]),
+        ]
+        selected = apply_mmr(chunks, 2, lambda_mult=0.5)
+        assert [c.chunk_id for c in selected] == ["chunk-0", "chunk-2"]
+
+    def test_lambda_one_keeps_relevance_order(self):
+        rng = np.random.default_rng(0)
+        relevance = rng.random(30)
+        order = mmr_select(relevance, rng.normal(size=(30, 16)), 10, lambda_mult=1.0)
+        assert order == list(np.argsort(-relevance)[:10])
+
+    def test_missing_embeddings_keep_order(self):
+        chunks = [_chunk(i, str(i), 1.0 - i / 10) for i in range(5)]
+        assert apply_mmr(chunks, 3) == chunks[:3]
+
+    def test_hundred_candidates_is_fast(self):
+        rng = np.random.default_rng(1)
+        relevance = rng.random(100)
+        embeddings = rng.normal(size=(100, 768))
+        mmr_select(relevance, embeddings, 10)
+        started = time.perf_counter()
+        for _ in range(10):
+            mmr_select(relevance, embeddings, 10)
+        assert (time.perf_counter() - started) / 10 < 0.05
+
+
+class TestMergeAdjacent:
+    def test_consecutive_chunks_merge_without_overlap(self):
+        chunks = [
+            _chunk(3, "gamma delta", 0.7),
+            _chunk(1, "alpha beta", 0.9),
+            _chunk(2, "beta gamma", 0.5),
+            _chunk(7, "far away", 0.6),
+        ]
+        merged = merge_adjacent_chunks(chunks, token_budget=100)
+        assert len(merged) == 2
+        first = merged[0]
+        assert first.context == "alpha beta gamma delta"
+        assert first.similarity == 0.9
+        assert first.metadata["_merged_chunk_ids"] == ["chunk-1", "chunk-2", "chunk-3"]
+        assert first.metadata["_idx_range"] == [1, 3]
+        assert merged[1].chunk_id == "chunk-7"
+
+    def test_other_knowledge_is_not_merged(self):
+        chunks = [_chunk(1, "a", 0.9), _chunk(2, "b", 0.8, knowledge_id="k2")]
+        assert len(merge_adjacent_chunks(chunks, token_budget=100)) == 2
+
+    def test_pages_of_one_knowledge_are_not_merged(self):
+        chunks = [
+            _chunk(3, "page one tail", 0.9, page_number=1),
+            _chunk(4, "page seven text", 0.8, page_number=7),
+            _chunk(5, "page seven more", 0.7, page_number=7),
+        ]
+        merged = merge_adjacent_chunks(chunks, token_budget=100)
+        assert [c.context for c in merged] == [
+            "page one tail",
+            "page seven text\npage seven more",
+        ]
+
+    def test_token_budget_splits_runs(self):
+        chunks = [_chunk(i, "x" * 40, 0.9 - i / 100) for i in range(4)]
+        merged = merge_adjacent_chunks(chunks, token_budget=20)
+        assert [c.metadata.get("_idx_range") for c in merged] == [[0, 1], [2, 3]]
+
+    def test_code_positions_are_combined(self):
+        chunks = [
+            _chunk(
+                0, "def a():\n    pass", 0.8, position={"start_line": 1, "end_line": 2}
+            ),
+            _chunk(
+                1, "def b():\n    pass", 0.9, position={"start_line": 4, "end_line": 5}
+            ),
+        ]
+        (merged,) = merge_adjacent_chunks(chunks, token_budget=100)
+        assert merged.context == "def a():\n    pass\ndef b():\n    pass"
+        assert merged.metadata["position"] == {
+            "start_line": 1,
+            "end_line": 5,
+            "total_lines": 5,
+        }
+
+
+class TestPostprocessResults:
+    def test_without_config_truncates(self):
+        chunks = [_chunk(i, str(i), 1.0) for i in range(5)]
+        assert postprocess_results(chunks, None, 2) == chunks[:2]
+
+    @pytest.mark.asyncio
+    async def test_retriever_applies_mmr(self, tmp_path):
+        vectors = [[1.0, 0.0], [0.999, 0.04], [0.8, 0.6], [0.0, 1.0]]
+        write_vector_index(
+            tmp_path / "index",
+            [
+                Chunk(
+                    chunk_id=f"chunk-{i}",
+                    space_id="space",
+                    tenant_id="tenant",
+                    knowledge_id=f"k{i}",
+                    context=f"chunk {i}",
+                    embedding=vector,
+                    embedding_model_name="test-model",
+                )
+                for i, vector in enumerate(vectors)
+            ],
+        )
+
+        retriever = MmapIndexRetriever(
+            tmp_path / "index", embedding=FixedEmbedding([1.0, 0.0])
+        )
+        plain = VectorSearchConfig(top_k=2)
+        diverse = VectorSearchConfig(
+            top_k=2, post_process=RetrievalPostProcessConfig(mmr=True, mmr_fetch_k=4)
+        )
+        results = await retriever.retrieve(
+            RetrievalRequest(content="q", config=plain), "tenant"
+        )
+        assert [r.chunk_id for r in results] == ["chunk-0", "chunk-1"]
+        results = await retriever.retrieve(
+            RetrievalRequest(content="q", config=diverse), "tenant"
+        )
+        assert [r.chunk_id for r in results] == ["chunk-0", "chunk-2"]
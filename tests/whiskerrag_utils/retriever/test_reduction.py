@@ -0,0 +1,168 @@
+import numpy as np
+import pytest
+
+from tests.whiskerrag_utils.retriever.index_helpers import FixedEmbedding, make_chunks
+from whiskerrag_types.model.retrieval import RetrievalRequest, VectorSearchConfig
+from whiskerrag_utils.retriever.mmap_index import (
+    MmapIndexRetriever,
+    MmapVectorIndex,
+    write_vector_index,
+)
+from whiskerrag_utils.retriever.reduction import (
+    DimensionReducer,
+    fit_space_reducers,
+    recall_report,
+    reduce_chunks,
+)
+from whiskerrag_utils.retriever.segmented_index import (
+    SegmentedIndexRetriever,
+    SegmentedVectorIndex,
+)
+from whiskerrag_utils.retriever.sharded_index import (
+    ShardedIndexRetriever,
+    ShardedVectorIndex,
+    write_sharded_index,
+)
+
+DIMENSION = 32
+
+
+def _vectors(count=200, rank=6, seed=0):
+    """Vectors that mostly live in a ``rank``-dim subspace."""
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=(rank, DIMENSION))
+    return rng.normal(size=(count, rank)) @ basis + 0.01 * rng.normal(
+        size=(count, DIMENSION)
+    )
+
+
+class TestDimensionReducer:
+    def test_pca_keeps_neighbours_of_low_rank_data(self):
+        vectors = _vectors()
+        reducer = DimensionReducer.fit_pca(vectors, 8)
+        reduced = reducer.transform(vectors)
+        assert reduced.shape == (200, 8)
+        np.testing.assert_allclose(np.linalg.norm(reduced, axis=1), 1, rtol=1e-5)
+        assert reducer.explained_variance_ratio > 0.99
+        [row] = recall_report(vectors, [8], top_k=5, num_queries=50)
+        assert row.recall_at_k > 0.9
+        assert row.memory_ratio == 0.25
+
+    def test_prefix(self):
+        reducer = DimensionReducer.prefix(4, 2)
+        np.testing.assert_allclose(
+            reducer.transform([[3.0, 4.0, 100.0, 0.0]]), [[0.6, 0.8]], rtol=1e-6
+        )
+        with pytest.raises(ValueError):
+            reducer.transform([[1.0, 2.0]])
+        with pytest.raises(ValueError):
+            DimensionReducer.prefix(4, 8)
+
+    def test_save_and_load(self, tmp_path):
+        vectors = _vectors()
+        reducer = DimensionReducer.fit_pca(vectors, 6)
+        reducer.save(tmp_path)
+        loaded = DimensionReducer.load(tmp_path)
+        assert loaded is not None and loaded.dimension == 6
+        np.testing.assert_allclose(
+            loaded.transform(vectors[:3]), reducer.transform(vectors[:3]), rtol=1e-5
+        )
+        assert DimensionReducer.load(tmp_path / "missing") is None
+
+    def test_recall_report_over_dimensions(self):
+        vectors = np.random.default_rng(1).normal(size=(300, DIMENSION))
+        report = recall_report(vectors, [4, 16, 32], method="prefix", top_k=5)
+        assert [row.dimension for row in report] == [32, 16, 4]
+        assert report[0].recall_at_k == 1.0
+        assert report[0].recall_at_k >= report[1].recall_at_k >= report[2].recall_at_k
+        pca = recall_report(vectors, [4, 16], top_k=5)
+        assert pca[0].explained_variance_ratio > pca[1].explained_variance_ratio
+
+    def test_recall_report_holds_sampled_queries_out_of_the_fit(self, monkeypatch):
+        fitted = []
+        fit_pca = DimensionReducer.fit_pca
+
+        def recording_fit(matrix, *args, **kwargs):
+            fitted.append(len(matrix))
+            return fit_pca(matrix, *args, **kwargs)
+
+        monkeypatch.setattr(DimensionReducer, "fit_pca", recording_fit)
+        recall_report(_vectors(), [8], num_queries=50)
+        recall_report(_vectors(), [8], num_queries=500)
+        recall_report(_vectors(), [8], queries=_vectors(count=5, seed=1))
+        assert fitted == [150, 100, 200]
+
+    def test_fit_space_reducers_and_reduce_chunks(self):
+        chunks = make_chunks(_vectors(seed=1), "a", space_id="a") + make_chunks(
+            _vectors(seed=2), "b", space_id="b"
+        )
+        reducers = fit_space_reducers(chunks, 6)
+        assert set(reducers) == {("a", "test-model"), ("b", "test-model")}
+        reduced = reduce_chunks(chunks[:3], reducers[("a", "test-model")])
+        assert [len(c.embedding) for c in reduced] == [6, 6, 6]
+        assert len(chunks[0].embedding) == DIMENSION
+
+
+class TestReducedIndexes:
+    @pytest.mark.asyncio
+    async def test_mmap_index_projects_queries(self, tmp_path):
+        vectors = _vectors()
+        reducer = DimensionReducer.fit_pca(vectors, 8)
+        path = write_vector_index(
+            tmp_path / "index", make_chunks(vectors), reducer=reducer
+        )
+        index = MmapVectorIndex.open(path, verify=True)
+        assert index.dimension == 8
+        assert index.query_dimension == DIMENSION
+        assert index.header["reduction"]["method"] == "pca"
+        assert index.embeddings.nbytes == 200 * 8 * 4
+
+        retriever = MmapIndexRetriever(index, embedding=FixedEmbedding(vectors[17]))
+        results = await retriever.retrieve(
+            RetrievalRequest(content="q", config=VectorSearchConfig(top_k=1)), "tenant"
+        )
+        assert results[0].chunk_id == "chunk-17"
+
+    @pytest.mark.asyncio
+    async def test_sharded_index_shares_reducer(self, tmp_path):
+        vectors = _vectors()
+        reducer = DimensionReducer.prefix(DIMENSION, 16)
+        path = write_sharded_index(
+            tmp_path / "sharded", make_chunks(vectors), 2, reducer=reducer
+        )
+        index = ShardedVectorIndex(path, processes=False)
+        assert index.dimension == 16 and index.query_dimension == DIMENSION
+        retriever = ShardedIndexRetriever(index, embedding=FixedEmbedding(vectors[5]))
+        results = await retriever.retrieve(
+            RetrievalRequest(content="q", config=VectorSearchConfig(top_k=1)), "tenant"
+        )
+        assert results[0].chunk_id == "chunk-5"
+
+    @pytest.mark.asyncio
+    async def test_segmented_index_projects_upserts(self):
+        vectors = _vectors()
+        reducer = DimensionReducer.fit_pca(vectors, 8)
+        index = SegmentedVectorIndex.from_chunks(
+            make_chunks(vectors[:100]), segment_size=64, reducer=reducer
+        )
+        index.upsert(make_chunks(vectors)[100:])
+        assert index.dimension == 8 and index.query_dimension == DIMENSION
+        retriever = SegmentedIndexRetriever(
+            index, embedding=FixedEmbedding(vectors[150])
+        )
+        results = await retriever.retrieve(
+            RetrievalRequest(content="q", config=VectorSearchConfig(top_k=1)), "tenant"
+        )
+        assert results[0].chunk_id == "chunk-150"
+        with pytest.raises(ValueError):
+            index.upsert(make_chunks(vectors[:1, :8]))
+        with pytest.raises(ValueError):
+            SegmentedVectorIndex("test-model", 64, reducer=reducer)
+
+    def test_mismatched_reducer_is_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            write_vector_index(
+                tmp_path / "index",
+                make_chunks(_vectors()),
+                reducer=DimensionReducer.prefix(64, 8),
+            )
@@ -0,0 +1,183 @@
+from typing import List
+
+import pytest
+
+from whiskerrag_types.interface.db_engine_plugin_interface import DBPluginInterface
+from whiskerrag_types.model.chunk import Chunk
+from whiskerrag_types.model.retrieval import RetrievalChunk, RetrievalRequest
+from whiskerrag_utils.retriever.cache import (
+    CachedRetriever,
+    RetrievalCache,
+    RetrievalCacheMixin,
+    normalize_query,
+)
+
+
+def _result(knowledge_id: str, space_id: str = "space-a") -> RetrievalChunk:
+    return RetrievalChunk(
+        space_id=space_id,
+        tenant_id="tenant",
+        context="hello",
+        knowledge_id=knowledge_id,
+        similarity=0.9,
+    )
+
+
+def _request(content: str = "What is  whisker?", **config) -> RetrievalRequest:
+    return RetrievalRequest(content=content, config={"type": "test", **config})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingRetriever:
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+
+    async def retrieve(self, params, tenant_id):
+        self.calls += 1
+        return self.results
+
+
+class FakeDBPlugin(DBPluginInterface):
+    def __init__(self, results: List[RetrievalChunk]):
+        super().__init__(settings=None)
+        self.results = results
+        self.retrieve_calls = 0
+
+    async def retrieve(self, tenant_id, params):
+        self.retrieve_calls += 1
+        return self.results
+
+    async def save_chunk_list(self, chunks):
+        return chunks
+
+    async def delete_knowledge_chunk(self, tenant_id, knowledge_ids):
+        return []
+
+    async def update_knowledge_enabled_status(self, tenant_id, knowledge_id, enabled):
+        return None
+
+
+FakeDBPlugin.__abstractmethods__ = frozenset()
+
+
+class CachedFakeDBPlugin(RetrievalCacheMixin, FakeDBPlugin):
+    pass
+
+
+CachedFakeDBPlugin.__abstractmethods__ = frozenset()
+
+
+class TestRetrievalCache:
+    def test_key_normalises_content_and_hashes_config(self):
+        assert normalize_query("  a　 b\n") == "a b"
+        key = RetrievalCache.make_key
+        assert key("t", _request("a  b")) == key("t", _request("a b"))
+        assert key("t", _request(top_k=1)) != key("t", _request(top_k=2))
+        assert key("t", _request()) != key("other", _request())
+
+    def test_ttl_and_lru_bound(self):
+        clock = FakeClock()
+        cache = RetrievalCache(ttl=10, max_entries=2, clock=clock)
+        cache.put("tenant", _request("q1"), [_result("k1")])
+        cache.put("tenant", _request("q2"), [_result("k1")])
+        assert cache.get("tenant", _request("q1")) is not None
+        cache.put("tenant", _request("q3"), [_result("k1")])
+        assert cache.get("tenant", _request("q2")) is None
+        assert len(cache) == 2
+
+        clock.now = 11
+        assert cache.get("tenant", _request("q1")) is None
+
+    def test_added_chunks_invalidate_only_affected_scopes(self):
+        cache = RetrievalCache()
+        scoped_a = _request(space_id_list=["space-a"])
+        scoped_b = _request(space_id_list=["space-b"])
+        unscoped = _request("anything")
+        cache.put("tenant", scoped_a, [_result("k1")])
+        cache.put("tenant", scoped_b, [_result("k2", "space-b")])
+        cache.put("tenant", unscoped, [_result("k2", "space-b")])
+
+        cache.invalidate_chunks_added("tenant", ["space-a"], ["k9"])
+        assert cache.get("tenant", scoped_a) is None
+        assert cache.get("tenant", scoped_b) is not None
+        assert cache.get("tenant", unscoped) is None
+
+    def test_removed_knowledge_only_invalidates_referencing_entries(self):
+        cache = RetrievalCache()
+        first = _request("first", space_id_list=["space-a"])
+        second = _request("second", space_id_list=["space-a"])
+        cache.put("tenant", first, [_result("k1")])
+        cache.put("tenant", second, [_result("k2")])
+
+        assert cache.invalidate_knowledge_removed("tenant", ["k1"]) == 1
+        assert cache.get("tenant", first) is None
+        assert cache.get("tenant", second) is not None
+
+    def test_stale_generation_is_not_stored(self):
+        cache = RetrievalCache()
+        generation = cache.generation("tenant")
+        cache.invalidate_tenant("tenant")
+        cache.put("tenant", _request(), [_result("k1")], generation)
+        assert cache.get("tenant", _request()) is None
+
+    def test_returned_results_are_copies(self):
+        cache = RetrievalCache()
+        cache.put("tenant", _request(), [_result("k1")])
+        cache.get("tenant", _request())[0].context = "mutated"
+        assert cache.get("tenant", _request())[0].context == "hello"
+
+
+class TestCachedRetriever:
+    @pytest.mark.asyncio
+    async def test_hit_skips_inner_retriever(self):
+        inner = CountingRetriever([_result("k1")])
+        retriever = CachedRetriever(inner)
+        await retriever.retrieve(_request(), "tenant")
+        results = await retriever.retrieve(_request("What is whisker?"), "tenant")
+        assert inner.calls == 1
+        assert results[0].knowledge_id == "k1"
+        assert retriever.cache.hits == 1
+
+
+class TestRetrievalCacheMixin:
+    @pytest.mark.asyncio
+    async def test_write_hooks_invalidate(self):
+        plugin = CachedFakeDBPlugin([_result("k1")])
+        request = _request(space_id_list=["space-a"])
+
+        await plugin.retrieve("tenant", request)
+        await plugin.retrieve("tenant", request)
+        assert plugin.retrieve_calls == 1
+
+        await plugin.save_chunk_list(
+            [
+                Chunk(
+                    space_id="space-a",
+                    tenant_id="tenant",
+                    context="new",
+                    knowledge_id="k5",
+                )
+            ]
+        )
+        await plugin.retrieve("tenant", request)
+        assert plugin.retrieve_calls == 2
+
+        await plugin.update_knowledge_enabled_status("tenant", "k1", False)
+        await plugin.retrieve("tenant", request)
+        assert plugin.retrieve_calls == 3
+
+        await plugin.delete_knowledge_chunk("tenant", ["k-unrelated"])
+        await plugin.retrieve("tenant", request)
+        assert plugin.retrieve_calls == 3
+
+        await plugin.update_knowledge_enabled_status("tenant", "k-other", True)
+        await plugin.retrieve("tenant", request)
+        assert plugin.retrieve_calls == 4
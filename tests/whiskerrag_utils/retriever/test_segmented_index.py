@@ -0,0 +1,208 @@
+import gc
+import threading
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from tests.whiskerrag_utils.retriever.index_helpers import (
+    FixedEmbedding,
+    exact_ids,
+    hit_ids,
+    make_chunk,
+    make_chunks,
+    random_vectors,
+    unit_query,
+)
+from whiskerrag_types.model.page import Condition, FilterGroup, Operator
+from whiskerrag_types.model.retrieval import RetrievalRequest, VectorSearchConfig
+from whiskerrag_utils.retriever.segmented_index import (
+    SegmentedIndexRetriever,
+    SegmentedVectorIndex,
+)
+
+DIMENSION = 8
+
+
+def _vectors(count, seed=7):
+    return random_vectors(count, DIMENSION, seed)
+
+
+def _index(count=20, segment_size=8, **kwargs):
+    vectors = _vectors(count)
+    index = SegmentedVectorIndex.from_chunks(
+        make_chunks(vectors), segment_size=segment_size, **kwargs
+    )
+    return index, vectors
+
+
+class TestSegmentedVectorIndex:
+    def test_segments_grow_and_search_is_exact(self):
+        index, vectors = _index(20, segment_size=8)
+        assert index.segment_count == 3
+        assert index.size == 20
+        query = unit_query(vectors[5])
+        assert hit_ids(index, index.search(query, 5)[0]) == exact_ids(
+            vectors, query, 5, set(range(20))
+        )
+
+    def test_tombstones_and_upsert(self):
+        index, vectors = _index(10)
+        assert index.delete(["chunk-3", "missing"]) == 1
+        assert index.size == 9
+        query = unit_query(vectors[3])
+        assert "chunk-3" not in hit_ids(index, index.search(query, 10)[0])
+
+        replaced = make_chunk(4, vectors[3])
+        index.upsert([replaced])
+        assert index.size == 9
+        top = index.get_chunks(*index.search(query, 1)[0])[0]
+        assert top.chunk_id == "chunk-4"
+        assert top.similarity == pytest.approx(1.0, abs=1e-5)
+
+    def test_enable_flags(self):
+        index, vectors = _index(12)
+        query = unit_query(vectors[0])
+        index.set_knowledge_enabled(["k0"], False)
+        ids = hit_ids(index, index.search(query, 12)[0])
+        assert ids == exact_ids(vectors, query, 12, {i for i in range(12) if i % 3})
+
+        # chunks added to a disabled knowledge stay disabled
+        index.upsert([make_chunk(50, vectors[0], knowledge_id="k0")])
+        assert "chunk-50" not in hit_ids(index, index.search(query, 20)[0])
+
+        index.set_chunk_enabled(["chunk-1"], False)
+        index.set_knowledge_enabled(["k0"], True)
+        ids = hit_ids(index, index.search(query, 20)[0])
+        assert "chunk-50" in ids and "chunk-0" in ids and "chunk-1" not in ids
+
+        index.upsert([make_chunk(60, vectors[1], enabled=False)])
+        assert "chunk-60" not in hit_ids(index, index.search(query, 20)[0])
+
+    def test_metadata_filter(self):
+        index, vectors = _index(12)
+        group = FilterGroup(
+            operator=Operator.AND,
+            conditions=[Condition(field="knowledge_id", operator="eq", value="k1")],
+        )
+        query = unit_query(vectors[1])
+        ids = hit_ids(index, index.search(query, 12, group)[0])
+        assert ids == exact_ids(vectors, query, 12, {1, 4, 7, 10})
+
+    def test_compaction_keeps_results(self):
+        index, vectors = _index(40, segment_size=8)
+        index.delete([f"chunk-{i}" for i in range(0, 40, 2)])
+        index.set_knowledge_enabled(["k2"], False)
+        query = unit_query(vectors[9])
+        before = hit_ids(index, index.search(query, 10)[0])
+
+        rewritten = index.compact()
+        assert rewritten == 5
+        assert index.segment_count < 5
+        assert index.size == 20
+        assert hit_ids(index, index.search(query, 10)[0]) == before
+        assert index.compact() == 0
+
+        index.set_knowledge_enabled(["k2"], True)
+        allowed = set(range(1, 40, 2))
+        assert hit_ids(index, index.search(query, 10)[0]) == exact_ids(
+            vectors, query, 10, allowed
+        )
+
+    def test_compaction_sizes_segments_to_live_rows(self):
+        index, _ = _index(40, segment_size=16)
+        index.delete([f"chunk-{i}" for i in range(0, 32, 2)])
+        assert index.compact() == 2
+        assert index.size == 24
+        # 16 live rows of the two sealed segments, then the active segment
+        capacities = [len(s.alive) for s in index._segments]
+        assert capacities[0] == 16 and sum(capacities[:-1]) == 16
+
+    def test_delete_knowledge(self):
+        index, vectors = _index(20, segment_size=8)
+        index.delete(["chunk-1"])
+        assert index.delete_knowledge(["k1", "missing"]) == 6
+        assert index.size == 13
+        ids = hit_ids(index, index.search(unit_query(vectors[1]), 20)[0])
+        assert not any(int(i.split("-")[1]) % 3 == 1 for i in ids)
+
+    def test_filters_see_rows_appended_after_a_search(self):
+        index, vectors = _index(6, segment_size=16)
+        group = FilterGroup(
+            operator=Operator.AND,
+            conditions=[Condition(field="knowledge_id", operator="eq", value="k9")],
+        )
+        query = unit_query(vectors[0])
+        assert hit_ids(index, index.search(query, 5, group)[0]) == []
+        index.upsert([make_chunk(6, vectors[0], knowledge_id="k9")])
+        assert hit_ids(index, index.search(query, 5, group)[0]) == ["chunk-6"]
+
+    def test_rows_from_before_compaction_stay_readable(self):
+        index, vectors = _index(16, segment_size=4)
+        index.delete(["chunk-0", "chunk-5"])
+        rows, scores = index.search(unit_query(vectors[2]), 3)[0]
+        index.compact()
+        assert [c.chunk_id for c in index.get_chunks(rows, scores)][0] == "chunk-2"
+
+    def test_queries_run_during_background_compaction(self):
+        index, vectors = _index(200, segment_size=16)
+        index.delete([f"chunk-{i}" for i in range(0, 200, 3)])
+        errors = []
+
+        def query_loop():
+            try:
+                for i in range(50):
+                    rows, scores = index.search(unit_query(vectors[i]), 5)[0]
+                    index.get_chunks(rows, scores)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        index.start_background_compaction(interval=0.001)
+        threads = [threading.Thread(target=query_loop) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        index.stop_background_compaction()
+        assert errors == []
+        assert index.size == 200 - 67
+
+    def test_dimension_is_checked(self):
+        index, _ = _index(2)
+        with pytest.raises(ValueError):
+            index.upsert([make_chunk(9, [1.0, 2.0])])
+
+    def test_nbytes_counts_chunks_and_bitmaps(self):
+        vectors = _vectors(2000)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            chunks = make_chunks(vectors, knowledge_groups=50, tags=["a", "b"])
+            index = SegmentedVectorIndex.from_chunks(chunks, segment_size=256)
+            del chunks
+            gc.collect()
+            measured, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        vector_bytes = sum(
+            s.embeddings.nbytes + s.alive.nbytes + s.enabled.nbytes
+            for s in index._segments
+        )
+        assert vector_bytes < measured / 4
+        assert 0.8 * measured < index.nbytes < 1.5 * measured
+
+
+class TestSegmentedIndexRetriever:
+    @pytest.mark.asyncio
+    async def test_retrieve(self):
+        index, vectors = _index(10)
+
+        retriever = SegmentedIndexRetriever(index, embedding=FixedEmbedding(vectors[6]))
+        request = RetrievalRequest(
+            content="question", config=VectorSearchConfig(top_k=2)
+        )
+        results = await retriever.retrieve(request, "tenant")
+        assert results[0].chunk_id == "chunk-6"
+        index.delete(["chunk-6"])
+        results = await retriever.retrieve(request, "tenant")
+        assert "chunk-6" not in [r.chunk_id for r in results]
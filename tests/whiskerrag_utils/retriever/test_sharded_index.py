@@ -0,0 +1,253 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from tests.whiskerrag_utils.retriever.index_helpers import (
+    FixedEmbedding,
+    exact_ids,
+    hit_ids,
+    make_chunks,
+    random_vectors,
+    unit_query,
+)
+from whiskerrag_types.model.page import Condition, FilterGroup, Operator
+from whiskerrag_types.model.retrieval import RetrievalRequest, VectorSearchConfig
+from whiskerrag_utils import RegisterTypeEnum, get_register
+from whiskerrag_utils.registry import init_register
+from whiskerrag_utils.retriever.mmap_index import MmapVectorIndex
+from whiskerrag_utils.retriever.sharded_index import (
+    ShardedIndexRetriever,
+    ShardedVectorIndex,
+    read_manifest,
+    shard_of,
+    write_sharded_index,
+)
+
+COUNT = 60
+DIMENSION = 8
+
+requires_fork = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="worker patches are inherited only by forked workers",
+)
+
+
+def _vectors():
+    return random_vectors(COUNT, DIMENSION, seed=3)
+
+
+def _exact(query, top_k, allowed=None):
+    return exact_ids(_vectors(), query, top_k, allowed)
+
+
+def _query(i):
+    return unit_query(_vectors()[i])
+
+
+@pytest.fixture
+def sharded_path(tmp_path):
+    return write_sharded_index(
+        tmp_path / "sharded", make_chunks(_vectors(), knowledge_groups=5), num_shards=3
+    )
+
+
+class TestShardedVectorIndex:
+    def test_layout(self, sharded_path):
+        manifest = read_manifest(sharded_path)
+        assert manifest["shards"] == ["shard-0000", "shard-0001", "shard-0002"]
+        sizes = [
+            MmapVectorIndex.open(sharded_path / s).size for s in manifest["shards"]
+        ]
+        assert sum(sizes) == COUNT
+        shard = MmapVectorIndex.open(sharded_path / "shard-0001")
+        assert all(shard_of(shard.chunk_id(row), 3) == 1 for row in range(shard.size))
+
+    def test_in_process_merge_is_exact(self, sharded_path):
+        index = ShardedVectorIndex(sharded_path, processes=False)
+        assert index.size == COUNT
+        for i in (0, 17, 42):
+            assert hit_ids(index, index.search(_query(i), 10)[0]) == _exact(
+                _query(i), 10
+            )
+
+    def test_worker_processes(self, sharded_path):
+        group = FilterGroup(
+            operator=Operator.AND,
+            conditions=[Condition(field="knowledge_id", operator="eq", value="k2")],
+        )
+        with ShardedVectorIndex(sharded_path, shard_timeout=10) as index:
+            index.start()
+            queries = np.concatenate([_query(5), _query(7)])
+            hits = index.search(queries, 4)
+            assert hit_ids(index, hits[0]) == _exact(_query(5), 4)
+            assert hit_ids(index, hits[1]) == _exact(_query(7), 4)
+            filtered = index.search_shards(_query(7), 20, group)
+            allowed = {i for i in range(COUNT) if i % 5 == 2}
+            assert hit_ids(index, filtered.hits[0]) == _exact(_query(7), 20, allowed)
+            assert filtered.missing_shards == []
+
+    @requires_fork
+    def test_slow_shard_degrades(self, sharded_path, monkeypatch):
+        search = MmapVectorIndex.search
+
+        def slow_search(self, *args, **kwargs):
+            if self.path.name == "shard-0001":
+                time.sleep(5)
+            return search(self, *args, **kwargs)
+
+        monkeypatch.setattr(MmapVectorIndex, "search", slow_search)
+        with ShardedVectorIndex(
+            sharded_path, shard_timeout=0.5, start_method="fork"
+        ) as index:
+            index.start()
+            started = time.monotonic()
+            result = index.search_shards(_query(1), 10)
+            assert time.monotonic() - started < 3
+            assert result.missing_shards == [1]
+            ids = hit_ids(index, result.hits[0])
+            assert len(ids) == 10
+            assert all(shard_of(chunk_id, 3) != 1 for chunk_id in ids)
+
+    def test_dead_worker_is_restarted(self, sharded_path):
+        with ShardedVectorIndex(sharded_path, shard_timeout=10) as index:
+            index.start()
+            index._workers[0]._process.kill()
+            index._workers[0]._process.join()
+            index.search(_query(2), 5)
+            result = index.search_shards(_query(2), 5)
+            assert hit_ids(index, result.hits[0]) == _exact(_query(2), 5)
+            assert result.missing_shards == []
+
+    @requires_fork
+    def test_concurrent_queries_report_their_own_missing_shards(
+        self, sharded_path, monkeypatch
+    ):
+        search = MmapVectorIndex.search
+
+        def slow_search(self, queries, top_k, *args):
+            if self.path.name == "shard-0001" and top_k == 7:
+                time.sleep(5)
+            return search(self, queries, top_k, *args)
+
+        monkeypatch.setattr(MmapVectorIndex, "search", slow_search)
+        with ShardedVectorIndex(
+            sharded_path, shard_timeout=1, start_method="fork"
+        ) as index:
+            index.start()
+            with ThreadPoolExecutor(2) as pool:
+                fast = pool.submit(index.search_shards, _query(3), 5)
+                time.sleep(0.2)  # queued behind the slow one, it would time out too
+                slow = pool.submit(index.search_shards, _query(3), 7)
+                assert fast.result().missing_shards == []
+                assert slow.result().missing_shards == [1]
+
+    @requires_fork
+    def test_queries_are_pipelined_across_workers(self, sharded_path, monkeypatch):
+        search = MmapVectorIndex.search
+
+        def slow_search(self, queries, top_k, *args):
+            # each query is slow on a different shard
+            if (self.path.name, top_k) in (("shard-0000", 7), ("shard-0001", 5)):
+                time.sleep(1)
+            return search(self, queries, top_k, *args)
+
+        monkeypatch.setattr(MmapVectorIndex, "search", slow_search)
+        with ShardedVectorIndex(
+            sharded_path, shard_timeout=10, start_method="fork"
+        ) as index:
+            index.start()
+            started = time.monotonic()
+            with ThreadPoolExecutor(2) as pool:
+                results = list(
+                    pool.map(lambda k: index.search_shards(_query(4), k), (7, 5))
+                )
+            # a query holding every worker until it is answered would take 2s
+            assert time.monotonic() - started < 1.7
+        assert [r.missing_shards for r in results] == [[], []]
+        assert hit_ids(index, results[1].hits[0]) == _exact(_query(4), 5)
+
+
+class TestShardedIndexRetriever:
+    def test_registered(self):
+        init_register()
+        assert (
+            get_register(RegisterTypeEnum.RETRIEVER, "sharded_index")
+            is ShardedIndexRetriever
+        )
+
+    @pytest.mark.asyncio
+    async def test_retrieve(self, sharded_path):
+        index = ShardedVectorIndex(sharded_path, processes=False)
+        retriever = ShardedIndexRetriever(
+            index, embedding=FixedEmbedding(_vectors()[9])
+        )
+        results = await retriever.retrieve(
+            RetrievalRequest(content="q", config=VectorSearchConfig(top_k=3)), "tenant"
+        )
+        assert [r.chunk_id for r in results] == _exact(_query(9), 3)
+
+    @requires_fork
+    @pytest.mark.asyncio
+    async def test_missing_shards_reach_the_retriever(
+        self, sharded_path, monkeypatch, caplog
+    ):
+        search = MmapVectorIndex.search
+
+        def slow_search(self, *args, **kwargs):
+            if self.path.name == "shard-0002":
+                time.sleep(5)
+            return search(self, *args, **kwargs)
+
+        monkeypatch.setattr(MmapVectorIndex, "search", slow_search)
+        request = RetrievalRequest(content="q", config=VectorSearchConfig(top_k=3))
+        with ShardedVectorIndex(
+            sharded_path, shard_timeout=0.5, start_method="fork"
+        ) as index:
+            index.start()
+            embedding = FixedEmbedding(_vectors()[9])
+            results = await ShardedIndexRetriever(index, embedding).retrieve(
+                request, "tenant"
+            )
+            assert len(results) == 3
+            assert "shard-0002" in caplog.text
+            strict = ShardedIndexRetriever(index, embedding, require_all_shards=True)
+            with pytest.raises(RuntimeError):
+                await strict.retrieve(request, "tenant")
+
+    @requires_fork
+    @pytest.mark.asyncio
+    async def test_waiting_on_workers_does_not_block_the_loop(
+        self, sharded_path, monkeypatch
+    ):
+        search = MmapVectorIndex.search
+
+        def slow_search(self, *args, **kwargs):
+            time.sleep(1)
+            return search(self, *args, **kwargs)
+
+        monkeypatch.setattr(MmapVectorIndex, "search", slow_search)
+        ticks = []
+
+        async def tick():
+            for _ in range(5):
+                await asyncio.sleep(0.05)
+                ticks.append(time.monotonic())
+
+        with ShardedVectorIndex(
+            sharded_path, shard_timeout=10, start_method="fork"
+        ) as index:
+            index.start()
+            retriever = ShardedIndexRetriever(
+                index, embedding=FixedEmbedding(_vectors()[9])
+            )
+            request = RetrievalRequest(content="q", config=VectorSearchConfig(top_k=3))
+            results, _ = await asyncio.gather(
+                retriever.retrieve(request, "tenant"), tick()
+            )
+            finished = time.monotonic()
+        assert [r.chunk_id for r in results] == _exact(_query(9), 3)
+        assert len(ticks) == 5 and ticks[-1] < finished - 0.5